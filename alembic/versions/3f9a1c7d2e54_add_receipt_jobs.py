@@ -0,0 +1,48 @@
+"""add receipt jobs
+
+Revision ID: 3f9a1c7d2e54
+Revises: 8d41b6e2c9a7
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c7d2e54'
+down_revision: Union[str, None] = '8d41b6e2c9a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 영수증 분석 작업 큐 (서버 재시작 후에도 남아 있도록 DB에 저장)
+    op.create_table(
+        'receipt_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('image', sa.LargeBinary(), nullable=True),
+        sa.Column('filename', sa.String(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('stage_timings', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_receipt_jobs_id'), 'receipt_jobs', ['id'], unique=False)
+    op.create_index('ix_receipt_jobs_status_id', 'receipt_jobs', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receipt_jobs_status_id', table_name='receipt_jobs')
+    op.drop_index(op.f('ix_receipt_jobs_id'), table_name='receipt_jobs')
+    op.drop_table('receipt_jobs')
@@ -0,0 +1,34 @@
+"""add chat history indexes
+
+Revision ID: 5c2e8a7f3b10
+Revises: 1d76a87b9409
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8a7f3b10'
+down_revision: Union[str, None] = '1d76a87b9409'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 채팅방별 최신 메시지 조회 및 (timestamp, id) 커서 페이지네이션용 복합 인덱스
+    op.create_index('ix_messages_chat_id_timestamp_id', 'messages', ['chat_id', 'timestamp', 'id'], unique=False)
+    op.create_index(
+        'ix_group_chat_messages_chatroom_id_timestamp_id',
+        'group_chat_messages',
+        ['chatroom_id', 'timestamp', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_group_chat_messages_chatroom_id_timestamp_id', table_name='group_chat_messages')
+    op.drop_index('ix_messages_chat_id_timestamp_id', table_name='messages')
@@ -0,0 +1,40 @@
+"""add chat read cursors
+
+Revision ID: 8d41b6e2c9a7
+Revises: 5c2e8a7f3b10
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41b6e2c9a7'
+down_revision: Union[str, None] = '5c2e8a7f3b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 사용자별 채팅방 읽음 위치 (안 읽은 메시지 수 계산용)
+    op.create_table(
+        'chat_read_cursors',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chat_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('last_read_message_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['chat_id'], ['chats.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('chat_id', 'user_id', name='uq_chat_read_cursor')
+    )
+    op.create_index(op.f('ix_chat_read_cursors_id'), 'chat_read_cursors', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_chat_read_cursors_id'), table_name='chat_read_cursors')
+    op.drop_table('chat_read_cursors')
@@ -0,0 +1,51 @@
+"""add receipt analysis cache
+
+Revision ID: a6d3e9b1f47c
+Revises: 3f9a1c7d2e54
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3e9b1f47c'
+down_revision: Union[str, None] = '3f9a1c7d2e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 영수증 이미지 해시별 OCR/추출 결과 캐시
+    op.create_table(
+        'receipt_analysis_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('perceptual_hash', sa.BigInteger(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('ocr_text', sa.Text(), nullable=False),
+        sa.Column('items', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('hits', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('content_hash')
+    )
+    op.create_index(op.f('ix_receipt_analysis_cache_id'), 'receipt_analysis_cache', ['id'], unique=False)
+    op.create_index(
+        'ix_receipt_analysis_cache_user_id_last_used_at',
+        'receipt_analysis_cache',
+        ['user_id', 'last_used_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receipt_analysis_cache_user_id_last_used_at', table_name='receipt_analysis_cache')
+    op.drop_index(op.f('ix_receipt_analysis_cache_id'), table_name='receipt_analysis_cache')
+    op.drop_table('receipt_analysis_cache')
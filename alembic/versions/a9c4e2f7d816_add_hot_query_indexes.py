@@ -0,0 +1,40 @@
+"""add hot query indexes
+
+Revision ID: a9c4e2f7d816
+Revises: d3f8a1c6b572
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c4e2f7d816'
+down_revision: Union[str, None] = 'd3f8a1c6b572'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# db/hot_queries.py의 조회 조건용 인덱스 (test_query_plans.py가 순차 스캔 여부 확인)
+# messages/group_chat_messages의 (채팅방, timestamp, id)는 5c2e8a7f3b10에,
+# transaction의 (sale_id, status)는 uq_sale_status 유니크 제약 인덱스로 이미 있음
+INDEXES = (
+    ('ix_ingredients_user_id_name', 'ingredients', ['user_id', 'name']),
+    ('ix_q_values_user_id_recipe_id', 'q_values', ['user_id', 'recipe_id']),
+    ('ix_sales_status', 'sales', ['status']),
+    ('ix_ingredient_requests_ingredient_id_status', 'ingredient_requests', ['ingredient_id', 'status']),
+    ('ix_recipes_name', 'recipes', ['name']),
+)
+
+
+def upgrade() -> None:
+    # 운영 DB에 손으로 만든 같은 이름의 인덱스가 있으면 건너뜀
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,40 @@
+"""add storage deletions
+
+Revision ID: b8e2d5a7c136
+Revises: f1a7c3e9d052
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2d5a7c136'
+down_revision: Union[str, None] = 'f1a7c3e9d052'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 저장소 객체 삭제 outbox (게시글 삭제/이미지 교체와 같은 트랜잭션에 기록)
+    op.create_table(
+        'storage_deletions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_storage_deletions_id'), 'storage_deletions', ['id'], unique=False)
+    op.create_index('ix_storage_deletions_next_attempt_at', 'storage_deletions', ['next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_storage_deletions_next_attempt_at', table_name='storage_deletions')
+    op.drop_index(op.f('ix_storage_deletions_id'), table_name='storage_deletions')
+    op.drop_table('storage_deletions')
@@ -0,0 +1,38 @@
+"""backfill temp receipt owner
+
+Revision ID: c7e1a4f8b263
+Revises: e5b7c2d9a418
+Create Date: 2026-10-21 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1a4f8b263'
+down_revision: Union[str, None] = 'e5b7c2d9a418'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 소유자 컬럼이 생기기 전에 분석 작업이 저장한 임시 데이터는 작업 결과(temp_id 포함)로 소유자를 채움
+    # (작업 없이 저장된 나머지는 소유자를 알 수 없어 NULL로 남고, 확정 시 410을 돌려준 뒤 정리 작업이 지움)
+    op.execute("""
+        UPDATE temp_receipts AS t
+        SET user_id = j.user_id
+        FROM receipt_jobs AS j,
+             jsonb_array_elements(
+                 CASE WHEN jsonb_typeof(j.result) = 'array' THEN j.result ELSE '[]'::jsonb END
+             ) AS item
+        WHERE t.user_id IS NULL
+          AND j.status = 'done'
+          AND item ->> 'temp_id' = t.id::text
+    """)
+
+
+def downgrade() -> None:
+    # 채운 소유자는 그대로 둠 (이전 스키마에서도 유효한 값)
+    pass
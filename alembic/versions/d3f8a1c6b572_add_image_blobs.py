@@ -0,0 +1,44 @@
+"""add image blobs
+
+Revision ID: d3f8a1c6b572
+Revises: b8e2d5a7c136
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f8a1c6b572'
+down_revision: Union[str, None] = 'b8e2d5a7c136'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 내용 해시 키 이미지 객체와 참조 수 (기존 uuid 키 이미지는 등록하지 않고 예전처럼 바로 삭제)
+    op.create_table(
+        'image_blobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('refcount', sa.Integer(), nullable=False),
+        sa.Column('uploaded', sa.Boolean(), nullable=False),
+        sa.Column('derivatives', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('content_hash'),
+        sa.UniqueConstraint('key')
+    )
+    op.create_index(op.f('ix_image_blobs_id'), 'image_blobs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_image_blobs_id'), table_name='image_blobs')
+    op.drop_table('image_blobs')
@@ -0,0 +1,27 @@
+"""add storage deletion lease
+
+Revision ID: d9b4f2a7e615
+Revises: c7e1a4f8b263
+Create Date: 2026-10-22 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b4f2a7e615'
+down_revision: Union[str, None] = 'c7e1a4f8b263'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 삭제기가 저장소에서 지우는 중인 항목 표시 (같은 내용 재업로드가 삭제가 끝나길 기다림)
+    op.add_column('storage_deletions', sa.Column('leased_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('storage_deletions', 'leased_until')
@@ -0,0 +1,33 @@
+"""add temp receipt owner
+
+Revision ID: e4b9c1f6a238
+Revises: c2f7a4d8e915
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b9c1f6a238'
+down_revision: Union[str, None] = 'c2f7a4d8e915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 일괄 확정 시 본인 임시 데이터만 옮기도록 소유자 추가
+    op.add_column('temp_receipts', sa.Column('user_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'temp_receipts_user_id_fkey', 'temp_receipts', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index('ix_temp_receipts_created_at', 'temp_receipts', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_temp_receipts_created_at', table_name='temp_receipts')
+    op.drop_constraint('temp_receipts_user_id_fkey', 'temp_receipts', type_='foreignkey')
+    op.drop_column('temp_receipts', 'user_id')
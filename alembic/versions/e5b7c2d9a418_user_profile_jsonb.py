@@ -0,0 +1,53 @@
+"""user profile jsonb
+
+Revision ID: e5b7c2d9a418
+Revises: a9c4e2f7d816
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b7c2d9a418'
+down_revision: Union[str, None] = 'a9c4e2f7d816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('nutrition_limits', 'recipe_history', 'ratings')
+
+
+def upgrade() -> None:
+    # json -> jsonb (테이블을 다시 쓰므로 잠금 동안 프로필 쓰기가 멈춤, 행 수가 적을 때 실행)
+    for column in COLUMNS:
+        op.alter_column(
+            'user_profiles', column,
+            type_=postgresql.JSONB(astext_type=sa.Text()),
+            existing_type=sa.JSON(),
+            postgresql_using=f'{column}::jsonb'
+        )
+    # nutrition_limits는 항상 user_id로 한 행만 읽으므로 인덱스를 두지 않음
+    op.create_index(
+        'ix_user_profiles_recipe_history', 'user_profiles', ['recipe_history'],
+        unique=False, postgresql_using='gin', postgresql_ops={'recipe_history': 'jsonb_path_ops'}
+    )
+    op.create_index(
+        'ix_user_profiles_ratings', 'user_profiles', ['ratings'],
+        unique=False, postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_profiles_ratings', table_name='user_profiles')
+    op.drop_index('ix_user_profiles_recipe_history', table_name='user_profiles')
+    for column in reversed(COLUMNS):
+        op.alter_column(
+            'user_profiles', column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(astext_type=sa.Text()),
+            postgresql_using=f'{column}::json'
+        )
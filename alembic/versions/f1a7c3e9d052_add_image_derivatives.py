@@ -0,0 +1,27 @@
+"""add image derivatives
+
+Revision ID: f1a7c3e9d052
+Revises: e4b9c1f6a238
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a7c3e9d052'
+down_revision: Union[str, None] = 'e4b9c1f6a238'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 썸네일/중간 크기 파생본 URL (기존 이미지는 NULL: 원본 사용)
+    op.add_column('images', sa.Column('derivatives', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('images', 'derivatives')
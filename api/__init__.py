@@ -10,7 +10,8 @@ from api.routes import (
     sale,
     group_purchases,
     receipts,
-    group_chat
+    group_chat,
+    metrics
 )
 
 router = APIRouter()
@@ -24,4 +25,5 @@ router.include_router(chat.router)
 router.include_router(group_purchases.router)
 router.include_router(receipts.router)
 router.include_router(sale.router)
-router.include_router(group_chat.router)
\ No newline at end of file
+router.include_router(group_chat.router)
+router.include_router(metrics.router)
\ No newline at end of file
@@ -1,14 +1,16 @@
-from typing import AsyncGenerator, List
-from fastapi import Depends, HTTPException, status, Security
+from typing import AsyncGenerator, List, Optional
+from fastapi import Depends, HTTPException, Request, status, Security
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.session import AsyncSessionLocal
 from core.config import settings
+from db.read_routing import read_routing
+from db.session import AsyncSessionLocal, read_session, replica_engine, socket_session
 from crud import crud_auth
 from schemas.auth import TokenData
 from models.models import UserRole, User
+from services.identity_cache import identity_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -23,19 +25,38 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_async_db),
-    token: str = Depends(oauth2_scheme)
-):
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    조회 전용 세션 (READ ONLY 트랜잭션, 커밋하지 않음)
+
+    복제본이 있으면 복제본에서 읽고, 최근에 변경 요청을 보낸 클라이언트는 기본 DB에서 읽는다.
+    """
+    pinned = replica_engine is not None and read_routing.prefers_primary(request)
+    replica = replica_engine is not None and not pinned
+    read_routing.record(replica, pinned)
+    async with read_session(replica=replica) as session:
+        yield session
+
+async def get_primary_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """기본 DB의 조회 전용 세션 (읽은 결과로 메모리 버퍼를 채워 복제 지연을 허용할 수 없는 조회)"""
+    read_routing.record(False, False)
+    async with read_session(replica=False) as session:
+        yield session
+
+async def resolve_user(token: str, db: Optional[AsyncSession] = None) -> User:
+    """
+    토큰으로 사용자 조회 (HTTP/웹소켓 공통)
+
+    토큰 payload와 사용자 스냅샷은 identity_cache에서 재사용하므로 캐시가 유효한 동안은
+    DB를 조회하지 않는다. db가 없으면(웹소켓) 캐시 미스일 때만 세션을 잠깐 연다.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = identity_cache.decode(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -43,11 +64,25 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = await crud_auth.get_user_by_email(db, email=token_data.email)
+    user = identity_cache.get_user(token_data.email)
     if user is None:
-        raise credentials_exception
+        generation = identity_cache.generation
+        if db is not None:
+            user = await crud_auth.get_user_by_email(db, email=token_data.email)
+        else:
+            async with socket_session() as session:
+                user = await crud_auth.get_user_by_email(session, email=token_data.email)
+        if user is None:
+            raise credentials_exception
+        user = identity_cache.put_user(token_data.email, user, generation)
     return user
 
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme)
+):
+    return await resolve_user(token, db)
+
 async def get_current_active_user(
     current_user = Depends(get_current_user)
 ):
@@ -55,6 +90,14 @@ async def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user)
+) -> User:
+    """운영용 엔드포인트 접근 확인 (ADMIN_EMAILS에 등록된 계정만)"""
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="관리자만 접근할 수 있습니다.")
+    return current_user
+
 def check_user_role(required_roles: List[UserRole]):
     async def role_checker(current_user: User = Security(get_current_active_user)) -> User:
         if current_user.role not in required_roles:
@@ -1,51 +1,54 @@
-from datetime import datetime
 import json
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models.models import Message
-from schemas.chat import ChatBase, ChatCreate, ChatQuery, MessageCreate, MessageResponse
+from models.models import Message, User
+from schemas.chat import (
+    ChatBase,
+    ChatCreate,
+    ChatInboxItem,
+    ChatQuery,
+    MessageCreate,
+    MessageResponse,
+    ReadCursorResponse
+)
 from crud.crud_chat import CRUDchat
-from api.dependencies import get_async_db
-from jose import JWTError, jwt
+from api.dependencies import get_async_db, get_current_active_user, get_primary_read_db, resolve_user
+from db.session import socket_session
 from core.config import settings
+from services.chat_broadcast import SAVED_FIELDS_RESERVE, ChatBroadcaster
+from services.chat_broker import chat_broker
+from services.chat_history import ChatHistoryCache
+from services.chat_unread import unread_counter
 
 router = APIRouter(
     prefix="/chat",
     tags=["chat"],
 )
 
-class ConnectionManager:
-    def __init__(self):
-        # room_id를 키로 사용하여 각 채팅방의 연결을 저장
-        # 각 연결에 email 정보를 함께 저장하기 위해 튜플 리스트로 변경
-        self.active_connections: dict[int, list[tuple[WebSocket, str]]] = {}
-    
-    async def connect(self, room_id: int, websocket: WebSocket, email: str):
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = []
-        self.active_connections[room_id].append((websocket, email))
-    
-    def disconnect(self, room_id: int, websocket: WebSocket):
-        if room_id in self.active_connections:
-            # 해당 웹소켓 연결 찾아서 제거
-            self.active_connections[room_id] = [
-                conn for conn in self.active_connections[room_id] 
-                if conn[0] != websocket
-            ]
-            # 채팅방에 아무도 없으면 채팅방 제거
-            if not self.active_connections[room_id]:
-                del self.active_connections[room_id]
+async def load_chat_history(db: AsyncSession, room_id: int, limit: int, before: Optional[int]) -> list:
+    return await CRUDchat(db).get_chat_messages(room_id, limit=limit, before=before)
+
+# 채팅방별 최근 메시지 버퍼
+chat_history_cache = ChatHistoryCache(
+    load_chat_history,
+    capacity=settings.CHAT_HISTORY_BUFFER_SIZE,
+    room_field="chat_id",
+    session_factory=socket_session
+)
 
-    async def broadcast(self, room_id: int, message: str, sender_email: str = None):
-        if room_id in self.active_connections:
-            for connection, email in self.active_connections[room_id]:
-                # sender_email이 제공되었으면 발신자를 제외하고 전송
-                if sender_email is None or email != sender_email:
-                    await connection.send_text(message)
 # 매니저 인스턴스 생성
-manager = ConnectionManager()
+manager = ChatBroadcaster(
+    queue_size=settings.CHAT_SEND_QUEUE_SIZE,
+    policy=settings.CHAT_SLOW_CONSUMER_POLICY,
+    broker=chat_broker,
+    channel_prefix="chat",
+    on_message=chat_history_cache.observe
+)
+# 이 워커에 소켓이 있는 방만 버퍼 사용 (다른 방은 브로커를 구독하지 않아 버퍼가 갱신되지 않음)
+chat_history_cache.is_live = lambda room_id: manager.room_size(room_id) > 0
 
 @router.post("/chats/", response_model=ChatBase)
 async def create_chat(chat_data: ChatCreate, db: AsyncSession = Depends(get_async_db)):
@@ -60,15 +63,85 @@ async def get_chats(user_id: int, db: AsyncSession = Depends(get_async_db)):
     chat_service = CRUDchat(db)
     return await chat_service.get_user_chats(user_id)
 
+@router.get("/inbox/", response_model=list[ChatInboxItem])
+async def get_inbox(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """받은편지함: 채팅방별 상대방, 상품, 마지막 메시지, 안 읽은 메시지 수 (로그인한 사용자 기준)"""
+    user_id = current_user.id
+    chat_service = CRUDchat(db)
+    counts = unread_counter.get(user_id)
+    # 메모리 카운터가 있으면 안 읽은 수 계산(메시지 스캔)을 생략
+    inbox = await chat_service.get_inbox(user_id, include_unread=counts is None)
+    if counts is None:
+        unread_counter.seed(user_id, {item["chat_id"]: item["unread_count"] for item in inbox})
+    else:
+        for item in inbox:
+            item["unread_count"] = counts.get(item["chat_id"], 0)
+    return inbox
+
+def update_unread_after_read(user_id: int, room_id: int, message_id: Optional[int]):
+    if message_id is None:
+        unread_counter.reset(user_id, room_id)
+    else:
+        # 중간 메시지까지만 읽은 경우 정확한 수를 알 수 없으므로 다음 조회 때 다시 계산
+        unread_counter.forget(user_id)
+
+@router.post("/chats/{room_id}/read", response_model=ReadCursorResponse)
+async def mark_chat_read(
+    room_id: int,
+    message_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """읽음 처리 (message_id가 없으면 마지막 메시지까지, 채팅방 참여자만)"""
+    user_id = current_user.id
+    chat_service = CRUDchat(db)
+    participants = await chat_service.get_participants(room_id)
+    if participants is None:
+        raise HTTPException(status_code=404, detail="채팅방을 찾을 수 없습니다.")
+    if user_id not in participants:
+        raise HTTPException(status_code=403, detail="채팅방 참여자만 읽음 처리할 수 있습니다.")
+    last_read = await chat_service.mark_read(room_id, user_id, message_id)
+    update_unread_after_read(user_id, room_id, message_id)
+    return ReadCursorResponse(chat_id=room_id, user_id=user_id, last_read_message_id=last_read)
+
 @router.post("/messages/", response_model=MessageResponse)
 async def send_message(message: MessageCreate, db: AsyncSession = Depends(get_async_db)):
     """메시지를 특정 채팅방에 저장"""
+    frame = json.dumps({"type": "chat", "content": message.content})
+    if not manager.fits(message.chat_id, frame, reserve=SAVED_FIELDS_RESERVE):
+        raise HTTPException(status_code=413, detail="메시지가 너무 깁니다.")
     chat_service = CRUDchat(db)
-    return await chat_service.send_message(message)
+    participants = await chat_service.get_participants(message.chat_id)
+    saved_message = await chat_service.send_message(message)
+    for participant_id in participants or ():
+        if participant_id != saved_message.sender_id:
+            unread_counter.increment(participant_id, message.chat_id)
+    # 웹소켓으로 보낸 메시지와 같이 방의 접속자와 (모든 워커의) 내역 버퍼에 전달
+    await manager.broadcast(message.chat_id, json.dumps({
+        "type": "chat",
+        "id": saved_message.id,
+        "sender_id": saved_message.sender_id,
+        "content": saved_message.content,
+        "timestamp": saved_message.timestamp.isoformat() if saved_message.timestamp else None
+    }))
+    return saved_message
+
+@router.get("/chats/{room_id}/messages/", response_model=list)
+async def get_chat_messages(
+    room_id: int,
+    before: Optional[int] = None,
+    limit: int = Query(settings.CHAT_HISTORY_PAGE_SIZE, ge=1, le=500),
+    db: AsyncSession = Depends(get_primary_read_db)
+):
+    """채팅방의 메시지 이력 조회 (최신순 페이지, before로 이전 페이지 조회)"""
+    return await chat_history_cache.page(room_id, limit, before, db=db)
 
 # WebSocket 핸들러 수정
 @router.websocket("/ws/chat/{room_id}")
-async def chat_websocket(websocket: WebSocket, room_id: int, db: AsyncSession = Depends(get_async_db)):
+async def chat_websocket(websocket: WebSocket, room_id: int):
     """특정 채팅방에서 실시간 메시지 송수신"""
     print(f"웹소켓 연결 시도: 채팅방 {room_id}")
     
@@ -76,9 +149,8 @@ async def chat_websocket(websocket: WebSocket, room_id: int, db: AsyncSession =
     await websocket.accept()
     print(f"웹소켓 연결 수락됨: 채팅방 {room_id}")
     
-    # 쿼리 파라미터에서 토큰과 user_id 추출
+    # 쿼리 파라미터에서 토큰 추출
     token = websocket.query_params.get("token")
-    user_id_param = websocket.query_params.get("user_id")
     
     if not token:
         print(f"토큰 없음: 채팅방 {room_id}")
@@ -86,29 +158,24 @@ async def chat_websocket(websocket: WebSocket, room_id: int, db: AsyncSession =
         return
     
     try:
-        # 토큰 검증
+        # 토큰 검증 (HTTP 요청과 같은 경로, 인증 캐시가 유효하면 DB를 조회하지 않음)
         print(f"토큰 검증 시작: 채팅방 {room_id}")
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
-        email = payload.get("sub")
-        user_id = payload.get("user_id") or user_id_param
-        print(f"토큰 검증 완료: 채팅방 {room_id}, 이메일: {email}, 사용자 ID: {user_id}")
-        
-        # 토큰 만료 확인
-        if datetime.fromtimestamp(payload.get("exp")) < datetime.utcnow():
-            print(f"토큰 만료됨: 채팅방 {room_id}")
+        try:
+            user = await resolve_user(token)
+        except HTTPException:
+            print(f"토큰 검증 실패: 채팅방 {room_id}")
             await websocket.close()
             return
-            
-        # 이메일은 필수, user_id가 없어도 진행
-        if not email:
-            print(f"이메일 없음: 채팅방 {room_id}")
+        
+        if not user.is_active:
+            print(f"비활성 사용자: 채팅방 {room_id}")
             await websocket.close()
             return
         
+        email = user.email
+        user_id = user.id
+        print(f"토큰 검증 완료: 채팅방 {room_id}, 이메일: {email}, 사용자 ID: {user_id}")
+        
         # 연결 상태 메시지 전송
         await websocket.send_text(json.dumps({
             "type": "connection",
@@ -123,35 +190,71 @@ async def chat_websocket(websocket: WebSocket, room_id: int, db: AsyncSession =
         try:
             # 채팅 서비스 인스턴스 생성 및 채팅 내역 불러오기
             try:
-                chat_service = CRUDchat(db)
-                print(f"채팅 내역 로드 시작: 채팅방 {room_id}")
-                chat_history = await chat_service.get_chat_messages(room_id)
-                print(f"채팅 내역 로드 완료: {len(chat_history)}개 메시지")
+                # 버퍼에 없을 때만 세션을 잠깐 사용
+                chat_history = await chat_history_cache.page(room_id, settings.CHAT_HISTORY_PAGE_SIZE)
                 
                 # 이전 채팅 내역을 클라이언트에게 전송
                 history_data = {
                     "type": "history",
                     "messages": chat_history
                 }
-                await websocket.send_text(json.dumps(history_data))
-                print(f"채팅 내역 전송 완료: 채팅방 {room_id}")
+                await manager.send_personal(websocket, json.dumps(history_data))
             except Exception as e:
                 print(f"채팅 내역 로드 실패: {str(e)}")
                 # 내역 로드 실패 메시지 전송
-                await websocket.send_text(json.dumps({
+                await manager.send_personal(websocket, json.dumps({
                     "type": "history_error",
                     "message": "채팅 내역을 불러오는 중 오류가 발생했습니다."
                 }))
             
+            participants = None
+            
             # 메시지 수신 루프
             while True:
                 print(f"메시지 수신 대기: 채팅방 {room_id}")
                 data = await websocket.receive_text()
                 print(f"메시지 수신됨: 채팅방 {room_id}")
+                # 다른 워커로 보낼 수 없는 크기는 저장하지 않고 발신자에게만 거절을 알림
+                if not manager.fits(room_id, data, email, reserve=SAVED_FIELDS_RESERVE):
+                    await manager.send_personal(websocket, json.dumps({
+                        "type": "error",
+                        "code": "message_too_large",
+                        "message": "메시지가 너무 깁니다."
+                    }))
+                    continue
                 
                 try:
                     message_data = json.loads(data)
                     
+                    # 이전 내역 요청 (스크롤): 발신자에게만 응답하고 브로드캐스트하지 않음
+                    if message_data.get("type") == "history":
+                        before = message_data.get("before")
+                        older = await chat_history_cache.page(
+                            room_id,
+                            settings.CHAT_HISTORY_PAGE_SIZE,
+                            int(before) if before is not None else None
+                        )
+                        await manager.send_personal(websocket, json.dumps({
+                            "type": "history",
+                            "before": before,
+                            "messages": older
+                        }))
+                        continue
+                    
+                    # 읽음 처리: 발신자에게만 결과를 응답하고 브로드캐스트하지 않음
+                    if message_data.get("type") == "read" and user_id:
+                        message_id = message_data.get("message_id")
+                        message_id = int(message_id) if message_id is not None else None
+                        async with socket_session() as db:
+                            last_read = await CRUDchat(db).mark_read(room_id, int(user_id), message_id)
+                        update_unread_after_read(int(user_id), room_id, message_id)
+                        await manager.send_personal(websocket, json.dumps({
+                            "type": "read",
+                            "room_id": room_id,
+                            "last_read_message_id": last_read
+                        }))
+                        continue
+                    
                     # 메시지 타입이 'chat'인 경우 데이터베이스에 저장
                     if message_data.get("type") == "chat" and user_id:
                         try:
@@ -161,8 +264,26 @@ async def chat_websocket(websocket: WebSocket, room_id: int, db: AsyncSession =
                                 sender_id=user_id,
                                 chat_id=room_id
                             )
-                            await chat_service.send_message(message_create)
+                            # 메시지 하나를 저장하는 동안만 세션 사용
+                            async with socket_session() as db:
+                                chat_service = CRUDchat(db)
+                                if participants is None:
+                                    # 채팅방 참여자는 연결당 한 번만 조회
+                                    participants = await chat_service.get_participants(room_id)
+                                saved_message = await chat_service.send_message(message_create)
+                            # 상대방의 안 읽은 메시지 수 증가 (DB 스캔 없이 받은편지함에 반영)
+                            if participants:
+                                for participant_id in participants:
+                                    if participant_id != saved_message.sender_id:
+                                        unread_counter.increment(participant_id, room_id)
                             print(f"메시지 저장 완료: 채팅방 {room_id}")
+                            # 수신자(및 내역 버퍼)도 저장된 메시지를 식별할 수 있도록 저장 정보 포함
+                            message_data["id"] = saved_message.id
+                            message_data["sender_id"] = saved_message.sender_id
+                            message_data["timestamp"] = (
+                                saved_message.timestamp.isoformat() if saved_message.timestamp else None
+                            )
+                            data = json.dumps(message_data)
                         except Exception as e:
                             print(f"메시지 저장 실패: {str(e)}")
                     
@@ -177,13 +298,14 @@ async def chat_websocket(websocket: WebSocket, room_id: int, db: AsyncSession =
                     await manager.broadcast(room_id, data, email)
                 
         except WebSocketDisconnect:
-            # 연결 종료 시 매니저에서 제거
             print(f"웹소켓 연결 종료: 채팅방 {room_id}")
+        finally:
+            # 연결 종료(또는 오류) 시 매니저에서 제거
             manager.disconnect(room_id, websocket)
+            # 이 워커에 남은 연결이 없으면 더 이상 갱신되지 않는 내역 버퍼도 제거
+            if manager.room_size(room_id) == 0:
+                chat_history_cache.evict(room_id)
             
-    except JWTError as e:
-        print(f"JWT 오류: 채팅방 {room_id}, {str(e)}")
-        await websocket.close()
     except Exception as e:
         print(f"예상치 못한 오류: 채팅방 {room_id}, {str(e)}")
         await websocket.close()
\ No newline at end of file
@@ -1,54 +1,56 @@
-from datetime import datetime
 import json
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from api.dependencies import get_async_db
-from models.models import GroupChatroom, GroupChatMessage, GroupChatParticipant, User
+from api.dependencies import get_async_db, get_primary_read_db, resolve_user
+from db.session import socket_session
+from models.models import GroupChatroom, GroupChatMessage, GroupChatParticipant
 from schemas.group_chat import GroupChatroomCreate, GroupChatMessageCreate
 from crud.crud_group_chat import (
     create_chatroom, 
     get_chatroom, 
     add_chat_participant,
-    create_chat_message, 
     get_chat_messages
 )
-from jose import JWTError, jwt
 from core.config import settings
+from services.chat_broadcast import SAVED_FIELDS_RESERVE, ChatBroadcaster
+from services.chat_broker import chat_broker
+from services.chat_history import ChatHistoryCache
+from services.group_chat_writer import SavedMessageRelay, group_chat_writer
 
 router = APIRouter(prefix="/group-purchases", tags=["group-purchases"])
 
-class GroupChatManager:
-    def __init__(self):
-        # 채팅방 ID를 키로 사용하여 각 그룹 채팅방의 연결을 저장
-        # 각 연결에 email과 user_id 정보를 함께 저장하기 위해 튜플 리스트로 변경
-        self.active_connections: dict[int, list[tuple[WebSocket, str, int]]] = {}
-    
-    async def connect(self, chatroom_id: int, websocket: WebSocket, email: str, user_id: int):
-        if chatroom_id not in self.active_connections:
-            self.active_connections[chatroom_id] = []
-        self.active_connections[chatroom_id].append((websocket, email, user_id))
-    
-    def disconnect(self, chatroom_id: int, websocket: WebSocket):
-        if chatroom_id in self.active_connections:
-            # 해당 웹소켓 연결 찾아서 제거
-            self.active_connections[chatroom_id] = [
-                conn for conn in self.active_connections[chatroom_id] 
-                if conn[0] != websocket
-            ]
-            # 채팅방에 아무도 없으면 채팅방 제거
-            if not self.active_connections[chatroom_id]:
-                del self.active_connections[chatroom_id]
+def serialize_group_message(msg: GroupChatMessage) -> dict:
+    return {
+        "id": msg.id,
+        "sender_id": msg.sender_id,
+        "content": msg.content,
+        "timestamp": msg.timestamp.isoformat() if msg.timestamp else None,
+        "chatroom_id": msg.chatroom_id
+    }
 
-    async def broadcast(self, chatroom_id: int, message: str, sender_email: str = None):
-        if chatroom_id in self.active_connections:
-            for connection, email, _ in self.active_connections[chatroom_id]:
-                # sender_email이 제공되었으면 발신자를 제외하고 전송
-                if sender_email is None or email != sender_email:
-                    await connection.send_text(message)
+async def load_group_history(db: AsyncSession, chatroom_id: int, limit: int, before: Optional[int]) -> list:
+    messages = await get_chat_messages(db, chatroom_id, limit=limit, before=before)
+    return [serialize_group_message(msg) for msg in messages]
+
+# 채팅방별 최근 메시지 버퍼
+group_chat_history = ChatHistoryCache(
+    load_group_history,
+    capacity=settings.CHAT_HISTORY_BUFFER_SIZE,
+    room_field="chatroom_id",
+    session_factory=socket_session
+)
 
 # 그룹 채팅 매니저 인스턴스 생성
-group_chat_manager = GroupChatManager()
+group_chat_manager = ChatBroadcaster(
+    queue_size=settings.CHAT_SEND_QUEUE_SIZE,
+    policy=settings.CHAT_SLOW_CONSUMER_POLICY,
+    broker=chat_broker,
+    channel_prefix="group_chat",
+    on_message=group_chat_history.observe
+)
+# 이 워커에 소켓이 있는 방만 버퍼 사용 (다른 방은 브로커를 구독하지 않아 버퍼가 갱신되지 않음)
+group_chat_history.is_live = lambda chatroom_id: group_chat_manager.room_size(chatroom_id) > 0
 
 @router.post("/chatrooms/", response_model=dict)
 async def create_group_chatroom(group_purchase_id: int, db: AsyncSession = Depends(get_async_db)):
@@ -85,17 +87,20 @@ async def add_participant(chatroom_id: int, user_id: int, db: AsyncSession = Dep
         }
 
 @router.get("/chatrooms/{chatroom_id}/messages/", response_model=list)
-async def get_messages(chatroom_id: int, db: AsyncSession = Depends(get_async_db)):
-    """채팅방의 메시지 이력 조회"""
-    return await get_chat_messages(db, chatroom_id)
-
-async def get_user_by_email(db: AsyncSession, email: str) -> User:
-    """이메일로 사용자 조회"""
-    result = await db.execute(select(User).filter(User.email == email))
-    return result.scalars().first()
+async def get_messages(
+    chatroom_id: int,
+    before: Optional[int] = None,
+    limit: int = Query(settings.CHAT_HISTORY_PAGE_SIZE, ge=1, le=500),
+    db: AsyncSession = Depends(get_primary_read_db)
+):
+    """채팅방의 메시지 이력 조회 (최신순 페이지, before로 이전 페이지 조회)"""
+    # 이 워커에 접속자가 있는 방은 이미 존재가 확인된 방
+    if group_chat_manager.room_size(chatroom_id) == 0 and await get_chatroom(db, chatroom_id) is None:
+        raise HTTPException(status_code=404, detail="채팅방을 찾을 수 없습니다.")
+    return await group_chat_history.page(chatroom_id, limit, before, db=db)
 
 @router.websocket("/ws/groupchat/{chatroom_id}")
-async def group_chat(websocket: WebSocket, chatroom_id: int, db: AsyncSession = Depends(get_async_db)):
+async def group_chat(websocket: WebSocket, chatroom_id: int):
     """그룹 채팅 WebSocket 핸들러"""
     print(f"그룹 웹소켓 연결 시도: 채팅방 {chatroom_id}")
     
@@ -103,9 +108,8 @@ async def group_chat(websocket: WebSocket, chatroom_id: int, db: AsyncSession =
     await websocket.accept()
     print(f"그룹 웹소켓 연결 수락됨: 채팅방 {chatroom_id}")
     
-    # 쿼리 파라미터에서 토큰과 user_id 추출
+    # 쿼리 파라미터에서 토큰 추출
     token = websocket.query_params.get("token")
-    user_id_param = websocket.query_params.get("user_id")
     
     if not token:
         print(f"토큰 없음: 그룹 채팅방 {chatroom_id}")
@@ -117,57 +121,45 @@ async def group_chat(websocket: WebSocket, chatroom_id: int, db: AsyncSession =
         return
     
     try:
-        # 토큰 검증
+        # 토큰 검증 (HTTP 요청과 같은 경로, 인증 캐시가 유효하면 DB를 조회하지 않음)
         print(f"토큰 검증 시작: 그룹 채팅방 {chatroom_id}")
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
-        email = payload.get("sub")
-        # user_id를 토큰 또는 쿼리 파라미터에서 가져오기
-        user_id = payload.get("user_id") or user_id_param
-        print(f"토큰 검증 완료: 그룹 채팅방 {chatroom_id}, 이메일: {email}, 사용자 ID: {user_id}")
-        
-        # 이메일로 사용자 ID 찾기 (토큰에 user_id가 없는 경우)
-        if not user_id and email:
-            user = await get_user_by_email(db, email)
-            if user:
-                user_id = str(user.id)
-                print(f"이메일로 사용자 ID 찾음: {user_id}")
-        
-        # 토큰 만료 확인
-        if datetime.fromtimestamp(payload.get("exp")) < datetime.utcnow():
-            print(f"토큰 만료됨: 그룹 채팅방 {chatroom_id}")
-            await websocket.send_text(json.dumps({
-                "type": "error",
-                "message": "인증 토큰이 만료되었습니다."
-            }))
-            await websocket.close()
-            return
-            
-        # 이메일은 필수, user_id가 없으면 오류
-        if not email:
-            print(f"이메일 없음: 그룹 채팅방 {chatroom_id}")
+        try:
+            user = await resolve_user(token)
+        except HTTPException:
+            print(f"토큰 검증 실패: 그룹 채팅방 {chatroom_id}")
             await websocket.send_text(json.dumps({
                 "type": "error",
-                "message": "인증 정보가 유효하지 않습니다."
+                "message": "인증 토큰이 유효하지 않습니다."
             }))
             await websocket.close()
             return
         
-        # user_id가 없으면 오류
-        if not user_id:
-            print(f"사용자 ID를 찾을 수 없음: 그룹 채팅방 {chatroom_id}")
+        if not user.is_active:
+            print(f"비활성 사용자: 그룹 채팅방 {chatroom_id}")
             await websocket.send_text(json.dumps({
                 "type": "error",
-                "message": "사용자 ID를 찾을 수 없습니다. 다시 로그인해주세요."
+                "message": "비활성화된 사용자입니다."
             }))
             await websocket.close()
             return
         
+        email = user.email
+        user_id = user.id
+        print(f"토큰 검증 완료: 그룹 채팅방 {chatroom_id}, 이메일: {email}, 사용자 ID: {user_id}")
+        
+        # 접속 시 필요한 DB 작업은 한 세션에서 처리하고 바로 반납 (연결 유지 중에는 세션을 잡지 않음)
+        async with socket_session() as db:
+            chatroom = await get_chatroom(db, chatroom_id)
+            if chatroom:
+                # 채팅방에 사용자 추가 (아직 참가자가 아니라면)
+                try:
+                    await add_chat_participant(db, chatroom_id, user_id)
+                except Exception as e:
+                    # 동시 접속으로 이미 참가자가 된 경우 등은 무시
+                    await db.rollback()
+                    print(f"참가자 추가 중 에러 (무시됨): {str(e)}")
+        
         # 채팅방 존재 확인
-        chatroom = await get_chatroom(db, chatroom_id)
         if not chatroom:
             print(f"채팅방이 존재하지 않음: 그룹 채팅방 {chatroom_id}")
             await websocket.send_text(json.dumps({
@@ -187,97 +179,95 @@ async def group_chat(websocket: WebSocket, chatroom_id: int, db: AsyncSession =
         # 매니저에 연결 추가
         await group_chat_manager.connect(chatroom_id, websocket, email, int(user_id))
         print(f"매니저에 연결 추가됨: 그룹 채팅방 {chatroom_id}")
+        # 저장이 끝난 메시지의 ack/브로드캐스트를 받은 순서대로 보냄 (수신 루프는 저장을 기다리지 않음)
+        relay = SavedMessageRelay(group_chat_writer, group_chat_manager, chatroom_id, websocket, email)
         
         try:
-            # 채팅방에 사용자 추가 (아직 참가자가 아니라면)
-            try:
-                await add_chat_participant(db, chatroom_id, int(user_id))
-                print(f"사용자 {user_id}를 채팅방 {chatroom_id}에 추가됨")
-            except Exception as e:
-                # 이미 참가자일 경우 에러가 발생할 수 있으므로 무시
-                print(f"참가자 추가 중 에러 (무시됨): {str(e)}")
-            
-            # 채팅 내역 불러오기
+            # 채팅 내역 불러오기 (버퍼에 없을 때만 세션을 잠깐 사용)
             try:
-                print(f"채팅 내역 로드 시작: 그룹 채팅방 {chatroom_id}")
-                chat_history = await get_chat_messages(db, chatroom_id)
-                print(f"채팅 내역 로드 완료: {len(chat_history)}개 메시지")
+                chat_history = await group_chat_history.page(chatroom_id, settings.CHAT_HISTORY_PAGE_SIZE)
                 
                 # 이전 채팅 내역을 클라이언트에게 전송
                 history_data = {
                     "type": "history",
-                    "messages": [
-                        {
-                            "id": msg.id,
-                            "sender_id": msg.sender_id,
-                            "content": msg.content,
-                            "timestamp": msg.timestamp.isoformat() if msg.timestamp else None,
-                            "chatroom_id": msg.chatroom_id
-                        } for msg in chat_history
-                    ]
+                    "messages": chat_history
                 }
-                await websocket.send_text(json.dumps(history_data))
-                print(f"채팅 내역 전송 완료: 그룹 채팅방 {chatroom_id}")
+                await group_chat_manager.send_personal(websocket, json.dumps(history_data))
             except Exception as e:
                 print(f"채팅 내역 로드 실패: {str(e)}")
                 # 내역 로드 실패 메시지 전송
-                await websocket.send_text(json.dumps({
+                await group_chat_manager.send_personal(websocket, json.dumps({
                     "type": "history_error",
                     "message": "채팅 내역을 불러오는 중 오류가 발생했습니다."
                 }))
             
             # 메시지 수신 루프
             while True:
-                print(f"메시지 수신 대기: 그룹 채팅방 {chatroom_id}")
                 data = await websocket.receive_text()
-                print(f"메시지 수신됨: 그룹 채팅방 {chatroom_id}")
+                # 다른 워커로 보낼 수 없는 크기는 저장하지 않고 발신자에게만 거절을 알림
+                if not group_chat_manager.fits(chatroom_id, data, email, reserve=SAVED_FIELDS_RESERVE):
+                    await group_chat_manager.send_personal(websocket, json.dumps({
+                        "type": "error",
+                        "code": "message_too_large",
+                        "message": "메시지가 너무 깁니다."
+                    }))
+                    continue
                 
                 try:
                     message_data = json.loads(data)
                     
-                    # 메시지 타입이 'chat'인 경우 데이터베이스에 저장
-                    if message_data.get("type") == "chat" and user_id:
+                    # 이전 내역 요청 (스크롤): 발신자에게만 응답하고 브로드캐스트하지 않음
+                    if message_data.get("type") == "history":
+                        before = message_data.get("before")
+                        older = await group_chat_history.page(
+                            chatroom_id,
+                            settings.CHAT_HISTORY_PAGE_SIZE,
+                            int(before) if before is not None else None
+                        )
+                        await group_chat_manager.send_personal(websocket, json.dumps({
+                            "type": "history",
+                            "before": before,
+                            "messages": older
+                        }))
+                        continue
+                    
+                    # 메시지 타입이 'chat'인 경우 저장 큐에 넣기만 하고 다음 프레임을 읽음
+                    # (저장되면 relay가 발신자에게 ack를, 방에 저장 정보가 붙은 메시지를 보냄)
+                    if message_data.get("type") == "chat":
                         try:
-                            print(f"메시지 저장 시작: 그룹 채팅방 {chatroom_id}")
-                            # 내용 확인을 위한 디버깅 로그
-                            print(f"저장할 메시지 내용: {message_data.get('content')}")
-                            
                             message_create = GroupChatMessageCreate(
                                 chatroom_id=chatroom_id,
                                 sender_id=int(user_id),
                                 content=message_data.get("content")  # 필드명 일치
                             )
-                            
-                            saved_message = await create_chat_message(db, message_create)
-                            print(f"메시지 저장 성공, ID: {saved_message.id}")
-                            
+                            await relay.submit(message_create, message_data)
+                            continue
                         except Exception as e:
                             print(f"메시지 저장 실패: {str(e)}")
-                            import traceback
-                            print(f"상세 오류: {traceback.format_exc()}")
+                            await group_chat_manager.send_personal(websocket, json.dumps({
+                                "type": "ack_error",
+                                "client_id": message_data.get("client_id"),
+                                "message": "메시지 저장 중 오류가 발생했습니다."
+                            }))
                     
-                    # 메시지를 발신자를 제외한 모든 사용자에게 전달
-                    print(f"메시지 브로드캐스트 시작: 그룹 채팅방 {chatroom_id}")
-                    await group_chat_manager.broadcast(chatroom_id, data, email)
-                    print(f"메시지 브로드캐스트 완료: 그룹 채팅방 {chatroom_id}")
+                    # 메시지를 발신자를 제외한 모든 사용자에게 전달 (앞선 채팅 메시지 다음 순서로)
+                    await relay.forward(data)
                     
                 except json.JSONDecodeError:
                     print(f"JSON 파싱 실패: 그룹 채팅방 {chatroom_id}")
                     # 일반 텍스트인 경우 그대로 전달
-                    await group_chat_manager.broadcast(chatroom_id, data, email)
+                    await relay.forward(data)
                 
         except WebSocketDisconnect:
-            # 연결 종료 시 매니저에서 제거
             print(f"웹소켓 연결 종료: 그룹 채팅방 {chatroom_id}")
+        finally:
+            # 연결 종료(또는 오류) 시 매니저에서 제거하고, 이미 받은 메시지는 마저 브로드캐스트
             group_chat_manager.disconnect(chatroom_id, websocket)
+            await relay.close()
+            # 이 워커에 남은 연결이 없으면 더 이상 갱신되지 않는 내역 버퍼도 제거
+            if group_chat_manager.room_size(chatroom_id) == 0:
+                group_chat_history.evict(chatroom_id)
             
-    except JWTError as e:
-        print(f"JWT 오류: 그룹 채팅방 {chatroom_id}, {str(e)}")
-        await websocket.send_text(json.dumps({
-            "type": "error",
-            "message": "인증 토큰이 유효하지 않습니다."
-        }))
-        await websocket.close()
     except Exception as e:
         print(f"예상치 못한 오류: 그룹 채팅방 {chatroom_id}, {str(e)}")
         await websocket.send_text(json.dumps({
@@ -1,7 +1,7 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, Request, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
-from api.dependencies import get_async_db, get_current_active_user
+from api.dependencies import get_async_db, get_current_active_user, get_read_db
 from crud.crud_group_purchase import CRUDGroupPurchase, group_purchase
 from schemas.group_purchases import (
     GroupPurchase, 
@@ -10,7 +10,7 @@ from schemas.group_purchases import (
     GroupPurchaseDetail
 )
 from models.models import User, GroupPurchaseStatus
-from services.s3_service import upload_images_to_s3
+from services.image_derivatives import pick_rendition, preferred_image_format, upload_images_with_derivatives
 from utils.form_parser import parse_group_purchase_form
 
 router = APIRouter(prefix="/group-purchases", tags=["group-purchases"])
@@ -34,10 +34,10 @@ async def create_group_purchase(
                     detail=f"Unsupported file extension: {file_ext}"
                 )
         
-        # S3 업로드
-        image_urls = await upload_images_to_s3(files)
+        # 원본 업로드 + 썸네일/중간 크기 파생본 생성
+        image_urls, derivatives = await upload_images_with_derivatives(files)
         if not image_urls:
-            raise HTTPException(status_code=500, detail="Failed to upload images to S3")
+            raise HTTPException(status_code=500, detail="Failed to upload images")
         
         # 첫 번째 이미지를 대표 이미지로 설정
         group_purchase_data.image_url = image_urls[0]  # 이 필드를 스키마에 추가해야 함
@@ -54,7 +54,8 @@ async def create_group_purchase(
             group_purchase_data=group_purchase_data,
             current_user=current_user,
             saving_price=saving_price,
-            image_urls=image_urls if files else None
+            image_urls=image_urls if files else None,
+            derivatives=derivatives if files else None
         )
         
         return group_purchase_obj
@@ -63,19 +64,25 @@ async def create_group_purchase(
 
 @router.get("/", response_model=List[GroupPurchase])
 async def list_group_purchases(
-    db: AsyncSession = Depends(get_async_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_active_user)
 ):
-    """공동구매 목록 조회"""
+    """공동구매 목록 조회 (이미지별 thumbnail_url: Accept에 image/webp가 있으면 WebP)"""
     crud_group_purchase = CRUDGroupPurchase(db)
     group_purchases = await crud_group_purchase.get_multi(
         db=db,
         skip=skip,
         limit=limit
     )
-    return group_purchases
+    image_format = preferred_image_format(request.headers.get("accept"))
+    items = [GroupPurchase.model_validate(group_purchase_obj) for group_purchase_obj in group_purchases]
+    for item in items:
+        for image in item.images:
+            image.thumbnail_url = pick_rendition(image.image_url, image.derivatives, "thumb", image_format)
+    return items
 
 @router.post("/{group_purchase_id}/join")
 async def join_group_purchase(
@@ -99,7 +106,7 @@ async def join_group_purchase(
 @router.get("/{group_purchase_id}", response_model=GroupPurchaseDetail)
 async def get_group_purchase(
     *,
-    db: AsyncSession = Depends(get_async_db),
+    db: AsyncSession = Depends(get_read_db),
     group_purchase_id: int,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -149,10 +156,10 @@ async def update_group_purchase(
                     detail=f"Unsupported file extension: {file_ext}"
                 )
         
-        # S3 업로드
-        image_urls = await upload_images_to_s3(files)
+        # 원본 업로드 + 썸네일/중간 크기 파생본 생성
+        image_urls, derivatives = await upload_images_with_derivatives(files)
         if not image_urls:
-            raise HTTPException(status_code=500, detail="Failed to upload new images to S3")
+            raise HTTPException(status_code=500, detail="Failed to upload new images")
         
         # 첫 번째 이미지를 대표 이미지로 설정
         group_purchase_data.image_url = image_urls[0]
@@ -165,7 +172,8 @@ async def update_group_purchase(
             group_purchase_id=group_purchase_id,
             current_user=current_user,
             obj_in=group_purchase_data,
-            image_urls=image_urls if files else None
+            image_urls=image_urls if files else None,
+            derivatives=derivatives if files else None
         )
         
         if not group_purchase_obj:
@@ -8,6 +8,7 @@ from services.ingredient_matcher import IngredientMatcher
 from crud.crud_ingredient import CRUDIngredient
 from schemas.ingredient import IngredientCreate, IngredientUpdate, UserIngredientsResponse
 from typing import List, Optional
+from db.hot_queries import ingredients_by_user
 
 
 router = APIRouter(prefix="/ingredients", tags=["Ingredients"])
@@ -21,19 +22,22 @@ async def get_my_ingredients(
     ascending: bool = True  # 정렬 방향
 ):
     """현재 사용자의 식재료 조회 (필터링 및 정렬 지원)"""
-    query = select(Ingredient).where(Ingredient.user_id == current_user.id)
+    query = ingredients_by_user(current_user.id)
     
-    # 카테고리 필터링
+    # 카테고리 필터링 (lambda_stmt라 조건도 람다로 덧붙임)
     if category:
-        query = query.where(Ingredient.category == category)
+        query += lambda s: s.where(Ingredient.category == category)
     
     # 정렬
+    order_by = None
     if sort_by == 'expiry_date':
-        query = query.order_by(Ingredient.expiry_date.asc() if ascending else Ingredient.expiry_date.desc())
+        order_by = Ingredient.expiry_date.asc() if ascending else Ingredient.expiry_date.desc()
     elif sort_by == 'name':
-        query = query.order_by(Ingredient.name.asc() if ascending else Ingredient.name.desc())
+        order_by = Ingredient.name.asc() if ascending else Ingredient.name.desc()
     elif sort_by == 'amount':
-        query = query.order_by(Ingredient.amount.asc() if ascending else Ingredient.amount.desc())
+        order_by = Ingredient.amount.asc() if ascending else Ingredient.amount.desc()
+    if order_by is not None:
+        query += lambda s: s.order_by(order_by)
     
     result = await db.execute(query)
     ingredients = result.scalars().all()
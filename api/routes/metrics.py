@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.dependencies import get_async_db, get_current_admin_user
+from db.read_routing import read_routing
+from db.session import engine, replica_engine, statement_cache_snapshot
+from db.pool_stats import pool_snapshot
+from services.image_derivatives import image_derivatives
+from services.image_registry import image_registry
+from services.llm_gateway import llm_gateway
+from services.ocr_client import ocr_client
+from services.password_hasher import password_hasher
+from services.receipt_service import receipt_analysis_cache, receipt_job_queue, temp_receipt_sweeper
+from services.storage_outbox import storage_deletion_drainer
+
+# 풀/큐 상태와 내부 오류 메시지가 드러나므로 관리자만 조회
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(get_current_admin_user)])
+
+
+@router.get("/db-pool", response_model=dict)
+async def get_db_pool_metrics():
+    """DB 연결 풀 사용 현황 (checkout 대기 시간 분포, 가장 오래 연결을 잡은 요청, 웹소켓 세션 수, 조회 세션 라우팅, 컴파일 캐시 등)"""
+    snapshot = pool_snapshot(engine.pool)
+    snapshot["read_routing"] = read_routing.stats()
+    snapshot["statement_cache"] = statement_cache_snapshot(engine)
+    if replica_engine is not None:
+        snapshot["replica"] = pool_snapshot(replica_engine.pool)
+    return snapshot
+
+
+@router.get("/password-hasher", response_model=dict)
+async def get_password_hasher_metrics():
+    """비밀번호 해시 스레드 풀 현황 (처리 중인 작업 수, 503으로 거절한 수)"""
+    return password_hasher.stats()
+
+
+@router.get("/ocr", response_model=dict)
+async def get_ocr_metrics():
+    """OCR 호출 현황 (진행 중/대기 중 호출 수, 재시도/실패 수, 지연 시간 백분위)"""
+    return ocr_client.stats()
+
+
+@router.get("/llm", response_model=dict)
+async def get_llm_metrics():
+    """LLM 호출 현황 (실제 호출 수, 캐시 적중, JSON 복구 요청 수, 지연 시간 백분위)"""
+    return llm_gateway.stats()
+
+
+@router.get("/images", response_model=dict)
+async def get_image_derivative_metrics():
+    """이미지 파생본 생성 현황 (생성/실패/건너뛴 수, 생성 시간 백분위)과 내용 해시 중복 제거 현황"""
+    return {**image_derivatives.stats(), "dedupe": image_registry.stats()}
+
+
+@router.get("/storage-deletions", response_model=dict)
+async def get_storage_deletion_metrics(db: AsyncSession = Depends(get_async_db)):
+    """저장소 삭제 outbox 현황 (남은 항목 수, 일괄 삭제/실패 수)"""
+    return {
+        **storage_deletion_drainer.stats(),
+        "backlog": await storage_deletion_drainer.backlog(db)
+    }
+
+
+@router.get("/receipt-cache", response_model=dict)
+async def get_receipt_cache_metrics():
+    """영수증 분석 캐시 현황 (적중률, 생략한 OCR/GPT 호출 수)"""
+    return receipt_analysis_cache.stats()
+
+
+@router.get("/receipt-jobs", response_model=dict)
+async def get_receipt_job_metrics(db: AsyncSession = Depends(get_async_db)):
+    """영수증 분석 작업 현황 (상태별 작업 수, 단계별 소요 시간 백분위)"""
+    return {
+        **receipt_job_queue.stats(),
+        "queue": await receipt_job_queue.status_counts(db),
+        "temp_receipt_sweeper": temp_receipt_sweeper.stats()
+    }
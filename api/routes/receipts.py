@@ -1,11 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from api.dependencies import get_async_db, get_current_active_user
-from services.receipt_service import ReceiptService
+from services.receipt_service import ReceiptService, receipt_job_queue
 from models.models import User
 from datetime import datetime
 from typing import Dict, Any, List
-from schemas.receipts import TempReceiptUpdate, IngredientUpdate
+from schemas.receipts import TempReceiptUpdate, IngredientUpdate, ReceiptJobResponse
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/receipts", tags=["receipts"])
@@ -15,22 +15,44 @@ class ConfirmItemBatch(BaseModel):
     category: str
     expiry_date: datetime
 
-@router.post("/upload")
+@router.post("/upload", status_code=202)
 async def upload_receipt(
     *,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """영수증 이미지를 업로드하고 분석하여 임시 저장합니다."""
+    """영수증 이미지를 업로드해 분석 작업을 등록합니다. 결과는 /receipts/jobs/{job_id}로 조회합니다."""
     receipt_service = ReceiptService()
-    analyzed_items = await receipt_service.analyze_receipt(file, db)
+    job = await receipt_service.analyze_receipt(file, db, current_user.id)
     
     return {
-        "message": "영수증이 성공적으로 분석되었습니다. 각 상품의 카테고리와 유통기한을 입력해주세요.",
-        "items": analyzed_items
+        "message": "영수증 분석이 시작되었습니다. 작업 상태를 조회해 결과를 확인해주세요.",
+        "job_id": job.id,
+        "status": job.status
     }
 
+@router.get("/jobs/{job_id}", response_model=ReceiptJobResponse)
+async def get_receipt_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """영수증 분석 작업 상태 조회 (완료되면 temp_id가 포함된 품목 목록 반환)"""
+    job = await receipt_job_queue.get_job(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="분석 작업을 찾을 수 없습니다.")
+    return ReceiptJobResponse(
+        job_id=job.id,
+        status=job.status,
+        items=job.result or [],
+        error=job.error,
+        attempts=job.attempts,
+        stage_timings=job.stage_timings,
+        created_at=job.created_at,
+        finished_at=job.finished_at
+    )
+
 @router.delete("/temp/{temp_id}")
 async def delete_temp_item(
     temp_id: int,
@@ -39,7 +61,7 @@ async def delete_temp_item(
 ) -> Dict[str, str]:
     """임시 저장된 상품을 삭제"""
     receipt_service = ReceiptService()
-    await receipt_service.delete_temp_item(db, temp_id)
+    await receipt_service.delete_temp_item(db, temp_id, current_user.id)
     
     return {
         "message": "상품이 성공적으로 삭제되었습니다."
@@ -95,28 +117,15 @@ async def confirm_items_batch(
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Dict[str, Any]:
-    """여러 임시 저장 상품을 한 번에 ingredients 테이블로 이동"""
+    """여러 임시 저장 상품을 한 트랜잭션으로 ingredients 테이블로 이동 (하나라도 없으면 전체 취소)"""
     receipt_service = ReceiptService()
-    ingredients = []
-    
-    for item in items:
-        ingredient = await receipt_service.save_to_ingredients(
-            db,
-            item.temp_id,
-            item.category,
-            item.expiry_date,
-            current_user.id
-        )
-        ingredients.append({
-            "id": ingredient.id,
-            "name": ingredient.name,
-            "category": ingredient.category,
-            "expiry_date": ingredient.expiry_date,
-            "amount": ingredient.amount,
-            "user_id": ingredient.user_id
-        })
+    ingredients = await receipt_service.confirm_items(
+        db,
+        [item.model_dump() for item in items],
+        current_user.id
+    )
     
     return {
         "message": "상품들이 성공적으로 저장되었습니다.",
         "ingredients": ingredients
-    } 
\ No newline at end of file
+    }
@@ -2,7 +2,7 @@ from typing import List, Dict, Optional
 from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import Field
-from api.dependencies import get_async_db, get_current_active_user
+from api.dependencies import get_async_db, get_current_active_user, get_read_db
 from crud import crud_recipe, crud_user
 from models.models import User
 from schemas.recipes import Recipe, RecipeCreate, RecipeUpdate,RecipeRating
@@ -11,7 +11,7 @@ from services import RecipeRecommender,RecipeService
 from collections import defaultdict
 from difflib import SequenceMatcher
 
-from services.s3_service import upload_images_to_s3
+from services.image_derivatives import pick_rendition, upload_images_with_derivatives
 from utils.form_parser import parse_recipe_form
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
@@ -36,15 +36,16 @@ async def create_recipe(
                     detail=f"Unsupported file extension: {file_ext}"
                 )
     
-    # S3 업로드
-    image_urls = await upload_images_to_s3(files) if files else []
+    # 원본 업로드 + 썸네일/중간 크기 파생본 생성
+    image_urls, derivatives = await upload_images_with_derivatives(files) if files else ([], [])
     if files and not image_urls:
-        raise HTTPException(status_code=500, detail="Failed to upload images to S3")
+        raise HTTPException(status_code=500, detail="Failed to upload images")
     
     # 첫 번째 이미지를 대표 이미지로 설정 (있는 경우)
+    # 레시피 행에는 URL만 저장하므로 어떤 클라이언트도 열 수 있는 JPEG 파생본 사용 (없으면 원본)
     if image_urls:
-        recipe_in.image_large = image_urls[0]
-        recipe_in.image_small = image_urls[0]  # 필요한 경우 썸네일 URL을 다르게 설정할 수 있음
+        recipe_in.image_large = pick_rendition(image_urls[0], derivatives[0], "medium")
+        recipe_in.image_small = pick_rendition(image_urls[0], derivatives[0], "thumb")
     
     # 요리 과정 이미지가 있다면 저장
     if len(image_urls) > 1:
@@ -61,7 +62,7 @@ async def create_recipe(
 
 @router.get("/", response_model=Dict[str, List[Recipe]])
 async def list_recipes(
-    db: AsyncSession = Depends(get_async_db),
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_active_user)
@@ -80,7 +81,7 @@ async def list_recipes(
 
 @router.get("/my", response_model=List[Recipe])
 async def get_my_recipes(
-    db: AsyncSession = Depends(get_async_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
     skip: int = 0,
     limit: int = 100
@@ -98,7 +99,7 @@ async def get_my_recipes(
 @router.get("/search", response_model=List[Recipe])
 async def search_recipes(
     query: str,
-    db: AsyncSession = Depends(get_async_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user),
     threshold: float = 0.4,  # 유사도 임계값 (기본값 0.4)
     limit: int = 10  # 최대 결과 수
@@ -124,7 +125,7 @@ async def search_recipes(
 @router.get("/{recipe_id}", response_model=Recipe)
 async def get_recipe(
     recipe_id: int,
-    db: AsyncSession = Depends(get_async_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get recipe by ID"""
@@ -156,11 +157,15 @@ async def update_recipe(
             status_code=403,
             detail="Not enough permissions"
         )
-    recipe = await crud_recipe.recipe.update(
-        db=db,
-        db_obj=recipe,
-        obj_in=recipe_in
-    )
+    try:
+        # 대표/요리 과정 이미지가 바뀌면 빠진 이미지의 참조를 해제
+        recipe = await crud_recipe.recipe.update_with_images(
+            db=db,
+            db_obj=recipe,
+            obj_in=recipe_in
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return recipe
 
 @router.delete("/{recipe_id}")
@@ -182,7 +187,8 @@ async def delete_recipe(
             status_code=403,
             detail="Not enough permissions"
         )
-    await crud_recipe.recipe.remove(db=db, id=recipe_id)
+    # 이미지 참조 해제: 더 이상 쓰는 곳이 없는 객체만 같은 트랜잭션의 outbox에 기록
+    await crud_recipe.recipe.remove_with_images(db=db, db_obj=recipe)
     return {"success": True}
 
 @router.get("/recommendations/{user_id}/select/{recipe_id}", response_model=Recipe)
@@ -1,10 +1,10 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
-from api.dependencies import get_async_db
+from api.dependencies import get_async_db, get_read_db
 from schemas.sale import SaleCreate, SaleResponse
 from crud.crud_sale import CRUDsale
-from services.s3_service import delete_images_from_s3, upload_images_to_s3
+from services.image_derivatives import preferred_image_format, upload_images_with_derivatives
 from services.sale_serivce import SaleService
 from utils.form_parser import parse_sale_form
 
@@ -31,13 +31,13 @@ async def create_sale(
             )
             
   
-    # S3 업로드
-    image_urls = await upload_images_to_s3(files)
+    # 원본 업로드 + 썸네일/중간 크기 파생본 생성
+    image_urls, derivatives = await upload_images_with_derivatives(files)
     if not image_urls:
-        raise HTTPException(status_code=500, detail="Failed to upload images to S3")
+        raise HTTPException(status_code=500, detail="Failed to upload images")
 
     # 판매 등록 및 이미지 저장
-    result = await sale_service.register_sale(sale_data, image_urls)
+    result = await sale_service.register_sale(sale_data, image_urls, derivatives)
 
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -50,7 +50,7 @@ async def delete_sale(
     db: AsyncSession = Depends(get_async_db)
 ):
     """
-    판매 삭제 엔드포인트 (AWS S3 이미지 삭제 포함)
+    판매 삭제 엔드포인트 (이미지는 백그라운드에서 삭제)
     """
     sale_service = CRUDsale(db)
     result = await sale_service.delete_sale(sale_id)
@@ -70,7 +70,7 @@ async def update_sale(
     """
     판매 정보 수정 엔드포인트
     - 제목, 가격, 수량(amount), 내용 등 변경 가능
-    - 이미지 변경 시 기존 이미지 삭제 후 새 이미지 업로드
+    - 이미지 변경 시 새 이미지 업로드 후 기존 이미지 삭제 예약 (outbox, 수정과 같은 트랜잭션)
     """
     sale_service = CRUDsale(db)
 
@@ -81,6 +81,7 @@ async def update_sale(
 
     # **이미지 변경을 원할 경우**: 기존 이미지 삭제 후 새 이미지 업로드
     image_urls = None  # 기본값은 None (변경하지 않을 경우)
+    derivatives = None
     if files:
         for file in files:
             file_ext = file.filename.split('.')[-1].lower()
@@ -90,18 +91,13 @@ async def update_sale(
                     detail=f"Unsupported file extension: {file_ext}"
                 )
 
-        # 기존 이미지 삭제 (S3에서 삭제)
-        existing_images = [img.image_url for img in result.images]
-        if existing_images:
-            await delete_images_from_s3(existing_images)
-
-        # 새로운 이미지 업로드
-        image_urls = await upload_images_to_s3(files)
+        # 새로운 이미지 업로드 (기존 이미지는 update_sale에서 삭제 예약)
+        image_urls, derivatives = await upload_images_with_derivatives(files)
         if not image_urls:
-            raise HTTPException(status_code=500, detail="Failed to upload new images to S3")
+            raise HTTPException(status_code=500, detail="Failed to upload new images")
 
     # 판매 정보 업데이트 수행
-    update_result = await sale_service.update_sale(sale_id, sale_data, image_urls)
+    update_result = await sale_service.update_sale(sale_id, sale_data, image_urls, derivatives)
 
     if "error" in update_result:
         raise HTTPException(status_code=400, detail=update_result["error"])
@@ -110,23 +106,26 @@ async def update_sale(
 
 
 @router.get("/sales", response_model=List[SaleResponse])
-async def get_all_sales(db: AsyncSession = Depends(get_async_db)):
+async def get_all_sales(request: Request, db: AsyncSession = Depends(get_read_db)):
     """
-    모든 판매 상품 조회 API
+    모든 판매 상품 조회 API (thumbnails: Accept에 image/webp가 있으면 WebP 썸네일)
     """
     sale_service = CRUDsale(db)
-    sales = await sale_service.get_all_sales()
+    sales = await sale_service.get_all_sales(preferred_image_format(request.headers.get("accept")))
 
     return sales
 @router.get("/sales/location", response_model=List[SaleResponse])
 async def get_sales_by_location(
+    request: Request,
     user_lat: float,
     user_lon: float,
     radius: int = 1000,  # 기본 반경 5km
-    db: AsyncSession = Depends(get_async_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     특정 위치 기준으로 반경 N km 내 판매 상품 조회 API
     """
     sale_service = CRUDsale(db)
-    return await sale_service.get_sales_by_location(user_lat, user_lon, radius)
\ No newline at end of file
+    return await sale_service.get_sales_by_location(
+        user_lat, user_lon, radius, preferred_image_format(request.headers.get("accept"))
+    )
\ No newline at end of file
@@ -14,7 +14,7 @@ from schemas.users import (
 from schemas.auth import User, UserUpdate
 from services.recommender import RecipeRecommender
 from models.models import UserRole
-from services.s3_service import upload_images_to_s3
+from services.storage import upload_images
 
 router = APIRouter(prefix="/users", tags=["users"])
 recommender = RecipeRecommender()
@@ -37,10 +37,10 @@ async def update_my_info(
     try:
         update_data, profile_image = form_data
         
-        # 프로필 이미지가 있으면 S3에 업로드
+        # 프로필 이미지가 있으면 저장소에 업로드
         if profile_image and profile_image.filename:
             print(f"프로필 이미지 업로드 시작: {profile_image.filename}")
-            image_urls = await upload_images_to_s3([profile_image])
+            image_urls = await upload_images([profile_image])
             if image_urls:
                 update_data["profile_image_url"] = image_urls[0]
                 print(f"프로필 이미지 업로드 완료: {image_urls[0]}")
@@ -57,6 +57,9 @@ async def update_my_info(
         else:
             # 업데이트할 데이터가 없으면 현재 사용자 정보 반환
             return current_user
+    except HTTPException:
+        # 404, 비밀번호 해시 대기열 초과(503) 등은 그대로 전달
+        raise
     except ValueError as e:
         print(f"사용자 정보 업데이트 중 오류: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -64,6 +67,17 @@ async def update_my_info(
         print(f"예상치 못한 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.delete("/me", response_model=User)
+async def deactivate_me(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """현재 사용자 계정 비활성화 (기존 토큰으로는 더 이상 인증되지 않음)"""
+    deactivated_user = await crud_auth.deactivate_user(db, current_user.id)
+    if not deactivated_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return deactivated_user
+
 
 @router.put("/{user_id}", response_model=User)
 async def update_user_by_id(
@@ -0,0 +1,100 @@
+"""
+레시피 재료 파싱 처리량 벤치마크
+
+data/ingredient_parse_corpus.json(이전에 LLM으로 파싱해 둔 결과)을 반복해서
+규칙 기반 파서만 돌린 처리량과, IngredientParser(규칙 + 애매한 줄만 LLM)의
+처리량/LLM 호출 비율을 비교한다. LLM은 지연 시간을 준 가짜 백엔드를 사용한다.
+
+    python bench_ingredient_parser.py
+    python bench_ingredient_parser.py --repeat 200 --llm-delay 1.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ingredient_parse_corpus.json")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100, help="코퍼스 반복 횟수 (규칙 파서 처리량 측정)")
+    parser.add_argument("--llm-delay", type=float, default=1.0, help="가짜 LLM 응답 지연(초)")
+    return parser.parse_args()
+
+
+def agreement(corpus: list) -> dict:
+    from utils.ingredient_line_parser import parse_ingredient_text
+
+    resolved = agreed = 0
+    for case in corpus:
+        parsed, unresolved = parse_ingredient_text(case["text"])
+        if unresolved:
+            continue
+        resolved += 1
+        expected = case["expected"]
+        if parsed.keys() == expected.keys() and all(abs(parsed[k] - expected[k]) <= 0.01 for k in expected):
+            agreed += 1
+    return {
+        "recipes": len(corpus),
+        "resolved_without_llm": resolved,
+        "agreement": round(agreed / resolved, 4) if resolved else 0.0
+    }
+
+
+def rule_throughput(corpus: list, repeat: int) -> dict:
+    from utils.ingredient_line_parser import parse_ingredient_text
+
+    lines = sum(len([line for line in case["text"].split("\n") if line.strip()]) for case in corpus) * repeat
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for case in corpus:
+            parse_ingredient_text(case["text"])
+    elapsed = time.perf_counter() - started
+    return {"lines": lines, "seconds": round(elapsed, 4), "lines_per_sec": round(lines / elapsed)}
+
+
+async def parser_run(corpus: list, delay: float) -> dict:
+    from services.llm_gateway import FakeLLMBackend, LLMGateway
+    from services.recipes import IngredientParser
+
+    expected = {case["text"]: case["expected"] for case in corpus}
+
+    def responder(messages):
+        # 애매한 줄이 들어 있는 레시피의 기대값을 돌려주는 가짜 LLM
+        lines = messages[1]["content"].rsplit("재료 목록:", 1)[1].strip()
+        for text, result in expected.items():
+            if lines in [line.strip() for line in text.split("\n")]:
+                return json.dumps(result, ensure_ascii=False)
+        return "{}"
+
+    backend = FakeLLMBackend(responder, delay=delay)
+    parser = IngredientParser(LLMGateway(backend, store=None, rate=0))
+    started = time.perf_counter()
+    for case in corpus:
+        await parser.parse_ingredients(case["text"])
+    elapsed = time.perf_counter() - started
+    total_lines = parser.rule_lines + parser.llm_lines
+    return {
+        "seconds": round(elapsed, 3),
+        "llm_calls": len(backend.calls),
+        "llm_calls_before": len(corpus),
+        "escalated_lines": f"{parser.llm_lines}/{total_lines}",
+        "estimated_seconds_before": round(len(corpus) * delay, 3)
+    }
+
+
+def main():
+    args = parse_args()
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    print(f"코퍼스 {len(corpus)}개 레시피")
+    print(f"  이전 결과와 일치율 {agreement(corpus)}")
+    print(f"  규칙 파서 처리량   {rule_throughput(corpus, args.repeat)}")
+    print(f"  IngredientParser  {asyncio.run(parser_run(corpus, args.llm_delay))}")
+
+
+if __name__ == "__main__":
+    main()
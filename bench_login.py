@@ -0,0 +1,144 @@
+"""
+로그인(bcrypt) 부하 중 채팅 트래픽 지연 벤치마크
+
+같은 이벤트 루프에서 채팅방 팬아웃과 로그인 검증을 동시에 돌리고
+이벤트 루프 지연, 채팅 메시지 전달 지연, 로그인 처리량을 비교한다.
+
+    python bench_login.py                 # inline(기존 방식)과 pool 모두 실행
+    python bench_login.py --mode pool --logins 200 --concurrency 100 --rounds 10
+
+inline: 이벤트 루프에서 bcrypt를 직접 호출 (변경 전 동작)
+pool:   services.password_hasher 스레드 풀 + 대기열 제한
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inline", "pool", "both"], default="both")
+    parser.add_argument("--logins", type=int, default=40, help="전체 로그인 시도 수")
+    parser.add_argument("--concurrency", type=int, default=40, help="동시에 시도하는 로그인 수")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt work factor")
+    parser.add_argument("--rooms", type=int, default=5)
+    parser.add_argument("--sockets", type=int, default=50, help="채팅방별 연결 수")
+    parser.add_argument("--interval", type=float, default=0.01, help="채팅방별 메시지 전송 간격(초)")
+    return parser.parse_args()
+
+
+class TimingWebSocket:
+    """받은 메시지의 전송 시각으로 전달 지연을 기록하는 가짜 웹소켓"""
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+
+    async def send_text(self, message: str):
+        sent_at = float(message.split("|", 1)[0])
+        self.tracker.record(time.perf_counter() - sent_at)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def run(mode: str, args) -> dict:
+    from core.security import pwd_context
+    from services.chat_broadcast import ChatBroadcaster
+    from services.password_hasher import PasswordHasher
+    from utils.metrics import LatencyTracker
+
+    hashed = pwd_context.hash("benchmark-password")
+    hasher = PasswordHasher(max_workers=args.workers, max_pending=args.max_pending)
+
+    delivery = LatencyTracker(window=100000)
+    loop_lag = LatencyTracker(window=100000)
+    broadcaster = ChatBroadcaster(queue_size=256)
+    for room_id in range(args.rooms):
+        for i in range(args.sockets):
+            await broadcaster.connect(room_id, TimingWebSocket(delivery), f"user{i}@bench", i)
+
+    stop = asyncio.Event()
+
+    async def chat_sender(room_id: int):
+        while not stop.is_set():
+            await broadcaster.broadcast(room_id, f"{time.perf_counter()}|안녕하세요")
+            await asyncio.sleep(args.interval)
+
+    async def lag_probe():
+        # 5ms 간격으로 깨어나야 하는 태스크가 실제로 얼마나 늦게 깨어나는지 측정
+        while not stop.is_set():
+            expected = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            loop_lag.record(max(0.0, time.perf_counter() - expected))
+
+    login_latency = LatencyTracker(window=100000)
+    results = {"ok": 0, "rejected": 0}
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def login():
+        async with slots:
+            started = time.perf_counter()
+            try:
+                if mode == "inline":
+                    verified = pwd_context.verify("benchmark-password", hashed)
+                else:
+                    verified, _ = await hasher.verify_and_update("benchmark-password", hashed)
+            except Exception:
+                results["rejected"] += 1
+                return
+            assert verified
+            results["ok"] += 1
+            login_latency.record(time.perf_counter() - started)
+
+    background = [asyncio.create_task(chat_sender(room_id)) for room_id in range(args.rooms)]
+    background.append(asyncio.create_task(lag_probe()))
+    # 로그인 없이 채팅 트래픽만 있을 때의 기준값을 잠깐 수집
+    await asyncio.sleep(0.2)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await asyncio.gather(*background)
+    for room_id in range(args.rooms):
+        for connection in list(broadcaster.rooms.get(room_id, ())):
+            broadcaster.disconnect(room_id, connection.websocket)
+    hasher.shutdown()
+
+    return {
+        "mode": mode,
+        "logins_ok": results["ok"],
+        "logins_rejected": results["rejected"],
+        "logins_per_sec": round(results["ok"] / elapsed, 2),
+        "login_latency": login_latency.snapshot(),
+        "loop_lag": loop_lag.snapshot(),
+        "chat_delivery": delivery.snapshot()
+    }
+
+
+def main():
+    args = parse_args()
+    # pwd_context는 settings.BCRYPT_ROUNDS로 만들어지므로 import 전에 지정
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    from core.config import settings
+    args.workers = settings.PASSWORD_HASH_WORKERS
+    args.max_pending = settings.PASSWORD_HASH_MAX_PENDING
+
+    modes = ["inline", "pool"] if args.mode == "both" else [args.mode]
+    print(
+        f"로그인 {args.logins}회 (동시 {args.concurrency}), bcrypt rounds={args.rounds}, "
+        f"채팅방 {args.rooms}개 x 연결 {args.sockets}개, 해시 스레드 {args.workers}개 / 대기 제한 {args.max_pending}"
+    )
+    for mode in modes:
+        result = asyncio.run(run(mode, args))
+        print(f"\n[{result['mode']}]")
+        print(f"  로그인 성공 {result['logins_ok']}, 거절(503) {result['logins_rejected']}, {result['logins_per_sec']}회/초")
+        print(f"  로그인 지연     {result['login_latency']}")
+        print(f"  이벤트 루프 지연 {result['loop_lag']}")
+        print(f"  채팅 전달 지연   {result['chat_delivery']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+판매 등록 이미지 업로드 벤치마크 (로컬 S3 호환 스텁 서버 사용)
+
+utils.s3_stub_server를 띄우고 같은 파일 묶음을
+sequential(변경 전: 이벤트 루프에서 upload_fileobj를 파일마다 순서대로 호출)과
+pipeline(services.storage.upload_images + S3Storage: 스레드 풀 동시 업로드 + 큰 파일 멀티파트)으로 올려
+전체 소요 시간과 그동안의 이벤트 루프 지연을 비교한다.
+
+    python bench_s3_upload.py
+    python bench_s3_upload.py --files 10 --size-kb 800 --large-mb 24 --delay 0.05
+"""
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10, help="한 번에 올리는 사진 수")
+    parser.add_argument("--size-kb", type=int, default=500, help="사진 하나의 크기(KB)")
+    parser.add_argument("--large-mb", type=int, default=20, help="멀티파트로 올라가는 큰 파일 크기(MB), 0이면 제외")
+    parser.add_argument("--delay", type=float, default=0.05, help="스텁 서버 요청별 지연(초)")
+    parser.add_argument("--rounds", type=int, default=3)
+    return parser.parse_args()
+
+
+def start_stub(delay: float):
+    import uvicorn
+    from utils.s3_stub_server import StubState, create_stub_app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    state = StubState(delay=delay)
+    server = uvicorn.Server(uvicorn.Config(create_stub_app(state), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 5
+    while not server.started and time.time() < deadline:
+        time.sleep(0.01)
+    return server, thread, state, port
+
+
+def make_files(args) -> list:
+    from fastapi import UploadFile
+
+    sizes = [args.size_kb * 1024] * args.files
+    if args.large_mb:
+        sizes.append(args.large_mb * 1024 * 1024)
+    files = []
+    for n, size in enumerate(sizes):
+        # 업로드 요청처럼 SpooledTemporaryFile에 담아 전달 (1MB 넘으면 디스크로 넘어감)
+        spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        spooled.write(os.urandom(size))
+        spooled.seek(0)
+        files.append(UploadFile(file=spooled, filename=f"photo{n}.jpg", headers={"content-type": "image/jpeg"}))
+    return files
+
+
+async def run(mode: str, files: list) -> dict:
+    import uuid
+    from services.storage import S3Storage, upload_images
+    from utils.metrics import LatencyTracker
+
+    store = S3Storage.from_settings()
+    # 클라이언트 생성 시간은 측정에서 제외
+    store.client
+
+    loop_lag = LatencyTracker(window=100000)
+    stop = asyncio.Event()
+
+    async def lag_probe():
+        while not stop.is_set():
+            expected = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            loop_lag.record(max(0.0, time.perf_counter() - expected))
+
+    probe = asyncio.create_task(lag_probe())
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    if mode == "sequential":
+        urls = []
+        for file in files:
+            await file.seek(0)
+            key = f"{uuid.uuid4()}.jpg"
+            store.client.upload_fileobj(file.file, store.bucket, key, ExtraArgs={"ContentType": file.content_type})
+            urls.append(store.url_for(key))
+    else:
+        urls = await upload_images(files, store)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    return {"mode": mode, "uploaded": len(urls), "seconds": round(elapsed, 3), "loop_lag": loop_lag.snapshot()}
+
+
+def main():
+    args = parse_args()
+    server, thread, state, port = start_stub(args.delay)
+    # 설정은 import 시점에 읽으므로 먼저 지정
+    os.environ["AWS_S3_ENDPOINT_URL"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("AWS_S3_BUCKET_NAME", "bench-bucket")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.setdefault("S3_MULTIPART_THRESHOLD_MB", "8")
+    from core.config import settings
+
+    print(
+        f"파일 {args.files + (1 if args.large_mb else 0)}개 (사진 {args.files}개 x {args.size_kb}KB + 큰 파일 {args.large_mb}MB), "
+        f"스텁 지연 {args.delay}s, 동시 업로드 {settings.S3_UPLOAD_CONCURRENCY}, "
+        f"멀티파트 기준 {settings.S3_MULTIPART_THRESHOLD_MB}MB"
+    )
+    try:
+        for mode in ("sequential", "pipeline"):
+            for _ in range(args.rounds):
+                before = len(state.requests)
+                # upload_fileobj는 전송이 끝나면 파일을 닫으므로 라운드마다 새로 만듦
+                result = asyncio.run(run(mode, make_files(args)))
+                print(
+                    f"[{result['mode']}] {result['uploaded']}개, {result['seconds']}s, "
+                    f"S3 요청 {len(state.requests) - before}회, 최대 동시 요청 {state.max_in_flight}, "
+                    f"루프 지연 max {result['loop_lag']['max_ms']}ms / p99 {result['loop_lag']['p99_ms']}ms"
+                )
+                state.max_in_flight = 0
+        stored = sorted(len(data) for data in state.objects.values())
+        print(f"스텁에 저장된 객체 {len(stored)}개 (가장 큰 객체 {stored[-1] / 1024 / 1024:.1f}MB)")
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
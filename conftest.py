@@ -0,0 +1,63 @@
+import io
+import os
+import unittest
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+# 테스트 실행 시 필수 설정값이 없으면 사용할 기본값 (.env 또는 실제 환경변수가 우선)
+TEST_SETTINGS = {
+    "PROJECT_NAME": "Recipe Recommendation System",
+    "VERSION": "1.0.0",
+    "API_V1_STR": "/api/v1",
+    "SECRET_KEY": "test-secret-key",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_DB": "recipe_db",
+    "CLOVA_OCR_API_URL": "http://localhost:9000/ocr",
+    "CLOVA_OCR_SECRET_KEY": "test",
+    "OPENAI_API_KEY": "test",
+    "STORAGE_BACKEND": "memory",
+}
+
+for key, value in TEST_SETTINGS.items():
+    os.environ.setdefault(key, value)
+
+# 설정되어 있을 때만 실제 Postgres를 쓰는 테스트 실행 (테스트마다 테이블을 지우고 다시 만듦)
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+def make_file(data: bytes, filename: str = "photo.jpg") -> UploadFile:
+    """업로드된 사진 파일"""
+    return UploadFile(file=io.BytesIO(data), filename=filename, headers={"content-type": "image/jpeg"})
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class DatabaseTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    TEST_DATABASE_URL에 빈 테이블을 만들고 끝나면 지우는 DB 테스트 기반 클래스
+
+    self.engine과 self.session_factory(expire_on_commit=False)를 제공한다.
+    하위 클래스의 asyncSetUp/asyncTearDown은 super()를 먼저/나중에 호출한다.
+    """
+
+    async def asyncSetUp(self):
+        from db.base import Base
+        import models.models  # noqa: F401  (모델 등록)
+
+        self.engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+        self.session_factory = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def asyncTearDown(self):
+        from db.base import Base
+
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await self.engine.dispose()
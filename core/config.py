@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
@@ -13,23 +14,113 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    ADMIN_EMAILS: List[str] = []  # /metrics 등 운영용 엔드포인트에 접근할 수 있는 계정 (JSON 배열, 비어 있으면 아무도 못 봄)
     
     # 데이터베이스 설정
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_SERVER: str
     POSTGRES_DB: str
+    DATABASE_REPLICA_URL: Optional[str] = None  # 조회 전용 복제본 (없으면 조회도 기본 DB의 READ ONLY 트랜잭션)
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # 변경 요청 뒤 이 시간 동안은 그 클라이언트의 조회를 기본 DB로 (복제 지연 대비)
+
+    # DB 연결 풀 설정 (워커 프로세스 하나 기준)
+    DB_POOL_SIZE: int = 50
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 90  # checkout 대기 한도(초)
+    DB_MAX_CONNECTIONS: Optional[int] = None  # 모든 워커가 합쳐 쓸 연결 수 (Postgres max_connections 중 이 앱 몫), 있으면 워커 수로 나눠 풀 크기 제한
+    WEB_CONCURRENCY: int = 1  # 워커 프로세스 수 (uvicorn/gunicorn --workers와 같게)
+    DB_POOL_SHED_TIMEOUT: Optional[float] = None  # 설정하면 checkout을 이 시간(초)만 기다리고 503 (과부하 시 빨리 거절)
+    DB_QUERY_CACHE_SIZE: int = 1200  # SQLAlchemy 컴파일 캐시 크기 (문장 형태별 컴파일된 SQL, 기본 500)
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500  # 연결별 asyncpg prepared statement 캐시 크기 (0이면 끔, pgbouncer transaction 모드면 0)
     
     # OCR 및 OpenAI 설정 추가
     CLOVA_OCR_API_URL: str
     CLOVA_OCR_SECRET_KEY: str
     OPENAI_API_KEY: str
     
-    AWS_ACCESS_KEY_ID: str
-    AWS_SECRET_ACCESS_KEY: str
-    AWS_REGION: str 
-    AWS_S3_BUCKET_NAME: str 
+    # 이미지 저장소 설정
+    STORAGE_BACKEND: str = "s3"  # s3 / local / memory
+    STORAGE_LOCAL_ROOT: str = "media"  # local 백엔드 저장 디렉터리
+    STORAGE_PUBLIC_URL: str = "/media"  # local 백엔드 URL 접두사 (경로이면 앱이 직접 제공)
+    STORAGE_DELETE_INTERVAL: float = 10.0  # 삭제 outbox 처리 주기(초), 0이면 처리하지 않음
+    STORAGE_DELETE_BATCH: int = 1000  # 한 번에 삭제하는 키 수 (S3 DeleteObjects 최대 1000)
+    STORAGE_DELETE_MAX_ATTEMPTS: int = 8  # 이 횟수만큼 실패하면 더 이상 재시도하지 않음
+    STORAGE_DELETE_RETRY_BACKOFF: float = 30.0  # 재시도 대기(초), 실패할 때마다 두 배
+    STORAGE_DELETE_LEASE: float = 300.0  # 고른 항목을 다른 워커가 고르지 않는 시간(초), 저장소 호출보다 길게
+
+    AWS_ACCESS_KEY_ID: Optional[str] = None
+    AWS_SECRET_ACCESS_KEY: Optional[str] = None
+    AWS_REGION: Optional[str] = None
+    AWS_S3_BUCKET_NAME: Optional[str] = None
+    AWS_S3_ENDPOINT_URL: Optional[str] = None  # MinIO 등 S3 호환 저장소 주소 (없으면 AWS)
+
+    # 이미지 업로드 설정
+    S3_UPLOAD_CONCURRENCY: int = 8  # 워커당 동시에 업로드하는 파일 수
+    S3_MULTIPART_THRESHOLD_MB: int = 8  # 이보다 큰 파일은 멀티파트 업로드
+    S3_MULTIPART_CHUNKSIZE_MB: int = 8
+    S3_MULTIPART_CONCURRENCY: int = 4  # 파일 하나의 파트를 동시에 보내는 수
+
+    # 이미지 파생본(썸네일/중간 크기) 설정
+    IMAGE_DERIVATIVE_WORKERS: int = 2  # 리사이즈 프로세스 수 (0이면 파생본을 만들지 않음)
+    IMAGE_THUMBNAIL_SIZE: int = 320  # 목록 카드용, 긴 변 픽셀
+    IMAGE_MEDIUM_SIZE: int = 1280  # 상세 화면용, 긴 변 픽셀
+    IMAGE_DERIVATIVE_QUALITY: int = 80
+    IMAGE_DEDUPE: bool = True  # 내용 해시 키로 저장해 같은 사진은 다시 올리지 않음
+
+    # 채팅 브로드캐스트 설정
+    CHAT_SEND_QUEUE_SIZE: int = 256
+    CHAT_SLOW_CONSUMER_POLICY: str = "drop"  # drop / coalesce / disconnect
+    CHAT_BROKER_BACKEND: str = "memory"  # memory / postgres (다중 워커)
+    CHAT_BROKER_DSN: Optional[str] = None  # 없으면 DATABASE_URL 사용
+    CHAT_UNREAD_CACHE_TTL: float = 300.0  # 안 읽은 수 메모리 카운터를 DB에서 다시 계산하는 주기(초), 0이면 사용하지 않음
+    CHAT_UNREAD_CACHE_USERS: int = 10000  # 안 읽은 수를 기억하는 최대 사용자 수
+
+    # 채팅 내역 설정
+    CHAT_HISTORY_PAGE_SIZE: int = 100  # 접속 시/스크롤 시 한 번에 보내는 메시지 수
+    CHAT_HISTORY_BUFFER_SIZE: int = 200  # 채팅방별 메모리에 유지하는 최근 메시지 수
+
+    # 인증 캐시 설정
+    AUTH_USER_CACHE_TTL: float = 30.0  # 사용자 스냅샷 유지 시간(초), 0이면 캐시하지 않음
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # 기억하는 토큰/사용자 최대 수
+
+    # 비밀번호 해시 설정
+    BCRYPT_ROUNDS: int = 12  # 바꾸면 기존 해시는 다음 로그인 때 새 값으로 다시 해시됨
+    PASSWORD_HASH_WORKERS: int = 2  # 동시에 bcrypt를 계산하는 스레드 수
+    PASSWORD_HASH_MAX_PENDING: int = 32  # 이보다 많이 밀리면 503으로 거절
+
+    # OCR 클라이언트 설정
+    OCR_PROVIDER: str = "clova"  # services.ocr_client.OCR_PROVIDERS의 키
+    OCR_TIMEOUT: float = 30.0  # 요청 전체 타임아웃(초)
+    OCR_CONNECT_TIMEOUT: float = 5.0
+    OCR_MAX_RETRIES: int = 2  # 네트워크 오류/5xx/429 재시도 횟수
+    OCR_RETRY_BACKOFF: float = 0.5  # 첫 재시도 대기(초), 이후 2배씩 증가
+    OCR_MAX_CONCURRENCY: int = 4  # 워커당 동시에 진행하는 OCR 호출 수
+    OCR_MAX_CONNECTIONS: int = 10
+
+    # 영수증 분석 작업 큐 설정
+    RECEIPT_JOB_WORKERS: int = 2  # 워커 프로세스당 동시에 처리하는 작업 수 (0이면 워커 없음)
+    RECEIPT_JOB_POLL_INTERVAL: float = 2.0  # 다른 프로세스가 넣은 작업을 확인하는 주기(초)
+    RECEIPT_JOB_VISIBILITY_TIMEOUT: float = 300.0  # 처리 중 상태가 이보다 오래되면 다시 처리
+    RECEIPT_JOB_MAX_ATTEMPTS: int = 3
+    TEMP_RECEIPT_MAX_AGE_HOURS: float = 24.0  # 이보다 오래 확정되지 않은 임시 품목은 삭제
+    TEMP_RECEIPT_SWEEP_INTERVAL: float = 600.0  # 정리 주기(초), 0이면 정리하지 않음
+    TEMP_RECEIPT_SWEEP_BATCH: int = 500  # 한 트랜잭션에서 삭제하는 최대 행 수
+
+    # 영수증 분석 결과 캐시 설정
+    RECEIPT_CACHE_TTL_HOURS: float = 168.0  # 캐시된 OCR/추출 결과 유지 시간 (0이면 캐시하지 않음)
+    RECEIPT_CACHE_MAX_ENTRIES: int = 10000  # 넘으면 오래 사용되지 않은 항목부터 삭제
+    RECEIPT_CACHE_PHASH_DISTANCE: int = 6  # 다시 찍은 사진으로 보는 dHash 해밍 거리 (0이면 정확히 같은 파일만)
 
+    # LLM 게이트웨이 설정
+    LLM_BACKEND: str = "openai"  # services.llm_gateway.LLM_BACKENDS의 키 (fake: 로컬 테스트용)
+    LLM_TIMEOUT: float = 60.0  # 호출 하나의 타임아웃(초)
+    LLM_MAX_CONCURRENCY: int = 4  # 워커당 동시에 진행하는 LLM 호출 수
+    LLM_RATE_PER_SECOND: float = 3.0  # 워커당 초당 호출 수 (0이면 제한 없음)
+    LLM_BURST: float = 5.0  # 한 번에 몰아서 보낼 수 있는 호출 수
+    LLM_CACHE_TTL_HOURS: float = 720.0  # 같은 프롬프트/입력 응답을 재사용하는 기간 (0이면 캐시하지 않음)
+    LLM_RECEIPT_MODEL: str = "gpt-4"
+    LLM_INGREDIENT_MODEL: str = "gpt-4o"
   
 
 
@@ -4,7 +4,14 @@ from jose import jwt
 from passlib.context import CryptContext
 from core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max를 기본값과 같게 두어 work factor가 다른 기존 해시는 needs_update로 판단되게 함
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
 
 def create_access_token(
     data: dict,
@@ -25,6 +32,7 @@ def create_access_token(
     )
     return encoded_jwt
 
+# 아래 동기 함수는 이벤트 루프를 막으므로 요청 처리 중에는 services.password_hasher를 사용
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
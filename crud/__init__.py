@@ -1,4 +1,4 @@
-from .crud_auth import get_user_by_email, get_user_by_username, create_user, authenticate_user, update_user_role, get_user_by_id
+from .crud_auth import get_user_by_email, get_user_by_username, create_user, authenticate_user, update_user_role, get_user_by_id, deactivate_user
 from .crud_recipe import recipe
 from .crud_user import user
 
@@ -11,5 +11,6 @@ __all__ = [
     "recipe",
     "user",
     "update_user_role"
-    "update_user_info" 
+    "update_user_info",
+    "deactivate_user"
 ]
\ No newline at end of file
@@ -1,21 +1,20 @@
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from core.security import get_password_hash, verify_password
 from models.models import User
 from schemas.auth import UserCreate,UserUpdate
 from models.models import UserRole
+from services.identity_cache import identity_cache
+from services.password_hasher import password_hasher
 from fastapi import HTTPException
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
-    print("---------------------------------------------------")
     result = await db.execute(
         select(User).filter(User.email == email)
     )
     return result.scalar_one_or_none()
 
 async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
-    print("---------------------------------------------------")
     result = await db.execute(
         select(User).filter(User.username == username)
     )
@@ -25,8 +24,12 @@ async def authenticate_user(db: AsyncSession, username: str, password: str) -> O
     user = await get_user_by_username(db, username=username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # work factor(BCRYPT_ROUNDS)가 바뀐 해시는 로그인 성공 시 다시 저장 (요청 세션 커밋 때 반영)
+        user.hashed_password = new_hash
     return user
 
 async def update_user_role(
@@ -53,6 +56,7 @@ async def update_user_role(
     user.trust_score = trust_score
     await db.commit()
     await db.refresh(user)
+    identity_cache.invalidate_user(user_id=user.id, email=user.email)
     return user
 
 async def get_user_by_nickname(db: AsyncSession, nickname: str) -> Optional[User]:
@@ -68,7 +72,7 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
             detail="Nickname already registered"
         )
         
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
@@ -102,6 +106,7 @@ async def update_user_info(
     
     if not user:
         return None
+    previous_email = user.email
     
     # 필드 업데이트
     update_dict = update_data.model_dump(exclude_unset=True)
@@ -121,7 +126,7 @@ async def update_user_info(
     
     # 비밀번호가 있으면 해시 처리
     if 'password' in update_dict:
-        user.hashed_password = get_password_hash(update_dict.pop('password'))
+        user.hashed_password = await password_hasher.hash(update_dict.pop('password'))
     
     # 사용자 객체 업데이트
     for field, value in update_dict.items():
@@ -131,4 +136,21 @@ async def update_user_info(
     # 변경사항 저장
     await db.commit()
     await db.refresh(user)
+    # 이전 이메일로 발급된 토큰도 캐시된 사용자로 인증되지 않도록 함께 제거
+    identity_cache.invalidate_user(user_id=user.id, email=previous_email)
+    return user
+
+async def deactivate_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """사용자 비활성화 (이후 요청은 get_current_active_user에서 거부됨)"""
+    result = await db.execute(
+        select(User).where(User.id == user_id)
+    )
+    user = result.scalar_one_or_none()
+    if not user:
+        return None
+
+    user.is_active = False
+    await db.commit()
+    await db.refresh(user)
+    identity_cache.invalidate_user(user_id=user.id, email=user.email)
     return user
\ No newline at end of file
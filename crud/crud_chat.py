@@ -1,11 +1,22 @@
+from typing import Optional, Tuple
 from fastapi import HTTPException
+from sqlalchemy import case, func, literal, true
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
-from models.models import Chat, Message, Sale, User
+from db.hot_queries import chat_messages_page
+from models.models import Chat, ChatReadCursor, Image, Message, Sale, User
 from schemas.chat import MessageCreate
 from datetime import datetime
 
+# 채팅방 응답(ChatBase)에 필요한 관계만 로드 (메시지는 내역 API/웹소켓으로 따로 조회)
+CHAT_RESPONSE_OPTIONS = (
+    joinedload(Chat.buyer),
+    joinedload(Chat.seller),
+    joinedload(Chat.item)
+)
+
 
 class CRUDchat:
     def __init__(self, db: AsyncSession):
@@ -14,23 +25,10 @@ class CRUDchat:
     async def create_chat(self, buyer_id: int, seller_id: int, item_id: int) -> Chat:
         """구매자가 채팅하기를 누르면 기존 채팅방이 있는지 확인 후 생성"""
 
-        # 사용자 및 상품 확인
-        buyer = await self.db.execute(select(User).filter(User.id == buyer_id))
-        buyer = buyer.scalars().first()
-
-        seller = await self.db.execute(select(User).filter(User.id == seller_id))
-        seller = seller.scalars().first()
-
-        sale_item = await self.db.execute(select(Sale).filter(Sale.id == item_id))
-        sale_item = sale_item.scalars().first()
-
-        if not buyer or not seller or not sale_item:
-            raise HTTPException(status_code=404, detail="User or Sale Item not found")
-
-        # 기존 채팅방 확인
+        # 기존 채팅방 확인 (대부분의 요청은 이미 있는 채팅방이므로 먼저 확인)
         existing_chat = await self.db.execute(
             select(Chat)
-            .options(joinedload(Chat.buyer), joinedload(Chat.seller), joinedload(Chat.item), joinedload(Chat.messages))
+            .options(*CHAT_RESPONSE_OPTIONS)
             .filter(Chat.buyer_id == buyer_id, Chat.seller_id == seller_id, Chat.item_id == item_id)
         )
         existing_chat = existing_chat.scalars().first()
@@ -38,16 +36,23 @@ class CRUDchat:
         if existing_chat:
             return existing_chat  # ✅ 기존 채팅방 반환
 
+        # 사용자 및 상품 확인
+        buyer = await self.db.execute(select(User.id).filter(User.id == buyer_id))
+        seller = await self.db.execute(select(User.id).filter(User.id == seller_id))
+        sale_item = await self.db.execute(select(Sale.id).filter(Sale.id == item_id))
+
+        if buyer.scalar() is None or seller.scalar() is None or sale_item.scalar() is None:
+            raise HTTPException(status_code=404, detail="User or Sale Item not found")
+
         # 새 채팅방 생성
         chat = Chat(buyer_id=buyer_id, seller_id=seller_id, item_id=item_id)
         self.db.add(chat)
         await self.db.commit()
-        await self.db.refresh(chat)
 
         # ✅ 즉시 로딩된 상태로 다시 조회 후 반환 (이게 핵심)
         chat_with_relations = await self.db.execute(
             select(Chat)
-            .options(joinedload(Chat.buyer), joinedload(Chat.seller), joinedload(Chat.item), joinedload(Chat.messages))
+            .options(*CHAT_RESPONSE_OPTIONS)
             .filter(Chat.id == chat.id)
         )
         return chat_with_relations.scalars().first()
@@ -57,13 +62,155 @@ class CRUDchat:
         """특정 사용자가 참여한 모든 채팅방 조회"""
         result = await self.db.execute(
             select(Chat)
-            .distinct()
-            .options(joinedload(Chat.buyer), joinedload(Chat.seller), joinedload(Chat.item))  # ✅ 즉시 로딩 추가
+            .options(*CHAT_RESPONSE_OPTIONS)
             .filter((Chat.buyer_id == user_id) | (Chat.seller_id == user_id))
         )
         return result.scalars().unique().all()
 
 
+    async def get_inbox(self, user_id: int, include_unread: bool = True) -> list[dict]:
+        """
+        받은편지함: 사용자가 참여한 채팅방별 상대방, 상품 제목/썸네일, 마지막 메시지, 안 읽은 수
+
+        LATERAL 조인으로 한 번의 쿼리에서 모두 조회한다.
+        include_unread=False면 안 읽은 수 계산(메시지 스캔)을 생략한다.
+        """
+        counterpart_id = case((Chat.buyer_id == user_id, Chat.seller_id), else_=Chat.buyer_id)
+
+        last_message = (
+            select(Message.id, Message.sender_id, Message.content, Message.timestamp)
+            .where(Message.chat_id == Chat.id)
+            .order_by(Message.timestamp.desc(), Message.id.desc())
+            .limit(1)
+            .lateral("last_message")
+        )
+        thumbnail = (
+            select(Image.image_url)
+            .where(Image.sale_id == Chat.item_id)
+            .order_by(Image.id)
+            .limit(1)
+            .lateral("thumbnail")
+        )
+
+        columns = [
+            Chat.id.label("chat_id"),
+            Chat.created_at,
+            Chat.item_id,
+            Sale.title.label("item_title"),
+            User.id.label("counterpart_id"),
+            User.nickname.label("counterpart_nickname"),
+            User.profile_image_url.label("counterpart_profile_image_url"),
+            thumbnail.c.image_url.label("thumbnail_url"),
+            last_message.c.id.label("last_message_id"),
+            last_message.c.sender_id.label("last_message_sender_id"),
+            last_message.c.content.label("last_message_content"),
+            last_message.c.timestamp.label("last_message_timestamp")
+        ]
+
+        query = (
+            select(*columns)
+            .select_from(Chat)
+            .outerjoin(Sale, Sale.id == Chat.item_id)
+            .outerjoin(User, User.id == counterpart_id)
+            .outerjoin(thumbnail, true())
+            .outerjoin(last_message, true())
+        )
+
+        if include_unread:
+            unread = (
+                select(func.count().label("unread_count"))
+                .where(
+                    Message.chat_id == Chat.id,
+                    Message.sender_id != user_id,
+                    Message.id > func.coalesce(ChatReadCursor.last_read_message_id, 0)
+                )
+                .lateral("unread")
+            )
+            query = (
+                query
+                .add_columns(unread.c.unread_count)
+                .outerjoin(
+                    ChatReadCursor,
+                    (ChatReadCursor.chat_id == Chat.id) & (ChatReadCursor.user_id == user_id)
+                )
+                .outerjoin(unread, true())
+            )
+        else:
+            query = query.add_columns(literal(None).label("unread_count"))
+
+        query = (
+            query
+            .where((Chat.buyer_id == user_id) | (Chat.seller_id == user_id))
+            .order_by(
+                func.coalesce(last_message.c.timestamp, Chat.created_at).desc(),
+                Chat.id.desc()
+            )
+        )
+        result = await self.db.execute(query)
+
+        inbox = []
+        for row in result.all():
+            inbox.append({
+                "chat_id": row.chat_id,
+                "counterpart": {
+                    "id": row.counterpart_id,
+                    "nickname": row.counterpart_nickname,
+                    "profile_image_url": row.counterpart_profile_image_url
+                } if row.counterpart_id is not None else None,
+                "item_id": row.item_id,
+                "item_title": row.item_title,
+                "thumbnail_url": row.thumbnail_url,
+                "last_message": {
+                    "id": row.last_message_id,
+                    "sender_id": row.last_message_sender_id,
+                    "content": row.last_message_content,
+                    "timestamp": row.last_message_timestamp
+                } if row.last_message_id is not None else None,
+                "unread_count": row.unread_count,
+                "created_at": row.created_at
+            })
+        return inbox
+
+    async def get_participants(self, chat_id: int) -> Optional[Tuple[int, int]]:
+        """채팅방의 (구매자 ID, 판매자 ID)"""
+        result = await self.db.execute(
+            select(Chat.buyer_id, Chat.seller_id).where(Chat.id == chat_id)
+        )
+        row = result.first()
+        return (row.buyer_id, row.seller_id) if row else None
+
+    async def mark_read(self, chat_id: int, user_id: int, message_id: Optional[int] = None) -> int:
+        """
+        읽음 위치 저장 (upsert). message_id가 없으면 채팅방의 마지막 메시지까지 읽음 처리
+
+        읽음 위치는 뒤로 가지 않으며, 저장된 마지막 읽은 메시지 ID를 반환한다.
+        """
+        if message_id is None:
+            latest = await self.db.execute(
+                select(func.coalesce(func.max(Message.id), 0)).where(Message.chat_id == chat_id)
+            )
+            message_id = latest.scalar()
+
+        stmt = insert(ChatReadCursor).values(
+            chat_id=chat_id,
+            user_id=user_id,
+            last_read_message_id=message_id,
+            updated_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_chat_read_cursor",
+            set_={
+                "last_read_message_id": func.greatest(
+                    ChatReadCursor.last_read_message_id, stmt.excluded.last_read_message_id
+                ),
+                "updated_at": stmt.excluded.updated_at
+            }
+        ).returning(ChatReadCursor.last_read_message_id)
+        result = await self.db.execute(stmt)
+        last_read = result.scalar()
+        await self.db.commit()
+        return last_read
+
     async def send_message(self, message: MessageCreate) -> Message:
         """채팅 메시지 저장"""
         new_message = Message(**message.dict())
@@ -71,50 +218,45 @@ class CRUDchat:
         await self.db.commit()
         await self.db.refresh(new_message)
         return new_message
-    async def get_chat_messages(self, room_id: int, limit: int = 100) -> list[dict]:
+    async def get_chat_messages(self, room_id: int, limit: int = 100, before: Optional[int] = None) -> list[dict]:
         """
         특정 채팅방의 최근 메시지 내역을 불러오는 함수
         
         Args:
             room_id: 채팅방 ID
             limit: 불러올 메시지 개수 (기본 100개)
+            before: 이 메시지 ID보다 이전 메시지만 조회 (스크롤 페이지네이션)
             
         Returns:
             최근 메시지 목록 (시간순 정렬)
         """
-        try:
-            # timestamp 필드 사용
-            query = select(Message).where(Message.chat_id == room_id).order_by(Message.timestamp).limit(limit)
-            result = await self.db.execute(query)
-            messages = result.scalars().all()
-            
-            # 메시지를 JSON 직렬화 가능한 형태로 변환
-            message_list = []
-            for msg in messages:
-                try:
-                    # None 체크만 수행
-                    timestamp_str = msg.timestamp.isoformat() if msg.timestamp else None
-                    
-                    message_list.append({
-                        "id": msg.id,
-                        "sender_id": msg.sender_id,
-                        "content": msg.content,
-                        "timestamp": timestamp_str,
-                        "chat_id": msg.chat_id
-                    })
-                except Exception as e:
-                    print(f"메시지 변환 중 오류 (메시지 ID: {msg.id}): {str(e)}")
-                    # 오류가 있는 경우 timestamp를 None으로 처리하고 계속 진행
-                    message_list.append({
-                        "id": msg.id,
-                        "sender_id": msg.sender_id,
-                        "content": msg.content,
-                        "timestamp": None,
-                        "chat_id": msg.chat_id
-                    })
-            
-            return message_list
-        except Exception as e:
-            print(f"채팅 내역 조회 중 오류: {str(e)}")
-            # 오류가 발생해도 빈 리스트 반환하여 연결이 끊어지지 않도록 함
-            return []
+        # 최신순으로 limit개를 가져온 뒤 시간순으로 뒤집음 ((timestamp, id) 커서 페이지네이션)
+        result = await self.db.execute(chat_messages_page(room_id, limit, before))
+        messages = list(reversed(result.scalars().all()))
+        
+        # 메시지를 JSON 직렬화 가능한 형태로 변환
+        message_list = []
+        for msg in messages:
+            try:
+                # None 체크만 수행
+                timestamp_str = msg.timestamp.isoformat() if msg.timestamp else None
+                
+                message_list.append({
+                    "id": msg.id,
+                    "sender_id": msg.sender_id,
+                    "content": msg.content,
+                    "timestamp": timestamp_str,
+                    "chat_id": msg.chat_id
+                })
+            except Exception as e:
+                print(f"메시지 변환 중 오류 (메시지 ID: {msg.id}): {str(e)}")
+                # 오류가 있는 경우 timestamp를 None으로 처리하고 계속 진행
+                message_list.append({
+                    "id": msg.id,
+                    "sender_id": msg.sender_id,
+                    "content": msg.content,
+                    "timestamp": None,
+                    "chat_id": msg.chat_id
+                })
+        
+        return message_list
@@ -1,7 +1,9 @@
+from typing import Optional
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
+from db.hot_queries import chatroom_by_id, group_chat_messages_page
 from models.models import GroupChatroom, GroupChatMessage, GroupChatParticipant, GroupPurchase, User
 from schemas.group_chat import GroupChatroomCreate, GroupChatMessageCreate
 
@@ -30,22 +32,12 @@ async def create_chatroom(db: AsyncSession, group_purchase_id: int) -> GroupChat
     await db.commit()
     await db.refresh(chatroom)
     
-    # 관계형 데이터와 함께 채팅방 반환
-    result = await db.execute(
-        select(GroupChatroom)
-        .options(joinedload(GroupChatroom.group_purchase))
-        .filter(GroupChatroom.id == chatroom.id)
-    )
-    return result.scalars().first()
+    return chatroom
 
 
 async def get_chatroom(db: AsyncSession, chatroom_id: int) -> GroupChatroom:
     """채팅방 ID로 채팅방 조회"""
-    result = await db.execute(
-        select(GroupChatroom)
-        .options(joinedload(GroupChatroom.group_purchase))
-        .filter(GroupChatroom.id == chatroom_id)
-    )
+    result = await db.execute(chatroom_by_id(chatroom_id))
     return result.scalars().first()
 
 
@@ -53,7 +45,6 @@ async def get_chatroom_by_group_purchase(db: AsyncSession, group_purchase_id: in
     """그룹 구매 ID로 채팅방 조회"""
     result = await db.execute(
         select(GroupChatroom)
-        .options(joinedload(GroupChatroom.group_purchase))
         .filter(GroupChatroom.group_purchase_id == group_purchase_id)
     )
     return result.scalars().first()
@@ -119,28 +110,21 @@ async def create_chat_message(db: AsyncSession, chat_message: GroupChatMessageCr
     return db_message
 
 
-async def get_chat_messages(db: AsyncSession, chatroom_id: int, limit: int = 100) -> list[GroupChatMessage]:
-    """채팅방의 메시지 이력 조회"""
-    try:
-        # 채팅방 존재 확인
-        chatroom = await get_chatroom(db, chatroom_id)
-        if not chatroom:
-            raise HTTPException(status_code=404, detail="채팅방을 찾을 수 없습니다.")
-        
-        # 메시지 조회 (시간순 정렬)
-        result = await db.execute(
-            select(GroupChatMessage)
-            .options(joinedload(GroupChatMessage.sender))
-            .filter(GroupChatMessage.chatroom_id == chatroom_id)
-            .order_by(GroupChatMessage.timestamp)
-            .limit(limit)
-        )
-        
-        return result.scalars().all()
-    except Exception as e:
-        print(f"채팅 메시지 조회 중 오류: {str(e)}")
-        # 오류가 발생해도 빈 리스트 반환하여 연결이 끊어지지 않도록 함
-        return []
+async def get_chat_messages(
+    db: AsyncSession,
+    chatroom_id: int,
+    limit: int = 100,
+    before: Optional[int] = None
+) -> list[GroupChatMessage]:
+    """
+    채팅방의 메시지 이력 조회 (최신 limit개, 시간순 정렬)
+
+    before에 메시지 ID를 주면 그 메시지보다 이전 메시지를 조회한다 (스크롤 페이지네이션).
+    """
+    # 최신순으로 limit개를 가져온 뒤 시간순으로 뒤집음 ((timestamp, id) 커서 페이지네이션)
+    result = await db.execute(group_chat_messages_page(chatroom_id, limit, before))
+    messages = result.scalars().all()
+    return list(reversed(messages))
 
 
 async def get_chatroom_participants(db: AsyncSession, chatroom_id: int) -> list[GroupChatParticipant]:
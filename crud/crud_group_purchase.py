@@ -7,7 +7,8 @@ from sqlalchemy.orm import selectinload, joinedload
 from datetime import datetime
 from models.models import GroupPurchase, GroupPurchaseParticipant, User, Image, GroupPurchaseStatus
 from schemas.group_purchases import GroupPurchaseCreate, GroupPurchaseUpdate, GroupPurchase as GroupPurchaseSchema
-from services.s3_service import upload_images_to_s3, delete_images_from_s3
+from services.storage import delete_images, upload_images
+from services.image_registry import image_registry
 
 class CRUDGroupPurchase:
     def __init__(self, db: AsyncSession):
@@ -19,7 +20,8 @@ class CRUDGroupPurchase:
         group_purchase_data: GroupPurchaseCreate,
         current_user: User,
         saving_price: float,
-        image_urls: Optional[List[str]] = None
+        image_urls: Optional[List[str]] = None,
+        derivatives: Optional[List[Optional[dict]]] = None
     ) -> GroupPurchase:
         """
         공동구매 생성 (이미지 포함)
@@ -45,10 +47,11 @@ class CRUDGroupPurchase:
             # 이미지가 있다면 저장
             if image_urls:
                 image_objects = []
-                for url in image_urls:
+                for url, derived in zip(image_urls, derivatives or [None] * len(image_urls)):
                     image = Image(
                         group_purchase_id=db_obj.id, 
-                        image_url=url
+                        image_url=url,
+                        derivatives=derived
                     )
                     image_objects.append(image)
                     
@@ -86,7 +89,6 @@ class CRUDGroupPurchase:
             result = await self.db.execute(
                 select(GroupPurchase)
                 .options(selectinload(GroupPurchase.images))
-                .options(selectinload(GroupPurchase.participants))
                 .where(GroupPurchase.id == id)
             )
             return result.scalar_one_or_none()
@@ -124,7 +126,8 @@ class CRUDGroupPurchase:
         group_purchase_id: int, 
         current_user: User, 
         obj_in: GroupPurchaseUpdate,
-        image_urls: Optional[List[str]] = None
+        image_urls: Optional[List[str]] = None,
+        derivatives: Optional[List[Optional[dict]]] = None
     ) -> Optional[GroupPurchase]:
         """
         공동구매 수정 (이미지 업데이트 포함)
@@ -162,10 +165,8 @@ class CRUDGroupPurchase:
                 
             # 이미지 변경이 있는 경우
             if image_urls is not None:
-                # 기존 이미지 S3에서 삭제
-                existing_images = [img.image_url for img in db_obj.images] if db_obj.images else []
-                if existing_images:
-                    await delete_images_from_s3(existing_images)
+                # 기존 이미지 참조 해제 (참조가 없어진 객체만 같은 트랜잭션의 outbox에 기록)
+                await image_registry.release(self.db, db_obj.images)
                 
                 # DB에서 기존 이미지 삭제
                 await self.db.execute(
@@ -174,7 +175,10 @@ class CRUDGroupPurchase:
                 await self.db.flush()
                 
                 # 새 이미지 추가
-                new_image_objects = [Image(group_purchase_id=db_obj.id, image_url=url) for url in image_urls]
+                new_image_objects = [
+                    Image(group_purchase_id=db_obj.id, image_url=url, derivatives=derived)
+                    for url, derived in zip(image_urls, derivatives or [None] * len(image_urls))
+                ]
                 self.db.add_all(new_image_objects)
                 
             await self.db.commit()
@@ -201,7 +205,7 @@ class CRUDGroupPurchase:
         current_user: User
     ) -> Dict[str, Any]:
         """
-        공동구매 삭제 (S3 이미지 삭제)
+        공동구매 삭제 (이미지 삭제는 outbox에 기록)
         """
         try:
             # 기존 공동구매 조회 (이미지 포함)
@@ -219,16 +223,12 @@ class CRUDGroupPurchase:
             if db_obj.created_by != current_user.id:
                 return {"error": "Only the creator can delete this group purchase"}
                 
-            # 이미지 URL 추출
-            image_urls = [img.image_url for img in db_obj.images] if db_obj.images else []
+            # 이미지 참조 해제 (참조가 없어진 객체만 파생본과 함께 outbox에 기록)
+            await image_registry.release(self.db, db_obj.images)
             
             # DB에서 공동구매 삭제 (이미지는 cascade로 자동 삭제)
             await self.db.delete(db_obj)
             await self.db.commit()
-            
-            # S3에서 이미지 삭제
-            if image_urls:
-                await delete_images_from_s3(image_urls)
                 
             return {"message": "Group purchase and images successfully deleted"}
             
@@ -1,9 +1,38 @@
+from collections import Counter
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from crud.base import CRUDBase
-from models.models import Recipe
+from models.models import Image, Recipe
 from schemas import RecipeCreate, RecipeUpdate
+from services.image_registry import blob_hash, image_registry
+from services.storage import ObjectStorage, storage
+
+IMAGE_FIELDS = ("image_large", "image_small", "cooking_img")
+
+
+def recipe_images(
+    image_large: Optional[str],
+    image_small: Optional[str],
+    cooking_img: Optional[List[str]],
+    backend: Optional[ObjectStorage] = None
+) -> List[Image]:
+    """
+    레시피가 가진 이미지 참조 (대표 이미지 하나 + 요리 과정 이미지마다 하나)
+
+    대표 이미지는 파생본 URL(중간 크기/썸네일)만 저장하므로 둘을 한 참조로 묶는다.
+    외부 이미지 URL(공공 데이터 레시피 등)은 저장소 객체가 아니므로 제외한다.
+    """
+    backend = backend or storage
+    images = []
+    main = [url for url in (image_large, image_small) if backend.owns(url)]
+    if main:
+        images.append(Image(image_url=main[0], derivatives={"small": {"url": main[-1]}}))
+    for url in cooking_img or []:
+        if backend.owns(url):
+            images.append(Image(image_url=url))
+    return images
+
 
 class CRUDRecipe(CRUDBase[Recipe, RecipeCreate, RecipeUpdate]):
     async def get_recipe(self, db: AsyncSession, id: int) -> Optional[Recipe]:
@@ -73,4 +102,50 @@ class CRUDRecipe(CRUDBase[Recipe, RecipeCreate, RecipeUpdate]):
         )
         return result.scalar_one_or_none()
 
+    async def update_with_images(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Recipe,
+        obj_in: RecipeUpdate,
+        backend: Optional[ObjectStorage] = None
+    ) -> Recipe:
+        """레시피 수정 (빠진 이미지는 참조를 해제, 업로드하지 않은 저장소 이미지 URL은 ValueError)"""
+        backend = backend or storage
+        update_data = obj_in.model_dump(exclude_unset=True)
+        if any(field in update_data for field in IMAGE_FIELDS):
+            current = {field: getattr(db_obj, field) for field in IMAGE_FIELDS}
+            before = recipe_images(**current, backend=backend)
+            replaced = {field: update_data[field] for field in IMAGE_FIELDS if field in update_data}
+            after = recipe_images(**{**current, **replaced}, backend=backend)
+
+            def hashes(images):
+                return Counter(blob_hash(backend.key_for(image.image_url)) for image in images)
+
+            # 다른 게시글의 이미지를 가져오면 참조 수 없이 공유하게 되므로 거부
+            if hashes(after) - hashes(before):
+                raise ValueError("새 이미지는 업로드로만 추가할 수 있습니다")
+            removed = hashes(before) - hashes(after)
+            released = []
+            for image in before:
+                content_hash = blob_hash(backend.key_for(image.image_url))
+                if removed[content_hash] > 0:
+                    removed[content_hash] -= 1
+                    released.append(image)
+            # 커밋은 update에서 (수정이 실패하면 참조 수도 그대로)
+            await image_registry.release(db, released, backend)
+        return await self.update(db, db_obj=db_obj, obj_in=update_data)
+
+    async def remove_with_images(
+        self, db: AsyncSession, *, db_obj: Recipe, backend: Optional[ObjectStorage] = None
+    ) -> Recipe:
+        """레시피 삭제 (대표/요리 과정 이미지 참조를 같은 트랜잭션에서 해제)"""
+        await image_registry.release(
+            db, recipe_images(db_obj.image_large, db_obj.image_small, db_obj.cooking_img, backend), backend
+        )
+        await db.delete(db_obj)
+        await db.commit()
+        return db_obj
+
+
 recipe = CRUDRecipe(Recipe)
\ No newline at end of file
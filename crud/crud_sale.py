@@ -7,7 +7,9 @@ from sqlalchemy.orm import selectinload  # ✅ 관계 강제 로드 추가
 from sqlalchemy.exc import IntegrityError
 from models.models import Sale, Ingredient, User, Image
 from schemas.sale import SaleCreate, SaleImageResponse, SaleResponse
-from services.s3_service import upload_images_to_s3, delete_images_from_s3
+from services.image_derivatives import DEFAULT_FORMAT, pick_rendition
+from services.storage import delete_images, upload_images
+from services.image_registry import image_registry
 from fastapi import UploadFile
 from sqlalchemy.orm import joinedload 
 
@@ -17,7 +19,9 @@ class CRUDsale:
         self.db = db
 
 
-    async def register_sale(self, sale_data: SaleCreate, image_urls: List[str]) -> dict:
+    async def register_sale(
+        self, sale_data: SaleCreate, image_urls: List[str], derivatives: Optional[List[Optional[dict]]] = None
+    ) -> dict:
         try:
             print(f"📌 저장할 이미지 URL 리스트: {image_urls}")  # ✅ 디버깅 코드 추가
 
@@ -57,7 +61,11 @@ class CRUDsale:
 
             # ✅ 이미지가 있을 경우에만 Image 테이블에 저장
             if image_urls:
-                image_objects = [Image(sale_id=sale.id, image_url=url) for url in image_urls]
+                derivatives = derivatives or [None] * len(image_urls)
+                image_objects = [
+                    Image(sale_id=sale.id, image_url=url, derivatives=derived)
+                    for url, derived in zip(image_urls, derivatives)
+                ]
                 self.db.add_all(image_objects)
 
             # ✅ DB 커밋
@@ -90,7 +98,8 @@ class CRUDsale:
                 "contents": sale.contents,
                 "amount": sale.amount,  # ✅ 추가된 amount 반환
                 "category": sale.category,  # ✅ 응답에도 category 필드 추가
-                "images": image_urls  # ✅ 빈 리스트일 수도 있음
+                "images": image_urls,  # ✅ 빈 리스트일 수도 있음
+                "thumbnails": [pick_rendition(img.image_url, img.derivatives) for img in sale.images]
             }
 
         except Exception as e:
@@ -101,7 +110,7 @@ class CRUDsale:
 
 
     async def delete_sale(self, sale_id: int) -> dict:
-        """상품 삭제 및 AWS S3 이미지 삭제, Ingredient.amount 복구"""
+        """상품 삭제 및 이미지 삭제 예약(outbox), Ingredient.amount 복구"""
         try:
         # ✅ Sale 및 연결된 이미지 조회 (이미지 관계 강제 로드)
             result = await self.db.execute(
@@ -112,9 +121,6 @@ class CRUDsale:
             if not sale:
                 return {"error": "Sale not found"}
             
-            # ✅ 연결된 이미지 URL 추출
-            image_urls = [img.image_url for img in sale.images] if sale.images else []
-
             # ✅ 관련된 Ingredient 테이블에서 원래 amount 복구
             ingredient_result = await self.db.execute(
                 select(Ingredient).where(Ingredient.id == sale.ingredient_id)
@@ -125,16 +131,13 @@ class CRUDsale:
                 ingredient.amount += sale.amount  # ✅ 판매 취소된 수량만큼 복구
                 await self.db.flush()
 
+            # ✅ 이미지 참조 해제: 더 이상 쓰는 곳이 없는 객체만 같은 트랜잭션의 outbox에 기록 (백그라운드에서 일괄 삭제)
+            await image_registry.release(self.db, sale.images)
+
             # ✅ DB에서 Sale 삭제 (Cascade로 Image도 자동 삭제됨)
             await self.db.delete(sale)
             await self.db.commit()
 
-            # ✅ AWS S3에서 이미지 삭제 (이미지가 있는 경우)
-            if image_urls:
-                success = await delete_images_from_s3(image_urls)
-                if not success:
-                    return {"error": "Failed to delete images from S3"}
-
             return {"message": "Sale and images successfully deleted, Ingredient amount restored"}
 
         except Exception as e:
@@ -143,7 +146,13 @@ class CRUDsale:
             print(f"🚨 Unexpected error during sale deletion: {e}")
             return {"error": "Unexpected error", "details": str(e)}
 
-    async def update_sale(self, sale_id: int, sale_data: SaleCreate, image_urls: Optional[List[str]]) -> dict:
+    async def update_sale(
+        self,
+        sale_id: int,
+        sale_data: SaleCreate,
+        image_urls: Optional[List[str]],
+        derivatives: Optional[List[Optional[dict]]] = None
+    ) -> dict:
         """판매 정보 수정 및 Ingredient.amount 조정 (이미지 변경 반영)"""
         try:
             # ✅ 기존 Sale 데이터 조회
@@ -187,14 +196,19 @@ class CRUDsale:
 
             # ✅ 이미지 변경이 있는 경우: 기존 이미지 삭제 후 새 이미지 추가
             if image_urls is not None:
-                # 기존 이미지 삭제
+                # 기존 이미지 삭제 (참조가 없어진 저장소 객체만 outbox에 기록)
+                await image_registry.release(self.db, sale.images)
                 await self.db.execute(
                     delete(Image).where(Image.sale_id == sale_id)
                 )
                 await self.db.flush()
 
                 # 새 이미지 추가
-                new_image_objects = [Image(sale_id=sale.id, image_url=url) for url in image_urls]
+                derivatives = derivatives or [None] * len(image_urls)
+                new_image_objects = [
+                    Image(sale_id=sale.id, image_url=url, derivatives=derived)
+                    for url, derived in zip(image_urls, derivatives)
+                ]
                 self.db.add_all(new_image_objects)
 
             await self.db.commit()
@@ -216,7 +230,9 @@ class CRUDsale:
                 "contents": sale.contents,
                 "amount": sale.amount,
                 "category": sale.category,  # ✅ 카테고리 필드 추가
-                "images": image_urls if image_urls else [img.image_url for img in sale.images]  # ✅ 이미지 반영
+                "images": image_urls if image_urls else [img.image_url for img in sale.images],  # ✅ 이미지 반영
+                "thumbnails": [pick_rendition(url, derived) for url, derived in zip(image_urls, derivatives)]
+                if image_urls else [pick_rendition(img.image_url, img.derivatives) for img in sale.images]
             }
 
         except Exception as e:
@@ -234,8 +250,8 @@ class CRUDsale:
         )
         return result.scalar_one_or_none()
     
-    async def get_all_sales(self):
-        """ 등록된 모든 상품 조회 (이미지 포함) """
+    async def get_all_sales(self, image_format: str = DEFAULT_FORMAT):
+        """ 등록된 모든 상품 조회 (이미지 포함, 썸네일은 image_format으로) """
         result = await self.db.execute(
             select(Sale).options(selectinload(Sale.images))
         )
@@ -260,11 +276,14 @@ class CRUDsale:
                 amount=sale.amount,
                 contents=sale.contents,
                 category=sale.category,  # ✅ 카테고리 필드 추가
-                images=[img.image_url for img in sale.images]
+                images=[img.image_url for img in sale.images],
+                thumbnails=[pick_rendition(img.image_url, img.derivatives, "thumb", image_format) for img in sale.images]
             ))
         return sales_list
 
-    async def get_sales_by_location(self, user_lat: float, user_lon: float, radius: int = 5000):
+    async def get_sales_by_location(
+        self, user_lat: float, user_lon: float, radius: int = 5000, image_format: str = DEFAULT_FORMAT
+    ):
             """
             특정 위치를 기준으로 반경 N km 내의 상품을 조회하는 메서드
             - `earth_distance`를 활용하여 반경 N km 내의 상품을 필터링
@@ -305,7 +324,10 @@ class CRUDsale:
                     amount=sale.amount,
                     contents=sale.contents,
                     category=sale.category,  # ✅ 카테고리 필드 추가
-                    images=[img.image_url for img in sale.images]  # ✅ 이미지 URL 리스트 반환
+                    images=[img.image_url for img in sale.images],  # ✅ 이미지 URL 리스트 반환
+                    thumbnails=[
+                        pick_rendition(img.image_url, img.derivatives, "thumb", image_format) for img in sale.images
+                    ]
                 )
                 for sale in sales
             ]
@@ -1,9 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.sql import func, and_
+from sqlalchemy.sql import func
 from geoalchemy2.elements import WKTElement
 from schemas.transaction import (TransDTO, ArriveDTO)
 from models.models import Sale, Transaction, User, Ingredient
+from db.hot_queries import trading_transaction
 from geoalchemy2 import Geometry
 from geoalchemy2.functions import ST_GeomFromEWKT
 from datetime import datetime, timedelta
@@ -30,7 +31,7 @@ class CRUDtransaction:
         return new_trans
     
     async def arrive(self, payload:ArriveDTO):
-        trans_result = await self._session.execute(select(Transaction).filter(and_(Transaction.sale_id == payload.sale_id, Transaction.status == "Trading")))
+        trans_result = await self._session.execute(trading_transaction(payload.sale_id))
         trans = trans_result.scalars().first()
         if not trans:
             return 1
@@ -63,7 +64,7 @@ class CRUDtransaction:
             return {"error":"거리가 인증이 되지 않습니다."}
         
     async def success(self, sale_id: int):
-        result = await self._session.execute(select(Transaction).filter(and_(Transaction.sale_id == sale_id, Transaction.status == "Trading")))
+        result = await self._session.execute(trading_transaction(sale_id))
         transaction = result.scalars().first()
         if transaction and transaction.buyer_time and transaction.seller_time:
             transaction.status = "Complete"
@@ -98,7 +99,7 @@ class CRUDtransaction:
         return -1
     
     async def cancel(self, sale_id: int):
-        result = await self._session.execute(select(Transaction).filter(and_(Transaction.sale_id == sale_id, Transaction.status == "Trading")))
+        result = await self._session.execute(trading_transaction(sale_id))
         transaction = result.scalars().first()
         if transaction:
             transaction.status = "Cancel"
@@ -135,5 +136,5 @@ class CRUDtransaction:
             return -1
 
     async def get_transaction(self, sale_id: int):
-        trans_result = await self._session.execute(select(Transaction).filter(and_(Transaction.sale_id == sale_id, Transaction.status == "Trading")))
+        trans_result = await self._session.execute(trading_transaction(sale_id))
         return trans_result.scalar_one_or_none()
\ No newline at end of file
@@ -1,7 +1,7 @@
 from typing import Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from crud.base import CRUDBase
+from db.hot_queries import profile_by_user
 from models.models import UserProfile
 from schemas.users import UserProfileCreate, UserProfileUpdate
 
@@ -9,9 +9,7 @@ class CRUDUser(CRUDBase[UserProfile, UserProfileCreate, UserProfileUpdate]):
     async def get_profile(
         self, db: AsyncSession, *, user_id: int
     ) -> Optional[UserProfile]:
-        result = await db.execute(
-            select(UserProfile).where(UserProfile.user_id == user_id)
-        )
+        result = await db.execute(profile_by_user(user_id))
         return result.scalar_one_or_none()
 
     async def create_with_owner(
@@ -27,9 +25,7 @@ class CRUDUser(CRUDBase[UserProfile, UserProfileCreate, UserProfileUpdate]):
     async def update_recipe_history(
         self, db: AsyncSession, *, user_id: int, recipe_id: int
     ) -> Optional[UserProfile]:
-        result = await db.execute(
-            select(UserProfile).where(UserProfile.user_id == user_id)
-        )
+        result = await db.execute(profile_by_user(user_id))
         db_obj = result.scalar_one_or_none()
         if not db_obj:
             return None
@@ -1,11 +1,12 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
+from sqlalchemy import cast, func, update
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.orm.attributes import set_committed_value
 from crud.base import CRUDBase
+from db.hot_queries import profile_by_user, profile_scoring_inputs
 from models.models import UserProfile
 from schemas.users import UserProfileCreate, UserProfileUpdate
-from sqlalchemy import inspect
-from sqlalchemy.orm.attributes import flag_modified
 
 class CRUDUserProfile(CRUDBase[UserProfile, UserProfileCreate, UserProfileUpdate]):
     async def get_profile(
@@ -14,34 +15,44 @@ class CRUDUserProfile(CRUDBase[UserProfile, UserProfileCreate, UserProfileUpdate
         user_id: int
     ) -> Optional[UserProfile]:
         """사용자 프로필 조회"""
-        result = await db.execute(
-            select(self.model).where(self.model.user_id == user_id)
-        )
+        result = await db.execute(profile_by_user(user_id))
         return result.scalar_one_or_none()
 
 
+    async def get_scoring_inputs(self, db: AsyncSession, user_id: int) -> Optional[Tuple[Dict, int]]:
+        """추천 점수용 (영양소 제한, 요리 기록 수) - 기록/평가 배열은 DB에서 길이만 셈"""
+        result = await db.execute(profile_scoring_inputs(user_id))
+        row = result.one_or_none()
+        return (row[0] or {}, row[1]) if row is not None else None
+
     async def update_recipe_history(
         self, 
         db: AsyncSession, 
         profile: UserProfile, 
         recipe_id: int
     ) -> UserProfile:
-        """레시피 히스토리 업데이트"""
-        if profile.recipe_history is None:
-            profile.recipe_history = []
-        
-        # 새로운 리스트 생성 및 할당
-        updated_history = list(profile.recipe_history)
-        if recipe_id not in updated_history:
-            updated_history.append(recipe_id)
-            profile.recipe_history = updated_history
-            
-            # flag_modified 사용하여 변경 감지
-            flag_modified(profile, "recipe_history")
-        
-        db.add(profile)
+        """
+        레시피 히스토리 업데이트
+
+        DB에서 배열 끝에 붙이므로 기록이 길어져도 전체를 다시 보내지 않고,
+        동시에 다른 레시피를 완료해도 서로 덮어쓰지 않는다.
+        """
+        history = func.coalesce(UserProfile.recipe_history, cast([], JSONB))
+        entry = func.jsonb_build_array(recipe_id)
+        result = await db.execute(
+            update(UserProfile)
+            .where(UserProfile.id == profile.id, ~history.contains(entry))
+            .values(recipe_history=history.op("||")(entry))
+            .returning(UserProfile.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        updated_at = result.scalar_one_or_none()
         await db.commit()
-        await db.refresh(profile)
+
+        # 이미 불러온 프로필은 다시 조회하지 않고 같은 변경을 반영
+        if updated_at is not None:
+            set_committed_value(profile, "recipe_history", list(profile.recipe_history or []) + [recipe_id])
+            set_committed_value(profile, "updated_at", updated_at)
         return profile
 
     async def update_rating(
@@ -51,21 +62,49 @@ class CRUDUserProfile(CRUDBase[UserProfile, UserProfileCreate, UserProfileUpdate
         recipe_id: int, 
         rating: float
     ) -> UserProfile:
-        """레시피 평가 업데이트"""
-        if profile.ratings is None:
-            profile.ratings = {}
-        
-        # 새로운 딕셔너리 생성 및 할당
-        updated_ratings = dict(profile.ratings)
-        updated_ratings[str(recipe_id)] = rating
-        profile.ratings = updated_ratings
-        
-        # flag_modified 직접 사용
-        flag_modified(profile, "ratings")
-        
-        db.add(profile)
+        """레시피 평가 업데이트 (DB에서 키 하나만 합침)"""
+        result = await db.execute(
+            update(UserProfile)
+            .where(UserProfile.id == profile.id)
+            .values(ratings=_merged_rating(recipe_id, rating))
+            .returning(UserProfile.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        updated_at = result.scalar_one()
         await db.commit()
-        await db.refresh(profile)
+
+        set_committed_value(profile, "ratings", {**(profile.ratings or {}), str(recipe_id): rating})
+        set_committed_value(profile, "updated_at", updated_at)
         return profile
 
+    async def rate(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        recipe_id: int,
+        rating: float
+    ) -> Optional[UserProfile]:
+        """
+        사용자 ID로 바로 평가를 합치고 갱신된 프로필을 돌려받음
+
+        프로필을 먼저 조회하지 않고 UPDATE ... RETURNING 한 번으로 처리한다 (프로필이 없으면 None).
+        """
+        result = await db.execute(
+            update(UserProfile)
+            .where(UserProfile.user_id == user_id)
+            .values(ratings=_merged_rating(recipe_id, rating))
+            .returning(UserProfile)
+            .execution_options(populate_existing=True)
+        )
+        profile = result.scalar_one_or_none()
+        await db.commit()
+        return profile
+
+
+def _merged_rating(recipe_id: int, rating: float):
+    """기존 ratings에 레시피 평가 키 하나를 합친 JSONB 식"""
+    ratings = func.coalesce(UserProfile.ratings, cast({}, JSONB))
+    return ratings.op("||")(func.jsonb_build_object(str(recipe_id), rating))
+
+
 user_profile = CRUDUserProfile(UserProfile)
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+자주 실행되는 조회(hot query) 모음
+
+조회 코드는 여기 있는 함수로 문장을 만들고, test_query_plans.py는 등록된 문장을 sample 인자로
+EXPLAIN해 큰 테이블을 순차 스캔하는 계획이 나오면 실패한다 (인덱스가 빠지거나 조건이 바뀐 경우).
+
+요청마다 실행되는 형태가 고정된 조회는 lambda_stmt로 만든다. 람다 안의 select()는 프로세스에서
+처음 한 번만 만들어 분석하고, 이후에는 바인드 값(user_id 등)만 바꿔 컴파일 캐시의 SQL을 그대로 쓴다
+(select() 생성과 캐시 키 계산을 매번 하지 않음). 조건을 덧붙일 때는 `stmt += lambda s: s.where(...)`.
+"""
+import json
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from sqlalchemy import Executable, Select, StatementLambdaElement, func, lambda_stmt, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from models.models import (
+    GroupChatMessage, GroupChatroom, Ingredient, IngredientRequest, Message, QValue, Recipe, Sale, Transaction,
+    UserProfile
+)
+
+# 거래가 진행 중이거나 끝난 요청 (같은 식재료에 새 요청을 받지 않음)
+ACTIVE_REQUEST_STATUSES = ("거래 중", "거래 완료")
+
+
+class HotQuery(NamedTuple):
+    name: str
+    build: Callable[..., Executable]
+    sample: Dict[str, Any]  # EXPLAIN에 쓸 인자
+
+
+HOT_QUERIES: Dict[str, HotQuery] = {}
+
+
+def hot_query(**sample):
+    """문장 생성 함수를 HOT_QUERIES에 등록 (sample은 계획 검사에 쓸 인자)"""
+    def register(build: Callable[..., Executable]) -> Callable[..., Executable]:
+        HOT_QUERIES[build.__name__] = HotQuery(build.__name__, build, sample)
+        return build
+    return register
+
+
+@hot_query(user_id=1)
+def ingredients_by_user(user_id: int) -> StatementLambdaElement:
+    """사용자의 식재료 (냉장고 조회, 추천)"""
+    return lambda_stmt(lambda: select(Ingredient).where(Ingredient.user_id == user_id))
+
+
+@hot_query(user_id=1, name="양파")
+def ingredient_by_user_and_name(user_id: int, name: str) -> Select:
+    """사용자의 식재료 하나 (레시피 완료 시 재료 차감)"""
+    return select(Ingredient).where(Ingredient.user_id == user_id, Ingredient.name == name)
+
+
+@hot_query(user_id=1)
+def profile_by_user(user_id: int) -> StatementLambdaElement:
+    """사용자 프로필 (추천, 레시피 완료)"""
+    return lambda_stmt(lambda: select(UserProfile).where(UserProfile.user_id == user_id))
+
+
+@hot_query(user_id=1)
+def profile_scoring_inputs(user_id: int) -> StatementLambdaElement:
+    """추천 점수에 쓰는 영양소 제한과 요리 기록 수 (기록/평가 배열은 가져오지 않음)"""
+    return lambda_stmt(lambda: select(
+        UserProfile.nutrition_limits,
+        func.coalesce(func.jsonb_array_length(UserProfile.recipe_history), 0)
+    ).where(UserProfile.user_id == user_id))
+
+
+@hot_query(user_id=1)
+def q_values_by_user(user_id: int) -> StatementLambdaElement:
+    """사용자의 레시피별 Q값 (추천 점수 계산)"""
+    return lambda_stmt(lambda: select(QValue).where(QValue.user_id == user_id))
+
+
+@hot_query(user_id=1, recipe_id=1)
+def q_value(user_id: int, recipe_id: int) -> Select:
+    """사용자-레시피 Q값 하나 (추천 선택 시 갱신)"""
+    return select(QValue).where(QValue.user_id == user_id, QValue.recipe_id == recipe_id)
+
+
+@hot_query()
+def available_sales() -> Select:
+    """판매 중인 상품 (식재료 매칭)"""
+    return select(Sale).where(Sale.status == "Available")
+
+
+@hot_query(ingredient_id=1)
+def active_ingredient_requests(ingredient_id: int) -> Select:
+    """식재료에 걸린 진행 중/완료 요청 (중복 요청 확인)"""
+    return select(IngredientRequest).where(
+        IngredientRequest.ingredient_id == ingredient_id,
+        IngredientRequest.status.in_(ACTIVE_REQUEST_STATUSES)
+    )
+
+
+@hot_query(name="김치찌개")
+def recipe_by_name(name: str) -> Select:
+    """이름으로 레시피 조회 (레시피 적재 시 중복 확인)"""
+    return select(Recipe).where(Recipe.name == name)
+
+
+@hot_query(sale_id=1)
+def trading_transaction(sale_id: int) -> Select:
+    """판매 상품의 진행 중인 거래"""
+    return select(Transaction).where(Transaction.sale_id == sale_id, Transaction.status == "Trading")
+
+
+@hot_query(chatroom_id=1)
+def chatroom_by_id(chatroom_id: int) -> StatementLambdaElement:
+    """그룹 채팅방 (접속, 참가자 추가, 메시지 저장마다 확인)"""
+    return lambda_stmt(lambda: select(GroupChatroom).where(GroupChatroom.id == chatroom_id))
+
+
+@hot_query(chat_id=1, limit=100, before=10)
+def chat_messages_page(chat_id: int, limit: int, before: Optional[int] = None) -> Select:
+    """채팅방 메시지 최신순 limit개 (before가 있으면 그 메시지 이전, (timestamp, id) 커서)"""
+    query = select(Message).where(Message.chat_id == chat_id)
+    if before is not None:
+        cursor_timestamp = select(Message.timestamp).where(Message.id == before).scalar_subquery()
+        query = query.where(tuple_(Message.timestamp, Message.id) < tuple_(cursor_timestamp, before))
+    return query.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit)
+
+
+@hot_query(chatroom_id=1, limit=100, before=10)
+def group_chat_messages_page(chatroom_id: int, limit: int, before: Optional[int] = None) -> Select:
+    """그룹 채팅방 메시지 최신순 limit개 (before가 있으면 그 메시지 이전, (timestamp, id) 커서)"""
+    query = select(GroupChatMessage).where(GroupChatMessage.chatroom_id == chatroom_id)
+    if before is not None:
+        cursor_timestamp = (
+            select(GroupChatMessage.timestamp).where(GroupChatMessage.id == before).scalar_subquery()
+        )
+        query = query.where(
+            tuple_(GroupChatMessage.timestamp, GroupChatMessage.id) < tuple_(cursor_timestamp, before)
+        )
+    return query.order_by(GroupChatMessage.timestamp.desc(), GroupChatMessage.id.desc()).limit(limit)
+
+
+def literal_sql(stmt: Executable) -> str:
+    """인자를 값으로 채운 PostgreSQL SQL (EXPLAIN용)"""
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+async def explain(conn, stmt: Executable) -> dict:
+    """EXPLAIN (FORMAT JSON) 결과의 최상위 Plan 노드"""
+    result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {literal_sql(stmt)}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def sequential_scans(plan: dict) -> List[str]:
+    """계획 트리에서 순차 스캔하는 테이블 이름들"""
+    tables = []
+    if plan.get("Node Type") == "Seq Scan":
+        tables.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        tables.extend(sequential_scans(child))
+    return tables
@@ -0,0 +1,132 @@
+import time
+import weakref
+from contextvars import ContextVar
+from typing import Dict, Optional
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from utils.metrics import LatencyTracker
+
+# checkout 대기 시간 구간 (초): 풀이 넉넉하면 1ms 안쪽, 밀리기 시작하면 뒤쪽 구간이 늘어남
+CHECKOUT_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# 지금 연결을 잡는 작업 (요청이면 "GET /api/v1/sales" 형태, 요청 밖이면 background)
+current_route: ContextVar[str] = ContextVar("current_route", default="background")
+
+
+class PoolStats:
+    """DB 연결 풀 사용 현황 (워커 프로세스 단위)"""
+
+    def __init__(self):
+        # 풀에서 연결을 얻기까지 기다린 시간
+        self.checkout_wait = LatencyTracker(buckets=CHECKOUT_WAIT_BUCKETS)
+        self.checkout_timeouts = 0
+        # 연결을 잡고 있던 시간과 가장 오래 잡았던 작업
+        self.hold_time = LatencyTracker()
+        self.max_held_route: Optional[str] = None
+        # 지금 나가 있는 연결 -> (checkout 시각, 작업)
+        self._held: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        # 웹소켓 작업 단위가 현재 잡고 있는 세션 수
+        self.socket_sessions = 0
+        self.socket_sessions_peak = 0
+
+    def socket_session_opened(self):
+        self.socket_sessions += 1
+        if self.socket_sessions > self.socket_sessions_peak:
+            self.socket_sessions_peak = self.socket_sessions
+
+    def socket_session_closed(self):
+        self.socket_sessions -= 1
+
+    def checked_out(self, record):
+        self._held[record] = (time.perf_counter(), current_route.get())
+
+    def checked_in(self, record):
+        held = self._held.pop(record, None)
+        if held is None:
+            return
+        started, route = held
+        seconds = time.perf_counter() - started
+        if seconds > self.hold_time.max:
+            self.max_held_route = route
+        self.hold_time.record(seconds)
+
+    def longest_held(self) -> Optional[Dict[str, object]]:
+        """지금 나가 있는 연결 중 가장 오래 잡혀 있는 것"""
+        now = time.perf_counter()
+        oldest = min(list(self._held.values()), default=None, key=lambda held: held[0])
+        if oldest is None:
+            return None
+        started, route = oldest
+        return {"route": route, "seconds": round(now - started, 3)}
+
+
+_stats: Dict[str, PoolStats] = {}
+
+
+def stats_for(name: Optional[str]) -> PoolStats:
+    """풀 이름(pool_logging_name)별 통계 (풀이 다시 만들어져도 같은 객체)"""
+    return _stats.setdefault(name or "primary", PoolStats())
+
+
+pool_stats = stats_for("primary")
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """연결 checkout 대기 시간과 연결을 잡고 있는 작업을 기록하는 풀"""
+
+    @property
+    def stats(self) -> PoolStats:
+        return stats_for(self._orig_logging_name)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.checkout_timeouts += 1
+            raise
+        finally:
+            self.stats.checkout_wait.record(time.perf_counter() - started)
+        self.stats.checked_out(record)
+        return record
+
+    def _do_return_conn(self, record):
+        self.stats.checked_in(record)
+        super()._do_return_conn(record)
+
+
+class RouteTaggingMiddleware:
+    """요청마다 current_route를 설정해 어떤 요청이 연결을 잡고 있는지 기록하는 ASGI 미들웨어"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        method = scope.get("method", "WS")
+        token = current_route.set(f"{method} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
+
+
+def pool_snapshot(pool) -> dict:
+    """풀 상태와 checkout 통계를 JSON으로 반환할 수 있는 dict로 변환"""
+    stats = pool.stats if isinstance(pool, InstrumentedPool) else pool_stats
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "timeout": pool.timeout(),
+        "socket_sessions": stats.socket_sessions,
+        "socket_sessions_peak": stats.socket_sessions_peak,
+        "checkout_timeouts": stats.checkout_timeouts,
+        "checkout_wait": stats.checkout_wait.snapshot(),
+        "hold_time": stats.hold_time.snapshot(),
+        "max_held_route": stats.max_held_route,
+        "longest_held": stats.longest_held()
+    }
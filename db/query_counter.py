@@ -0,0 +1,43 @@
+from typing import List, Tuple
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """
+    엔진에서 실행된 SQL 문 수와 가져온 행 수를 세는 컨텍스트 매니저
+
+    엔드포인트별 쿼리 예산 테스트(test_query_budget.py)와 N+1 조사에 사용한다.
+
+        with QueryCounter(engine) as counter:
+            ...
+        counter.count, counter.rows
+    """
+
+    def __init__(self, engine):
+        # AsyncEngine이면 이벤트는 sync_engine에 등록해야 함
+        self.engine = getattr(engine, "sync_engine", engine)
+        self.statements: List[Tuple[str, int]] = []
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "after_cursor_execute", self._after_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # asyncpg 어댑터 커서는 SELECT 결과를 _rows에 버퍼링하고 rowcount는 -1로 둠
+        rows = getattr(cursor, "_rows", None)
+        fetched = len(rows) if rows is not None else max(cursor.rowcount, 0)
+        self.statements.append((statement, fetched))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def rows(self) -> int:
+        return sum(fetched for _, fetched in self.statements)
+
+    def report(self) -> str:
+        return "\n".join(f"[{fetched} rows] {statement}" for statement, fetched in self.statements)
@@ -0,0 +1,126 @@
+"""
+조회 요청의 복제본/기본 DB 선택 (read-your-writes)
+
+변경 요청(POST/PUT/PATCH/DELETE)이 성공하면 "이 시각까지는 기본 DB에서 읽기"를 세 곳에 남긴다.
+
+- 인증된 사용자(JWT sub): 이 워커의 메모리에 기록. 쿠키를 저장하지 않는 Bearer 클라이언트도
+  같은 워커로 오는 다음 조회는 기본 DB로 간다.
+- 응답 헤더 X-DB-Primary-Until: 클라이언트가 다음 요청에 그대로 돌려보내면 어느 워커로 가든 적용된다
+  (워커가 여럿이고 쿠키를 쓰지 않는 클라이언트는 이 헤더를 돌려보내야 함).
+- 쿠키: 브라우저처럼 쿠키를 저장하는 클라이언트는 따로 할 일이 없다.
+"""
+import time
+from typing import Dict, Optional
+from fastapi import Request
+from core.config import settings
+from services.identity_cache import identity_cache
+
+PRIMARY_UNTIL_COOKIE = "db_primary_until"
+PRIMARY_UNTIL_HEADER = "X-DB-Primary-Until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def bearer_subject(authorization: Optional[str]) -> Optional[str]:
+    """Authorization: Bearer 토큰의 sub (토큰이 없거나 유효하지 않으면 None)"""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return identity_cache.decode(authorization[7:].strip()).get("sub")
+    except Exception:
+        return None
+
+
+def _parse_until(value: Optional[str]) -> float:
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+class ReadRouting:
+    """조회 세션이 어디로 갔는지 집계하고, 최근에 쓴 사용자를 기억 (워커 프로세스 단위)"""
+
+    def __init__(self, window: float = 5.0, max_pins: int = 10000):
+        self.window = window
+        self.max_pins = max_pins
+        # 사용자(JWT sub) -> 이 시각까지 기본 DB
+        self._pins: Dict[str, float] = {}
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.pinned_reads = 0  # 최근 쓰기 때문에 기본 DB로 보낸 조회
+
+    def pin(self, subject: str, until: float):
+        self._pins[subject] = until
+        if len(self._pins) > self.max_pins:
+            now = time.time()
+            self._pins = {key: value for key, value in self._pins.items() if value > now}
+            # 모두 유효하면 가장 먼저 끝나는 것부터 버림
+            while len(self._pins) > self.max_pins:
+                del self._pins[min(self._pins, key=self._pins.get)]
+
+    def prefers_primary(self, request: Request) -> bool:
+        """최근에 변경 요청을 보낸 클라이언트인지 (사용자 기록, 돌려보낸 헤더, 쿠키 중 하나라도 유효)"""
+        now = time.time()
+        if _parse_until(request.headers.get(PRIMARY_UNTIL_HEADER)) > now:
+            return True
+        if _parse_until(request.cookies.get(PRIMARY_UNTIL_COOKIE)) > now:
+            return True
+        subject = bearer_subject(request.headers.get("authorization"))
+        if subject is None:
+            return False
+        until = self._pins.get(subject)
+        if until is not None and until <= now:
+            del self._pins[subject]
+            return False
+        return until is not None
+
+    def record(self, replica: bool, pinned: bool):
+        if replica:
+            self.replica_reads += 1
+        else:
+            self.primary_reads += 1
+        if pinned:
+            self.pinned_reads += 1
+
+    def stats(self) -> dict:
+        return {
+            "window_seconds": self.window,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "pinned_reads": self.pinned_reads,
+            "pinned_users": len(self._pins)
+        }
+
+
+class ReadYourWritesMiddleware:
+    """성공한 변경 요청의 사용자를 기억하고, 응답에 기본 DB 고정 헤더/쿠키를 붙이는 ASGI 미들웨어"""
+
+    def __init__(self, app, routing: ReadRouting):
+        self.app = app
+        self.routing = routing
+
+    async def __call__(self, scope, receive, send):
+        window = self.routing.window
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or window <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + window
+                headers = dict(scope.get("headers", []))
+                subject = bearer_subject(headers.get(b"authorization", b"").decode("latin-1"))
+                if subject is not None:
+                    self.routing.pin(subject, until)
+                cookie = f"{PRIMARY_UNTIL_COOKIE}={until:.3f}; Max-Age={int(window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message = {**message, "headers": [
+                    *message.get("headers", []),
+                    (PRIMARY_UNTIL_HEADER.lower().encode("latin-1"), f"{until:.3f}".encode("latin-1")),
+                    (b"set-cookie", cookie.encode("latin-1"))
+                ]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
+
+
+read_routing = ReadRouting(window=settings.READ_YOUR_WRITES_SECONDS)
@@ -1,6 +1,9 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from core.config import settings
+from db.pool_stats import InstrumentedPool, pool_stats
 import ssl
 
 ssl_context = ssl.create_default_context()
@@ -8,13 +11,76 @@ ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
 
 
+def pool_options(
+    pool_size: int = 50,
+    max_overflow: int = 20,
+    timeout: float = 90,
+    max_connections: Optional[int] = None,
+    workers: int = 1,
+    shed_timeout: Optional[float] = None
+) -> dict:
+    """
+    워커 하나의 풀 설정
+
+    max_connections(모든 워커가 합쳐 쓸 수 있는 연결 수)가 있으면 워커 수로 나눈 몫을 넘지 않게
+    pool_size/max_overflow를 줄인다. shed_timeout이 있으면 checkout을 그 시간만 기다리고
+    TimeoutError를 올려 503으로 응답한다 (90초씩 매달려 있지 않고 빨리 거절).
+    """
+    if max_connections:
+        per_worker = max(1, max_connections // max(1, workers))
+        pool_size = min(pool_size, per_worker)
+        max_overflow = max(0, min(max_overflow, per_worker - pool_size))
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": shed_timeout if shed_timeout else timeout
+    }
+
+
+def statement_cache_options(query_cache_size: int = 500, prepared_statement_cache_size: int = 100) -> dict:
+    """
+    문장 캐시 설정
+
+    query_cache_size는 SQLAlchemy가 문장 형태별로 컴파일한 SQL을 보관하는 개수,
+    prepared_statement_cache_size는 연결마다 asyncpg가 PREPARE한 문장을 보관하는 개수
+    (캐시에 있으면 Postgres 파싱/계획 준비 왕복을 건너뜀).
+    """
+    return {
+        "query_cache_size": query_cache_size,
+        "connect_args": {"prepared_statement_cache_size": prepared_statement_cache_size}
+    }
+
+
+def statement_cache_snapshot(engine) -> dict:
+    """컴파일 캐시에 들어 있는 문장 수 (capacity에 자주 닿으면 DB_QUERY_CACHE_SIZE를 늘림)"""
+    cache = engine.sync_engine._compiled_cache
+    if cache is None:
+        return {"compiled": 0, "capacity": 0}
+    return {"compiled": len(cache), "capacity": cache.capacity}
+
+
+POOL_OPTIONS = pool_options(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    timeout=settings.DB_POOL_TIMEOUT,
+    max_connections=settings.DB_MAX_CONNECTIONS,
+    workers=settings.WEB_CONCURRENCY,
+    shed_timeout=settings.DB_POOL_SHED_TIMEOUT
+)
+
+STATEMENT_CACHE_OPTIONS = statement_cache_options(
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    prepared_statement_cache_size=settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+)
+
 engine = create_async_engine(
     settings.DATABASE_URL,
-    pool_size=50,         # 기본 연결 풀 크기 증가
-    max_overflow=20,      # 추가 연결 허용 수 
-    pool_timeout=90,      # 타임아웃 시간 늘리기
+    **POOL_OPTIONS,       # 워커 수에 맞춘 풀 크기 / checkout 대기 한도
+    **STATEMENT_CACHE_OPTIONS,  # 컴파일 캐시 / 연결별 prepared statement 캐시
     pool_recycle=3600,    # 1시간마다 연결 재생성
     pool_pre_ping=True,   # 연결 상태 사전 확인
+    poolclass=InstrumentedPool,  # checkout 대기 시간/연결을 잡은 요청 기록
+    pool_logging_name="primary",
     echo=False,
     future=True
 )
@@ -25,4 +91,64 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
     autocommit=False,
     autoflush=False
-)
\ No newline at end of file
+)
+
+# 조회 전용 복제본 (설정하지 않으면 None, 조회도 기본 DB 사용)
+replica_engine = create_async_engine(
+    settings.DATABASE_REPLICA_URL,
+    **POOL_OPTIONS,
+    **STATEMENT_CACHE_OPTIONS,
+    pool_recycle=3600,
+    pool_pre_ping=True,
+    poolclass=InstrumentedPool,
+    pool_logging_name="replica",
+    echo=False,
+    future=True
+) if settings.DATABASE_REPLICA_URL else None
+
+# 조회 전용 세션: BEGIN READ ONLY로 시작하고 (쓰기는 DB가 거절) 커밋하지 않음
+PrimaryReadSessionLocal = sessionmaker(
+    engine.execution_options(postgresql_readonly=True),
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False
+)
+ReplicaReadSessionLocal = sessionmaker(
+    replica_engine.execution_options(postgresql_readonly=True),
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False
+) if replica_engine is not None else None
+
+
+@asynccontextmanager
+async def read_session(replica: bool = True) -> AsyncIterator[AsyncSession]:
+    """
+    조회 전용 세션
+
+    replica이고 복제본이 설정되어 있으면 복제본에서, 아니면 기본 DB에서 읽는다.
+    끝날 때 커밋하지 않고 닫기만 한다 (READ ONLY 트랜잭션은 롤백으로 끝냄).
+    """
+    factory = ReplicaReadSessionLocal if replica and ReplicaReadSessionLocal is not None else PrimaryReadSessionLocal
+    async with factory() as session:
+        yield session
+
+
+@asynccontextmanager
+async def socket_session() -> AsyncIterator[AsyncSession]:
+    """
+    웹소켓 작업 단위용 세션
+
+    연결 전체가 아니라 한 번의 작업(조회/저장) 동안만 세션을 잡고 바로 풀에 반납한다.
+    """
+    pool_stats.socket_session_opened()
+    try:
+        async with AsyncSessionLocal() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+    finally:
+        pool_stats.socket_session_closed()
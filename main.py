@@ -1,21 +1,44 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 from api import router
 from services.recipes import init
+from services.image_derivatives import image_derivatives
+from services.llm_gateway import llm_gateway
+from services.ocr_client import ocr_client
+from services.receipt_service import receipt_job_queue, temp_receipt_sweeper
+from services.storage import LocalStorage, storage
+from services.storage_outbox import storage_deletion_drainer
 from contextlib import asynccontextmanager
-from db.session import AsyncSessionLocal
+from sqlalchemy import exc as sa_exc
+from core.config import settings
+from db.pool_stats import RouteTaggingMiddleware
+from db.read_routing import PRIMARY_UNTIL_HEADER, ReadYourWritesMiddleware, read_routing
+from db.session import AsyncSessionLocal, replica_engine
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init()
+    # 레시피 초기 데이터 적재 (필요할 때만 주석 해제)
+    # await init()
+    receipt_job_queue.start()
+    temp_receipt_sweeper.start()
+    image_derivatives.start()
+    storage_deletion_drainer.start()
     yield
+    await storage_deletion_drainer.stop()
+    await temp_receipt_sweeper.stop()
+    await receipt_job_queue.stop()
+    await ocr_client.aclose()
+    await llm_gateway.aclose()
+    image_derivatives.shutdown()
 
 
 app = FastAPI(
     title="Recipe Recommendation System",
     description="Recipe recommendation system with user authentication",
     version="1.0.0",
-    #lifespan=lifespan
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -25,10 +48,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[PRIMARY_UNTIL_HEADER],  # 다른 출처의 클라이언트도 읽어서 다음 요청에 돌려보낼 수 있게
 )
 
+# 복제본을 쓰면 변경 요청 직후의 조회는 기본 DB로 (자기가 쓴 내용을 바로 보도록)
+if replica_engine is not None:
+    app.add_middleware(ReadYourWritesMiddleware, routing=read_routing)
+
+# 어떤 요청이 DB 연결을 잡고 있는지 기록 (/metrics/db-pool의 longest_held)
+app.add_middleware(RouteTaggingMiddleware)
+
 app.include_router(router, prefix="/api/v1")
 
+
+@app.exception_handler(sa_exc.TimeoutError)
+async def pool_timeout_handler(request: Request, e: sa_exc.TimeoutError):
+    """DB 연결 풀이 checkout 대기 한도 안에 연결을 내주지 못하면 503 (DB_POOL_SHED_TIMEOUT으로 한도 조절)"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "요청이 많아 잠시 후 다시 시도해 주세요."},
+        headers={"Retry-After": "1"}
+    )
+
+# 로컬 저장소를 쓰면 업로드한 이미지를 앱이 직접 제공 (STORAGE_PUBLIC_URL이 경로인 경우)
+if isinstance(storage, LocalStorage) and storage.base_url.startswith("/"):
+    app.mount(storage.mount_path, StaticFiles(directory=storage.root, check_dir=False), name="media")
+
 @app.get("/test")
 async def test_route():
     return {"message": "Test route works!"}
@@ -1,6 +1,6 @@
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey, Boolean, DateTime, Numeric, Enum as SQLAlchemyEnum, func, Text, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey, Boolean, DateTime, Numeric, Enum as SQLAlchemyEnum, func, Text, UniqueConstraint, Index, LargeBinary, BigInteger
+from sqlalchemy.orm import backref, relationship
 from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 from db.base import Base
@@ -33,31 +33,40 @@ class User(Base):
     profile_image_url = Column(String, nullable=True)  
     
     # Relationships
-    profile = relationship("UserProfile", back_populates="user", uselist=False)
-    recipes = relationship("Recipe", back_populates="creator")
-    q_values = relationship("QValue", back_populates="user")
-    requests = relationship("IngredientRequest", back_populates="user", cascade="all, delete-orphan")
-    chats_as_buyer = relationship("Chat", foreign_keys="[Chat.buyer_id]", back_populates="buyer")
-    chats_as_seller = relationship("Chat", foreign_keys="[Chat.seller_id]", back_populates="seller")
-    sales = relationship("Sale", back_populates="seller", cascade="all, delete-orphan")
+    # 관계는 모두 지연 로드(select)로 두고, 응답에 필요한 관계는 쿼리에서 options()로 명시적으로 로드한다
+    profile = relationship("UserProfile", back_populates="user", uselist=False, lazy="select")
+    recipes = relationship("Recipe", back_populates="creator", lazy="select")
+    q_values = relationship("QValue", back_populates="user", lazy="select")
+    requests = relationship("IngredientRequest", back_populates="user", cascade="all, delete-orphan", lazy="select")
+    chats_as_buyer = relationship("Chat", foreign_keys="[Chat.buyer_id]", back_populates="buyer", lazy="select")
+    chats_as_seller = relationship("Chat", foreign_keys="[Chat.seller_id]", back_populates="seller", lazy="select")
+    sales = relationship("Sale", back_populates="seller", cascade="all, delete-orphan", lazy="select")
     group_purchases = relationship("GroupPurchase", back_populates="creator", lazy="dynamic")
     group_purchase_participations = relationship("GroupPurchaseParticipant", back_populates="user", lazy="dynamic")  
-    group_chat_participations = relationship("GroupChatParticipant", back_populates="user")
-    messages = relationship("GroupChatMessage", back_populates="sender")
+    group_chat_participations = relationship("GroupChatParticipant", back_populates="user", lazy="select")
+    messages = relationship("GroupChatMessage", back_populates="sender", lazy="select")
 
 class UserProfile(Base):
     __tablename__ = "user_profiles"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
-    nutrition_limits = Column(JSON, default={})  # 영양소 제한만 남김
-    recipe_history = Column(JSON, default=[])
-    ratings = Column(JSON, default={})
+    nutrition_limits = Column(JSONB, default={})  # 영양소 제한만 남김
+    recipe_history = Column(JSONB, default=[])
+    ratings = Column(JSONB, default={})  # {레시피 ID(문자열): 평점}
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    user = relationship("User", back_populates="profile")
+    user = relationship("User", back_populates="profile", lazy="select")
+
+    __table_args__ = (
+        # 레시피를 요리한 사용자 (recipe_history @> '[id]')
+        Index("ix_user_profiles_recipe_history", "recipe_history",
+              postgresql_using="gin", postgresql_ops={"recipe_history": "jsonb_path_ops"}),
+        # 레시피를 평가한 사용자 (ratings ? 'id')
+        Index("ix_user_profiles_ratings", "ratings", postgresql_using="gin"),
+    )
 
 class QValue(Base):
     __tablename__ = "q_values"
@@ -70,8 +79,13 @@ class QValue(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    user = relationship("User", back_populates="q_values")
-    recipe = relationship("Recipe", back_populates="q_values")
+    user = relationship("User", back_populates="q_values", lazy="select")
+    recipe = relationship("Recipe", back_populates="q_values", lazy="select")
+
+    __table_args__ = (
+        # 사용자별 Q값 조회와 (사용자, 레시피) 한 건 조회
+        Index("ix_q_values_user_id_recipe_id", "user_id", "recipe_id"),
+    )
 
 class IngredientRequest(Base):
     __tablename__ = 'ingredient_requests'
@@ -84,8 +98,13 @@ class IngredientRequest(Base):
     created_at = Column(DateTime, default=datetime.utcnow)  # 요청 생성 시간
 
     # 관계 정의
-    user = relationship("User", back_populates="requests")
-    ingredient = relationship("Ingredient", back_populates="requests")
+    user = relationship("User", back_populates="requests", lazy="select")
+    ingredient = relationship("Ingredient", back_populates="requests", lazy="select")
+
+    __table_args__ = (
+        # 같은 식재료의 진행 중/완료 요청 확인
+        Index("ix_ingredient_requests_ingredient_id_status", "ingredient_id", "status"),
+    )
 
 class Ingredient(Base):
     __tablename__ = 'ingredients'
@@ -96,8 +115,13 @@ class Ingredient(Base):
     amount = Column(Integer , nullable= False)
     user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
 
-    requests = relationship("IngredientRequest", back_populates="ingredient")
-    sales = relationship("Sale", back_populates="ingredient")
+    requests = relationship("IngredientRequest", back_populates="ingredient", lazy="select")
+    sales = relationship("Sale", back_populates="ingredient", lazy="select")
+
+    __table_args__ = (
+        # 냉장고 조회/추천의 사용자별 식재료와 (사용자, 이름) 차감 조회
+        Index("ix_ingredients_user_id_name", "user_id", "name"),
+    )
 
 class Sale(Base):
     __tablename__ = 'sales'
@@ -115,10 +139,15 @@ class Sale(Base):
     contents = Column(String , nullable= False ) # 내용 추가
     amount = Column(Integer, nullable=False)
     
-    seller = relationship("User", back_populates="sales")  # 판매자와의 관계
-    ingredient = relationship("Ingredient", back_populates="sales")  # 식재료와의 관계
-    images = relationship("Image", back_populates="sale", cascade="all, delete")  # 판매 이미지 관계
-    chats = relationship("Chat", back_populates="item", cascade="all, delete")  # Chat과 연결됨 (새롭게 추가!)
+    seller = relationship("User", back_populates="sales", lazy="select")  # 판매자와의 관계
+    ingredient = relationship("Ingredient", back_populates="sales", lazy="select")  # 식재료와의 관계
+    images = relationship("Image", back_populates="sale", cascade="all, delete", lazy="select")  # 판매 이미지 관계
+    chats = relationship("Chat", back_populates="item", cascade="all, delete", lazy="select")  # Chat과 연결됨 (새롭게 추가!)
+
+    __table_args__ = (
+        # 판매 중인 상품 조회 (거래가 쌓일수록 판매 완료 행이 대부분)
+        Index("ix_sales_status", "status"),
+    )
 
 class Image(Base):
     __tablename__ = "images"
@@ -126,10 +155,12 @@ class Image(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     sale_id = Column(Integer, ForeignKey("sales.id", ondelete="CASCADE"), nullable=True)
     image_url = Column(String, nullable=True)
+    # 파생본 URL {"thumb": {"webp": url, "jpeg": url}, "medium": {...}} (없으면 원본만 있음)
+    derivatives = Column(JSON, nullable=True)
     group_purchase_id = Column(Integer, ForeignKey("group_purchases.id", ondelete="CASCADE"), nullable=True)
 
-    sale = relationship("Sale", back_populates="images")
-    group_purchase = relationship("GroupPurchase", back_populates="images")
+    sale = relationship("Sale", back_populates="images", lazy="select")
+    group_purchase = relationship("GroupPurchase", back_populates="images", lazy="select")
 
 class Transaction(Base):
     __tablename__ = 'transaction'
@@ -142,8 +173,8 @@ class Transaction(Base):
     buyer_time = Column(DateTime, nullable=True)
     status = Column(String(50), default='Trading')
 
-    buyer = relationship('User', foreign_keys=[buyer_id], backref='bought_transactions')
-    request = relationship('Sale', backref='transactions')
+    buyer = relationship('User', foreign_keys=[buyer_id], backref=backref('bought_transactions', lazy='select'), lazy='select')
+    request = relationship('Sale', backref=backref('transactions', lazy='select'), lazy='select')
     __table_args__ = (
         UniqueConstraint('sale_id', 'status', name='uq_sale_status'),
     )
@@ -156,10 +187,12 @@ class Chat(Base):
     item_id = Column(Integer, ForeignKey("sales.id"), nullable=False)  # 상품 ID 추가
     created_at = Column(DateTime, default=func.now())
 
-    buyer = relationship("User", foreign_keys=[buyer_id], back_populates="chats_as_buyer", lazy="joined")
-    seller = relationship("User", foreign_keys=[seller_id], back_populates="chats_as_seller", lazy="joined")
-    item = relationship("Sale", back_populates="chats",lazy="joined")  # Sale(판매 상품)과의 관계
-    messages = relationship("Message", back_populates="chat", lazy="joined")
+    # 관계는 기본적으로 로드하지 않고, 필요한 쿼리에서 options()로 명시적으로 로드한다
+    # (messages를 joined로 두면 채팅방 조회마다 모든 메시지 행이 함께 조회됨)
+    buyer = relationship("User", foreign_keys=[buyer_id], back_populates="chats_as_buyer", lazy="select")
+    seller = relationship("User", foreign_keys=[seller_id], back_populates="chats_as_seller", lazy="select")
+    item = relationship("Sale", back_populates="chats", lazy="select")  # Sale(판매 상품)과의 관계
+    messages = relationship("Message", back_populates="chat", lazy="select")
 
 class Message(Base):
     __tablename__ = "messages"
@@ -169,7 +202,26 @@ class Message(Base):
     content = Column(String, nullable=False)
     timestamp = Column(DateTime, default=func.now())
 
-    chat = relationship("Chat", back_populates="messages")
+    chat = relationship("Chat", back_populates="messages", lazy="select")
+
+    __table_args__ = (
+        # 채팅방별 최신순 조회 및 (timestamp, id) 커서 페이지네이션용
+        Index("ix_messages_chat_id_timestamp_id", "chat_id", "timestamp", "id"),
+    )
+
+class ChatReadCursor(Base):
+    """사용자별 채팅방 읽음 위치 (마지막으로 읽은 메시지 ID)"""
+    __tablename__ = "chat_read_cursors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    last_read_message_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('chat_id', 'user_id', name='uq_chat_read_cursor'),
+    )
 
 class Recipe(Base):
     __tablename__ = 'recipes'
@@ -190,8 +242,13 @@ class Recipe(Base):
     cooking_img = Column(JSONB)
 
     # Relationships
-    creator = relationship("User", back_populates="recipes")
-    q_values = relationship("QValue", back_populates="recipe")
+    creator = relationship("User", back_populates="recipes", lazy="select")
+    q_values = relationship("QValue", back_populates="recipe", lazy="select")
+
+    __table_args__ = (
+        # 레시피 적재 시 이름 중복 확인
+        Index("ix_recipes_name", "name"),
+    )
 
 class GroupPurchaseStatus(str, Enum):
     OPEN = "open"
@@ -222,11 +279,11 @@ class GroupPurchase(Base):
     created_at = Column(DateTime(timezone=False), default=datetime.utcnow)
 
     # Relationships
-    creator = relationship("User", back_populates="group_purchases")
-    participants = relationship("GroupPurchaseParticipant", back_populates="group_purchase")
+    creator = relationship("User", back_populates="group_purchases", lazy="select")
+    participants = relationship("GroupPurchaseParticipant", back_populates="group_purchase", lazy="select")
     # 기존 GroupPurchase 모델에 채팅방 관계 추가
-    chatroom = relationship("GroupChatroom", back_populates="group_purchase", uselist=False)
-    images = relationship("Image", back_populates="group_purchase", cascade="all, delete")  # 이미지 관계 추가
+    chatroom = relationship("GroupChatroom", back_populates="group_purchase", uselist=False, lazy="select")
+    images = relationship("Image", back_populates="group_purchase", cascade="all, delete", lazy="select")  # 이미지 관계 추가
 
 class GroupPurchaseParticipant(Base):
     __tablename__ = "group_purchase_participants"
@@ -237,8 +294,8 @@ class GroupPurchaseParticipant(Base):
     joined_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    group_purchase = relationship("GroupPurchase", back_populates="participants")
-    user = relationship("User", back_populates="group_purchase_participations", foreign_keys=[username])
+    group_purchase = relationship("GroupPurchase", back_populates="participants", lazy="select")
+    user = relationship("User", back_populates="group_purchase_participations", foreign_keys=[username], lazy="select")
 
 class GroupChatroom(Base):
     __tablename__ = "group_chatrooms"
@@ -248,9 +305,9 @@ class GroupChatroom(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    group_purchase = relationship("GroupPurchase", back_populates="chatroom")
-    messages = relationship("GroupChatMessage", back_populates="chatroom")
-    participants = relationship("GroupChatParticipant", back_populates="chatroom")
+    group_purchase = relationship("GroupPurchase", back_populates="chatroom", lazy="select")
+    messages = relationship("GroupChatMessage", back_populates="chatroom", lazy="select")
+    participants = relationship("GroupChatParticipant", back_populates="chatroom", lazy="select")
 
 class GroupChatParticipant(Base):
     __tablename__ = "group_chat_participants"
@@ -261,8 +318,8 @@ class GroupChatParticipant(Base):
     joined_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    user = relationship("User", back_populates="group_chat_participations")
-    chatroom = relationship("GroupChatroom", back_populates="participants")
+    user = relationship("User", back_populates="group_chat_participations", lazy="select")
+    chatroom = relationship("GroupChatroom", back_populates="participants", lazy="select")
 
 class GroupChatMessage(Base):
     __tablename__ = "group_chat_messages"
@@ -274,8 +331,13 @@ class GroupChatMessage(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    chatroom = relationship("GroupChatroom", back_populates="messages")
-    sender = relationship("User", back_populates="messages")
+    chatroom = relationship("GroupChatroom", back_populates="messages", lazy="select")
+    sender = relationship("User", back_populates="messages", lazy="select")
+
+    __table_args__ = (
+        # 채팅방별 최신순 조회 및 (timestamp, id) 커서 페이지네이션용
+        Index("ix_group_chat_messages_chatroom_id_timestamp_id", "chatroom_id", "timestamp", "id"),
+    )
 
     
 class TempReceipt(Base):
@@ -283,4 +345,100 @@ class TempReceipt(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)  # 이전 데이터는 NULL
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # 확정되지 않고 남은 임시 데이터 정리용
+        Index("ix_temp_receipts_created_at", "created_at"),
+    )
+
+
+class ReceiptJob(Base):
+    """영수증 분석 작업 (OCR → 품목 추출 → TempReceipt 저장)"""
+    __tablename__ = 'receipt_jobs'
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending / processing / done / failed
+    image = Column(LargeBinary, nullable=True)  # 업로드 원본 (처리가 끝나면 비움)
+    filename = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(JSONB, nullable=True)  # 추출된 품목 (temp_id 포함)
+    error = Column(Text, nullable=True)
+    stage_timings = Column(JSONB, nullable=True)  # 단계별 소요 시간(ms)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # 워커가 대기 중인 작업을 id 순으로 가져갈 때 사용
+        Index("ix_receipt_jobs_status_id", "status", "id"),
+    )
+
+
+class ReceiptAnalysisCache(Base):
+    """같은 영수증 이미지의 OCR/추출 결과 캐시 (재업로드 시 외부 호출 생략)"""
+    __tablename__ = 'receipt_analysis_cache'
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, unique=True)  # 이미지 바이트 SHA-256
+    perceptual_hash = Column(BigInteger, nullable=True)  # 64비트 dHash (Pillow가 있을 때만)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    ocr_text = Column(Text, nullable=False)
+    items = Column(JSONB, nullable=True)  # 추출 결과 (추출에 실패했으면 NULL)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # 같은 사용자가 다시 찍은 사진을 찾을 때 사용
+        Index("ix_receipt_analysis_cache_user_id_last_used_at", "user_id", "last_used_at"),
+    )
+
+
+class LLMResponseCache(Base):
+    """프롬프트/입력별 LLM 응답 캐시 (같은 입력으로 다시 호출하지 않음)"""
+    __tablename__ = 'llm_response_cache'
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(64), nullable=False, unique=True)  # 모델/메시지/옵션의 SHA-256
+    model = Column(String, nullable=False)
+    response = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class StorageDeletion(Base):
+    """저장소에서 지울 객체 (DB 변경과 같은 트랜잭션에 기록하고 백그라운드에서 일괄 삭제)"""
+    __tablename__ = 'storage_deletions'
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    leased_until = Column(DateTime, nullable=True)  # 삭제기가 골라 저장소에서 지우는 중이면 lease 만료 시각
+
+    __table_args__ = (
+        # 삭제기가 재시도 시각이 된 항목을 고를 때 사용
+        Index("ix_storage_deletions_next_attempt_at", "next_attempt_at"),
+    )
+
+
+class ImageBlob(Base):
+    """내용 해시로 저장한 이미지 객체와 이를 가리키는 이미지 행 수 (같은 사진은 한 번만 저장)"""
+    __tablename__ = 'image_blobs'
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, nullable=False)  # 원본 바이트의 sha256
+    key = Column(String, unique=True, nullable=False)  # 저장소 키 (<해시>.<확장자>)
+    content_type = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=False, default=0)
+    refcount = Column(Integer, nullable=False, default=0)
+    uploaded = Column(Boolean, nullable=False, default=False)  # 원본 PUT 완료 여부
+    derivatives = Column(JSON, nullable=True)  # 파생본 URL (Images.derivatives와 같은 형태)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import List, Optional
+from typing import Optional
 
 # ✅ 메시지 기본 스키마
 class MessageBase(BaseModel):
@@ -53,6 +53,33 @@ class ChatBase(BaseModel):
     seller: Optional[UserResponse]
     item: Optional[ItemResponse]
     created_at: datetime
-    messages: List[MessageResponse] = []
 
     model_config = ConfigDict(from_attributes=True)  # ✅ Pydantic 2.x 대응
+
+
+# ✅ 받은편지함 스키마
+class InboxCounterpart(BaseModel):
+    id: int
+    nickname: str
+    profile_image_url: Optional[str] = None
+
+class InboxLastMessage(BaseModel):
+    id: int
+    sender_id: int
+    content: str
+    timestamp: Optional[datetime] = None
+
+class ChatInboxItem(BaseModel):
+    chat_id: int
+    counterpart: Optional[InboxCounterpart] = None
+    item_id: int
+    item_title: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    last_message: Optional[InboxLastMessage] = None
+    unread_count: int = 0
+    created_at: Optional[datetime] = None
+
+class ReadCursorResponse(BaseModel):
+    chat_id: int
+    user_id: int
+    last_read_message_id: int
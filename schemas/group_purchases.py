@@ -48,6 +48,8 @@ class GroupPurchaseImage(BaseModel):
     id: int
     group_purchase_id: int
     image_url: str
+    derivatives: Optional[dict] = None  # {"thumb": {"webp", "jpeg"}, "medium": {...}}
+    thumbnail_url: Optional[str] = None  # 목록 응답에서 채움 (파생본이 없으면 원본)
     
     model_config = ConfigDict(from_attributes=True)  # v2 스타일 설정
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 class TempReceiptUpdate(BaseModel):
@@ -9,4 +9,13 @@ class IngredientUpdate(BaseModel):
     name: Optional[str] = None
     amount: Optional[int] = None
     category: Optional[str] = None
-    expiry_date: Optional[datetime] = None 
\ No newline at end of file
+    expiry_date: Optional[datetime] = None 
+class ReceiptJobResponse(BaseModel):
+    job_id: int
+    status: str  # pending / processing / done / failed
+    items: List[Dict[str, Any]] = []
+    error: Optional[str] = None
+    attempts: int
+    stage_timings: Optional[Dict[str, float]] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -35,7 +35,7 @@ class RecipeUpdate(BaseModel):
     image_large: Optional[str] = None
     ingredients: Optional[Dict[str, float]] = None
     instructions: Optional[Dict[str, Any]] = None
-    cooking_img: Optional[Dict[str, Any]] = None
+    cooking_img: Optional[List[str]] = None
 
 class Recipe(RecipeBase):
     id: int
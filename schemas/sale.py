@@ -34,6 +34,7 @@ class SaleResponse(BaseModel):
     status: str
     category: str  
     images: List[str] = []
+    thumbnails: List[str] = []  # 이미지별 목록용 썸네일 URL (파생본이 없으면 원본)
     contents: Optional[str]
 
     class Config:
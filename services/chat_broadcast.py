@@ -0,0 +1,241 @@
+import asyncio
+import json
+import uuid
+from enum import Enum
+from typing import Callable, Dict, Optional, Set
+from fastapi import WebSocket
+from services.chat_broker import ChatBroker
+
+# 저장 후 메시지에 붙이는 id/sender_id/timestamp 등의 여유분 (저장 전에 크기를 확인할 때 사용)
+SAVED_FIELDS_RESERVE = 128
+
+
+class MessageTooLarge(ValueError):
+    """브로커로 다른 워커에 보낼 수 없는 크기의 메시지 (발신자에게 거절을 알림)"""
+
+
+class SlowConsumerPolicy(str, Enum):
+    """송신 큐가 가득 찬 연결(느린 클라이언트)에 대한 처리 방식"""
+    DROP = "drop"              # 새 메시지를 버림
+    COALESCE = "coalesce"      # 가장 오래된 대기 메시지를 버리고 최신 메시지를 넣음
+    DISCONNECT = "disconnect"  # 연결을 끊음
+
+
+class ClientConnection:
+    """웹소켓 하나와 전용 송신 큐, 큐를 비우는 writer 태스크"""
+
+    def __init__(
+        self,
+        broadcaster: "ChatBroadcaster",
+        room_id: int,
+        websocket: WebSocket,
+        email: str,
+        user_id: Optional[int] = None,
+        queue_size: int = 256
+    ):
+        self.broadcaster = broadcaster
+        self.room_id = room_id
+        self.websocket = websocket
+        self.email = email
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def _write_loop(self):
+        """큐에 쌓인 메시지를 순서대로 전송"""
+        try:
+            while True:
+                message = await self.queue.get()
+                await self.websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 전송 실패한 연결은 방에서 제거 (다른 연결에는 영향 없음)
+            print(f"메시지 전송 실패, 연결 제거: 채팅방 {self.room_id}, {str(e)}")
+            self.broadcaster.disconnect(self.room_id, self.websocket)
+
+    def offer(self, message: str, policy: SlowConsumerPolicy) -> bool:
+        """대기 없이 메시지를 큐에 넣음. 큐가 가득 차면 정책에 따라 처리"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        self.dropped += 1
+        if policy == SlowConsumerPolicy.COALESCE:
+            self.queue.get_nowait()
+            self.queue.put_nowait(message)
+            return True
+        if policy == SlowConsumerPolicy.DISCONNECT:
+            print(f"느린 클라이언트 연결 종료: 채팅방 {self.room_id}, {self.email}")
+            self.broadcaster.disconnect(self.room_id, self.websocket)
+            asyncio.create_task(self._close_socket())
+        return False
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close(code=1008)
+        except Exception:
+            pass
+
+    def close(self):
+        self.closed = True
+        self._writer.cancel()
+
+
+class ChatBroadcaster:
+    """
+    채팅방별 웹소켓 연결 관리 및 메시지 팬아웃
+
+    - 연결마다 크기가 제한된 송신 큐와 writer 태스크를 두어
+      느리거나 끊긴 클라이언트가 방 전체의 전송을 막지 않도록 함
+    - 방 멤버십은 room_id -> 연결 집합으로 관리 (연결 해제 시 목록 재생성 없음)
+    - broker가 있으면 다른 워커의 같은 방에도 메시지를 전달하며,
+      로컬 소켓이 있는 방의 채널만 구독한다
+    - on_message가 있으면 로컬/다른 워커의 모든 브로드캐스트 메시지를 워커당 한 번 전달한다
+    - 브로커 payload 한도(max_payload)를 넘는 메시지는 로컬에도 보내지 않고 MessageTooLarge로 거절한다
+      (일부 워커에만 전달되지 않도록, 저장 전에 fits로 먼저 확인)
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 256,
+        policy: str = SlowConsumerPolicy.DROP,
+        broker: Optional[ChatBroker] = None,
+        channel_prefix: str = "chat",
+        on_message: Optional[Callable[[int, str], None]] = None
+    ):
+        self.queue_size = queue_size
+        self.policy = SlowConsumerPolicy(policy)
+        self.broker = broker
+        self.channel_prefix = channel_prefix
+        self.on_message = on_message
+        # 브로커에서 자신이 publish한 메시지를 구분하기 위한 인스턴스 ID
+        self.instance_id = uuid.uuid4().hex
+        self.rooms: Dict[int, Set[ClientConnection]] = {}
+        self._connections: Dict[WebSocket, ClientConnection] = {}
+        self._subscribed: Set[int] = set()
+        self._subscription_lock = asyncio.Lock()
+
+    def _channel(self, room_id: int) -> str:
+        return f"{self.channel_prefix}_{room_id}"
+
+    async def connect(self, room_id: int, websocket: WebSocket, email: str, user_id: Optional[int] = None):
+        connection = ClientConnection(
+            self, room_id, websocket, email, user_id, queue_size=self.queue_size
+        )
+        self._connections[websocket] = connection
+        self.rooms.setdefault(room_id, set()).add(connection)
+        await self._sync_subscription(room_id)
+        return connection
+
+    def disconnect(self, room_id: int, websocket: WebSocket):
+        connection = self._connections.pop(websocket, None)
+        if connection is None:
+            return
+        connection.close()
+        room = self.rooms.get(room_id)
+        if room is not None:
+            room.discard(connection)
+            # 채팅방에 아무도 없으면 채팅방 제거 및 구독 해제
+            if not room:
+                del self.rooms[room_id]
+                if self.broker is not None:
+                    asyncio.create_task(self._sync_subscription(room_id))
+
+    async def _sync_subscription(self, room_id: int):
+        """로컬 연결 유무에 맞춰 방 채널 구독 상태를 맞춤"""
+        if self.broker is None:
+            return
+        async with self._subscription_lock:
+            channel = self._channel(room_id)
+            try:
+                if room_id in self.rooms and room_id not in self._subscribed:
+                    await self.broker.subscribe(channel, self._on_broker_message)
+                    self._subscribed.add(room_id)
+                elif room_id not in self.rooms and room_id in self._subscribed:
+                    await self.broker.unsubscribe(channel, self._on_broker_message)
+                    self._subscribed.discard(room_id)
+            except Exception as e:
+                print(f"채널 구독 상태 변경 실패: {channel}, {str(e)}")
+
+    async def send_personal(self, websocket: WebSocket, message: str):
+        """특정 연결에만 메시지 전송 (히스토리 등 버리면 안 되는 메시지는 큐가 빌 때까지 대기)"""
+        connection = self._connections.get(websocket)
+        if connection is not None and not connection.closed:
+            await connection.queue.put(message)
+
+    def _envelope(self, room_id: int, message: str, sender_email: Optional[str]) -> str:
+        return json.dumps({
+            "origin": self.instance_id,
+            "room_id": room_id,
+            "sender_email": sender_email,
+            "message": message
+        })
+
+    def fits(self, room_id: int, message: str, sender_email: Optional[str] = None, reserve: int = 0) -> bool:
+        """브로커로 보낼 수 있는 크기인지 (reserve: 저장 후 메시지에 더 붙일 bytes)"""
+        limit = getattr(self.broker, "max_payload", None)
+        if limit is None:
+            return True
+        try:
+            # JSON 메시지는 저장 후 다시 직렬화해서 보내므로 그 크기로 확인 (한글은 \uXXXX로 늘어남)
+            message = json.dumps(json.loads(message))
+        except ValueError:
+            pass
+        return len(self._envelope(room_id, message, sender_email).encode("utf-8")) + reserve <= limit
+
+    async def broadcast(self, room_id: int, message: str, sender_email: str = None):
+        """
+        로컬 연결에 바로 팬아웃하고, 브로커를 통해 다른 워커에도 전달
+
+        메시지는 publish마다 한 번만 직렬화되며 수신 측도 워커당 한 번만 파싱한다.
+        브로커로 보낼 수 없는 크기면 아무에게도 보내지 않고 MessageTooLarge.
+        """
+        envelope = self._envelope(room_id, message, sender_email) if self.broker is not None else None
+        limit = getattr(self.broker, "max_payload", None)
+        if limit is not None and len(envelope.encode("utf-8")) > limit:
+            raise MessageTooLarge("메시지가 너무 깁니다.")
+        self._notify(room_id, message)
+        self._fanout(room_id, message, sender_email)
+        if self.broker is None:
+            return
+        try:
+            await self.broker.publish(self._channel(room_id), envelope)
+        except Exception as e:
+            # 다른 워커로의 전달 실패가 로컬 전달이나 웹소켓 루프를 막지 않도록 함
+            print(f"브로커 publish 실패: 채팅방 {room_id}, {str(e)}")
+
+    def _on_broker_message(self, channel: str, payload: str):
+        envelope = json.loads(payload)
+        if envelope["origin"] == self.instance_id:
+            return  # 로컬 연결에는 이미 전달됨
+        self._notify(envelope["room_id"], envelope["message"])
+        self._fanout(envelope["room_id"], envelope["message"], envelope["sender_email"])
+
+    def _notify(self, room_id: int, message: str):
+        if self.on_message is None:
+            return
+        try:
+            self.on_message(room_id, message)
+        except Exception as e:
+            print(f"메시지 훅 처리 실패: 채팅방 {room_id}, {str(e)}")
+
+    def _fanout(self, room_id: int, message: str, sender_email: Optional[str] = None):
+        """방의 모든 로컬 연결 큐에 메시지를 넣음 (전송은 연결별 writer가 동시에 수행)"""
+        room = self.rooms.get(room_id)
+        if not room:
+            return
+        for connection in list(room):
+            # sender_email이 제공되었으면 발신자를 제외하고 전송
+            if sender_email is not None and connection.email == sender_email:
+                continue
+            connection.offer(message, self.policy)
+
+    def room_size(self, room_id: int) -> int:
+        return len(self.rooms.get(room_id, ()))
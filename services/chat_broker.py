@@ -0,0 +1,189 @@
+import asyncio
+from typing import Callable, Dict, List, Optional
+import asyncpg
+from core.config import settings
+
+# NOTIFY payload 최대 크기 (PostgreSQL 기본값 8000 bytes)
+PG_NOTIFY_MAX_PAYLOAD = 7999
+
+BrokerHandler = Callable[[str, str], None]
+
+
+class ChatBroker:
+    """
+    채팅 메시지 pub/sub 브로커 인터페이스
+
+    워커(프로세스)마다 로컬 소켓이 있는 채널만 구독하고,
+    publish된 payload는 구독 중인 모든 워커의 handler(channel, payload)로 전달된다.
+    max_payload가 있으면 그보다 큰 payload(UTF-8 bytes)는 보낼 수 없다.
+    """
+
+    max_payload: Optional[int] = None
+
+    async def publish(self, channel: str, payload: str) -> None:
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str, handler: BrokerHandler) -> None:
+        raise NotImplementedError
+
+    async def unsubscribe(self, channel: str, handler: BrokerHandler) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryBroker(ChatBroker):
+    """단일 프로세스용 브로커 (같은 프로세스 안의 구독자에게만 전달)"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[BrokerHandler]] = {}
+
+    async def publish(self, channel: str, payload: str) -> None:
+        for handler in list(self._handlers.get(channel, ())):
+            handler(channel, payload)
+
+    async def subscribe(self, channel: str, handler: BrokerHandler) -> None:
+        handlers = self._handlers.setdefault(channel, [])
+        if handler not in handlers:
+            handlers.append(handler)
+
+    async def unsubscribe(self, channel: str, handler: BrokerHandler) -> None:
+        handlers = self._handlers.get(channel)
+        if not handlers:
+            return
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers:
+            del self._handlers[channel]
+
+    def channels(self) -> List[str]:
+        return list(self._handlers)
+
+
+class PostgresBroker(ChatBroker):
+    """
+    PostgreSQL LISTEN/NOTIFY 기반 브로커
+
+    LISTEN 전용 연결 하나와 NOTIFY 전용 연결 하나를 SQLAlchemy 풀과 별도로 유지한다.
+    LISTEN 연결이 끊기면 reconnect_delay부터 두 배씩(최대 max_reconnect_delay) 기다리며
+    다시 연결하고 구독 중인 채널을 모두 다시 LISTEN 한다 (끊긴 동안의 메시지는 전달되지 않음).
+    """
+
+    max_payload = PG_NOTIFY_MAX_PAYLOAD
+
+    def __init__(self, dsn: str, reconnect_delay: float = 0.5, max_reconnect_delay: float = 30.0):
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._handlers: Dict[str, List[BrokerHandler]] = {}
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        self._notify_conn: Optional[asyncpg.Connection] = None
+        self._listen_lock = asyncio.Lock()
+        self._notify_lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.reconnects = 0
+
+    async def _get_listen_conn(self) -> asyncpg.Connection:
+        if self._listen_conn is None or self._listen_conn.is_closed():
+            conn = await asyncpg.connect(self.dsn)
+            try:
+                # 재연결된 경우 기존 채널 다시 구독
+                for channel in self._handlers:
+                    await conn.add_listener(channel, self._on_notify)
+            except BaseException:
+                await conn.close()
+                raise
+            conn.add_termination_listener(self._on_terminated)
+            self._listen_conn = conn
+        return self._listen_conn
+
+    def _on_terminated(self, connection):
+        if connection is not self._listen_conn:
+            return
+        self._listen_conn = None
+        if self._closing or not self._handlers:
+            print("채팅 브로커 LISTEN 연결 종료됨, 다음 구독 시 재연결")
+            return
+        print("채팅 브로커 LISTEN 연결 종료됨, 재연결 시작")
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        """구독 중인 채널이 있는 동안 연결될 때까지 재시도"""
+        delay = self.reconnect_delay
+        while not self._closing and self._handlers:
+            try:
+                async with self._listen_lock:
+                    await self._get_listen_conn()
+                self.reconnects += 1
+                print(f"채팅 브로커 LISTEN 재연결 완료: 채널 {len(self._handlers)}개")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"채팅 브로커 LISTEN 재연결 실패, {delay:.1f}초 후 재시도: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        for handler in list(self._handlers.get(channel, ())):
+            handler(channel, payload)
+
+    async def publish(self, channel: str, payload: str) -> None:
+        if len(payload.encode("utf-8")) > PG_NOTIFY_MAX_PAYLOAD:
+            raise ValueError("NOTIFY payload가 너무 큽니다.")
+        async with self._notify_lock:
+            if self._notify_conn is None or self._notify_conn.is_closed():
+                self._notify_conn = await asyncpg.connect(self.dsn)
+            await self._notify_conn.execute("SELECT pg_notify($1, $2)", channel, payload)
+
+    async def subscribe(self, channel: str, handler: BrokerHandler) -> None:
+        async with self._listen_lock:
+            conn = await self._get_listen_conn()
+            handlers = self._handlers.setdefault(channel, [])
+            if not handlers:
+                await conn.add_listener(channel, self._on_notify)
+            if handler not in handlers:
+                handlers.append(handler)
+
+    async def unsubscribe(self, channel: str, handler: BrokerHandler) -> None:
+        async with self._listen_lock:
+            handlers = self._handlers.get(channel)
+            if not handlers:
+                return
+            if handler in handlers:
+                handlers.remove(handler)
+            if not handlers:
+                del self._handlers[channel]
+                if self._listen_conn is not None and not self._listen_conn.is_closed():
+                    await self._listen_conn.remove_listener(channel, self._on_notify)
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            await asyncio.gather(self._reconnect_task, return_exceptions=True)
+            self._reconnect_task = None
+        for conn in (self._listen_conn, self._notify_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._listen_conn = None
+        self._notify_conn = None
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """SQLAlchemy URL(postgresql+asyncpg://)을 asyncpg DSN으로 변환"""
+    return database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def create_chat_broker() -> ChatBroker:
+    """설정(CHAT_BROKER_BACKEND)에 따라 브로커 생성"""
+    if settings.CHAT_BROKER_BACKEND == "postgres":
+        return PostgresBroker(asyncpg_dsn(settings.CHAT_BROKER_DSN or settings.DATABASE_URL))
+    return InMemoryBroker()
+
+
+# 프로세스 내 채팅 매니저들이 공유하는 브로커
+chat_broker = create_chat_broker()
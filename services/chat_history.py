@@ -0,0 +1,141 @@
+import asyncio
+import json
+from collections import deque
+from typing import Any, AsyncContextManager, Awaitable, Callable, Deque, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# (db, room_id, limit, before) -> 시간순으로 정렬된 직렬화 메시지 목록
+HistoryLoader = Callable[[AsyncSession, int, int, Optional[int]], Awaitable[List[Dict[str, Any]]]]
+
+
+class ChatHistoryCache:
+    """
+    채팅방별 최근 메시지 링 버퍼
+
+    - 최신 페이지 요청은 버퍼에서 바로 응답하고, 버퍼가 비어 있을 때만 DB를 조회한다
+    - 같은 방의 동시 로드(재접속 폭주)는 하나의 DB 조회로 합친다
+    - before 커서가 있는 이전 페이지 요청은 항상 DB 키셋 조회로 처리한다
+    - 버퍼는 로컬 소켓이 있는(브로커를 구독 중인) 방에 대해서만 유지하며, 방이 비면 evict로 제거한다
+      (is_live가 False인 방은 버퍼를 만들지 않고 DB에서 바로 조회: 구독하지 않는 방의 버퍼는 갱신되지 않음)
+    - db를 넘기지 않으면 DB 조회가 필요할 때만 session_factory로 세션을 연다
+    """
+
+    def __init__(
+        self,
+        loader: HistoryLoader,
+        capacity: int = 200,
+        room_field: str = "chatroom_id",
+        session_factory: Optional[Callable[[], AsyncContextManager[AsyncSession]]] = None,
+        is_live: Optional[Callable[[int], bool]] = None
+    ):
+        self.loader = loader
+        self.session_factory = session_factory
+        # room_id -> 이 워커에 그 방의 소켓이 있는지 (없으면 모든 방을 라이브로 간주)
+        self.is_live = is_live
+        self.capacity = capacity
+        self.room_field = room_field
+        self._rooms: Dict[int, Deque[Dict[str, Any]]] = {}
+        self._loading: Dict[int, asyncio.Future] = {}
+        # 로드 중에 도착한 메시지 (로드 결과와 병합)
+        self._pending: Dict[int, List[Dict[str, Any]]] = {}
+
+    async def page(
+        self,
+        room_id: int,
+        limit: int,
+        before: Optional[int] = None,
+        db: Optional[AsyncSession] = None
+    ) -> List[Dict[str, Any]]:
+        """시간순으로 정렬된 메시지 한 페이지 반환"""
+        if before is not None or limit > self.capacity:
+            return await self._query(db, room_id, limit, before)
+        if self.is_live is not None and not self.is_live(room_id):
+            self.evict(room_id)
+            return await self._query(db, room_id, limit, None)
+
+        buffer = self._rooms.get(room_id)
+        if buffer is None:
+            buffer = await self._load(db, room_id)
+        return list(buffer)[-limit:] if limit else []
+
+    async def _query(
+        self,
+        db: Optional[AsyncSession],
+        room_id: int,
+        limit: int,
+        before: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        if db is not None:
+            return await self.loader(db, room_id, limit, before)
+        async with self.session_factory() as session:
+            return await self.loader(session, room_id, limit, before)
+
+    async def _load(self, db: Optional[AsyncSession], room_id: int) -> Deque[Dict[str, Any]]:
+        loading = self._loading.get(room_id)
+        if loading is not None:
+            return await asyncio.shield(loading)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[room_id] = future
+        self._pending[room_id] = []
+        try:
+            messages = await self._query(db, room_id, self.capacity, None)
+            buffer = deque(messages, maxlen=self.capacity)
+            for record in self._pending.get(room_id, ()):
+                self._insert(buffer, record)
+            self._rooms[room_id] = buffer
+            future.set_result(buffer)
+            return buffer
+        except Exception as e:
+            future.set_exception(e)
+            # 대기자가 없어도 "exception was never retrieved" 경고가 나지 않도록 처리
+            future.exception()
+            raise
+        finally:
+            self._loading.pop(room_id, None)
+            self._pending.pop(room_id, None)
+
+    def append(self, room_id: int, record: Dict[str, Any]):
+        """새 메시지를 버퍼에 추가 (버퍼가 없는 방은 다음 로드 때 DB에서 읽음)"""
+        buffer = self._rooms.get(room_id)
+        if buffer is not None:
+            self._insert(buffer, record)
+        elif room_id in self._pending:
+            self._pending[room_id].append(record)
+
+    @staticmethod
+    def _insert(buffer: Deque[Dict[str, Any]], record: Dict[str, Any]):
+        if not buffer or buffer[-1]["id"] < record["id"]:
+            buffer.append(record)
+            return
+        if any(existing["id"] == record["id"] for existing in buffer):
+            return
+        # 워커 간 전달 순서가 뒤바뀐 경우 ID 순서로 재정렬
+        ordered = sorted([*buffer, record], key=lambda item: item["id"])
+        buffer.clear()
+        buffer.extend(ordered[-buffer.maxlen:])
+
+    def observe(self, room_id: int, message: str):
+        """
+        브로드캐스트된 메시지(로컬/다른 워커)를 보고 저장된 채팅 메시지면 버퍼에 추가
+
+        ChatBroadcaster의 on_message 훅으로 사용한다.
+        """
+        if room_id not in self._rooms and room_id not in self._pending:
+            return
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+        if not isinstance(data, dict) or data.get("type") != "chat" or data.get("id") is None:
+            return
+        self.append(room_id, {
+            "id": data["id"],
+            "sender_id": data.get("sender_id"),
+            "content": data.get("content"),
+            "timestamp": data.get("timestamp"),
+            self.room_field: room_id
+        })
+
+    def evict(self, room_id: int):
+        self._rooms.pop(room_id, None)
@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from core.config import settings
+
+
+class UnreadCounter:
+    """
+    사용자별 채팅방 안 읽은 메시지 수 (메모리)
+
+    사용자의 받은편지함을 처음 조회할 때 DB에서 한 번 계산해 채워 두고(seed),
+    이후에는 웹소켓에서 메시지가 저장될 때 increment, 읽음 처리 시 reset 한다.
+    채워지지 않은 사용자는 None을 반환하므로 호출 측이 DB에서 계산해야 한다.
+
+    - 채운 지 ttl초가 지나면 버리고 DB에서 다시 계산한다 (놓친 갱신이 있어도 ttl 안에 바로잡힘)
+    - 최근에 조회한 max_users명까지만 기억한다 (가장 오래 조회하지 않은 사용자부터 버림)
+
+    카운터는 워커(프로세스) 단위라서, 여러 워커가 메시지를 나눠 받는 환경
+    (WEB_CONCURRENCY > 1 이거나 CHAT_BROKER_BACKEND가 memory가 아닌 경우)에서는 사용하지 않는다.
+    """
+
+    def __init__(self, enabled: bool = True, ttl: float = 300.0, max_users: int = 10000):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_users = max_users
+        # 사용자 ID -> ({채팅방 ID: 안 읽은 수}, 만료 시각)
+        self._counts: "OrderedDict[int, Tuple[Dict[int, int], float]]" = OrderedDict()
+
+    def _live(self, user_id: int) -> Optional[Dict[int, int]]:
+        cached = self._counts.get(user_id)
+        if cached is None:
+            return None
+        counts, expires_at = cached
+        if expires_at <= time.monotonic():
+            del self._counts[user_id]
+            return None
+        return counts
+
+    def get(self, user_id: int) -> Optional[Dict[int, int]]:
+        """채팅방 ID -> 안 읽은 수 (채워지지 않았거나 만료된 사용자는 None)"""
+        if not self.enabled:
+            return None
+        counts = self._live(user_id)
+        if counts is None:
+            return None
+        self._counts.move_to_end(user_id)
+        return dict(counts)
+
+    def seed(self, user_id: int, counts: Dict[int, int]):
+        if not self.enabled or self.ttl <= 0:
+            return
+        self._counts[user_id] = (dict(counts), time.monotonic() + self.ttl)
+        self._counts.move_to_end(user_id)
+        while len(self._counts) > self.max_users:
+            self._counts.popitem(last=False)
+
+    def increment(self, user_id: int, chat_id: int):
+        counts = self._live(user_id)
+        if counts is not None:
+            counts[chat_id] = counts.get(chat_id, 0) + 1
+
+    def reset(self, user_id: int, chat_id: int):
+        counts = self._live(user_id)
+        if counts is not None:
+            counts[chat_id] = 0
+
+    def forget(self, user_id: int):
+        """사용자 카운터를 버려 다음 조회 때 DB에서 다시 계산하도록 함"""
+        self._counts.pop(user_id, None)
+
+
+unread_counter = UnreadCounter(
+    enabled=settings.CHAT_BROKER_BACKEND == "memory" and settings.WEB_CONCURRENCY == 1,
+    ttl=settings.CHAT_UNREAD_CACHE_TTL,
+    max_users=settings.CHAT_UNREAD_CACHE_USERS
+)
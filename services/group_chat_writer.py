@@ -0,0 +1,212 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from db.session import AsyncSessionLocal
+from models.models import GroupChatMessage
+from schemas.group_chat import GroupChatMessageCreate
+from services.chat_broadcast import ChatBroadcaster
+
+
+class GroupChatMessageWriter:
+    """
+    그룹 채팅 메시지 write-behind 저장기
+
+    웹소켓 루프는 검증된 메시지를 큐에 넣기만 하고(submit, 저장을 기다리지 않음), 단일 flusher 태스크가
+    배치 크기 또는 짧은 대기 시간(flush_interval)을 기준으로 모아서
+    다중 행 INSERT ... RETURNING 한 번으로 저장한다.
+    큐 순서대로 저장되므로 ID 순서가 도착 순서와 일치한다.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        max_batch_size: int = 200,
+        flush_interval: float = 0.005
+    ):
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, message: GroupChatMessageCreate) -> asyncio.Future:
+        """메시지를 저장 큐에 넣고, (id, timestamp)로 완료되는 Future를 반환"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        row = {
+            "chatroom_id": message.chatroom_id,
+            "sender_id": message.sender_id,
+            "content": message.content,
+            "timestamp": datetime.utcnow()
+        }
+        await self._queue.put((row, future))
+        return future
+
+    async def save(self, message: GroupChatMessageCreate) -> Tuple[int, datetime]:
+        """메시지를 저장하고 저장된 (id, timestamp)를 반환"""
+        return await (await self.submit(message))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> list:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                insert(GroupChatMessage).returning(
+                    GroupChatMessage.id,
+                    GroupChatMessage.timestamp,
+                    sort_by_parameter_order=True
+                ),
+                rows
+            )
+            saved = result.all()
+            await session.commit()
+            return saved
+
+    async def _flush(self, batch: list):
+        rows = [row for row, _ in batch]
+        try:
+            saved = await self._insert(rows)
+        except IntegrityError:
+            # 잘못된 행 하나가 배치 전체를 실패시키지 않도록 개별 저장으로 재시도
+            for row, future in batch:
+                try:
+                    saved_row = (await self._insert([row]))[0]
+                    if not future.done():
+                        future.set_result((saved_row.id, saved_row.timestamp))
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        except Exception as e:
+            print(f"그룹 채팅 메시지 배치 저장 실패 ({len(batch)}개): {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), saved_row in zip(batch, saved):
+            if not future.done():
+                future.set_result((saved_row.id, saved_row.timestamp))
+
+
+class SavedMessageRelay:
+    """
+    웹소켓 연결 하나의 ack/브로드캐스트를 저장 순서대로 보내는 태스크
+
+    수신 루프는 submit으로 저장 큐에 넣고 바로 다음 프레임을 읽는다.
+    저장이 끝나면 발신자에게 ack(id, timestamp)를 보내고 저장 정보를 붙여 방에 브로드캐스트한다.
+    저장에 실패하면 ack_error를 보내고 (저장 전과 같이) 원래 메시지를 브로드캐스트한다.
+    저장하지 않는 메시지도 forward로 넘기면 앞선 채팅 메시지와 순서가 바뀌지 않는다.
+    전달을 기다리는 메시지가 max_pending개면 수신 루프가 기다린다 (한 연결이 메모리를 무한히 쓰지 않도록).
+    """
+
+    def __init__(
+        self,
+        writer: GroupChatMessageWriter,
+        broadcaster: ChatBroadcaster,
+        room_id: int,
+        websocket,
+        email: str,
+        max_pending: int = 100
+    ):
+        self.writer = writer
+        self.broadcaster = broadcaster
+        self.room_id = room_id
+        self.websocket = websocket
+        self.email = email
+        self._pending: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, message: GroupChatMessageCreate, frame: Dict[str, Any]):
+        """저장 큐에 넣기만 하고 반환 (frame은 클라이언트가 보낸 메시지)"""
+        future = await self.writer.submit(message)
+        await self._pending.put((frame, message.sender_id, future))
+
+    async def forward(self, data: str):
+        """저장하지 않는 메시지를 앞선 메시지 다음 순서로 브로드캐스트"""
+        await self._pending.put((data, None, None))
+
+    async def _run(self):
+        while True:
+            item = await self._pending.get()
+            if item is None:
+                return
+            frame, sender_id, future = item
+            if future is None:
+                await self._broadcast(frame)
+                continue
+            try:
+                message_id, timestamp = await future
+            except Exception as e:
+                print(f"메시지 저장 실패: 그룹 채팅방 {self.room_id}, {str(e)}")
+                await self.broadcaster.send_personal(self.websocket, json.dumps({
+                    "type": "ack_error",
+                    "client_id": frame.get("client_id"),
+                    "message": "메시지 저장 중 오류가 발생했습니다."
+                }))
+                await self._broadcast(json.dumps(frame))
+                continue
+            await self.broadcaster.send_personal(self.websocket, json.dumps({
+                "type": "ack",
+                "client_id": frame.get("client_id"),
+                "id": message_id,
+                "timestamp": timestamp.isoformat()
+            }))
+            # 수신자(및 내역 버퍼)도 저장된 메시지를 식별할 수 있도록 저장 정보 포함
+            await self._broadcast(json.dumps({
+                **frame,
+                "id": message_id,
+                "sender_id": sender_id,
+                "timestamp": timestamp.isoformat()
+            }))
+
+    async def _broadcast(self, data: str):
+        try:
+            await self.broadcaster.broadcast(self.room_id, data, self.email)
+        except Exception as e:
+            print(f"메시지 브로드캐스트 실패: 그룹 채팅방 {self.room_id}, {str(e)}")
+
+    async def close(self, timeout: float = 5.0):
+        """이미 받은 메시지의 ack/브로드캐스트를 마치고 종료 (연결 종료 시)"""
+        try:
+            # 큐가 가득 찬 경우 종료 표시를 넣는 것도 기다리므로 함께 시간 제한
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            print(f"저장 대기 중인 메시지 전달 시간 초과: 그룹 채팅방 {self.room_id}")
+            # 닫힌 웹소켓으로 보내거나 저장 결과를 계속 붙잡고 있지 않도록 태스크를 끝냄
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _drain(self):
+        await self._pending.put(None)
+        await asyncio.shield(self._task)
+
+
+# 프로세스 전체에서 공유하는 저장기
+group_chat_writer = GroupChatMessageWriter()
@@ -0,0 +1,104 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError
+from core.config import settings
+from models.models import User
+
+
+class IdentityCache:
+    """
+    인증 결과 캐시 (워커 프로세스 단위)
+
+    - 디코딩한 토큰 payload는 토큰의 exp까지 재사용한다 (서명 검증을 매 요청 반복하지 않음)
+    - 토큰 subject(이메일)별 사용자 스냅샷은 user_ttl초 동안 재사용한다
+    - 사용자 정보/등급 변경, 비활성화 시 invalidate_user로 즉시 제거한다
+      (다른 워커의 캐시는 TTL이 지나야 갱신되므로 TTL은 짧게 유지)
+
+    스냅샷은 세션에 속하지 않은 User 객체라서 컬럼 값만 읽을 수 있고 관계는 로드되지 않는다.
+    """
+
+    def __init__(self, user_ttl: float = 30.0, max_tokens: int = 10000, max_users: int = 10000):
+        self.user_ttl = user_ttl
+        self.max_tokens = max_tokens
+        self.max_users = max_users
+        # 토큰 -> (payload, exp)
+        self._tokens: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # 이메일 -> (사용자 스냅샷, 만료 시각)
+        self._users: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        # 사용자 ID -> 이메일 (ID로 무효화할 때 사용)
+        self._emails: Dict[int, str] = {}
+        # 무효화 세대: 조회 도중 무효화가 일어나면 그 조회 결과는 저장하지 않음
+        self._generation = 0
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """토큰 검증 및 payload 반환 (실패 시 JWTError)"""
+        cached = self._tokens.get(token)
+        if cached is not None:
+            payload, exp = cached
+            if exp > time.time():
+                self._tokens.move_to_end(token)
+                return payload
+            del self._tokens[token]
+            raise ExpiredSignatureError("Signature has expired.")
+
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        exp = payload.get("exp")
+        # exp가 없는 토큰은 사용자 캐시 TTL만큼만 기억
+        self._tokens[token] = (payload, float(exp) if exp is not None else time.time() + self.user_ttl)
+        if len(self._tokens) > self.max_tokens:
+            self._tokens.popitem(last=False)
+        return payload
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get_user(self, email: str) -> Optional[User]:
+        cached = self._users.get(email)
+        if cached is None:
+            return None
+        user, expires_at = cached
+        if expires_at <= time.monotonic():
+            self._drop(email)
+            return None
+        self._users.move_to_end(email)
+        return user
+
+    def put_user(self, email: str, user: User, generation: int) -> User:
+        """DB에서 읽은 사용자를 스냅샷으로 저장하고 반환"""
+        snapshot = self._snapshot(user)
+        if generation == self._generation:
+            self._users[email] = (snapshot, time.monotonic() + self.user_ttl)
+            self._emails[snapshot.id] = email
+            if len(self._users) > self.max_users:
+                _, (oldest, _) = self._users.popitem(last=False)
+                self._emails.pop(oldest.id, None)
+        return snapshot
+
+    def invalidate_user(self, user_id: Optional[int] = None, email: Optional[str] = None):
+        self._generation += 1
+        if user_id is not None:
+            cached_email = self._emails.pop(user_id, None)
+            if cached_email is not None:
+                self._users.pop(cached_email, None)
+        if email is not None:
+            self._drop(email)
+
+    def _drop(self, email: str):
+        cached = self._users.pop(email, None)
+        if cached is not None:
+            self._emails.pop(cached[0].id, None)
+
+    @staticmethod
+    def _snapshot(user: User) -> User:
+        # 요청 세션과 분리된 사본 (여러 요청이 공유해도 세션 상태에 영향 없음)
+        return User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+
+
+identity_cache = IdentityCache(
+    user_ttl=settings.AUTH_USER_CACHE_TTL,
+    max_tokens=settings.AUTH_TOKEN_CACHE_SIZE,
+    max_users=settings.AUTH_TOKEN_CACHE_SIZE
+)
@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from fastapi import UploadFile
+from core.config import settings
+from models.models import Image as ImageRow
+from services.image_registry import BlobEntry, ImageRegistry, image_registry
+from services.storage import ObjectStorage, storage, upload_failed, upload_images
+from utils.image_resize import FORMATS, Image, render_derivatives, warm_up
+from utils.metrics import LatencyTracker
+
+# 목록 화면 기본 형식 (WebP를 받는다고 알린 클라이언트에만 WebP)
+DEFAULT_FORMAT = "jpeg"
+
+
+class ImageDerivativeService:
+    """
+    업로드 이미지의 썸네일/중간 크기 파생본 생성
+
+    - 디코딩/리사이즈/인코딩은 CPU 작업이라 프로세스 풀에서 실행 (이벤트 루프와 GIL을 막지 않음)
+    - 파생본은 원본 키에 "_<이름>.<확장자>"를 붙인 키로 원본과 같은 저장소에 저장
+    - Pillow가 없거나 디코딩/저장에 실패하면 파생본 없이 원본만 사용 (목록은 원본 URL로 대체)
+    """
+
+    def __init__(
+        self,
+        sizes: Dict[str, int],
+        formats: Tuple[str, ...] = ("webp", "jpeg"),
+        quality: int = 80,
+        workers: int = 2
+    ):
+        self.sizes = sizes
+        self.formats = formats
+        self.quality = quality
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self.rendered = 0
+        self.failures = 0
+        self.skipped = 0
+        self.latency = LatencyTracker()
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None and self.workers > 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: 이벤트 루프/DB 연결을 가진 부모 프로세스를 fork하지 않음
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def start(self):
+        """워커 프로세스를 미리 띄움 (첫 업로드가 프로세스 시작 시간을 기다리지 않도록)"""
+        if self.enabled:
+            for _ in range(self.workers):
+                self.executor.submit(warm_up)
+
+    async def render(self, data: bytes) -> Optional[Dict[str, Dict[str, bytes]]]:
+        """파생본 {이름: {형식: bytes}} 생성 (실패하면 None)"""
+        if not self.enabled:
+            self.skipped += 1
+            return None
+        started = time.perf_counter()
+        try:
+            rendered = await asyncio.get_running_loop().run_in_executor(
+                self.executor, render_derivatives, data, self.sizes, self.formats, self.quality
+            )
+        except Exception as e:
+            self.failures += 1
+            print(f"이미지 파생본 생성 실패: {e}")
+            return None
+        self.latency.record(time.perf_counter() - started)
+        self.rendered += 1
+        return rendered
+
+    async def store(
+        self,
+        original_url: str,
+        rendered: Dict[str, Dict[str, bytes]],
+        backend: ObjectStorage
+    ) -> Optional[Dict[str, Dict[str, str]]]:
+        """파생본을 저장하고 {이름: {형식: URL}} 반환 (하나라도 실패하면 저장한 것도 지우고 None)"""
+        stem = backend.key_for(original_url).rsplit(".", 1)[0]
+        uploads = []
+        for name, encoded in rendered.items():
+            for fmt, data in encoded.items():
+                _, content_type, extension = FORMATS[fmt]
+                uploads.append((name, fmt, f"{stem}_{name}.{extension}", data, content_type))
+
+        results = await asyncio.gather(
+            *(backend.put(key, io.BytesIO(data), content_type) for _, _, key, data, content_type in uploads),
+            return_exceptions=True
+        )
+        if any(isinstance(result, Exception) for result in results):
+            self.failures += 1
+            print(f"이미지 파생본 저장 실패: {original_url}")
+            await backend.delete_many([key for _, _, key, _, _ in uploads])
+            return None
+
+        derivatives: Dict[str, Dict[str, str]] = {}
+        for name, fmt, key, _, _ in uploads:
+            derivatives.setdefault(name, {})[fmt] = backend.url_for(key)
+        return derivatives
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "sizes": self.sizes,
+            "rendered": self.rendered,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "latency": self.latency.snapshot()
+        }
+
+
+image_derivatives = ImageDerivativeService(
+    sizes={"thumb": settings.IMAGE_THUMBNAIL_SIZE, "medium": settings.IMAGE_MEDIUM_SIZE},
+    quality=settings.IMAGE_DERIVATIVE_QUALITY,
+    workers=settings.IMAGE_DERIVATIVE_WORKERS
+)
+
+
+async def upload_images_with_derivatives(
+    files: List[UploadFile],
+    backend: Optional[ObjectStorage] = None,
+    service: Optional[ImageDerivativeService] = None,
+    registry: Optional[ImageRegistry] = None
+) -> Tuple[Optional[List[str]], List[Optional[Dict[str, Dict[str, str]]]]]:
+    """
+    원본을 업로드하면서 파생본을 만들어 같은 저장소에 저장
+
+    (원본 URL 목록, 이미지별 파생본 URL) 반환. 원본 업로드 규칙(하나라도 실패하면 502)은
+    upload_images와 같고, 파생본은 실패해도 None으로 두고 원본만 사용한다.
+    registry가 켜져 있으면 내용 해시를 키로 쓰고, 이미 올라간 내용은 PUT과 파생본 생성을 건너뛴다.
+    """
+    if not files:
+        return None, []
+    backend = backend or storage
+    service = service or image_derivatives
+    registry = registry or image_registry
+    if registry.enabled:
+        return await _upload_deduplicated(files, backend, service, registry)
+    if not service.enabled:
+        service.skipped += len(files)
+        return await upload_images(files, backend), [None] * len(files)
+
+    # 업로드가 끝나면 파일이 닫힐 수 있으므로(S3) 파생본용 바이트를 먼저 읽어 둠
+    contents: List[Optional[bytes]] = []
+    for file in files:
+        if getattr(file, "filename", None):
+            contents.append(await file.read())
+            await file.seek(0)
+        else:
+            contents.append(None)
+
+    async def render_all():
+        return await asyncio.gather(*(service.render(data) if data else _none() for data in contents))
+
+    # 원본 전송과 파생본 생성을 동시에 진행
+    render_task = asyncio.ensure_future(render_all())
+    try:
+        urls = await upload_images(files, backend)
+    except BaseException:
+        render_task.cancel()
+        raise
+    rendered = await render_task
+
+    derivatives = await asyncio.gather(*(
+        service.store(url, result, backend) if result else _none()
+        for url, result in zip(urls, rendered)
+    ))
+    return urls, list(derivatives)
+
+
+async def _upload_deduplicated(
+    files: List[UploadFile],
+    backend: ObjectStorage,
+    service: ImageDerivativeService,
+    registry: ImageRegistry
+) -> Tuple[List[str], List[Optional[Dict[str, Dict[str, str]]]]]:
+    """내용 해시 키로 업로드 (처음 보는 내용만 PUT하고 파생본 생성)"""
+    invalid = [file for file in files if not hasattr(file, "file") or not getattr(file, "filename", None)]
+    if invalid:
+        raise upload_failed([
+            {"filename": getattr(file, "filename", None), "error": "잘못된 파일"} for file in invalid
+        ])
+
+    contents = []
+    for file in files:
+        contents.append(await file.read())
+        await file.seek(0)
+    hashes = await asyncio.to_thread(lambda: [hashlib.sha256(data).hexdigest() for data in contents])
+    refs = await registry.acquire([
+        BlobEntry(
+            content_hash=content_hash,
+            key=f"{content_hash}.{file.filename.split('.')[-1].lower()}",
+            content_type=file.content_type,
+            size=len(data)
+        )
+        for file, data, content_hash in zip(files, contents, hashes)
+    ])
+
+    # 아직 올라가지 않은 내용만 (같은 요청 안의 같은 사진은 한 번만)
+    pending: Dict[str, int] = {}
+    for index, ref in enumerate(refs):
+        if not ref.uploaded:
+            pending.setdefault(ref.content_hash, index)
+    indexes = list(pending.values())
+
+    render_task = asyncio.ensure_future(asyncio.gather(*(service.render(contents[i]) for i in indexes)))
+    try:
+        results = await backend.put_many([files[i] for i in indexes], [refs[i].key for i in indexes])
+    except BaseException:
+        render_task.cancel()
+        raise
+    rendered = await render_task
+
+    failed = [result for result in results if result["error"]]
+    if failed:
+        # 이번 요청이 늘린 참조를 되돌림 (다른 곳에서 쓰지 않는 내용이면 삭제 outbox로)
+        async with registry.session_factory() as db:
+            await registry.release(db, [ImageRow(image_url=backend.url_for(ref.key)) for ref in refs], backend)
+            await db.commit()
+        raise upload_failed(failed)
+
+    stored = await asyncio.gather(*(
+        service.store(result["url"], derived, backend) if derived else _none()
+        for result, derived in zip(results, rendered)
+    ))
+    new_derivatives = dict(zip(pending, stored))
+    await registry.mark_uploaded(new_derivatives)
+
+    urls = [backend.url_for(ref.key) for ref in refs]
+    derivatives = [
+        ref.derivatives if ref.uploaded else new_derivatives[ref.content_hash]
+        for ref in refs
+    ]
+    return urls, derivatives
+
+
+async def _none():
+    return None
+
+
+def pick_rendition(
+    image_url: Optional[str],
+    derivatives: Optional[Dict[str, Dict[str, str]]],
+    rendition: str = "thumb",
+    image_format: str = DEFAULT_FORMAT
+) -> Optional[str]:
+    """파생본 URL 선택 (요청한 형식이 없으면 다른 형식, 파생본이 없으면 원본)"""
+    encoded = (derivatives or {}).get(rendition) or {}
+    return encoded.get(image_format) or next(iter(encoded.values()), None) or image_url
+
+
+def preferred_image_format(accept: Optional[str]) -> str:
+    """Accept 헤더에 image/webp가 있으면 webp"""
+    return "webp" if accept and "image/webp" in accept else DEFAULT_FORMAT
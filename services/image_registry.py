@@ -0,0 +1,222 @@
+import asyncio
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
+from db.session import AsyncSessionLocal
+from models.models import ImageBlob, StorageDeletion
+from services.storage import ObjectStorage, storage
+from services.storage_outbox import enqueue_deletions
+
+
+class BlobEntry(NamedTuple):
+    """업로드할 이미지 하나 (acquire 입력)"""
+    content_hash: str
+    key: str
+    content_type: Optional[str]
+    size: int
+
+
+class BlobRef(NamedTuple):
+    """acquire 결과 (uploaded면 원본 PUT과 파생본 생성을 건너뜀)"""
+    content_hash: str
+    key: str
+    uploaded: bool
+    derivatives: Optional[Dict[str, Dict[str, str]]]
+
+
+def blob_hash(key: str) -> str:
+    """저장소 키의 내용 해시 부분 (원본 "<해시>.<확장자>", 파생본 "<해시>_<이름>.<확장자>")"""
+    return key.rsplit(".", 1)[0].split("_", 1)[0]
+
+
+def image_object_urls(images) -> List[str]:
+    """Image 행들의 원본 + 파생본 URL (저장소에서 함께 지울 때 사용)"""
+    urls = []
+    for image in images or []:
+        if image.image_url:
+            urls.append(image.image_url)
+        for encoded in (getattr(image, "derivatives", None) or {}).values():
+            urls.extend(encoded.values())
+    return urls
+
+
+class ImageRegistry:
+    """
+    내용 해시 키 이미지 객체의 참조 수 관리 (image_blobs)
+
+    - 업로드 전에 acquire로 참조를 먼저 늘리고 커밋한다. 이미 올라간 내용이면 PUT을 건너뛴다
+    - Image 행을 지울 때 같은 트랜잭션에서 release로 줄이고, 0이 되면 등록을 지우고 삭제 outbox에 기록한다
+    - 같은 내용이 다시 올라오면 아직 처리되지 않은 삭제 예약을 취소한다
+      (삭제기가 lease를 잡고 저장소에서 지우는 중인 행이면 삭제가 끝날 때까지 기다린 뒤 반환하므로
+      호출 측의 PUT이 진행 중인 삭제에 지워지지 않음)
+    - 등록되지 않은 기존 uuid 키 이미지는 예전처럼 바로 삭제 outbox에 기록한다
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        enabled: bool = True,
+        deletion_poll_interval: float = 0.1
+    ):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.deletion_poll_interval = deletion_poll_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.released = 0
+        self.removed = 0
+        self.deletion_waits = 0
+
+    async def acquire(self, entries: List[BlobEntry]) -> List[BlobRef]:
+        """entries마다 참조를 하나씩 늘리고 입력 순서대로 결과 반환 (새 내용이면 행 생성)"""
+        counts = Counter(entry.content_hash for entry in entries)
+        first: Dict[str, BlobEntry] = {}
+        for entry in entries:
+            first.setdefault(entry.content_hash, entry)
+
+        now = datetime.utcnow()
+        # 한 문장 안에서 같은 행을 두 번 갱신할 수 없으므로 요청 안의 중복은 미리 합침
+        stmt = insert(ImageBlob).values([
+            {
+                "content_hash": content_hash,
+                "key": entry.key,
+                "content_type": entry.content_type,
+                "size": entry.size,
+                "refcount": counts[content_hash],
+                "uploaded": False,
+                "created_at": now,
+                "last_used_at": now
+            }
+            for content_hash, entry in first.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ImageBlob.content_hash],
+            set_={"refcount": ImageBlob.refcount + stmt.excluded.refcount, "last_used_at": now}
+        ).returning(ImageBlob.content_hash, ImageBlob.key, ImageBlob.uploaded, ImageBlob.derivatives)
+
+        async with self.session_factory() as db:
+            result = await db.execute(stmt)
+            refs = {row.content_hash: BlobRef(*row) for row in result}
+            in_flight = await self._cancel_deletions(db, list(refs), now)
+            await db.commit()
+        if in_flight:
+            await self._wait_for_deletions(list(refs))
+
+        for content_hash, count in counts.items():
+            if refs[content_hash].uploaded:
+                self.hits += count
+                self.bytes_saved += first[content_hash].size * count
+            else:
+                self.misses += count
+        return [refs[entry.content_hash] for entry in entries]
+
+    async def _cancel_deletions(self, db: AsyncSession, hashes: List[str], now: datetime) -> bool:
+        """
+        0이 되어 삭제 예약된 뒤 다시 올라온 내용의 삭제 예약을 취소 (원본/파생본 키가 모두 해시로 시작)
+
+        삭제기가 lease를 잡고 지우는 중인 행은 취소해도 저장소 삭제를 막을 수 없으므로 남겨 두고,
+        그런 행이 있으면 True를 반환한다.
+        """
+        prefixes = or_(*(StorageDeletion.key.startswith(content_hash) for content_hash in hashes))
+        leased = StorageDeletion.leased_until > now
+        await db.execute(
+            delete(StorageDeletion)
+            .where(prefixes, or_(StorageDeletion.leased_until.is_(None), ~leased))
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(select(StorageDeletion.id).where(prefixes, leased).limit(1))
+        return result.first() is not None
+
+    async def _wait_for_deletions(self, hashes: List[str]):
+        """진행 중인 저장소 삭제가 끝나거나(행이 지워지거나 실패로 lease가 풀림) lease가 만료될 때까지 대기"""
+        self.deletion_waits += 1
+        while True:
+            await asyncio.sleep(self.deletion_poll_interval)
+            async with self.session_factory() as db:
+                if not await self._cancel_deletions(db, hashes, datetime.utcnow()):
+                    # 실패해 재시도를 기다리는 예약도 함께 취소됨 (PUT으로 다시 올리므로)
+                    await db.commit()
+                    return
+                await db.rollback()
+
+    async def mark_uploaded(self, derivatives: Dict[str, Optional[Dict[str, Dict[str, str]]]]):
+        """원본 PUT이 끝난 해시에 파생본 URL을 기록 (이후 같은 내용은 PUT과 생성을 건너뜀)"""
+        if not derivatives:
+            return
+        async with self.session_factory() as db:
+            for content_hash, derived in derivatives.items():
+                await db.execute(
+                    update(ImageBlob)
+                    .where(ImageBlob.content_hash == content_hash)
+                    .values(uploaded=True, derivatives=derived)
+                )
+            await db.commit()
+
+    async def release(self, db: AsyncSession, images: Iterable, backend: Optional[ObjectStorage] = None):
+        """
+        Image 행들의 참조를 줄이고 0이 된 객체(파생본 포함)를 삭제 outbox에 기록
+
+        image_url은 원본 또는 파생본 URL (레시피처럼 파생본 URL만 저장한 경우도 같은 객체로 셈).
+        커밋은 호출 측 트랜잭션에서 (Image 행 삭제가 롤백되면 참조 수도 그대로)
+        """
+        backend = backend or storage
+        images = [image for image in images if image.image_url]
+        counts = Counter(blob_hash(backend.key_for(image.image_url)) for image in images)
+        # 줄일 수가 같은 해시끼리 묶어 한 번에 갱신
+        by_count: Dict[int, List[str]] = defaultdict(list)
+        for content_hash, count in counts.items():
+            by_count[count].append(content_hash)
+
+        matched = set()
+        dead_ids = []
+        urls = []
+        for count, hashes in by_count.items():
+            result = await db.execute(
+                update(ImageBlob)
+                .where(ImageBlob.content_hash.in_(hashes))
+                .values(refcount=ImageBlob.refcount - count)
+                .returning(ImageBlob.id, ImageBlob.content_hash, ImageBlob.key, ImageBlob.refcount, ImageBlob.derivatives)
+                .execution_options(synchronize_session=False)
+            )
+            for row in result:
+                matched.add(row.content_hash)
+                if row.refcount <= 0:
+                    dead_ids.append(row.id)
+                    urls.append(backend.url_for(row.key))
+                    for encoded in (row.derivatives or {}).values():
+                        urls.extend(encoded.values())
+
+        if dead_ids:
+            await db.execute(
+                delete(ImageBlob).where(ImageBlob.id.in_(dead_ids)).execution_options(synchronize_session=False)
+            )
+        # 등록되지 않은 기존 이미지는 행마다 자기 객체를 가짐
+        urls.extend(image_object_urls([
+            image for image in images if blob_hash(backend.key_for(image.image_url)) not in matched
+        ]))
+        enqueue_deletions(db, urls, backend)
+
+        self.released += sum(counts[content_hash] for content_hash in matched)
+        self.removed += len(dead_ids)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "released": self.released,
+            "removed": self.removed,
+            "deletion_waits": self.deletion_waits
+        }
+
+
+image_registry = ImageRegistry(enabled=settings.IMAGE_DEDUPE)
@@ -6,6 +6,7 @@ from models import Sale
 import math
 import asyncio
 from typing import List, Dict, Tuple
+from db.hot_queries import available_sales
 
 class IngredientMatcher:
     def __init__(self, db: AsyncSession):
@@ -66,7 +67,7 @@ class IngredientMatcher:
 
      # 제공 가능한 판매 데이터 가져오기
     async def fetch_sales_data(self) -> List[Dict]:
-        result = await self.db.execute(select(Sale).where(Sale.status == "Available"))
+        result = await self.db.execute(available_sales())
         sales = result.scalars().all()
         return [
             {
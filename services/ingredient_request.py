@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from models import IngredientRequest, Ingredient
 from datetime import datetime
+from db.hot_queries import active_ingredient_requests
 
 
 class RequestService:
@@ -12,10 +13,7 @@ class RequestService:
         """새로운 요청 생성"""
         # 동일 식재료에 'Pending' 또는 'Completed' 상태 요청이 있는지 확인
         existing_request = await self.db.execute(
-            select(IngredientRequest).where(
-                (IngredientRequest.ingredient_id == ingredient_id) &
-                (IngredientRequest.status.in_(["거래 중", "거래 완료"]))
-            )
+            active_ingredient_requests(ingredient_id)
         )
         if existing_request.scalars().first():
             raise ValueError(f"Ingredient with ID {ingredient_id} is already in transaction or completed")
@@ -95,10 +93,7 @@ class RequestService:
         """새로운 요청 생성"""
         # 동일 식재료에 'Pending' 또는 'Completed' 상태 요청이 있는지 확인
         existing_request = await self.db.execute(
-            select(IngredientRequest).where(
-                (IngredientRequest.ingredient_id == ingredient_id) &
-                (IngredientRequest.status.in_(["거래 중", "거래 완료"]))
-            )
+            active_ingredient_requests(ingredient_id)
         )
         if existing_request.scalars().first():
             raise ValueError(f"Ingredient with ID {ingredient_id} is already in transaction or completed")
@@ -178,10 +173,7 @@ class RequestService:
         """새로운 요청 생성"""
         # 동일 식재료에 'Pending' 또는 'Completed' 상태 요청이 있는지 확인
         existing_request = await self.db.execute(
-            select(IngredientRequest).where(
-                (IngredientRequest.ingredient_id == ingredient_id) &
-                (IngredientRequest.status.in_(["거래 중", "거래 완료"]))
-            )
+            active_ingredient_requests(ingredient_id)
         )
         if existing_request.scalars().first():
             raise ValueError(f"Ingredient with ID {ingredient_id} is already in transaction or completed")
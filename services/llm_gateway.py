@@ -0,0 +1,409 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
+from db.session import AsyncSessionLocal
+from models.models import LLMResponseCache
+from utils.metrics import LatencyTracker
+
+Messages = List[Dict[str, str]]
+
+# response_format={"type": "json_object"}를 지원하는 모델 (그 외 모델은 프롬프트와 파싱으로만 처리)
+JSON_MODE_MODELS = ("gpt-4o", "gpt-4-turbo", "gpt-4.1", "gpt-3.5-turbo")
+
+REPAIR_PROMPT = "앞의 응답은 올바른 JSON이 아닙니다. 설명이나 코드 블록 없이 올바른 JSON만 다시 출력해주세요."
+
+
+class LLMError(Exception):
+    """LLM 호출 실패 (타임아웃, API 오류)"""
+
+
+class LLMJSONError(LLMError):
+    """복구 요청 후에도 응답이 올바른 JSON이 아닌 경우"""
+
+
+def parse_json(text: str) -> Any:
+    """코드 블록(```json)을 벗겨 JSON으로 파싱"""
+    cleaned = text.strip().replace('```json', '').replace('```', '').strip()
+    return json.loads(cleaned)
+
+
+def cache_key(model: str, messages: Messages, temperature: float, max_tokens: Optional[int], json_mode: bool) -> str:
+    """프롬프트와 입력, 생성 옵션으로 만든 캐시 키 (SHA-256)"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens, "json": json_mode},
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMBackend:
+    """채팅 완성 API 인터페이스 (응답 본문 문자열을 반환)"""
+
+    async def complete(
+        self,
+        model: str,
+        messages: Messages,
+        temperature: float,
+        max_tokens: Optional[int],
+        json_mode: bool
+    ) -> str:
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI Chat Completions (AsyncOpenAI, 처음 호출할 때 생성)"""
+
+    def __init__(self, api_key: str, timeout: float = 60.0):
+        self.api_key = api_key
+        self.timeout = timeout
+        self._client = None
+
+    async def complete(self, model, messages, temperature, max_tokens, json_mode):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            # 재시도는 게이트웨이의 복구 로직과 작업 큐가 담당
+            self._client = AsyncOpenAI(api_key=self.api_key, timeout=self.timeout, max_retries=1)
+        options: Dict[str, Any] = {"model": model, "messages": messages, "temperature": temperature}
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+        if json_mode and model.startswith(JSON_MODE_MODELS):
+            options["response_format"] = {"type": "json_object"}
+        response = await self._client.chat.completions.create(**options)
+        return response.choices[0].message.content or ""
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    테스트/벤치마크용 로컬 백엔드
+
+    responder(messages)가 돌려준 문자열을 delay초 뒤에 응답한다 (기본값은 "{}").
+    호출 수와 동시 호출 수를 기록한다.
+    """
+
+    def __init__(self, responder: Optional[Callable[[Messages], str]] = None, delay: float = 0.0):
+        self.responder = responder or (lambda messages: "{}")
+        self.delay = delay
+        self.calls: List[Messages] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete(self, model, messages, temperature, max_tokens, json_mode):
+        self.calls.append(messages)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            return self.responder(messages)
+        finally:
+            self.in_flight -= 1
+
+
+LLM_BACKENDS: Dict[str, Type[LLMBackend]] = {
+    "openai": OpenAIBackend,
+    "fake": FakeLLMBackend,
+}
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷 (rate가 0 이하면 제한 없음)"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> float:
+        """토큰 하나를 쓸 때까지 대기하고, 기다린 시간(초)을 반환"""
+        if self.rate <= 0:
+            return 0.0
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        waited = 0.0
+        # 순서대로 토큰을 받도록 대기도 락 안에서 함
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class MemoryResponseStore:
+    """프로세스 메모리 LRU 응답 캐시 (테스트/벤치마크용)"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        return response
+
+    async def put(self, key: str, model: str, response: str):
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class PostgresResponseStore:
+    """llm_response_cache 테이블에 저장되는 응답 캐시 (워커/재시작 간 공유, ttl이 지나면 무시)"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        ttl: timedelta = timedelta(days=30)
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[str]:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(LLMResponseCache)
+                .where(LLMResponseCache.key == key, LLMResponseCache.created_at > datetime.utcnow() - self.ttl)
+                .values(hits=LLMResponseCache.hits + 1, last_used_at=datetime.utcnow())
+                .returning(LLMResponseCache.response)
+            )
+            response = result.scalar_one_or_none()
+            await db.commit()
+        return response
+
+    async def put(self, key: str, model: str, response: str):
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            stmt = insert(LLMResponseCache).values(
+                key=key, model=model, response=response, hits=0, created_at=now, last_used_at=now
+            )
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={"response": response, "created_at": now, "last_used_at": now}
+            ))
+            await db.commit()
+
+
+class LLMGateway:
+    """
+    LLM 호출 공용 게이트웨이
+
+    - 같은 프롬프트/입력/옵션의 응답은 store(기본 Postgres)에 캐시해 다시 호출하지 않음
+    - 같은 키로 동시에 들어온 요청은 호출 한 번의 결과를 나눠 씀
+    - 토큰 버킷으로 초당 호출 수를, 세마포어로 동시 호출 수를 제한
+    - complete_json은 JSON 파싱에 실패하면 한 번만 고쳐 달라고 다시 요청
+      (캐시에는 파싱에 성공한 응답만 저장)
+    - 호출 수, 캐시 적중, 지연 시간 백분위를 stats()로 제공
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        store: Optional[Any] = None,
+        max_concurrency: int = 4,
+        rate: float = 3.0,
+        burst: float = 5.0,
+        timeout: float = 60.0
+    ):
+        self.backend = backend
+        self.store = store
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.timeout = timeout
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+
+        self.latency = LatencyTracker()
+        self.requests = 0
+        self.backend_calls = 0
+        self.cache_hits = 0
+        self.deduplicated = 0
+        self.repairs = 0
+        self.failures = 0
+        self.rate_limited_seconds = 0.0
+        self.in_flight = 0
+
+    async def complete(
+        self,
+        messages: Messages,
+        model: str = "gpt-4o",
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True
+    ) -> str:
+        """채팅 완성 응답 본문"""
+        async def produce() -> str:
+            return await self._call(model, messages, temperature, max_tokens, False)
+
+        key = cache_key(model, messages, temperature, max_tokens, False)
+        return await self._cached(key, model, produce, use_cache)
+
+    async def complete_json(
+        self,
+        messages: Messages,
+        model: str = "gpt-4o",
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True
+    ) -> Any:
+        """JSON 응답을 파싱해 반환 (복구 요청까지 실패하면 LLMJSONError)"""
+        async def produce() -> str:
+            text = await self._call(model, messages, temperature, max_tokens, True)
+            try:
+                parse_json(text)
+                return text
+            except ValueError:
+                self.repairs += 1
+            repair_messages = messages + [
+                {"role": "assistant", "content": text},
+                {"role": "user", "content": REPAIR_PROMPT}
+            ]
+            repaired = await self._call(model, repair_messages, temperature, max_tokens, True)
+            try:
+                parse_json(repaired)
+            except ValueError as e:
+                self.failures += 1
+                raise LLMJSONError(f"JSON 응답 복구 실패: {str(e)} / 응답: {repaired[:200]}")
+            return repaired
+
+        key = cache_key(model, messages, temperature, max_tokens, True)
+        return parse_json(await self._cached(key, model, produce, use_cache))
+
+    async def _cached(self, key: str, model: str, produce: Callable[[], Awaitable[str]], use_cache: bool) -> str:
+        self.requests += 1
+        if use_cache and self.store is not None:
+            try:
+                cached = await self.store.get(key)
+            except Exception as e:
+                print(f"LLM 캐시 조회 실패: {str(e)}")
+                cached = None
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            response = await produce()
+            future.set_result(response)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 기다리는 요청이 없을 때 "exception was never retrieved" 경고 방지
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+        if use_cache and self.store is not None:
+            try:
+                await self.store.put(key, model, response)
+            except Exception as e:
+                print(f"LLM 캐시 저장 실패: {str(e)}")
+        return response
+
+    async def _call(
+        self,
+        model: str,
+        messages: Messages,
+        temperature: float,
+        max_tokens: Optional[int],
+        json_mode: bool
+    ) -> str:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        # 토큰을 기다리는 동안 동시 호출 자리를 차지하지 않도록 자리보다 먼저 받음
+        self.rate_limited_seconds += await self.bucket.acquire()
+        async with self._slots:
+            self.in_flight += 1
+            self.backend_calls += 1
+            started = time.perf_counter()
+            try:
+                return await asyncio.wait_for(
+                    self.backend.complete(model, messages, temperature, max_tokens, json_mode),
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                self.failures += 1
+                raise LLMError(f"LLM 응답 시간 초과 ({self.timeout}초)")
+            except LLMError:
+                self.failures += 1
+                raise
+            except Exception as e:
+                self.failures += 1
+                raise LLMError(f"LLM 호출 실패: {str(e)}") from e
+            finally:
+                self.in_flight -= 1
+                self.latency.record(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "backend_calls": self.backend_calls,
+            "cache_hits": self.cache_hits,
+            "cache_hit_rate": round(self.cache_hits / self.requests, 4) if self.requests else 0.0,
+            "deduplicated": self.deduplicated,
+            "repairs": self.repairs,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "rate_limited_seconds": round(self.rate_limited_seconds, 3),
+            "latency": self.latency.snapshot()
+        }
+
+    async def aclose(self):
+        await self.backend.aclose()
+
+
+def create_llm_backend() -> LLMBackend:
+    """설정(LLM_BACKEND)에 따라 LLM 백엔드 생성"""
+    backend_class = LLM_BACKENDS.get(settings.LLM_BACKEND)
+    if backend_class is None:
+        raise ValueError(f"지원하지 않는 LLM_BACKEND: {settings.LLM_BACKEND}")
+    if backend_class is OpenAIBackend:
+        return OpenAIBackend(settings.OPENAI_API_KEY, timeout=settings.LLM_TIMEOUT)
+    return backend_class()
+
+
+# 워커 프로세스가 공유하는 LLM 게이트웨이
+llm_gateway = LLMGateway(
+    create_llm_backend(),
+    store=PostgresResponseStore(ttl=timedelta(hours=settings.LLM_CACHE_TTL_HOURS))
+    if settings.LLM_CACHE_TTL_HOURS > 0 else None,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    rate=settings.LLM_RATE_PER_SECOND,
+    burst=settings.LLM_BURST,
+    timeout=settings.LLM_TIMEOUT
+)
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import BinaryIO, Dict, Optional, Type
+import httpx
+from fastapi import HTTPException, UploadFile
+from core.config import settings
+from utils.metrics import LatencyTracker
+
+# 파일 앞부분(매직 넘버)으로 판별하는 이미지 형식
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"%PDF", "pdf"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+)
+IMAGE_EXTENSIONS = {"jpg": "jpg", "jpeg": "jpg", "png": "png", "pdf": "pdf", "tif": "tiff", "tiff": "tiff"}
+
+# 재시도할 응답 상태 코드 (그 외 4xx는 요청 자체의 문제라 재시도하지 않음)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def detect_image_format(file: BinaryIO, filename: Optional[str] = None) -> str:
+    """업로드 파일의 이미지 형식 판별 (파일 위치는 처음으로 되돌림)"""
+    head = file.read(16)
+    file.seek(0)
+    for signature, image_format in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return image_format
+    if filename and "." in filename:
+        extension = filename.rsplit(".", 1)[1].lower()
+        if extension in IMAGE_EXTENSIONS:
+            return IMAGE_EXTENSIONS[extension]
+    return "jpg"
+
+
+class OCRError(Exception):
+    """OCR 응답을 해석할 수 없거나 인식에 실패한 경우"""
+
+
+class OCRProvider:
+    """
+    OCR API 인터페이스
+
+    build_request로 업로드 요청을 만들고 parse로 응답을 텍스트로 바꾼다.
+    파일은 요청 본문에 그대로 연결해 청크 단위로 전송한다 (메모리에 전부 읽지 않음).
+    """
+
+    def build_request(
+        self,
+        client: httpx.AsyncClient,
+        file: BinaryIO,
+        filename: str,
+        image_format: str
+    ) -> httpx.Request:
+        raise NotImplementedError
+
+    def parse(self, data: dict) -> str:
+        raise NotImplementedError
+
+
+class ClovaOCRProvider(OCRProvider):
+    """네이버 Clova General OCR (V2)"""
+
+    def __init__(self, api_url: str, secret_key: str):
+        self.api_url = api_url
+        self.secret_key = secret_key
+
+    def build_request(self, client, file, filename, image_format):
+        message = {
+            'images': [{'format': image_format, 'name': 'receipt'}],
+            'requestId': str(uuid.uuid4()),
+            'version': 'V2',
+            'timestamp': int(round(time.time() * 1000))
+        }
+        return client.build_request(
+            "POST",
+            self.api_url,
+            headers={'X-OCR-SECRET': self.secret_key},
+            data={'message': json.dumps(message)},
+            files={'file': (filename or f"receipt.{image_format}", file, f"image/{image_format}")}
+        )
+
+    def parse(self, data):
+        try:
+            image = data['images'][0]
+            if image.get('inferResult', 'SUCCESS') != 'SUCCESS':
+                raise OCRError(image.get('message') or image['inferResult'])
+            fields = image['fields']
+        except (KeyError, IndexError, TypeError) as e:
+            raise OCRError(f"예상하지 못한 OCR 응답 형식: {str(e)}")
+
+        # OCR 결과를 문자열로 변환
+        string_result = ''
+        for field in fields:
+            string_result += field['inferText'] + (' ' if not field['lineBreak'] else '\n')
+        return string_result
+
+
+OCR_PROVIDERS: Dict[str, Type[OCRProvider]] = {
+    "clova": ClovaOCRProvider,
+}
+
+
+class OCRClient:
+    """
+    비동기 OCR 클라이언트
+
+    - 워커당 하나의 httpx.AsyncClient로 연결을 재사용 (keep-alive 연결 풀)
+    - 연결/전체 타임아웃, 네트워크 오류와 5xx/429에 대한 지수 백오프 재시도
+    - 동시 호출 수를 max_concurrency로 제한 (초과분은 대기)
+    - 진행 중/대기 중 호출 수와 지연 시간 백분위를 stats()로 제공
+    """
+
+    def __init__(
+        self,
+        provider: OCRProvider,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+        max_concurrency: int = 4,
+        max_connections: int = 10,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.provider = provider
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_concurrency = max_concurrency
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        self.latency = LatencyTracker()
+        self.in_flight = 0
+        self.waiting = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # 이벤트 루프가 실행 중일 때 처음 호출하는 곳에서 생성
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, transport=self.transport)
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def recognize(self, file: UploadFile) -> str:
+        """업로드된 영수증 이미지를 OCR 텍스트로 변환"""
+        client = self._ensure_client()
+        image_format = detect_image_format(file.file, file.filename)
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            data = await self._send_with_retry(client, file, image_format)
+            return self.provider.parse(data)
+        except OCRError as e:
+            self.failures += 1
+            raise HTTPException(status_code=502, detail=f"영수증 인식에 실패했습니다: {str(e)}")
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            self.latency.record(time.perf_counter() - started)
+
+    async def _send_with_retry(self, client: httpx.AsyncClient, file: UploadFile, image_format: str) -> dict:
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            # 재시도 시 파일을 처음부터 다시 전송
+            file.file.seek(0)
+            request = self.provider.build_request(client, file.file, file.filename, image_format)
+            try:
+                response = await client.send(request)
+            except httpx.TimeoutException as e:
+                if last_attempt:
+                    self.failures += 1
+                    raise HTTPException(status_code=504, detail=f"OCR 서비스 응답 시간이 초과되었습니다: {str(e)}")
+            except httpx.TransportError as e:
+                if last_attempt:
+                    self.failures += 1
+                    raise HTTPException(status_code=502, detail=f"OCR 서비스에 연결할 수 없습니다: {str(e)}")
+            else:
+                if response.status_code < 400:
+                    try:
+                        return response.json()
+                    except ValueError as e:
+                        raise OCRError(f"JSON이 아닌 응답: {str(e)}")
+                if response.status_code not in RETRYABLE_STATUS or last_attempt:
+                    self.failures += 1
+                    raise HTTPException(
+                        status_code=502,
+                        detail=f"OCR 서비스 오류 ({response.status_code}): {response.text[:200]}"
+                    )
+
+            self.retries += 1
+            delay = self.retry_backoff * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay))
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "retries": self.retries,
+            "failures": self.failures,
+            "latency": self.latency.snapshot()
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_ocr_provider() -> OCRProvider:
+    """설정(OCR_PROVIDER)에 따라 OCR 제공자 생성"""
+    provider_class = OCR_PROVIDERS.get(settings.OCR_PROVIDER)
+    if provider_class is None:
+        raise ValueError(f"지원하지 않는 OCR_PROVIDER: {settings.OCR_PROVIDER}")
+    return provider_class(settings.CLOVA_OCR_API_URL, settings.CLOVA_OCR_SECRET_KEY)
+
+
+# 워커 프로세스가 공유하는 OCR 클라이언트
+ocr_client = OCRClient(
+    create_ocr_provider(),
+    timeout=settings.OCR_TIMEOUT,
+    connect_timeout=settings.OCR_CONNECT_TIMEOUT,
+    max_retries=settings.OCR_MAX_RETRIES,
+    retry_backoff=settings.OCR_RETRY_BACKOFF,
+    max_concurrency=settings.OCR_MAX_CONCURRENCY,
+    max_connections=settings.OCR_MAX_CONNECTIONS
+)
@@ -0,0 +1,70 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from core.config import settings
+from core.security import pwd_context
+
+
+class PasswordHasher:
+    """
+    bcrypt 해시/검증을 전용 스레드 풀에서 실행
+
+    bcrypt는 한 번에 수백 ms 동안 CPU를 쓰므로 이벤트 루프에서 직접 호출하면
+    그동안 해당 워커의 모든 요청과 웹소켓이 멈춘다.
+    - 동시에 계산하는 수는 max_workers로 제한 (bcrypt는 계산 중 GIL을 놓음)
+    - 대기 중인 작업이 max_pending을 넘으면 바로 503으로 거절해
+      로그인 폭주가 다른 작업의 CPU를 모두 가져가지 못하게 한다
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, retry_after: int = 1):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        # 실행 중 + 대기 중인 작업 수 (이벤트 루프 스레드에서만 변경)
+        self._in_flight = 0
+        self.rejected = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        비밀번호 검증
+
+        검증에 성공했고 저장된 해시의 work factor가 현재 설정(BCRYPT_ROUNDS)과 다르면
+        새 해시를 함께 반환한다 (로그인 시 조용히 갱신).
+        """
+        return await self._run(pwd_context.verify_and_update, password, hashed_password)
+
+    async def _run(self, func, *args):
+        if self._in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="요청이 많아 잠시 후 다시 시도해주세요.",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._in_flight -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._in_flight,
+            "rejected": self.rejected
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -0,0 +1,205 @@
+import asyncio
+import copy
+import hashlib
+import io
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.session import AsyncSessionLocal
+from models.models import ReceiptAnalysisCache
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow가 없으면 정확히 같은 파일(SHA-256)만 찾음
+    Image = None
+
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+# 다시 찍은 사진 후보로 비교하는 사용자별 최근 캐시 수
+PERCEPTUAL_CANDIDATES = 200
+
+
+def content_hash(image: bytes) -> str:
+    return hashlib.sha256(image).hexdigest()
+
+
+def perceptual_hash(image: bytes) -> Optional[int]:
+    """
+    64비트 dHash (9x8 흑백 축소 이미지에서 가로로 이웃한 픽셀 밝기 비교)
+
+    같은 영수증을 다시 찍거나 다시 인코딩한 이미지는 해밍 거리가 작다.
+    Pillow가 없거나 이미지를 열 수 없으면 None.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(image)) as img:
+            pixels = list(img.convert("L").resize((9, 8)).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    # BigInteger(부호 있는 64비트)에 저장할 수 있도록 변환
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & HASH_MASK).count("1")
+
+
+class ReceiptAnalysisCacheService:
+    """
+    영수증 이미지별 OCR 텍스트/추출 결과 캐시 (Postgres에 저장)
+
+    - 정확히 같은 파일(SHA-256)은 사용자와 관계없이 재사용한다
+    - 다시 찍은 사진(dHash 해밍 거리 <= max_distance)은 같은 사용자의 캐시에서만 찾는다
+      (다른 사용자의 영수증 내용이 비슷한 사진 때문에 노출되지 않도록)
+    - 추출에 실패한 결과(빈 결과 또는 추출 호출 오류)는 OCR 텍스트만 저장해 다음에는 추출만 다시 한다
+    - ttl이 지난 항목은 조회하지 않고, 저장할 때 만료 항목과
+      max_entries를 넘는 오래 사용되지 않은 항목을 지운다
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        ttl: timedelta = timedelta(days=7),
+        max_entries: int = 10000,
+        max_distance: int = 6,
+        evict_every: int = 50
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.evict_every = evict_every
+        self._stores = 0
+
+        self.lookups = 0
+        self.exact_hits = 0
+        self.perceptual_hits = 0
+        self.ocr_calls_avoided = 0
+        self.extract_calls_avoided = 0
+        self.evicted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > timedelta(0)
+
+    async def fingerprint(self, image: bytes) -> Tuple[str, Optional[int]]:
+        """(SHA-256, dHash) 계산 (이미지 디코딩은 스레드에서)"""
+        phash = None
+        if Image is not None and self.max_distance > 0:
+            phash = await asyncio.to_thread(perceptual_hash, image)
+        return content_hash(image), phash
+
+    async def lookup(self, user_id: int, sha256: str, phash: Optional[int]) -> Optional[Dict[str, Any]]:
+        """캐시된 {"ocr_text", "items"} 반환 (없으면 None)"""
+        self.lookups += 1
+        cutoff = datetime.utcnow() - self.ttl
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(ReceiptAnalysisCache.id, ReceiptAnalysisCache.ocr_text, ReceiptAnalysisCache.items)
+                .where(ReceiptAnalysisCache.content_hash == sha256, ReceiptAnalysisCache.created_at > cutoff)
+            )
+            row = result.first()
+            if row is not None:
+                self.exact_hits += 1
+            elif phash is not None:
+                row = await self._find_similar(db, user_id, phash, cutoff)
+                if row is not None:
+                    self.perceptual_hits += 1
+            if row is None:
+                return None
+
+            await db.execute(
+                update(ReceiptAnalysisCache)
+                .where(ReceiptAnalysisCache.id == row.id)
+                .values(hits=ReceiptAnalysisCache.hits + 1, last_used_at=datetime.utcnow())
+            )
+            await db.commit()
+
+        self.ocr_calls_avoided += 1
+        if row.items is not None:
+            self.extract_calls_avoided += 1
+        # 호출 측이 품목에 temp_id 등을 붙여도 캐시 값에 영향이 없도록 복사
+        return {"ocr_text": row.ocr_text, "items": copy.deepcopy(row.items)}
+
+    async def _find_similar(self, db: AsyncSession, user_id: int, phash: int, cutoff: datetime):
+        result = await db.execute(
+            select(
+                ReceiptAnalysisCache.id,
+                ReceiptAnalysisCache.perceptual_hash,
+                ReceiptAnalysisCache.ocr_text,
+                ReceiptAnalysisCache.items
+            )
+            .where(
+                ReceiptAnalysisCache.user_id == user_id,
+                ReceiptAnalysisCache.perceptual_hash.isnot(None),
+                ReceiptAnalysisCache.created_at > cutoff
+            )
+            .order_by(ReceiptAnalysisCache.last_used_at.desc())
+            .limit(PERCEPTUAL_CANDIDATES)
+        )
+        best, best_distance = None, self.max_distance + 1
+        for row in result.all():
+            distance = hamming_distance(row.perceptual_hash, phash)
+            if distance < best_distance:
+                best, best_distance = row, distance
+        return best
+
+    async def store(
+        self,
+        user_id: int,
+        sha256: str,
+        phash: Optional[int],
+        ocr_text: str,
+        items: Optional[List[Dict[str, Any]]]
+    ):
+        now = datetime.utcnow()
+        values = {
+            "ocr_text": ocr_text,
+            "items": copy.deepcopy(items) if items else None,
+            "perceptual_hash": phash,
+            "created_at": now,
+            "last_used_at": now
+        }
+        async with self.session_factory() as db:
+            stmt = insert(ReceiptAnalysisCache).values(content_hash=sha256, user_id=user_id, hits=0, **values)
+            await db.execute(stmt.on_conflict_do_update(index_elements=["content_hash"], set_=values))
+            self._stores += 1
+            if self._stores % self.evict_every == 0:
+                await self._evict(db, now)
+            await db.commit()
+
+    async def _evict(self, db: AsyncSession, now: datetime):
+        expired = await db.execute(
+            delete(ReceiptAnalysisCache).where(ReceiptAnalysisCache.created_at <= now - self.ttl)
+        )
+        # 최근 사용 순으로 max_entries개만 남김
+        keep = (
+            select(ReceiptAnalysisCache.id)
+            .order_by(ReceiptAnalysisCache.last_used_at.desc())
+            .limit(self.max_entries)
+        )
+        overflow = await db.execute(delete(ReceiptAnalysisCache).where(ReceiptAnalysisCache.id.not_in(keep)))
+        self.evicted += max(expired.rowcount, 0) + max(overflow.rowcount, 0)
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.perceptual_hits
+        return {
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "perceptual_hits": self.perceptual_hits,
+            "hit_rate": round(hits / self.lookups, 4) if self.lookups else 0.0,
+            "ocr_calls_avoided": self.ocr_calls_avoided,
+            "extract_calls_avoided": self.extract_calls_avoided,
+            "evicted": self.evicted,
+            "enabled": self.enabled,
+            "perceptual_hash_enabled": Image is not None and self.max_distance > 0
+        }
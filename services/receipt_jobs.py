@@ -0,0 +1,231 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from fastapi import UploadFile
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+from db.session import AsyncSessionLocal
+from models.models import ReceiptJob
+from utils.metrics import LatencyTracker, timed
+
+STAGES = ("queue_wait", "cache_lookup", "ocr", "extract", "save", "total")
+
+
+class ReceiptJobQueue:
+    """
+    Postgres에 저장되는 영수증 분석 작업 큐
+
+    - enqueue는 업로드 원본을 receipt_jobs에 저장하고 바로 반환한다
+    - 워커(workers개)가 FOR UPDATE SKIP LOCKED로 대기 작업을 하나씩 가져가므로
+      여러 워커 프로세스가 같은 테이블을 나눠 처리해도 중복 처리되지 않는다
+    - 처리 중 프로세스가 죽은 작업은 visibility_timeout이 지나면 다시 가져간다
+      (이미 max_attempts번 시도한 작업은 다시 가져가지 않고 실패로 기록)
+    - OCR/추출 같은 원격 호출 중에는 DB 세션을 잡지 않고, 저장 단계에서만 연다
+    - 같은 프로세스의 enqueue는 워커를 바로 깨우고, 다른 프로세스의 작업은 poll_interval마다 확인한다
+
+    processor는 extract_items(image, filename, timings, user_id)와 save_temp_items(db, items, user_id)를 제공한다.
+    """
+
+    def __init__(
+        self,
+        processor: Any,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        workers: int = 2,
+        poll_interval: float = 2.0,
+        visibility_timeout: float = 300.0,
+        max_attempts: int = 3
+    ):
+        self.processor = processor
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+        self.stage_latency: Dict[str, LatencyTracker] = {stage: LatencyTracker() for stage in STAGES}
+        self.processing = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def enqueue(self, db: AsyncSession, user_id: int, file: UploadFile) -> ReceiptJob:
+        """업로드 파일을 작업으로 저장 (커밋 후 워커를 깨움)"""
+        job = ReceiptJob(
+            user_id=user_id,
+            status="pending",
+            image=await file.read(),
+            filename=file.filename,
+            attempts=0
+        )
+        db.add(job)
+        await db.commit()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get_job(self, db: AsyncSession, job_id: int, user_id: int) -> Optional[ReceiptJob]:
+        """사용자 본인의 작업 조회 (이미지 본문은 읽지 않음)"""
+        result = await db.execute(
+            select(ReceiptJob)
+            .options(defer(ReceiptJob.image))
+            .where(ReceiptJob.id == job_id, ReceiptJob.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+    def start(self):
+        if self._tasks or self.workers <= 0:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        print(f"영수증 작업 워커 시작: {self.workers}개")
+
+    async def stop(self):
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+
+    async def claim(self) -> Optional[Dict[str, Any]]:
+        """대기 중(또는 처리 시간이 초과된) 작업 하나를 처리 중으로 바꾸고 반환"""
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=self.visibility_timeout)
+        stale = and_(ReceiptJob.status == "processing", ReceiptJob.started_at < stale_before)
+        next_job = (
+            select(ReceiptJob.id)
+            .where(or_(
+                ReceiptJob.status == "pending",
+                and_(stale, ReceiptJob.attempts < self.max_attempts)
+            ))
+            .order_by(ReceiptJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with self.session_factory() as db:
+            # 마지막 시도 중에 워커가 죽은 작업 (이미지를 계속 들고 있지 않도록 실패로 정리)
+            expired = await db.execute(
+                update(ReceiptJob)
+                .where(stale, ReceiptJob.attempts >= self.max_attempts)
+                .values(status="failed", error="처리 시간 초과", image=None, finished_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            self.failed += expired.rowcount
+            result = await db.execute(
+                update(ReceiptJob)
+                .where(ReceiptJob.id == next_job)
+                .values(status="processing", started_at=now, attempts=ReceiptJob.attempts + 1)
+                .returning(
+                    ReceiptJob.id,
+                    ReceiptJob.user_id,
+                    ReceiptJob.image,
+                    ReceiptJob.filename,
+                    ReceiptJob.attempts,
+                    ReceiptJob.created_at
+                )
+            )
+            row = result.mappings().first()
+            await db.commit()
+        return dict(row) if row else None
+
+    async def _worker(self, n: int):
+        while not self._stopping:
+            try:
+                job = await self.claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"영수증 작업 가져오기 실패 (워커 {n}): {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            await self.process(job)
+
+    async def process(self, job: Dict[str, Any]):
+        """작업 하나를 OCR → 추출 → 저장 순서로 처리하고 결과를 기록"""
+        self.processing += 1
+        started = time.perf_counter()
+        timings = {"queue_wait": round((datetime.utcnow() - job["created_at"]).total_seconds() * 1000, 3)}
+        try:
+            items = await self.processor.extract_items(job["image"], job["filename"], timings, job["user_id"])
+            async with self.session_factory() as db:
+                with timed(timings, "save"):
+                    items = await self.processor.save_temp_items(db, items, job["user_id"])
+                timings["total"] = round((time.perf_counter() - started) * 1000, 3)
+                await db.execute(
+                    update(ReceiptJob)
+                    .where(ReceiptJob.id == job["id"])
+                    .values(
+                        status="done",
+                        result=items,
+                        image=None,
+                        error=None,
+                        stage_timings=timings,
+                        finished_at=datetime.utcnow()
+                    )
+                )
+                # 품목 저장과 작업 완료를 한 트랜잭션으로 커밋
+                await db.commit()
+            self.completed += 1
+            self._record(timings)
+        except asyncio.CancelledError:
+            # 종료 중 취소된 작업은 visibility_timeout 이후 다시 처리됨
+            raise
+        except Exception as e:
+            print(f"영수증 작업 처리 실패: 작업 {job['id']}, 시도 {job['attempts']}, {str(e)}")
+            await self._fail(job, e, timings)
+        finally:
+            self.processing -= 1
+
+    async def _fail(self, job: Dict[str, Any], error: Exception, timings: Dict[str, float]):
+        retry = job["attempts"] < self.max_attempts
+        values = {"status": "pending" if retry else "failed", "error": str(error), "stage_timings": timings}
+        if not retry:
+            values.update(image=None, finished_at=datetime.utcnow())
+        try:
+            async with self.session_factory() as db:
+                await db.execute(update(ReceiptJob).where(ReceiptJob.id == job["id"]).values(**values))
+                await db.commit()
+        except Exception as e:
+            print(f"영수증 작업 상태 저장 실패: 작업 {job['id']}, {str(e)}")
+            return
+        if retry:
+            self.retried += 1
+        else:
+            self.failed += 1
+
+    def _record(self, timings: Dict[str, float]):
+        for stage, milliseconds in timings.items():
+            tracker = self.stage_latency.get(stage)
+            if tracker is not None:
+                tracker.record(milliseconds / 1000)
+
+    async def status_counts(self, db: AsyncSession) -> Dict[str, int]:
+        result = await db.execute(select(ReceiptJob.status, func.count()).group_by(ReceiptJob.status))
+        return {status: count for status, count in result.all()}
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "processing": self.processing,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "stages": {stage: tracker.snapshot() for stage, tracker in self.stage_latency.items()}
+        }
@@ -1,108 +1,185 @@
 from fastapi import UploadFile, HTTPException
-from openai import OpenAI
-import json
-import requests
-import uuid
-import time
+import io
 from core.config import settings
-from datetime import datetime, timezone
-from sqlalchemy import select
-from models.models import Ingredient, TempReceipt
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import DateTime, Integer, String, column, delete, insert, literal, select, values
+from models.models import Ingredient, ReceiptJob, TempReceipt
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from schemas.receipts import TempReceiptUpdate, IngredientUpdate
+from services.llm_gateway import LLMJSONError, llm_gateway
+from services.ocr_client import ocr_client
+from services.receipt_cache import ReceiptAnalysisCacheService
+from services.receipt_jobs import ReceiptJobQueue
+from services.temp_receipt_sweeper import TempReceiptSweeper
+from utils.metrics import timed
+from db.hot_queries import ingredients_by_user
+
+# 같은 영수증을 다시 올렸을 때 OCR/GPT 호출을 생략하기 위한 결과 캐시
+receipt_analysis_cache = ReceiptAnalysisCacheService(
+    ttl=timedelta(hours=settings.RECEIPT_CACHE_TTL_HOURS),
+    max_entries=settings.RECEIPT_CACHE_MAX_ENTRIES,
+    max_distance=settings.RECEIPT_CACHE_PHASH_DISTANCE
+)
 
 class ReceiptService:
-    def __init__(self):
-        self.ocr_api_url = settings.CLOVA_OCR_API_URL
-        self.ocr_secret_key = settings.CLOVA_OCR_SECRET_KEY
-        self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
-    async def analyze_receipt(self, file: UploadFile, db: AsyncSession) -> list:
-        # OCR 분석
-        ocr_result = await self._process_ocr(file)
+    async def analyze_receipt(self, file: UploadFile, db: AsyncSession, user_id: int) -> ReceiptJob:
+        """영수증 분석 작업을 큐에 넣고 바로 반환 (OCR/추출은 백그라운드 워커가 처리)"""
+        return await receipt_job_queue.enqueue(db, user_id, file)
+
+    async def extract_items(
+        self,
+        image: bytes,
+        filename: Optional[str],
+        timings: Dict[str, float],
+        user_id: Optional[int] = None
+    ) -> list:
+        """캐시 조회 → OCR → GPT 추출 (원격 호출 단계, 요청 DB 세션을 사용하지 않음)"""
+        cache = receipt_analysis_cache if user_id is not None and receipt_analysis_cache.enabled else None
+        cached = None
+        if cache is not None:
+            with timed(timings, "cache_lookup"):
+                sha256, phash = await cache.fingerprint(image)
+                cached = await cache.lookup(user_id, sha256, phash)
+            if cached is not None and cached["items"] is not None:
+                print(f"영수증 캐시 적중: {sha256[:12]}")
+                return cached["items"]
+
+        if cached is not None:
+            # 이전에 추출만 실패한 영수증은 OCR 결과를 재사용
+            ocr_result = cached["ocr_text"]
+        else:
+            with timed(timings, "ocr"):
+                ocr_result = await self._process_ocr(UploadFile(file=io.BytesIO(image), filename=filename))
         print("OCR 결과:", ocr_result)
-        
+
         # ChatGPT를 통한 데이터 추출
-        items = await self._extract_data_with_gpt(ocr_result)
+        try:
+            with timed(timings, "extract"):
+                items = await self._extract_data_with_gpt(ocr_result)
+        except Exception:
+            # 추출 호출이 실패해도 OCR 결과는 저장해 작업 재시도 때 OCR을 다시 호출하지 않음
+            if cache is not None and cached is None:
+                await self._store_cache(cache, user_id, sha256, phash, ocr_result, None)
+            raise
         print("GPT 추출 결과:", items)
-        print("GPT 추출 결과 타입:", type(items))
-        if items:
-            print("첫 번째 아이템:", items[0])
-            print("첫 번째 아이템 타입:", type(items[0]))
-        
+
+        if cache is not None:
+            await self._store_cache(cache, user_id, sha256, phash, ocr_result, items)
+        return items
+
+    async def _store_cache(
+        self,
+        cache: ReceiptAnalysisCacheService,
+        user_id: int,
+        sha256: str,
+        phash: Optional[int],
+        ocr_text: str,
+        items: Optional[list]
+    ):
         try:
-            temp_items = []
-            for item in items:
-                print("현재 처리 중인 아이템:", item)
-                # TempReceipt 테이블에 저장 (name만 사용)
-                temp_receipt = TempReceipt(
-                    name=item['name']
-                )
-                print("생성된 TempReceipt:", temp_receipt.__dict__)  # 객체의 속성 확인
-                db.add(temp_receipt)
-                await db.flush()
-                
-                # 원본 아이템에 temp_id 추가
-                item['temp_id'] = temp_receipt.id
-                temp_items.append(item)
-            
-            await db.commit()
-            print("저장 완료된 아이템들:", temp_items)
-            return temp_items
-            
+            await cache.store(user_id, sha256, phash, ocr_text, items)
         except Exception as e:
-            print(f"에러 발생 위치: {e.__traceback__.tb_frame.f_code.co_name}")
-            print(f"에러 발생 라인: {e.__traceback__.tb_lineno}")
-            print(f"에러 메시지: {str(e)}")
-            print(f"에러 타입: {type(e)}")
-            await db.rollback()
-            raise HTTPException(
-                status_code=500,
-                detail=f"영수증 분석 중 오류가 발생했습니다: {str(e)}"
-            )
+            # 캐시 저장 실패로 분석 결과를 버리지 않음
+            print(f"영수증 캐시 저장 실패: {str(e)}")
+
+    async def save_temp_items(self, db: AsyncSession, items: list, user_id: Optional[int] = None) -> list:
+        """추출된 품목을 TempReceipt에 한 번에 저장하고 temp_id를 붙여 반환 (커밋은 호출 측에서)"""
+        if not items:
+            return []
+        # 품목 수와 관계없이 INSERT ... RETURNING id 한 번 (입력 순서대로 id 반환)
+        result = await db.execute(
+            insert(TempReceipt).returning(TempReceipt.id, sort_by_parameter_order=True),
+            [{"name": item['name'], "user_id": user_id} for item in items]
+        )
+        for item, temp_id in zip(items, result.scalars().all()):
+            # 원본 아이템에 temp_id 추가
+            item['temp_id'] = temp_id
+        return items
+
+    async def confirm_items(self, db: AsyncSession, items: List[Dict[str, Any]], user_id: int) -> List[dict]:
+        """
+        임시 저장 품목들을 한 트랜잭션에서 ingredients로 이동
+
+        items: [{"temp_id", "category", "expiry_date"}]
+        INSERT ... SELECT 한 번과 DELETE 한 번으로 처리하고,
+        본인 것이 아니거나 이미 처리된 temp_id가 있으면 전체를 되돌린다.
+        """
+        entries = {}
+        for item in items:
+            expiry_date = item["expiry_date"]
+            # timezone 처리: UTC로 정규화
+            if expiry_date.tzinfo is not None:
+                expiry_date = expiry_date.astimezone(timezone.utc)
+            entries[item["temp_id"]] = (item["category"], expiry_date.replace(tzinfo=None))
+        if not entries:
+            return []
+
+        confirmed = values(
+            column("temp_id", Integer),
+            column("category", String),
+            column("expiry_date", DateTime),
+            name="confirmed"
+        ).data([(temp_id, category, expiry_date) for temp_id, (category, expiry_date) in entries.items()])
 
-    async def save_to_ingredients(
-        self, 
-        db: AsyncSession, 
-        temp_id: int, 
-        category: str, 
-        expiry_date: datetime,
-        user_id: int
-    ) -> Ingredient:
         try:
-            # 1. 임시 데이터 조회
             result = await db.execute(
-                select(TempReceipt).where(TempReceipt.id == temp_id)
+                insert(Ingredient)
+                .from_select(
+                    ["name", "category", "expiry_date", "amount", "user_id"],
+                    select(
+                        TempReceipt.name,
+                        confirmed.c.category,
+                        confirmed.c.expiry_date,
+                        literal(1),  # 기본값으로 1 설정
+                        literal(user_id)
+                    )
+                    .join(confirmed, confirmed.c.temp_id == TempReceipt.id)
+                    .where(TempReceipt.user_id == user_id)
+                    .order_by(TempReceipt.id)
+                )
+                .returning(
+                    Ingredient.id,
+                    Ingredient.name,
+                    Ingredient.category,
+                    Ingredient.expiry_date,
+                    Ingredient.amount,
+                    Ingredient.user_id
+                )
             )
-            temp_item = result.scalar_one_or_none()
-            
-            if not temp_item:
-                raise ValueError(f"임시 데이터를 찾을 수 없습니다. (ID: {temp_id})")
-            
-            # 2. timezone 처리: UTC로 정규화
-            if expiry_date.tzinfo is not None:
-                expiry_date = expiry_date.astimezone(timezone.utc).replace(tzinfo=None)
-            else:
-                # offset-naive datetime인 경우 그대로 사용
-                expiry_date = expiry_date.replace(tzinfo=None)
-            
-            # 3. ingredients 테이블에 저장
-            ingredient = Ingredient(
-                name=temp_item.name,
-                category=category,
-                expiry_date=expiry_date,  # 변환된 시간 사용
-                amount=1,  # 기본값으로 1 설정
-                user_id=user_id  # user_id 추가
+            ingredients = [dict(row) for row in result.mappings().all()]
+
+            deleted = await db.execute(
+                delete(TempReceipt)
+                .where(TempReceipt.id.in_(list(entries)), TempReceipt.user_id == user_id)
+                .returning(TempReceipt.id)
             )
-            
-            # 4. 데이터베이스 반영
-            db.add(ingredient)
-            await db.delete(temp_item)
+            # 동시에 같은 품목을 확정한 요청이 있으면 DELETE에서 빠진 id로 드러남
+            missing = sorted(set(entries) - set(deleted.scalars().all()))
+            if missing:
+                await db.rollback()
+                # 소유자 컬럼이 생기기 전에 저장된 데이터는 본인 것인지 알 수 없어 확정할 수 없음
+                legacy = await db.execute(
+                    select(TempReceipt.id).where(TempReceipt.id.in_(missing), TempReceipt.user_id.is_(None))
+                )
+                legacy_ids = sorted(legacy.scalars().all())
+                if legacy_ids:
+                    raise HTTPException(
+                        status_code=410,
+                        detail={
+                            "message": "이전 버전에서 임시 저장된 품목은 확정할 수 없습니다. 영수증을 다시 분석해 주세요.",
+                            "temp_ids": legacy_ids
+                        }
+                    )
+                raise HTTPException(
+                    status_code=404,
+                    detail={"message": "임시 데이터를 찾을 수 없습니다.", "temp_ids": missing}
+                )
             await db.commit()
-            
-            return ingredient
-            
+            return ingredients
+
+        except HTTPException:
+            raise
         except Exception as e:
             await db.rollback()
             raise HTTPException(
@@ -111,58 +188,38 @@ class ReceiptService:
             )
 
     async def _process_ocr(self, file: UploadFile) -> str:
-        request_json = {
-            'images': [{'format': 'jpg', 'name': 'receipt'}],
-            'requestId': str(uuid.uuid4()),
-            'version': 'V2',
-            'timestamp': int(round(time.time() * 1000))
-        }
-
-        payload = {'message': json.dumps(request_json).encode('UTF-8')}
-        files = [('file', await file.read())]
-        headers = {'X-OCR-SECRET': self.ocr_secret_key}
-
-        response = requests.request("POST", self.ocr_api_url, headers=headers, data=payload, files=files)
-        json_data = response.json()
-
-        # OCR 결과를 문자열로 변환
-        string_result = ''
-        for field in json_data['images'][0]['fields']:
-            string_result += field['inferText'] + (' ' if not field['lineBreak'] else '\n')
-            
-        return string_result
+        # 비동기 클라이언트로 호출해 OCR 응답을 기다리는 동안 이벤트 루프를 막지 않음
+        return await ocr_client.recognize(file)
 
     async def _extract_data_with_gpt(self, text: str) -> list:
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[
+        messages = [
+            {
+                "role": "system",
+                "content": """영수증 데이터를 다음 JSON 형식으로 정확히 변환해주세요:
                 {
-                    "role": "system", 
-                    "content": """영수증 데이터를 다음 JSON 형식으로 정확히 변환해주세요:
-                    {
-                        "items": [
-                            {
-                                "name": "상품명",
-                                "quantity": 수량,
-                                "amount": 가격,
-                                "purchase_date": "YYYY-MM-DD"
-                            }
-                        ]
-                    }"""
-                },
-                {"role": "user", "content": text}
-            ]
-        )
-        
+                    "items": [
+                        {
+                            "name": "상품명",
+                            "quantity": 수량,
+                            "amount": 가격,
+                            "purchase_date": "YYYY-MM-DD"
+                        }
+                    ]
+                }"""
+            },
+            {"role": "user", "content": text}
+        ]
+
+        # 같은 OCR 텍스트는 게이트웨이 캐시로 재사용, 호출 실패는 작업 재시도로 넘김
         try:
-            response_text = response.choices[0].message.content
-            print("GPT 원본 응답:", response_text)
-            data = json.loads(response_text)
-            return data.get('items', [])
-        except Exception as e:
+            data = await llm_gateway.complete_json(messages, model=settings.LLM_RECEIPT_MODEL, temperature=1.0)
+        except LLMJSONError as e:
             print(f"GPT 응답 파싱 에러: {str(e)}")
-            print(f"GPT 응답 원문: {response_text}")
             return []
+        print("GPT 추출 응답:", data)
+        if not isinstance(data, dict):
+            return []
+        return data.get('items', [])
 
     async def update_temp_receipt(
         self,
@@ -171,9 +228,9 @@ class ReceiptService:
         update_data: TempReceiptUpdate,
         user_id: int
     ) -> dict:
-        """임시 저장된 영수증 데이터 수정"""
+        """임시 저장된 영수증 데이터 수정 (본인 것만)"""
         result = await db.execute(
-            select(TempReceipt).where(TempReceipt.id == temp_id)
+            select(TempReceipt).where(TempReceipt.id == temp_id, TempReceipt.user_id == user_id)
         )
         temp_receipt = result.scalar_one_or_none()
 
@@ -219,6 +276,21 @@ class ReceiptService:
             "created_at": temp_receipt.created_at
         }
 
+    async def delete_temp_item(self, db: AsyncSession, temp_id: int, user_id: int):
+        """임시 저장된 상품 삭제 (본인 것만, 없거나 다른 사용자 것이면 404)"""
+        result = await db.execute(
+            delete(TempReceipt)
+            .where(TempReceipt.id == temp_id, TempReceipt.user_id == user_id)
+            .returning(TempReceipt.id)
+        )
+        if result.scalar_one_or_none() is None:
+            await db.rollback()
+            raise HTTPException(
+                status_code=404,
+                detail="임시 저장된 데이터를 찾을 수 없습니다."
+            )
+        await db.commit()
+
     async def update_ingredient(
         self,
         db: AsyncSession,
@@ -287,7 +359,7 @@ class ReceiptService:
     ) -> List[dict]:
         """사용자의 식재료 목록 조회"""
         result = await db.execute(
-            select(Ingredient).where(Ingredient.user_id == user_id)
+            ingredients_by_user(user_id)
         )
         ingredients = result.scalars().all()
         
@@ -301,4 +373,21 @@ class ReceiptService:
                 "user_id": ingredient.user_id
             }
             for ingredient in ingredients
-        ]
\ No newline at end of file
+        ]
+
+
+# 영수증 분석 작업 큐 (main.py lifespan에서 워커 시작/종료)
+receipt_job_queue = ReceiptJobQueue(
+    ReceiptService(),
+    workers=settings.RECEIPT_JOB_WORKERS,
+    poll_interval=settings.RECEIPT_JOB_POLL_INTERVAL,
+    visibility_timeout=settings.RECEIPT_JOB_VISIBILITY_TIMEOUT,
+    max_attempts=settings.RECEIPT_JOB_MAX_ATTEMPTS
+)
+
+# 확정되지 않은 임시 품목 정리 (main.py lifespan에서 시작/종료)
+temp_receipt_sweeper = TempReceiptSweeper(
+    max_age=timedelta(hours=settings.TEMP_RECEIPT_MAX_AGE_HOURS),
+    interval=settings.TEMP_RECEIPT_SWEEP_INTERVAL,
+    batch_size=settings.TEMP_RECEIPT_SWEEP_BATCH
+)
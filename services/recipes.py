@@ -1,10 +1,8 @@
 from fastapi import HTTPException
 import requests
 from sqlalchemy import select
-from api.dependencies import get_async_db
 from models.models import Ingredient, Recipe,UserProfile
 from db.session import AsyncSessionLocal
-from openai import OpenAI
 from typing import Dict, List
 import json
 import asyncio
@@ -12,9 +10,11 @@ from datetime import datetime
 from core.config import settings
 from crud import crud_recipe, crud_user
 from services.recommender import RecipeRecommender
+from services.llm_gateway import LLMError, LLMGateway, llm_gateway
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from utils.ingredient_mapper import IngredientMapper
+from utils.ingredient_line_parser import parse_ingredient_text
 
 keyId = "639e8e893d6445718216"
 serviceId = "COOKRCP01"
@@ -29,6 +29,7 @@ from crud.crud_recipe import recipe as crud_recipe
 from crud.crud_user_profile import user_profile as crud_user_profile
 from services.recommender import RecipeRecommender
 from models.models import Recipe, UserProfile
+from db.hot_queries import ingredient_by_user_and_name, ingredients_by_user, recipe_by_name
 
 class RecipeService:
     def __init__(self):
@@ -52,7 +53,7 @@ class RecipeService:
 
         # Ingredient 테이블에서 사용자 재료 조회
         ingredient_result = await db.execute(
-            select(Ingredient).where(Ingredient.user_id == user_id)
+            ingredients_by_user(user_id)
         )
         user_ingredients = {
             ingredient.name: ingredient.amount 
@@ -115,10 +116,7 @@ class RecipeService:
     ):
         """실제 재료 차감 로직"""
         ingredient_result = await db.execute(
-            select(Ingredient).filter(
-                Ingredient.user_id == user_id, 
-                Ingredient.name == ingredient_name
-            )
+            ingredient_by_user_and_name(user_id, ingredient_name)
         )
         ingredient = ingredient_result.scalar_one_or_none()
 
@@ -144,19 +142,12 @@ class RecipeService:
         if not recipe:
             raise HTTPException(status_code=404, detail="Recipe not found")
 
-        # 사용자 프로필 가져오기
-        user_profile = await crud_user_profile.get_profile(db, user_id=user_id)
-        if not user_profile:
+        # 평가 업데이트 (프로필을 먼저 조회하지 않고 UPDATE ... RETURNING)
+        updated_profile = await crud_user_profile.rate(db, user_id, recipe_id, rating)
+        if not updated_profile:
             raise HTTPException(status_code=404, detail="User profile not found")
 
         try:
-            # 평가 업데이트
-            updated_profile = await crud_user_profile.update_rating(
-                db,
-                user_profile,
-                recipe_id,
-                rating
-            )
 
             # Q-value 업데이트
             await self.recommender.update_q_value(
@@ -200,13 +191,22 @@ class RecipeService:
         return remaining
     
 class IngredientParser:
-    def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
-
-    def parse_ingredients(self, ingredients_text: str) -> Dict[str, float]:
+    def __init__(self, gateway: LLMGateway = llm_gateway):
+        self.gateway = gateway
+        # 규칙으로 파싱한 줄 / LLM으로 보낸 줄 수
+        self.rule_lines = 0
+        self.llm_lines = 0
+
+    async def parse_ingredients(self, ingredients_text: str) -> Dict[str, float]:
+        # 규칙으로 확신할 수 있는 줄은 바로 파싱하고, 나머지 줄만 LLM으로 보냄
+        parsed, unresolved = parse_ingredient_text(ingredients_text)
+        self.rule_lines += len([line for line in ingredients_text.split('\n') if line.strip()]) - len(unresolved)
+        if not unresolved:
+            return parsed
+
+        self.llm_lines += len(unresolved)
         try:
-            lines = ingredients_text.split('\n')
-            filtered_lines = [line for line in lines if line and not line.strip() in ['고명', '새우두부계란찜']]
+            filtered_lines = [line for line in unresolved if line and not line.strip() in ['고명', '새우두부계란찜']]
             cleaned_text = ', '.join(filtered_lines)
             
             prompt = f"""
@@ -233,31 +233,27 @@ class IngredientParser:
             {cleaned_text}
             """
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{
+            result = await self.gateway.complete_json(
+                [{
                     "role": "system",
                     "content": "레시피 재료를 단순한 재료:수량 형태의 JSON으로 변환하는 assistant입니다."
                 }, {
                     "role": "user",
                     "content": prompt
                 }],
+                model=settings.LLM_INGREDIENT_MODEL,
                 temperature=0.1,
                 max_tokens=1000
             )
-
-            parsed_text = response.choices[0].message.content.strip()
-            parsed_text = parsed_text.replace('```json', '').replace('```', '').strip()
-            
-            print(f"정제된 GPT 응답: {parsed_text}")
-            
-            result = json.loads(parsed_text)
+            if not isinstance(result, dict):
+                raise LLMError(f"재료:수량 객체가 아닌 응답: {result}")
             print(f"파싱 성공: {result}")
-            return result
+            return {**parsed, **result}
                 
         except Exception as e:
+            # LLM 실패 시 규칙으로 파싱한 줄만 사용
             print(f"파싱 에러: {str(e)}")
-            return {}
+            return parsed
         
 def fetch_recipe_data(keyId: str, serviceId: str, startIdx: int, endIdx: int, dataType: str = "json") -> dict:
     """
@@ -279,14 +275,23 @@ async def init_api_data(recipe_data: dict) -> List[dict]:
     API 데이터 초기화 및 가공
     """
     api_data_list = []
-    ingredient_parser = IngredientParser(api_key=settings.OPENAI_API_KEY)
+    ingredient_parser = IngredientParser()
     
     rows = recipe_data.get("COOKRCP01", {}).get("row", [])
     total_rows = len(rows)
     
     print(f"총 {total_rows}개의 레시피 처리 시작")
+
+    async def parse_row_ingredients(row: dict) -> Dict[str, float]:
+        raw_ingredients = row.get("RCP_PARTS_DTLS", "")
+        if raw_ingredients and raw_ingredients != "데이터 없음":
+            return await ingredient_parser.parse_ingredients(raw_ingredients)
+        return {}
+
+    # 재료 파싱(LLM 호출)은 게이트웨이의 동시 호출/속도 제한 안에서 한꺼번에 진행
+    parsed_rows = await asyncio.gather(*(parse_row_ingredients(row) for row in rows))
     
-    for idx, row in enumerate(rows, 1):
+    for idx, (row, parsed_ingredients) in enumerate(zip(rows, parsed_rows), 1):
         try:
             # 조리 과정 및 이미지 추출
             manual_list = []
@@ -309,14 +314,9 @@ async def init_api_data(recipe_data: dict) -> List[dict]:
                 print(f"영양 정보 변환 오류 ({row.get('RCP_NM')}): {e}")
                 calories, carbs, protein, fat, sodium = 0, 0.0, 0.0, 0.0, 0.0
 
-            # 재료 텍스트 파싱
-            raw_ingredients = row.get("RCP_PARTS_DTLS", "")
-            print(f"\n원본 재료 텍스트: {raw_ingredients}")
-            if raw_ingredients and raw_ingredients != "데이터 없음":
-                parsed_ingredients = ingredient_parser.parse_ingredients(raw_ingredients)
-                print(f"파싱된 재료: {parsed_ingredients}")
-            else:
-                parsed_ingredients = {}
+            # 재료 텍스트 파싱 결과
+            print(f"\n원본 재료 텍스트: {row.get('RCP_PARTS_DTLS', '')}")
+            print(f"파싱된 재료: {parsed_ingredients}")
 
             api_dict = {
                 "name": row.get("RCP_NM", ""),
@@ -361,7 +361,7 @@ async def init():
             for api_dict in api_data:
                 try:
                     # 기존 레시피 확인
-                    stmt = select(Recipe).where(Recipe.name == api_dict['name'])
+                    stmt = recipe_by_name(api_dict['name'])
                     result = await session.execute(stmt)
                     existing_recipe = result.scalar_one_or_none()
                     
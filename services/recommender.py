@@ -2,11 +2,13 @@ from typing import List, Dict
 import random
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from models.models import Recipe, UserProfile, QValue, Ingredient
+from models.models import Recipe, QValue, Ingredient
 from schemas.recipes import Recipe as RecipeSchema
-from schemas.users import UserProfile as UserProfileSchema
+from schemas.users import NutritionLimits
 from schemas.users import RecommendationResponse
 
+from crud.crud_user_profile import user_profile as crud_user_profile
+from db.hot_queries import ingredients_by_user, q_value, q_values_by_user
 # 텍스트 유사도 기반 재료 매퍼 import
 from utils.ingredient_mapper import IngredientMapper
 
@@ -45,17 +47,15 @@ class RecipeRecommender:
             return False
 
     def calculate_nutrition_limits_score(
-        self, recipe: RecipeSchema, user_profile: UserProfileSchema
+        self, recipe: RecipeSchema, limits: NutritionLimits
     ) -> float:
         """영양소 제한 기반 점수 계산"""
         scores = []
         
         # nutrition_limits가 없으면 1.0 반환
-        if not hasattr(user_profile, 'nutrition_limits') or not user_profile.nutrition_limits:
+        if not limits:
             return 1.0
         
-        limits = user_profile.nutrition_limits
-        
         # 각 영양소별 제한 체크
         if recipe.calories and hasattr(limits, 'max_calories') and limits.max_calories:
             if recipe.calories > limits.max_calories:
@@ -86,14 +86,14 @@ class RecipeRecommender:
 
     def calculate_recipe_score(
         self, recipe: RecipeSchema, user_ingredients: Dict[str, float], 
-        user_profile: UserProfileSchema, q_value: float
+        limits: NutritionLimits, history_length: int, q_value: float
     ) -> float:
-        """전체 레시피 점수 계산"""
+        """전체 레시피 점수 계산 (history_length: 요리 기록 수)"""
         # 초기 사용자일 경우의 처리
-        is_new_user = not user_profile.recipe_history or len(user_profile.recipe_history) == 0
+        is_new_user = history_length == 0
         
         # 영양소 제한 체크
-        nutrition_limits_score = self.calculate_nutrition_limits_score(recipe, user_profile)
+        nutrition_limits_score = self.calculate_nutrition_limits_score(recipe, limits)
         if nutrition_limits_score == 0.0:
             return 0.0  # 영양소 제한 초과시 추천하지 않음
             
@@ -120,19 +120,16 @@ class RecipeRecommender:
     ) -> List[RecommendationResponse]:
         # 기존 코드와 유사하지만, 재료 매칭 로직 개선
         ingredient_result = await db.execute(
-            select(Ingredient).where(Ingredient.user_id == user_id)
+            ingredients_by_user(user_id)
         )
         user_ingredients = {
             ingredient.name: ingredient.amount 
             for ingredient in ingredient_result.scalars().all()
         }
 
-        # Get user profile
-        result = await db.execute(
-            select(UserProfile).where(UserProfile.user_id == user_id)
-        )
-        user_profile = result.scalar_one_or_none()
-        if not user_profile:
+        # 영양소 제한과 요리 기록 수만 조회 (기록/평가 배열은 가져오지 않음)
+        scoring_inputs = await crud_user_profile.get_scoring_inputs(db, user_id)
+        if scoring_inputs is None:
             return []
 
         # Get all recipes
@@ -141,10 +138,17 @@ class RecipeRecommender:
 
         # Get Q-values
         result = await db.execute(
-            select(QValue).where(QValue.user_id == user_id)
+            q_values_by_user(user_id)
         )
         q_values = {qv.recipe_id: qv.value for qv in result.scalars().all()}
 
+        raw_limits, history_length = scoring_inputs
+        try:
+            limits = NutritionLimits.model_validate(raw_limits)
+        except Exception as e:
+            print(f"영양소 제한 변환 오류 ({user_id}): {e}")
+            return []
+
         # Calculate scores
         recipe_scores = []
         for recipe in recipes:
@@ -155,24 +159,23 @@ class RecipeRecommender:
                 
                 # 영양소 매칭 정보
                 nutrition_match = {}
-                if hasattr(user_profile, 'nutrition_limits') and user_profile.nutrition_limits:
-                    limits = user_profile.nutrition_limits
-                    if recipe.calories and hasattr(limits, 'max_calories') and limits.max_calories:
-                        nutrition_match['calories'] = recipe.calories / limits.max_calories
-                    if recipe.carbs and hasattr(limits, 'max_carbs') and limits.max_carbs:
-                        nutrition_match['carbs'] = float(recipe.carbs) / float(limits.max_carbs)
-                    if recipe.protein and hasattr(limits, 'max_protein') and limits.max_protein:
-                        nutrition_match['protein'] = float(recipe.protein) / float(limits.max_protein)
-                    if recipe.fat and hasattr(limits, 'max_fat') and limits.max_fat:
-                        nutrition_match['fat'] = float(recipe.fat) / float(limits.max_fat)
-                    if recipe.sodium and hasattr(limits, 'max_sodium') and limits.max_sodium:
-                        nutrition_match['sodium'] = float(recipe.sodium) / float(limits.max_sodium)
+                if recipe.calories and limits.max_calories:
+                    nutrition_match['calories'] = recipe.calories / limits.max_calories
+                if recipe.carbs and limits.max_carbs:
+                    nutrition_match['carbs'] = float(recipe.carbs) / float(limits.max_carbs)
+                if recipe.protein and limits.max_protein:
+                    nutrition_match['protein'] = float(recipe.protein) / float(limits.max_protein)
+                if recipe.fat and limits.max_fat:
+                    nutrition_match['fat'] = float(recipe.fat) / float(limits.max_fat)
+                if recipe.sodium and limits.max_sodium:
+                    nutrition_match['sodium'] = float(recipe.sodium) / float(limits.max_sodium)
                 
                 # 레시피 점수 계산
                 score = self.calculate_recipe_score(
                     RecipeSchema.model_validate(recipe),
                     user_ingredients,  # 변경된 부분
-                    UserProfileSchema.model_validate(user_profile),
+                    limits,
+                    history_length,
                     q_values.get(recipe.id, 0)
                 )
                 
@@ -214,21 +217,18 @@ class RecipeRecommender:
     ) -> None:
         """Q-value 업데이트"""
         result = await db.execute(
-            select(QValue).where(
-                QValue.user_id == user_id,
-                QValue.recipe_id == recipe_id
-            )
+            q_value(user_id, recipe_id)
         )
-        q_value = result.scalar_one_or_none()
+        current = result.scalar_one_or_none()
         
-        if q_value:
-            q_value.value = (1 - learning_rate) * q_value.value + learning_rate * reward
+        if current:
+            current.value = (1 - learning_rate) * current.value + learning_rate * reward
         else:
-            q_value = QValue(
+            current = QValue(
                 user_id=user_id,
                 recipe_id=recipe_id,
                 value=reward * learning_rate
             )
-            db.add(q_value)
+            db.add(current)
         
         await db.commit()
\ No newline at end of file
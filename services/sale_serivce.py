@@ -3,7 +3,7 @@ from fastapi import UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from crud.crud_sale import CRUDsale
 from schemas.sale import SaleCreate, SaleImageResponse, SaleResponse
-from services.s3_service import upload_images_to_s3, delete_images_from_s3
+from services.storage import delete_images, upload_images
 
 class SaleService:
     def __init__(self, db: AsyncSession):
@@ -11,7 +11,7 @@ class SaleService:
         self.sale_crud = CRUDsale(db)
 
 async def process_sale(db: AsyncSession, sale_data: SaleCreate, files: List[UploadFile]):
-    image_urls = await upload_images_to_s3(files)  # ✅ S3 업로드 후 URL 리스트 반환
+    image_urls = await upload_images(files)  # ✅ S3 업로드 후 URL 리스트 반환
     if not image_urls:
         return None
 
@@ -32,6 +32,6 @@ async def remove_sale(db: AsyncSession, sale_id: int):
 
     image_url = result.get("image_url")
     if image_url:
-        await delete_images_from_s3(image_url)
+        await delete_images(image_url)
 
     return True
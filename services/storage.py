@@ -0,0 +1,343 @@
+import asyncio
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional
+from urllib.parse import urlparse
+from fastapi import HTTPException, UploadFile
+from core.config import settings
+
+MB = 1024 * 1024
+# S3 DeleteObjects 요청 하나에 넣을 수 있는 최대 키 수
+DELETE_BATCH_LIMIT = 1000
+
+
+class ObjectStorage:
+    """
+    이미지 등 업로드 파일 저장소 인터페이스
+
+    put/delete_many만 구현하면 put_many(동시 업로드 + 파일별 결과)는 공통으로 사용한다.
+    키는 "<uuid 또는 내용 해시>.<확장자>" 형태의 평평한 이름이고 URL의 마지막 경로 조각이 키가 된다.
+    """
+
+    name = "base"
+
+    async def put(self, key: str, file: BinaryIO, content_type: str):
+        raise NotImplementedError
+
+    async def delete_many(self, keys: List[str]) -> List[str]:
+        """키들을 삭제하고 삭제하지 못한 키 목록을 반환 (없는 키는 삭제된 것으로 봄)"""
+        raise NotImplementedError
+
+    def url_for(self, key: str) -> str:
+        raise NotImplementedError
+
+    def key_for(self, url: str) -> str:
+        return url.rstrip("/").split("/")[-1]
+
+    def owns(self, url: Optional[str]) -> bool:
+        """이 저장소에 올린 객체의 URL인지 (외부 이미지 URL을 지우지 않도록)"""
+        return bool(url) and self.url_for(self.key_for(url)) == url
+
+    async def put_many(self, files: List[UploadFile], keys: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        파일들을 동시에 저장하고 파일별 결과를 입력 순서대로 반환
+
+        keys가 없으면 uuid 키를 만든다.
+        [{"filename", "url", "error"}] (성공하면 error는 None, 실패하면 url은 None)
+        """
+        async def put_one(file: UploadFile, key: Optional[str]) -> Dict[str, Any]:
+            filename = getattr(file, "filename", None)
+            if not hasattr(file, 'file') or not filename:
+                return {"filename": filename, "url": None, "error": "잘못된 파일"}
+
+            # 유니크한 파일명 생성
+            if key is None:
+                file_extension = filename.split(".")[-1].lower()
+                key = f"{uuid.uuid4()}.{file_extension}"
+            try:
+                file.file.seek(0)
+                await self.put(key, file.file, file.content_type or "application/octet-stream")
+            except Exception as e:
+                print(f"개별 파일 업로드 실패: {filename}, {e}")
+                return {"filename": filename, "url": None, "error": str(e)}
+            return {"filename": filename, "url": self.url_for(key), "error": None}
+
+        return await asyncio.gather(*(put_one(file, key) for file, key in zip(files, keys or [None] * len(files))))
+
+
+class LocalStorage(ObjectStorage):
+    """
+    로컬 디렉터리 저장소 (개발/부하 테스트용)
+
+    base_url이 "/media"처럼 경로이면 main에서 같은 경로로 StaticFiles를 마운트해 제공한다.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str = "media", base_url: str = "/media"):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    @property
+    def mount_path(self) -> str:
+        return urlparse(self.base_url).path or "/"
+
+    def _path(self, key: str) -> str:
+        # 키에 경로 구분자가 들어와도 root 밖으로 나가지 않도록 이름만 사용
+        return os.path.join(self.root, os.path.basename(key))
+
+    def _write(self, key: str, file: BinaryIO):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._path(key), "wb") as out:
+            shutil.copyfileobj(file, out)
+
+    def _remove(self, keys: List[str]) -> List[str]:
+        failed = []
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"로컬 파일 삭제 실패: {key}, {e}")
+                failed.append(key)
+        return failed
+
+    async def put(self, key: str, file: BinaryIO, content_type: str):
+        await asyncio.to_thread(self._write, key, file)
+
+    async def delete_many(self, keys: List[str]) -> List[str]:
+        return await asyncio.to_thread(self._remove, keys)
+
+    def url_for(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+class MemoryStorage(ObjectStorage):
+    """프로세스 메모리 저장소 (테스트/벤치마크용, 재시작하면 사라짐)"""
+
+    name = "memory"
+
+    def __init__(self, base_url: str = "memory://media"):
+        self.base_url = base_url.rstrip("/")
+        self.objects: Dict[str, bytes] = {}
+        self.content_types: Dict[str, str] = {}
+
+    async def put(self, key: str, file: BinaryIO, content_type: str):
+        self.objects[key] = file.read()
+        self.content_types[key] = content_type
+
+    async def delete_many(self, keys: List[str]) -> List[str]:
+        for key in keys:
+            self.objects.pop(key, None)
+            self.content_types.pop(key, None)
+        return []
+
+    def url_for(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+class S3Storage(ObjectStorage):
+    """
+    S3(또는 MinIO 등 S3 호환) 저장소
+
+    boto3 클라이언트와 업로드 스레드 풀은 첫 요청 때 만든다
+    (import만으로 AWS 설정을 요구하거나 클라이언트를 만들지 않도록).
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: Optional[str],
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        upload_concurrency: int = 8,
+        multipart_threshold_mb: int = 8,
+        multipart_chunksize_mb: int = 8,
+        multipart_concurrency: int = 4
+    ):
+        self.bucket = bucket
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.endpoint_url = endpoint_url
+        self.upload_concurrency = upload_concurrency
+        self.multipart_concurrency = multipart_concurrency
+        self.multipart_threshold_mb = multipart_threshold_mb
+        self.multipart_chunksize_mb = multipart_chunksize_mb
+        self._client = None
+        self._transfer_config = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "S3Storage":
+        return cls(
+            settings.AWS_S3_BUCKET_NAME,
+            region=settings.AWS_REGION,
+            access_key_id=settings.AWS_ACCESS_KEY_ID,
+            secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+            upload_concurrency=settings.S3_UPLOAD_CONCURRENCY,
+            multipart_threshold_mb=settings.S3_MULTIPART_THRESHOLD_MB,
+            multipart_chunksize_mb=settings.S3_MULTIPART_CHUNKSIZE_MB,
+            multipart_concurrency=settings.S3_MULTIPART_CONCURRENCY
+        )
+
+    def _create_client(self):
+        # boto3는 S3를 쓸 때만 불러옴
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
+        if not self.bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3에는 AWS_S3_BUCKET_NAME 설정이 필요합니다.")
+        config = Config(
+            # 동시 업로드 수만큼 연결을 재사용
+            max_pool_connections=self.upload_concurrency * self.multipart_concurrency,
+            retries={"max_attempts": 3, "mode": "standard"}
+        )
+        if self.endpoint_url:
+            # MinIO 등 S3 호환 저장소: 경로 방식 주소, 필요할 때만 체크섬 (aws-chunked 본문을 지원하지 않는 경우가 있음)
+            config = config.merge(Config(
+                s3={"addressing_style": "path"},
+                request_checksum_calculation="when_required",
+                response_checksum_validation="when_required"
+            ))
+        # 큰 파일은 멀티파트로 나눠 병렬 전송
+        self._transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_threshold_mb * MB,
+            multipart_chunksize=self.multipart_chunksize_mb * MB,
+            max_concurrency=self.multipart_concurrency
+        )
+        return boto3.client(
+            "s3",
+            aws_access_key_id=self.access_key_id,
+            aws_secret_access_key=self.secret_access_key,
+            region_name=self.region,
+            endpoint_url=self.endpoint_url,
+            config=config
+        )
+
+    @property
+    def client(self):
+        # 업로드 스레드들이 동시에 처음 접근해도 클라이언트는 하나만 생성
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # boto3 호출은 블로킹이라 전용 스레드 풀에서 실행 (이벤트 루프를 막지 않음)
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.upload_concurrency, thread_name_prefix="s3-upload"
+                    )
+        return self._executor
+
+    def url_for(self, key: str) -> str:
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def _upload(self, key: str, file: BinaryIO, content_type: str):
+        # UploadFile.file(SpooledTemporaryFile)을 그대로 넘겨 청크 단위로 읽으며 전송 (메모리로 복사하지 않음)
+        # upload_fileobj는 전송이 끝나면 파일을 닫으므로 업로드 뒤에는 다시 읽을 수 없음
+        client = self.client
+        client.upload_fileobj(
+            file,
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": content_type},
+            Config=self._transfer_config
+        )
+
+    def _delete(self, keys: List[str]) -> List[str]:
+        # 키마다 DeleteObject를 보내지 않고 DeleteObjects 한 번에 최대 1000개씩 삭제
+        failed = []
+        for start in range(0, len(keys), DELETE_BATCH_LIMIT):
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in keys[start:start + DELETE_BATCH_LIMIT]], "Quiet": True}
+            )
+            # Quiet 모드에서는 실패한 키만 돌려줌
+            for error in response.get("Errors", []):
+                print(f"S3 삭제 실패: {error.get('Key')}, {error.get('Code')}")
+                failed.append(error["Key"])
+        return failed
+
+    async def put(self, key: str, file: BinaryIO, content_type: str):
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._upload, key, file, content_type)
+
+    async def delete_many(self, keys: List[str]) -> List[str]:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._delete, keys)
+
+
+def create_storage() -> ObjectStorage:
+    """설정(STORAGE_BACKEND)에 따라 저장소 생성"""
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage.from_settings()
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.STORAGE_LOCAL_ROOT, settings.STORAGE_PUBLIC_URL)
+    if settings.STORAGE_BACKEND == "memory":
+        return MemoryStorage()
+    raise ValueError(f"지원하지 않는 STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+
+
+# 워커 프로세스가 공유하는 저장소
+storage = create_storage()
+
+
+async def upload_images(files: List[UploadFile], backend: Optional[ObjectStorage] = None) -> Optional[List[str]]:
+    """
+    이미지들을 동시에 업로드하고 URL 목록을 반환
+
+    하나라도 실패하면 성공한 파일도 지우고 파일별 실패 사유와 함께 502를 반환한다
+    (일부 이미지만 저장된 게시글이 만들어지지 않도록).
+    """
+    if not files:
+        return None
+
+    backend = backend or storage
+    results = await backend.put_many(files)
+    failed = [result for result in results if result["error"]]
+    if failed:
+        uploaded = [result["url"] for result in results if result["url"]]
+        if uploaded:
+            await delete_images(uploaded, backend)
+        raise upload_failed(failed)
+    return [result["url"] for result in results]
+
+
+def upload_failed(failed: List[Dict[str, Any]]) -> HTTPException:
+    """put_many 실패 결과로 파일별 실패 사유를 담은 502 생성"""
+    return HTTPException(
+        status_code=502,
+        detail={
+            "message": "이미지 업로드에 실패했습니다.",
+            "files": [{"filename": result["filename"], "error": result["error"]} for result in failed]
+        }
+    )
+
+
+async def delete_images(image_urls: List[str], backend: Optional[ObjectStorage] = None) -> bool:
+    """
+    저장소에서 여러 개의 이미지 파일 삭제
+    """
+    backend = backend or storage
+    try:
+        failed = await backend.delete_many([backend.key_for(image_url) for image_url in image_urls])
+        return not failed
+    except Exception as e:
+        print(f"이미지 삭제 실패: {e}")
+        return False
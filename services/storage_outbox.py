@@ -0,0 +1,213 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
+from db.session import AsyncSessionLocal
+from models.models import StorageDeletion
+from services.storage import ObjectStorage, storage
+
+
+def enqueue_deletions(db: AsyncSession, image_urls: List[str], backend: Optional[ObjectStorage] = None):
+    """
+    저장소 객체 삭제를 outbox에 기록 (커밋은 호출 측 트랜잭션에서)
+
+    게시글 삭제가 롤백되면 삭제 기록도 함께 사라지고, 커밋되면 삭제기가 반드시 처리한다.
+    """
+    backend = backend or storage
+    keys = {backend.key_for(url) for url in image_urls if url}
+    if keys:
+        db.add_all([StorageDeletion(key=key) for key in sorted(keys)])
+
+
+class StorageDeletionDrainer:
+    """
+    삭제 outbox(StorageDeletion)를 저장소에서 일괄 삭제하는 백그라운드 작업
+
+    - interval마다 재시도 시각이 된 항목을 batch_size개씩 골라 delete_many 한 번으로 지운다
+      (S3는 DeleteObjects 요청 하나에 최대 1000개)
+    - 실패한 키는 retry_backoff * 2^(시도 횟수) 뒤에 다시 시도하고,
+      max_attempts번 실패하면 행을 남겨 둔 채 더 이상 고르지 않는다 (last_error로 확인)
+    - FOR UPDATE SKIP LOCKED로 고르고 재시도 시각을 lease초 뒤로 미룬 채 커밋한 뒤 저장소를 호출하므로,
+      여러 워커 프로세스가 동시에 돌아도 같은 키를 두 번 지우지 않고 저장소 호출 중에는 잠금을 잡지 않는다
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        backend: Optional[ObjectStorage] = None,
+        interval: float = 10.0,
+        batch_size: int = 1000,
+        max_attempts: int = 8,
+        retry_backoff: float = 30.0,
+        lease: float = 300.0
+    ):
+        self.session_factory = session_factory
+        self.backend = backend or storage
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.lease = lease
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.batches = 0
+        self.deleted = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        self.last_run_at: Optional[datetime] = None
+
+    def start(self):
+        if self._task is not None or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                deleted = await self.drain()
+                if deleted:
+                    print(f"저장소 객체 삭제: {deleted}건")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"저장소 객체 삭제 실패: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def drain(self) -> int:
+        """재시도 시각이 된 항목이 없을 때까지 배치 단위로 삭제하고 삭제 건수를 반환"""
+        total = 0
+        while True:
+            picked, deleted = await self._drain_batch()
+            total += deleted
+            if picked < self.batch_size:
+                break
+            # 배치 사이에 다른 작업이 DB를 쓸 수 있도록 양보
+            await asyncio.sleep(0)
+
+        self.runs += 1
+        self.deleted += total
+        self.last_run_at = datetime.utcnow()
+        return total
+
+    async def _claim(self, now: datetime):
+        """
+        재시도 시각이 된 항목을 골라 재시도 시각을 lease만큼 미루고 바로 커밋
+
+        저장소를 호출하는 동안 행 잠금을 잡고 있지 않아도 다른 워커가 같은 행을 고르지 않고,
+        처리 중에 워커가 죽으면 lease가 지난 뒤 다시 골라진다. leased_until이 있는 행은
+        ImageRegistry.acquire가 취소하지 않고 삭제가 끝날 때까지 기다린다.
+        """
+        lease_until = now + timedelta(seconds=self.lease)
+        due = (
+            select(StorageDeletion.id)
+            .where(StorageDeletion.next_attempt_at <= now, StorageDeletion.attempts < self.max_attempts)
+            .order_by(StorageDeletion.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(StorageDeletion)
+                .where(StorageDeletion.id.in_(due.scalar_subquery()))
+                .values(next_attempt_at=lease_until, leased_until=lease_until)
+                .returning(StorageDeletion.id, StorageDeletion.key, StorageDeletion.attempts)
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            await db.commit()
+        return rows, lease_until
+
+    async def _drain_batch(self):
+        now = datetime.utcnow()
+        rows, lease_until = await self._claim(now)
+        if not rows:
+            return 0, 0
+        self.batches += 1
+
+        # 트랜잭션 밖에서 저장소 호출 (느린 요청이 DB 연결과 행 잠금을 붙잡지 않음)
+        error = None
+        try:
+            failed_keys = set(await self.backend.delete_many(sorted({row.key for row in rows})))
+        except Exception as e:
+            error = str(e)
+            failed_keys = {row.key for row in rows}
+
+        done = [row.id for row in rows if row.key not in failed_keys]
+        async with self.session_factory() as db:
+            if done:
+                await db.execute(delete(StorageDeletion).where(StorageDeletion.id.in_(done)))
+
+            # 시도 횟수가 같은 행끼리 묶어 재시도 시각을 한 번에 갱신
+            # (lease가 지나 다른 워커가 다시 고른 행은 그 워커가 처리하므로 건드리지 않음)
+            retries: Dict[int, List[int]] = defaultdict(list)
+            for row in rows:
+                if row.key in failed_keys:
+                    retries[row.attempts].append(row.id)
+            for attempts, ids in retries.items():
+                await db.execute(
+                    update(StorageDeletion)
+                    .where(StorageDeletion.id.in_(ids), StorageDeletion.leased_until == lease_until)
+                    .values(
+                        attempts=attempts + 1,
+                        leased_until=None,
+                        last_error=error or "저장소가 삭제 실패를 반환함",
+                        next_attempt_at=datetime.utcnow() + timedelta(seconds=self.retry_backoff * 2 ** attempts)
+                    )
+                )
+            await db.commit()
+
+        if failed_keys:
+            self.failed += len(rows) - len(done)
+            self.last_error = error or f"{len(failed_keys)}개 키 삭제 실패"
+        return len(rows), len(done)
+
+    async def backlog(self, db: AsyncSession) -> dict:
+        """남은 항목 수 (대기 중 / 재시도 대기 / 재시도 포기)"""
+        now = datetime.utcnow()
+        result = await db.execute(
+            select(
+                func.count().filter(StorageDeletion.attempts == 0),
+                func.count().filter(StorageDeletion.attempts > 0, StorageDeletion.attempts < self.max_attempts),
+                func.count().filter(StorageDeletion.attempts >= self.max_attempts),
+                func.min(StorageDeletion.created_at).filter(StorageDeletion.attempts < self.max_attempts)
+            )
+        )
+        pending, retrying, dead, oldest = result.one()
+        return {
+            "pending": pending,
+            "retrying": retrying,
+            "dead": dead,
+            "oldest_age_seconds": round((now - oldest).total_seconds(), 1) if oldest else 0.0
+        }
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "runs": self.runs,
+            "batches": self.batches,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "last_error": self.last_error,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None
+        }
+
+
+# 워커 프로세스마다 하나씩 실행 (SKIP LOCKED로 서로 다른 배치를 처리)
+storage_deletion_drainer = StorageDeletionDrainer(
+    interval=settings.STORAGE_DELETE_INTERVAL,
+    batch_size=settings.STORAGE_DELETE_BATCH,
+    max_attempts=settings.STORAGE_DELETE_MAX_ATTEMPTS,
+    retry_backoff=settings.STORAGE_DELETE_RETRY_BACKOFF,
+    lease=settings.STORAGE_DELETE_LEASE
+)
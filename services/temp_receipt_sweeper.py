@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.session import AsyncSessionLocal
+from models.models import TempReceipt
+
+
+class TempReceiptSweeper:
+    """
+    확정되지 않고 남은 TempReceipt 정리 작업
+
+    - interval마다 max_age보다 오래된 임시 데이터를 batch_size개씩 나눠 삭제한다
+      (한 번에 지워 긴 트랜잭션/잠금이 생기지 않도록 배치마다 커밋)
+    - FOR UPDATE SKIP LOCKED로 고르므로 여러 워커 프로세스가 동시에 돌아도 서로 기다리지 않는다
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        max_age: timedelta = timedelta(hours=24),
+        interval: float = 600.0,
+        batch_size: int = 500
+    ):
+        self.session_factory = session_factory
+        self.max_age = max_age
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.deleted = 0
+        self.last_run_at: Optional[datetime] = None
+
+    def start(self):
+        if self._task is not None or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                deleted = await self.sweep()
+                if deleted:
+                    print(f"임시 영수증 데이터 정리: {deleted}건")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"임시 영수증 데이터 정리 실패: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def sweep(self) -> int:
+        """오래된 임시 데이터를 모두 지울 때까지 배치 단위로 삭제하고 삭제 건수를 반환"""
+        cutoff = datetime.utcnow() - self.max_age
+        total = 0
+        while True:
+            batch = (
+                select(TempReceipt.id)
+                .where(TempReceipt.created_at < cutoff)
+                .order_by(TempReceipt.created_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    delete(TempReceipt).where(TempReceipt.id.in_(batch.scalar_subquery())).returning(TempReceipt.id)
+                )
+                deleted: List[int] = result.scalars().all()
+                await db.commit()
+            total += len(deleted)
+            if len(deleted) < self.batch_size:
+                break
+            # 배치 사이에 다른 작업이 DB를 쓸 수 있도록 양보
+            await asyncio.sleep(0)
+
+        self.runs += 1
+        self.deleted += total
+        self.last_run_at = datetime.utcnow()
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "deleted": self.deleted,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None
+        }
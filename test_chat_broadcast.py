@@ -0,0 +1,163 @@
+import asyncio
+import time
+import unittest
+from services.chat_broadcast import ChatBroadcaster, SlowConsumerPolicy
+
+ROOM_ID = 1
+SOCKETS_PER_ROOM = 1000
+SLOW_EVERY = 10  # 10개 중 1개는 느린 클라이언트
+MESSAGES = 50
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.received = []
+        self.closed = False
+
+    async def send_text(self, message: str):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(message)
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+
+class TestChatBroadcastLoad(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # 디버그 모드의 콜백 추적 비용이 팬아웃 시간 측정에 섞이지 않도록 끔
+        asyncio.get_running_loop().set_debug(False)
+
+    async def _fill_room(self, broadcaster, slow_delay=1.0):
+        fast, slow = [], []
+        for i in range(SOCKETS_PER_ROOM):
+            is_slow = i % SLOW_EVERY == 0
+            ws = FakeWebSocket(delay=slow_delay if is_slow else 0.0)
+            await broadcaster.connect(ROOM_ID, ws, f"user{i}@test.com", i)
+            (slow if is_slow else fast).append(ws)
+        return fast, slow
+
+    async def _publish(self, broadcaster, count=MESSAGES) -> float:
+        """메시지를 차례로 브로드캐스트하고 broadcast 호출에 걸린 시간 합계를 반환"""
+        elapsed = 0.0
+        for n in range(count):
+            started = time.perf_counter()
+            await broadcaster.broadcast(ROOM_ID, f"msg-{n}")
+            elapsed += time.perf_counter() - started
+            # 메시지 사이에 이벤트 루프 양보 (writer 태스크 실행)
+            await asyncio.sleep(0)
+        return elapsed
+
+    async def _wait_until(self, predicate, timeout=5.0):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if predicate():
+                return
+            await asyncio.sleep(0.01)
+
+    async def _drain(self, sockets, expected, timeout=5.0):
+        await self._wait_until(
+            lambda: all(len(ws.received) >= expected for ws in sockets), timeout
+        )
+
+    async def test_fast_readers_not_blocked_by_slow_readers(self):
+        broadcaster = ChatBroadcaster(queue_size=8, policy=SlowConsumerPolicy.DROP)
+        fast, slow = await self._fill_room(broadcaster)
+
+        elapsed = await self._publish(broadcaster)
+
+        # 팬아웃은 큐 적재만 하므로 느린 클라이언트의 전송 시간과 무관해야 함
+        self.assertLess(elapsed, 1.0)
+
+        await self._drain(fast, MESSAGES)
+        expected = [f"msg-{n}" for n in range(MESSAGES)]
+        for ws in fast:
+            self.assertEqual(ws.received, expected)
+
+        # 느린 클라이언트는 큐 크기를 넘는 메시지를 버림
+        for ws in slow:
+            connection = broadcaster._connections[ws]
+            self.assertGreater(connection.dropped, 0)
+            self.assertLessEqual(len(ws.received) + connection.queue.qsize(), 8 + 1)
+
+        for ws in fast + slow:
+            broadcaster.disconnect(ROOM_ID, ws)
+        self.assertEqual(broadcaster.room_size(ROOM_ID), 0)
+        self.assertNotIn(ROOM_ID, broadcaster.rooms)
+
+    async def test_coalesce_keeps_latest_messages(self):
+        broadcaster = ChatBroadcaster(queue_size=4, policy=SlowConsumerPolicy.COALESCE)
+        fast, slow = await self._fill_room(broadcaster, slow_delay=0.05)
+
+        await self._publish(broadcaster)
+
+        await self._drain(fast, MESSAGES)
+        for ws in fast:
+            self.assertEqual(len(ws.received), MESSAGES)
+
+        # 느린 클라이언트도 결국 가장 최신 메시지까지 받음
+        last = f"msg-{MESSAGES - 1}"
+        await self._wait_until(
+            lambda: all(ws.received and ws.received[-1] == last for ws in slow)
+        )
+        for ws in slow:
+            self.assertEqual(ws.received[-1], last)
+            self.assertLess(len(ws.received), MESSAGES)
+
+        for ws in fast + slow:
+            broadcaster.disconnect(ROOM_ID, ws)
+
+    async def test_disconnect_policy_evicts_slow_readers(self):
+        broadcaster = ChatBroadcaster(queue_size=4, policy=SlowConsumerPolicy.DISCONNECT)
+        fast, slow = await self._fill_room(broadcaster)
+
+        await self._publish(broadcaster)
+        await self._drain(fast, MESSAGES)
+        await asyncio.sleep(0)
+
+        self.assertEqual(broadcaster.room_size(ROOM_ID), len(fast))
+        for ws in slow:
+            self.assertTrue(ws.closed)
+        for ws in fast:
+            self.assertEqual(len(ws.received), MESSAGES)
+
+        for ws in fast:
+            broadcaster.disconnect(ROOM_ID, ws)
+
+    async def test_dead_socket_does_not_abort_fanout(self):
+        broadcaster = ChatBroadcaster(queue_size=8)
+        dead = FakeWebSocket(fail=True)
+        alive = FakeWebSocket()
+        await broadcaster.connect(ROOM_ID, dead, "dead@test.com")
+        await broadcaster.connect(ROOM_ID, alive, "alive@test.com")
+
+        await broadcaster.broadcast(ROOM_ID, "hello")
+        await self._drain([alive], 1)
+        await asyncio.sleep(0)
+
+        self.assertEqual(alive.received, ["hello"])
+        self.assertEqual(broadcaster.room_size(ROOM_ID), 1)
+        broadcaster.disconnect(ROOM_ID, alive)
+
+    async def test_sender_is_excluded(self):
+        broadcaster = ChatBroadcaster()
+        sender = FakeWebSocket()
+        other = FakeWebSocket()
+        await broadcaster.connect(ROOM_ID, sender, "sender@test.com")
+        await broadcaster.connect(ROOM_ID, other, "other@test.com")
+
+        await broadcaster.broadcast(ROOM_ID, "hi", "sender@test.com")
+        await self._drain([other], 1)
+
+        self.assertEqual(sender.received, [])
+        self.assertEqual(other.received, ["hi"])
+        broadcaster.disconnect(ROOM_ID, sender)
+        broadcaster.disconnect(ROOM_ID, other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+import unittest
+from services.chat_broadcast import SAVED_FIELDS_RESERVE, ChatBroadcaster, MessageTooLarge
+from services.chat_broker import InMemoryBroker, PostgresBroker, asyncpg_dsn
+
+ROOM_ID = 7
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_text(self, message: str):
+        self.received.append(message)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class CountingBroker(InMemoryBroker):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    async def publish(self, channel: str, payload: str) -> None:
+        self.published.append((channel, payload))
+        await super().publish(channel, payload)
+
+
+async def wait_for(predicate, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+class TestChatBroker(unittest.IsolatedAsyncioTestCase):
+    async def test_message_reaches_sockets_on_other_worker(self):
+        broker = CountingBroker()
+        # 같은 브로커를 공유하는 두 워커
+        worker_a = ChatBroadcaster(broker=broker)
+        worker_b = ChatBroadcaster(broker=broker)
+
+        sender, local_peer = FakeWebSocket(), FakeWebSocket()
+        remote_peers = [FakeWebSocket() for _ in range(3)]
+        await worker_a.connect(ROOM_ID, sender, "sender@test.com")
+        await worker_a.connect(ROOM_ID, local_peer, "local@test.com")
+        for i, ws in enumerate(remote_peers):
+            await worker_b.connect(ROOM_ID, ws, f"remote{i}@test.com")
+
+        await worker_a.broadcast(ROOM_ID, "hello", "sender@test.com")
+        everyone = [local_peer] + remote_peers
+        self.assertTrue(await wait_for(lambda: all(ws.received for ws in everyone)))
+
+        # 발신자는 제외되고, 각 수신자는 정확히 한 번 받음
+        self.assertEqual(sender.received, [])
+        for ws in everyone:
+            self.assertEqual(ws.received, ["hello"])
+        # publish 한 번에 직렬화도 한 번
+        self.assertEqual(len(broker.published), 1)
+
+        for ws in (sender, local_peer):
+            worker_a.disconnect(ROOM_ID, ws)
+        for ws in remote_peers:
+            worker_b.disconnect(ROOM_ID, ws)
+
+    async def test_worker_subscribes_only_to_rooms_with_local_sockets(self):
+        broker = InMemoryBroker()
+        worker = ChatBroadcaster(broker=broker, channel_prefix="group_chat")
+        ws = FakeWebSocket()
+
+        self.assertEqual(broker.channels(), [])
+        await worker.connect(ROOM_ID, ws, "user@test.com")
+        self.assertEqual(broker.channels(), [f"group_chat_{ROOM_ID}"])
+
+        worker.disconnect(ROOM_ID, ws)
+        self.assertTrue(await wait_for(lambda: broker.channels() == []))
+
+    async def test_oversized_message_is_rejected_before_fanout(self):
+        broker = CountingBroker()
+        broker.max_payload = 400
+        worker_a = ChatBroadcaster(broker=broker)
+        worker_b = ChatBroadcaster(broker=broker)
+        local_peer, remote_peer = FakeWebSocket(), FakeWebSocket()
+        await worker_a.connect(ROOM_ID, local_peer, "local@test.com")
+        await worker_b.connect(ROOM_ID, remote_peer, "remote@test.com")
+
+        short = json.dumps({"type": "chat", "content": "안녕"})
+        self.assertTrue(worker_a.fits(ROOM_ID, short, "sender@test.com", reserve=SAVED_FIELDS_RESERVE))
+
+        # 원문은 한도 안이지만 다시 직렬화하면 한글이 \uXXXX로 늘어나 한도를 넘음
+        raw = json.dumps({"type": "chat", "content": "가" * 60}, ensure_ascii=False)
+        self.assertTrue(len(raw.encode("utf-8")) < 300)
+        self.assertFalse(worker_a.fits(ROOM_ID, raw, "sender@test.com"))
+
+        with self.assertRaises(MessageTooLarge):
+            await worker_a.broadcast(ROOM_ID, json.dumps(json.loads(raw)), "sender@test.com")
+        await worker_a.broadcast(ROOM_ID, short, "sender@test.com")
+        self.assertTrue(await wait_for(lambda: remote_peer.received))
+
+        # 일부 워커에만 전달되지 않도록 로컬에도 보내지 않음
+        self.assertEqual(local_peer.received, [short])
+        self.assertEqual(remote_peer.received, [short])
+        self.assertEqual(len(broker.published), 1)
+
+        worker_a.disconnect(ROOM_ID, local_peer)
+        worker_b.disconnect(ROOM_ID, remote_peer)
+
+    @unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+    async def test_postgres_listener_reconnects_and_relistens(self):
+        import asyncpg
+
+        broker_a = PostgresBroker(asyncpg_dsn(TEST_DATABASE_URL))
+        broker_b = PostgresBroker(asyncpg_dsn(TEST_DATABASE_URL), reconnect_delay=0.05)
+        worker_a = ChatBroadcaster(broker=broker_a)
+        worker_b = ChatBroadcaster(broker=broker_b)
+        sender, remote = FakeWebSocket(), FakeWebSocket()
+        admin = await asyncpg.connect(asyncpg_dsn(TEST_DATABASE_URL))
+        try:
+            await worker_a.connect(ROOM_ID, sender, "sender@test.com")
+            await worker_b.connect(ROOM_ID, remote, "remote@test.com")
+            await worker_b.connect(ROOM_ID + 1, FakeWebSocket(), "other@test.com")
+
+            # DB 재시작/장애 조치처럼 LISTEN 연결이 서버 쪽에서 끊김
+            await admin.execute("SELECT pg_terminate_backend($1)", broker_b._listen_conn.get_server_pid())
+            self.assertTrue(await wait_for(lambda: broker_b.reconnects == 1, timeout=5.0))
+
+            await worker_a.broadcast(ROOM_ID, "after reconnect", "sender@test.com")
+            self.assertTrue(await wait_for(lambda: remote.received, timeout=5.0))
+            self.assertEqual(remote.received, ["after reconnect"])
+            self.assertEqual(set(broker_b._handlers), {f"chat_{ROOM_ID}", f"chat_{ROOM_ID + 1}"})
+        finally:
+            await admin.close()
+            await broker_a.close()
+            await broker_b.close()
+
+    @unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+    async def test_postgres_listen_notify_across_workers(self):
+        broker_a = PostgresBroker(asyncpg_dsn(TEST_DATABASE_URL))
+        broker_b = PostgresBroker(asyncpg_dsn(TEST_DATABASE_URL))
+        worker_a = ChatBroadcaster(broker=broker_a)
+        worker_b = ChatBroadcaster(broker=broker_b)
+        sender, remote = FakeWebSocket(), FakeWebSocket()
+        try:
+            await worker_a.connect(ROOM_ID, sender, "sender@test.com")
+            await worker_b.connect(ROOM_ID, remote, "remote@test.com")
+
+            await worker_a.broadcast(ROOM_ID, "hello", "sender@test.com")
+            self.assertTrue(await wait_for(lambda: remote.received, timeout=5.0))
+            self.assertEqual(remote.received, ["hello"])
+            self.assertEqual(sender.received, [])
+        finally:
+            worker_a.disconnect(ROOM_ID, sender)
+            worker_b.disconnect(ROOM_ID, remote)
+            await asyncio.sleep(0.05)
+            await broker_a.close()
+            await broker_b.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import unittest
+from services.chat_history import ChatHistoryCache
+
+ROOM_ID = 1
+
+
+class FakeHistory:
+    """DB 대신 메시지 목록을 keyset 조회처럼 돌려주고 조회 횟수를 셈"""
+
+    def __init__(self, count: int):
+        self.messages = [{"id": i, "content": f"m{i}", "chat_id": ROOM_ID} for i in range(1, count + 1)]
+        self.queries = 0
+
+    async def load(self, db, room_id, limit, before):
+        self.queries += 1
+        rows = [m for m in self.messages if before is None or m["id"] < before]
+        return rows[-limit:]
+
+
+def chat_frame(message_id: int) -> str:
+    return json.dumps({"type": "chat", "id": message_id, "sender_id": 2, "content": f"m{message_id}"})
+
+
+class TestChatHistoryCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.history = FakeHistory(30)
+        self.live_rooms = set()
+        self.cache = ChatHistoryCache(
+            self.history.load,
+            capacity=20,
+            room_field="chat_id",
+            is_live=lambda room_id: room_id in self.live_rooms
+        )
+
+    async def test_room_without_local_socket_is_not_buffered(self):
+        for _ in range(2):
+            page = await self.cache.page(ROOM_ID, 10, db=object())
+            self.assertEqual([m["id"] for m in page], list(range(21, 31)))
+        self.assertEqual(self.history.queries, 2)
+        self.assertNotIn(ROOM_ID, self.cache._rooms)
+
+        # 구독하지 않는 방의 메시지는 버퍼에 들어가지 않고, 다음 조회는 DB의 최신 상태를 봄
+        self.cache.observe(ROOM_ID, chat_frame(31))
+        self.history.messages.append({"id": 31, "content": "m31", "chat_id": ROOM_ID})
+        page = await self.cache.page(ROOM_ID, 10, db=object())
+        self.assertEqual(page[-1]["id"], 31)
+
+    async def test_live_room_is_served_from_buffer(self):
+        self.live_rooms.add(ROOM_ID)
+        await self.cache.page(ROOM_ID, 10, db=object())
+        self.cache.observe(ROOM_ID, chat_frame(31))
+        page = await self.cache.page(ROOM_ID, 10, db=object())
+        self.assertEqual([m["id"] for m in page], list(range(22, 32)))
+        self.assertEqual(self.history.queries, 1)
+
+        # 이전 페이지는 항상 DB
+        older = await self.cache.page(ROOM_ID, 5, before=22, db=object())
+        self.assertEqual([m["id"] for m in older], list(range(17, 22)))
+        self.assertEqual(self.history.queries, 2)
+
+    async def test_buffer_is_dropped_when_room_is_no_longer_live(self):
+        self.live_rooms.add(ROOM_ID)
+        await self.cache.page(ROOM_ID, 10, db=object())
+        self.live_rooms.clear()
+
+        await self.cache.page(ROOM_ID, 10, db=object())
+        self.assertNotIn(ROOM_ID, self.cache._rooms)
+        self.assertEqual(self.history.queries, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from conftest import DatabaseTestCase
+from services.chat_unread import UnreadCounter, unread_counter
+
+
+class TestUnreadCounter(unittest.TestCase):
+    def test_unseeded_user_reads_from_db(self):
+        counter = UnreadCounter()
+        self.assertIsNone(counter.get(1))
+        # 채워지지 않은 사용자의 증가는 무시 (다음 조회 때 DB에서 계산)
+        counter.increment(1, 10)
+        self.assertIsNone(counter.get(1))
+
+        counter.seed(1, {10: 2})
+        counter.increment(1, 10)
+        counter.increment(1, 11)
+        self.assertEqual(counter.get(1), {10: 3, 11: 1})
+        counter.reset(1, 10)
+        self.assertEqual(counter.get(1), {10: 0, 11: 1})
+        counter.forget(1)
+        self.assertIsNone(counter.get(1))
+
+    def test_counts_expire_after_ttl(self):
+        counter = UnreadCounter(ttl=60)
+        with patch("services.chat_unread.time.monotonic", return_value=1000.0):
+            counter.seed(1, {10: 1})
+        with patch("services.chat_unread.time.monotonic", return_value=1059.0):
+            self.assertEqual(counter.get(1), {10: 1})
+        with patch("services.chat_unread.time.monotonic", return_value=1061.0):
+            counter.increment(1, 10)
+            self.assertIsNone(counter.get(1))
+        self.assertEqual(len(counter._counts), 0)
+
+    def test_least_recently_read_user_is_dropped(self):
+        counter = UnreadCounter(max_users=2)
+        counter.seed(1, {10: 1})
+        counter.seed(2, {20: 1})
+        counter.get(1)
+        counter.seed(3, {30: 1})
+        self.assertEqual(set(counter._counts), {1, 3})
+
+    def test_disabled_counter_never_serves(self):
+        for counter in (UnreadCounter(enabled=False), UnreadCounter(ttl=0)):
+            counter.seed(1, {10: 1})
+            self.assertIsNone(counter.get(1))
+
+
+class ChatTestCase(DatabaseTestCase):
+    async def asyncSetUp(self):
+        from models.models import Chat, Message, Sale, User
+
+        await super().asyncSetUp()
+
+        async with self.session_factory() as db:
+            for i in (1, 2, 3):
+                db.add(User(
+                    email=f"u{i}@test.com", username=f"u{i}", nickname=f"n{i}", hashed_password="x",
+                    address_name="서울", zone_no="00000", location_lat=37.5, location_lon=127.0
+                ))
+            await db.flush()
+            for title in ("양파", "감자"):
+                db.add(Sale(
+                    seller_id=2, title=title, ingredient_name=title, value=1000, category="채소",
+                    location_lat=37.5, location_lon=127.0, expiry_date=datetime(2030, 1, 1),
+                    contents="팝니다", amount=1
+                ))
+            await db.flush()
+            # 1번 채팅방: 1(구매자) - 2(판매자), 2번 채팅방: 1 - 3
+            db.add_all([Chat(buyer_id=1, seller_id=2, item_id=1), Chat(buyer_id=1, seller_id=3, item_id=2)])
+            await db.flush()
+            start = datetime(2026, 1, 1)
+            for n, (chat_id, sender_id) in enumerate([(1, 2), (1, 2), (1, 1), (1, 2), (2, 3)]):
+                db.add(Message(
+                    chat_id=chat_id, sender_id=sender_id, content=f"m{n}", timestamp=start + timedelta(minutes=n)
+                ))
+            await db.commit()
+
+    async def inbox(self, user_id, include_unread=True):
+        from crud.crud_chat import CRUDchat
+
+        async with self.session_factory() as db:
+            return await CRUDchat(db).get_inbox(user_id, include_unread=include_unread)
+
+    async def mark_read(self, chat_id, user_id, message_id=None):
+        from crud.crud_chat import CRUDchat
+
+        async with self.session_factory() as db:
+            return await CRUDchat(db).mark_read(chat_id, user_id, message_id)
+
+
+class TestInbox(ChatTestCase):
+    async def test_inbox_lists_rooms_by_latest_message(self):
+        inbox = await self.inbox(1)
+
+        self.assertEqual([item["chat_id"] for item in inbox], [2, 1])
+        self.assertEqual([item["counterpart"]["nickname"] for item in inbox], ["n3", "n2"])
+        self.assertEqual([item["item_title"] for item in inbox], ["감자", "양파"])
+        self.assertEqual([item["last_message"]["content"] for item in inbox], ["m4", "m3"])
+        # 자기가 보낸 메시지는 안 읽은 수에서 제외
+        self.assertEqual([item["unread_count"] for item in inbox], [1, 3])
+
+        self.assertEqual([item["unread_count"] for item in await self.inbox(1, include_unread=False)], [None, None])
+        self.assertEqual([item["unread_count"] for item in await self.inbox(2)], [1])
+
+    async def test_mark_read_never_moves_backwards(self):
+        self.assertEqual(await self.mark_read(1, 1, message_id=2), 2)
+        self.assertEqual([item["unread_count"] for item in await self.inbox(1)], [1, 1])
+
+        # 마지막 메시지까지 읽은 뒤 예전 메시지를 읽음 처리해도 그대로 (greatest)
+        self.assertEqual(await self.mark_read(1, 1), 4)
+        self.assertEqual(await self.mark_read(1, 1, message_id=1), 4)
+        self.assertEqual([item["unread_count"] for item in await self.inbox(1)], [1, 0])
+
+
+class TestInboxRoutes(ChatTestCase):
+    async def asyncSetUp(self):
+        from fastapi import FastAPI
+        from httpx import ASGITransport, AsyncClient
+        from api.dependencies import get_async_db, get_current_active_user
+        from api.routes import chat
+        from models.models import User
+
+        await super().asyncSetUp()
+
+        async def override_get_async_db():
+            async with self.session_factory() as session:
+                yield session
+                await session.commit()
+
+        self.current_user = None
+        app = FastAPI()
+        app.include_router(chat.router)
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        self.get_current_active_user = get_current_active_user
+        self.app = app
+        self.client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+        self.users = {i: User(id=i, email=f"u{i}@test.com", is_active=True) for i in (1, 2, 3)}
+        for user_id in self.users:
+            unread_counter.forget(user_id)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        for user_id in self.users:
+            unread_counter.forget(user_id)
+        await super().asyncTearDown()
+
+    def login(self, user_id):
+        self.app.dependency_overrides[self.get_current_active_user] = lambda: self.users[user_id]
+
+    async def test_anonymous_requests_are_unauthorized(self):
+        self.assertEqual((await self.client.get("/chat/inbox/")).status_code, 401)
+        self.assertEqual((await self.client.post("/chat/chats/1/read")).status_code, 401)
+
+    async def test_inbox_is_for_logged_in_user_only(self):
+        self.login(3)
+        # user_id 쿼리 인자는 무시하고 로그인한 사용자의 채팅방만
+        response = await self.client.get("/chat/inbox/", params={"user_id": 1})
+        self.assertEqual([item["chat_id"] for item in response.json()], [2])
+
+    async def test_only_participants_can_mark_read(self):
+        self.login(3)
+        self.assertEqual((await self.client.post("/chat/chats/1/read")).status_code, 403)
+        self.assertEqual((await self.client.post("/chat/chats/99/read")).status_code, 404)
+        self.assertIsNone(unread_counter.get(3))
+
+        self.login(1)
+        response = await self.client.post("/chat/chats/1/read")
+        self.assertEqual(response.json(), {"chat_id": 1, "user_id": 1, "last_read_message_id": 4})
+        self.assertEqual([item["unread_count"] for item in await self.inbox(1)], [1, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from db.pool_stats import InstrumentedPool, RouteTaggingMiddleware, current_route, pool_snapshot, stats_for
+from db.session import pool_options
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+class TestPoolOptions(unittest.TestCase):
+    def test_defaults_are_kept_without_connection_budget(self):
+        self.assertEqual(pool_options(), {"pool_size": 50, "max_overflow": 20, "pool_timeout": 90})
+
+    def test_connection_budget_is_split_across_workers(self):
+        # Postgres 100개 중 이 앱 몫 80개를 워커 4개가 나눠 씀
+        options = pool_options(pool_size=15, max_overflow=20, max_connections=80, workers=4)
+        self.assertEqual((options["pool_size"], options["max_overflow"]), (15, 5))
+        options = pool_options(pool_size=50, max_overflow=20, max_connections=80, workers=8)
+        self.assertEqual((options["pool_size"], options["max_overflow"]), (10, 0))
+
+    def test_shed_timeout_replaces_pool_timeout(self):
+        self.assertEqual(pool_options(shed_timeout=0.5)["pool_timeout"], 0.5)
+
+
+class TestPoolTimeoutResponse(unittest.TestCase):
+    def test_pool_timeout_becomes_503(self):
+        from main import pool_timeout_handler
+
+        app = FastAPI()
+        app.add_exception_handler(exc.TimeoutError, pool_timeout_handler)
+
+        @app.get("/busy")
+        async def busy():
+            raise exc.TimeoutError("QueuePool limit reached")
+
+        response = TestClient(app).get("/busy")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["retry-after"], "1")
+
+
+class TestRouteTagging(unittest.TestCase):
+    def test_request_route_is_visible_to_pool_checkouts(self):
+        app = FastAPI()
+        app.add_middleware(RouteTaggingMiddleware)
+
+        @app.get("/sales")
+        async def sales():
+            return {"route": current_route.get()}
+
+        self.assertEqual(TestClient(app).get("/sales").json(), {"route": "GET /sales"})
+        self.assertEqual(current_route.get(), "background")
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class TestInstrumentedPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            TEST_DATABASE_URL,
+            poolclass=InstrumentedPool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.2,
+            pool_logging_name="test_pool"
+        )
+        self.stats = stats_for("test_pool")
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_tracks_holder_and_sheds_on_timeout(self):
+        token = current_route.set("GET /slow")
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                await asyncio.sleep(0.05)
+                held = pool_snapshot(self.engine.pool)["longest_held"]
+                self.assertEqual(held["route"], "GET /slow")
+                self.assertGreaterEqual(held["seconds"], 0.05)
+
+                # 풀이 꽉 찬 상태에서는 checkout 대기 한도 뒤에 TimeoutError
+                with self.assertRaises(exc.TimeoutError):
+                    async with self.engine.connect() as other:
+                        await other.execute(text("SELECT 1"))
+        finally:
+            current_route.reset(token)
+
+        snapshot = pool_snapshot(self.engine.pool)
+        self.assertIsNone(snapshot["longest_held"])
+        self.assertEqual(snapshot["checkout_timeouts"], 1)
+        self.assertEqual(snapshot["max_held_route"], "GET /slow")
+        self.assertEqual(snapshot["hold_time"]["count"], 1)
+        self.assertEqual(snapshot["checkout_wait"]["count"], 2)
+        self.assertEqual(snapshot["checkout_wait"]["histogram"]["le_500ms"], 1)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class TestSocketSession(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.orm import sessionmaker
+        from db.pool_stats import pool_stats
+
+        self.engine = create_async_engine(
+            TEST_DATABASE_URL, poolclass=InstrumentedPool, pool_size=2, max_overflow=0, pool_logging_name="socket_test"
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE IF NOT EXISTS socket_session_test (n integer)"))
+            await conn.execute(text("TRUNCATE socket_session_test"))
+        self.pool_stats = pool_stats
+        self.opened = pool_stats.socket_sessions
+        # socket_session이 테스트 엔진의 세션을 쓰도록
+        self.patcher = patch(
+            "db.session.AsyncSessionLocal",
+            sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        )
+        self.patcher.start()
+
+    async def asyncTearDown(self):
+        self.patcher.stop()
+        async with self.engine.begin() as conn:
+            await conn.execute(text("DROP TABLE IF EXISTS socket_session_test"))
+        await self.engine.dispose()
+
+    async def rows(self):
+        async with self.engine.connect() as conn:
+            return (await conn.execute(text("SELECT n FROM socket_session_test ORDER BY n"))).scalars().all()
+
+    async def test_commits_and_returns_connection_to_pool(self):
+        from db.session import socket_session
+
+        held = self.engine.pool.stats.hold_time.count
+        async with socket_session() as session:
+            await session.execute(text("INSERT INTO socket_session_test VALUES (1)"))
+            self.assertEqual(self.pool_stats.socket_sessions, self.opened + 1)
+            self.assertEqual(self.engine.pool.checkedout(), 1)
+
+        self.assertEqual(self.pool_stats.socket_sessions, self.opened)
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+        self.assertEqual(self.engine.pool.stats.hold_time.count, held + 1)
+        self.assertEqual(await self.rows(), [1])
+
+    async def test_rolls_back_on_error(self):
+        from db.session import socket_session
+
+        with self.assertRaises(ValueError):
+            async with socket_session() as session:
+                await session.execute(text("INSERT INTO socket_session_test VALUES (1)"))
+                raise ValueError("save failed")
+
+        self.assertEqual(self.pool_stats.socket_sessions, self.opened)
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+        self.assertEqual(await self.rows(), [])
+
+    async def test_peak_counts_concurrent_sessions(self):
+        from db.session import socket_session
+
+        self.pool_stats.socket_sessions_peak = self.opened
+        both_open = asyncio.Barrier(2)
+
+        async def work(n):
+            async with socket_session() as session:
+                await session.execute(text(f"INSERT INTO socket_session_test VALUES ({n})"))
+                await both_open.wait()
+
+        await asyncio.gather(work(1), work(2))
+        self.assertEqual(self.pool_stats.socket_sessions_peak, self.opened + 2)
+        self.assertEqual(self.pool_stats.socket_sessions, self.opened)
+        self.assertEqual(await self.rows(), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime
+from sqlalchemy import select
+from conftest import DatabaseTestCase
+from schemas.group_chat import GroupChatMessageCreate
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_text(self, message: str):
+        self.received.append(json.loads(message))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class TestGroupChatMessageWriter(DatabaseTestCase):
+    async def asyncSetUp(self):
+        from models.models import GroupChatroom, GroupPurchase, User
+        from services.group_chat_writer import GroupChatMessageWriter
+
+        await super().asyncSetUp()
+
+        async with self.session_factory() as db:
+            for i in (1, 2):
+                db.add(User(
+                    email=f"u{i}@test.com", username=f"u{i}", nickname=f"n{i}", hashed_password="x",
+                    address_name="서울", zone_no="00000", location_lat=37.5, location_lon=127.0
+                ))
+            await db.flush()
+            db.add(GroupPurchase(
+                title="양파 공구", created_by=1, price=1000, original_price=2000, saving_price=1000,
+                category="채소", max_participants=5, end_date=datetime(2030, 1, 1)
+            ))
+            await db.flush()
+            db.add(GroupChatroom(group_purchase_id=1))
+            await db.commit()
+
+        self.inserts = []
+        writer = GroupChatMessageWriter(self.session_factory, max_batch_size=10, flush_interval=0.05)
+        original_insert = writer._insert
+
+        async def counting_insert(rows):
+            self.inserts.append(len(rows))
+            return await original_insert(rows)
+
+        writer._insert = counting_insert
+        self.writer = writer
+
+    async def asyncTearDown(self):
+        if self.writer._task is not None:
+            self.writer._task.cancel()
+            await asyncio.gather(self.writer._task, return_exceptions=True)
+        await super().asyncTearDown()
+
+    def message(self, content, chatroom_id=1, sender_id=1):
+        return GroupChatMessageCreate(chatroom_id=chatroom_id, sender_id=sender_id, content=content)
+
+    async def stored(self):
+        from models.models import GroupChatMessage
+
+        async with self.session_factory() as db:
+            result = await db.execute(select(GroupChatMessage.id, GroupChatMessage.content).order_by(GroupChatMessage.id))
+            return result.all()
+
+    async def test_messages_are_batched_and_ids_follow_input_order(self):
+        futures = [await self.writer.submit(self.message(f"m{i}")) for i in range(25)]
+        saved = await asyncio.gather(*futures)
+
+        # 배치 크기(10)만큼 모아 다중 행 INSERT
+        self.assertEqual(self.inserts, [10, 10, 5])
+        ids = [message_id for message_id, _ in saved]
+        self.assertEqual(ids, sorted(ids))
+        # 각 Future가 자기 행의 ID를 받음 (sort_by_parameter_order)
+        self.assertEqual(await self.stored(), [(message_id, f"m{i}") for i, message_id in enumerate(ids)])
+
+    async def test_bad_row_falls_back_to_per_row_inserts(self):
+        from sqlalchemy.exc import IntegrityError
+
+        futures = [
+            await self.writer.submit(self.message("ok-1")),
+            await self.writer.submit(self.message("bad", chatroom_id=999)),
+            await self.writer.submit(self.message("ok-2"))
+        ]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+
+        self.assertIsInstance(results[1], IntegrityError)
+        self.assertEqual([content for _, content in await self.stored()], ["ok-1", "ok-2"])
+        self.assertEqual(self.inserts, [3, 1, 1, 1])
+
+    async def test_relay_acks_sender_and_broadcasts_in_order(self):
+        from services.chat_broadcast import ChatBroadcaster
+        from services.group_chat_writer import SavedMessageRelay
+
+        broadcaster = ChatBroadcaster()
+        sender, peer = FakeWebSocket(), FakeWebSocket()
+        await broadcaster.connect(1, sender, "u1@test.com", 1)
+        await broadcaster.connect(1, peer, "u2@test.com", 2)
+        relay = SavedMessageRelay(self.writer, broadcaster, 1, sender, "u1@test.com")
+
+        # 저장을 기다리지 않고 바로 반환
+        await relay.submit(self.message("안녕"), {"type": "chat", "content": "안녕", "client_id": "a"})
+        await relay.forward(json.dumps({"type": "typing"}))
+        await relay.submit(self.message("bad", chatroom_id=999), {"type": "chat", "content": "bad", "client_id": "b"})
+        await relay.submit(self.message("반가워"), {"type": "chat", "content": "반가워", "client_id": "c"})
+        self.assertEqual(sender.received, [])
+
+        await relay.close()
+        await asyncio.sleep(0.05)
+
+        [(first_id, _), (second_id, _)] = await self.stored()
+        self.assertEqual(
+            [(frame["type"], frame["client_id"], frame.get("id")) for frame in sender.received],
+            [("ack", "a", first_id), ("ack_error", "b", None), ("ack", "c", second_id)]
+        )
+        self.assertEqual(
+            [(frame["type"], frame.get("id"), frame.get("sender_id")) for frame in peer.received],
+            [("chat", first_id, 1), ("typing", None, None), ("chat", None, None), ("chat", second_id, 1)]
+        )
+        for ws in (sender, peer):
+            broadcaster.disconnect(1, ws)
+
+
+class StalledWriter:
+    """저장이 끝나지 않는 저장기"""
+
+    async def submit(self, message):
+        return asyncio.get_running_loop().create_future()
+
+
+class TestSavedMessageRelayClose(unittest.IsolatedAsyncioTestCase):
+    async def test_timed_out_close_cancels_relay_task(self):
+        from services.chat_broadcast import ChatBroadcaster
+        from services.group_chat_writer import SavedMessageRelay
+
+        sender = FakeWebSocket()
+        relay = SavedMessageRelay(StalledWriter(), ChatBroadcaster(), 1, sender, "u1@test.com", max_pending=1)
+        message = GroupChatMessageCreate(chatroom_id=1, sender_id=1, content="안녕")
+        await relay.submit(message, {"type": "chat", "content": "안녕", "client_id": "a"})
+        # 큐가 가득 차 종료 표시도 들어가지 못하는 상태
+        await relay.submit(message, {"type": "chat", "content": "안녕", "client_id": "b"})
+
+        await relay.close(timeout=0.05)
+        self.assertTrue(relay._task.cancelled())
+        self.assertEqual(sender.received, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
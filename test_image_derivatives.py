@@ -0,0 +1,93 @@
+import io
+import unittest
+from types import SimpleNamespace
+from conftest import make_file
+from services.image_derivatives import (
+    ImageDerivativeService,
+    pick_rendition,
+    preferred_image_format,
+    upload_images_with_derivatives
+)
+from services.image_registry import ImageRegistry, image_object_urls
+from services.storage import MemoryStorage
+from utils.image_resize import Image
+
+DERIVATIVES = {
+    "thumb": {"webp": "memory://media/a_thumb.webp", "jpeg": "memory://media/a_thumb.jpg"},
+    "medium": {"webp": "memory://media/a_medium.webp", "jpeg": "memory://media/a_medium.jpg"},
+}
+
+
+def make_jpeg(width: int, height: int) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 80, 40)).save(out, "JPEG")
+    return out.getvalue()
+
+
+class TestRenditionSelection(unittest.TestCase):
+    def test_pick_rendition(self):
+        self.assertEqual(pick_rendition("memory://media/a.jpg", DERIVATIVES), "memory://media/a_thumb.jpg")
+        self.assertEqual(pick_rendition("memory://media/a.jpg", DERIVATIVES, "medium", "webp"), "memory://media/a_medium.webp")
+        # 파생본이 없는 기존 이미지는 원본
+        self.assertEqual(pick_rendition("memory://media/a.jpg", None), "memory://media/a.jpg")
+        self.assertEqual(pick_rendition("memory://media/a.jpg", {"thumb": {"webp": "t.webp"}}), "t.webp")
+
+    def test_preferred_image_format(self):
+        self.assertEqual(preferred_image_format("application/json"), "jpeg")
+        self.assertEqual(preferred_image_format(None), "jpeg")
+        self.assertEqual(preferred_image_format("application/json, image/webp"), "webp")
+
+    def test_image_object_urls_include_derivatives(self):
+        images = [
+            SimpleNamespace(image_url="memory://media/a.jpg", derivatives=DERIVATIVES),
+            SimpleNamespace(image_url="memory://media/b.jpg", derivatives=None),
+        ]
+        urls = image_object_urls(images)
+        self.assertEqual(len(urls), 6)
+        self.assertIn("memory://media/b.jpg", urls)
+
+
+class TestUploadWithDerivatives(unittest.IsolatedAsyncioTestCase):
+    # uuid 키 업로드 경로 (내용 해시 중복 제거는 test_image_registry에서 DB와 함께)
+    registry = ImageRegistry(enabled=False)
+
+    async def test_disabled_service_keeps_originals_only(self):
+        storage = MemoryStorage()
+        service = ImageDerivativeService({"thumb": 320}, workers=0)
+
+        urls, derivatives = await upload_images_with_derivatives([make_file(b"not-an-image")], storage, service, self.registry)
+
+        self.assertEqual(len(urls), 1)
+        self.assertEqual(derivatives, [None])
+        self.assertEqual(list(storage.objects.values()), [b"not-an-image"])
+        self.assertEqual(service.stats()["skipped"], 1)
+
+    @unittest.skipIf(Image is None, "Pillow가 설치되어 있지 않음")
+    async def test_renders_in_process_pool_and_stores_derivatives(self):
+        storage = MemoryStorage()
+        service = ImageDerivativeService({"thumb": 64, "medium": 256}, workers=1)
+        try:
+            urls, derivatives = await upload_images_with_derivatives(
+                [make_file(make_jpeg(1024, 768)), make_file(b"broken", "broken.jpg")], storage, service, self.registry
+            )
+        finally:
+            service.shutdown()
+
+        self.assertEqual(len(urls), 2)
+        # 디코딩할 수 없는 파일은 원본만 저장
+        self.assertIsNone(derivatives[1])
+        self.assertEqual(service.stats()["failures"], 1)
+
+        thumb = storage.objects[storage.key_for(derivatives[0]["thumb"]["jpeg"])]
+        with Image.open(io.BytesIO(thumb)) as img:
+            self.assertEqual(img.size, (64, 48))
+        medium = storage.objects[storage.key_for(derivatives[0]["medium"]["webp"])]
+        with Image.open(io.BytesIO(medium)) as img:
+            self.assertEqual((img.format, img.size), ("WEBP", (256, 192)))
+        self.assertEqual(storage.content_types[storage.key_for(derivatives[0]["thumb"]["webp"])], "image/webp")
+        # 원본 2개 + 파생본 2종 x 2형식
+        self.assertEqual(len(storage.objects), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
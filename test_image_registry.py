@@ -0,0 +1,216 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from sqlalchemy import select
+from conftest import DatabaseTestCase, make_file
+from services.storage import MemoryStorage
+
+
+class CountingStorage(MemoryStorage):
+    """put 호출 수를 세고, fail이면 put이 실패"""
+
+    def __init__(self):
+        super().__init__()
+        self.puts = 0
+        self.fail = False
+
+    async def put(self, key, file, content_type):
+        self.puts += 1
+        if self.fail:
+            raise ConnectionError("storage unavailable")
+        await super().put(key, file, content_type)
+
+
+class TestImageRegistry(DatabaseTestCase):
+    async def asyncSetUp(self):
+        from services.image_derivatives import ImageDerivativeService
+        from services.image_registry import ImageRegistry
+        from services.storage_outbox import StorageDeletionDrainer
+
+        await super().asyncSetUp()
+
+        self.storage = CountingStorage()
+        self.registry = ImageRegistry(self.session_factory)
+        self.service = ImageDerivativeService({"thumb": 64}, workers=0)
+        self.drainer = StorageDeletionDrainer(self.session_factory, self.storage)
+
+    async def upload(self, *contents):
+        from services.image_derivatives import upload_images_with_derivatives
+
+        urls, _ = await upload_images_with_derivatives(
+            [make_file(data) for data in contents], self.storage, self.service, self.registry
+        )
+        return urls
+
+    async def release(self, *urls):
+        async with self.session_factory() as db:
+            await self.registry.release(db, [SimpleNamespace(image_url=url, derivatives=None) for url in urls], self.storage)
+            await db.commit()
+
+    async def refcounts(self):
+        from models.models import ImageBlob
+
+        async with self.session_factory() as db:
+            result = await db.execute(select(ImageBlob.key, ImageBlob.refcount))
+            return dict(result.all())
+
+    async def test_reupload_of_known_content_skips_put(self):
+        first = await self.upload(b"same", b"same", b"other")
+        self.assertEqual(first[0], first[1])
+        self.assertEqual(self.storage.puts, 2)
+
+        again = await self.upload(b"same")
+        self.assertEqual(again, first[:1])
+        self.assertEqual(self.storage.puts, 2)
+        self.assertEqual((await self.refcounts())[self.storage.key_for(first[0])], 3)
+
+        stats = self.registry.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 3))
+        self.assertEqual(stats["bytes_saved"], len(b"same"))
+
+    async def test_object_is_deleted_with_last_reference(self):
+        url, _ = await self.upload(b"same", b"same")
+        key = self.storage.key_for(url)
+
+        await self.release(url)
+        self.assertEqual(await self.drainer.drain(), 0)
+        self.assertIn(key, self.storage.objects)
+
+        await self.release(url)
+        self.assertEqual(await self.refcounts(), {})
+        self.assertEqual(await self.drainer.drain(), 1)
+        self.assertNotIn(key, self.storage.objects)
+
+    async def test_unregistered_images_are_deleted_directly(self):
+        self.storage.objects["legacy.jpg"] = b"x"
+        self.storage.objects["legacy_thumb.jpg"] = b"x"
+
+        async with self.session_factory() as db:
+            await self.registry.release(db, [SimpleNamespace(
+                image_url="memory://media/legacy.jpg",
+                derivatives={"thumb": {"jpeg": "memory://media/legacy_thumb.jpg"}}
+            )], self.storage)
+            await db.commit()
+
+        self.assertEqual(await self.drainer.drain(), 2)
+        self.assertEqual(self.storage.objects, {})
+
+    async def test_reupload_cancels_pending_deletion(self):
+        [url] = await self.upload(b"same")
+        await self.release(url)
+
+        # 삭제 예약이 처리되기 전에 같은 내용이 다시 올라옴
+        self.assertEqual(await self.upload(b"same"), [url])
+        self.assertEqual(self.storage.puts, 2)
+        self.assertEqual(await self.drainer.drain(), 0)
+        self.assertIn(self.storage.key_for(url), self.storage.objects)
+
+    async def test_reupload_during_drain_waits_for_storage_delete(self):
+        from models.models import ImageBlob
+
+        [url] = await self.upload(b"same")
+        key = self.storage.key_for(url)
+        await self.release(url)
+        self.registry.deletion_poll_interval = 0.01
+        seen = {}
+        delete_many = self.storage.delete_many
+
+        async def racing_delete_many(keys):
+            # 삭제기가 행을 골라 커밋한 뒤 저장소에서 지우는 사이에 같은 내용이 다시 올라옴
+            reupload = asyncio.create_task(self.upload(b"same"))
+            await asyncio.sleep(0.1)
+            seen["waiting"] = not reupload.done()
+            seen["puts"] = self.storage.puts
+            result = await delete_many(keys)
+            seen["reupload"] = reupload
+            return result
+
+        self.storage.delete_many = racing_delete_many
+        self.assertEqual(await self.drainer.drain(), 1)
+
+        self.assertEqual(await seen["reupload"], [url])
+        # 삭제가 끝날 때까지 PUT하지 않고 기다린 뒤 다시 올림
+        self.assertTrue(seen["waiting"])
+        self.assertEqual((seen["puts"], self.storage.puts), (1, 2))
+        self.assertIn(key, self.storage.objects)
+        async with self.session_factory() as db:
+            blob = (await db.execute(select(ImageBlob))).scalar_one()
+        self.assertEqual((blob.refcount, blob.uploaded), (1, True))
+        self.assertEqual(self.registry.stats()["deletion_waits"], 1)
+        self.assertEqual(await self.drainer.drain(), 0)
+
+    async def test_failed_upload_releases_its_references(self):
+        [kept] = await self.upload(b"kept")
+        self.storage.fail = True
+
+        with self.assertRaises(HTTPException) as ctx:
+            await self.upload(b"kept", b"new")
+        self.assertEqual(ctx.exception.status_code, 502)
+
+        # 기존 참조는 그대로, 실패한 새 내용은 등록이 지워짐
+        self.assertEqual(await self.refcounts(), {self.storage.key_for(kept): 1})
+
+    async def create_recipe(self, main_url, cooking_urls):
+        from models.models import Recipe
+
+        # 대표 이미지는 파생본 URL만 저장됨 ("<해시>_medium.jpg")
+        stem = self.storage.key_for(main_url).rsplit(".", 1)[0]
+        async with self.session_factory() as db:
+            recipe = Recipe(
+                name="김치찌개",
+                image_large=self.storage.url_for(f"{stem}_medium.jpg"),
+                image_small=self.storage.url_for(f"{stem}_thumb.jpg"),
+                cooking_img=[*cooking_urls, "https://example.com/public/step.jpg"]
+            )
+            db.add(recipe)
+            await db.commit()
+            return recipe.id
+
+    async def test_recipe_delete_releases_its_images(self):
+        from crud.crud_recipe import recipe as crud_recipe
+
+        main, step, shared = await self.upload(b"main", b"step", b"shared")
+        await self.upload(b"shared")
+        recipe_id = await self.create_recipe(main, [step, shared])
+
+        async with self.session_factory() as db:
+            recipe = await crud_recipe.get(db, recipe_id)
+            await crud_recipe.remove_with_images(db, db_obj=recipe, backend=self.storage)
+
+        # 다른 곳에서 쓰는 내용만 남고, 외부 URL은 삭제 대상이 아님
+        self.assertEqual(await self.refcounts(), {self.storage.key_for(shared): 1})
+        self.assertEqual(await self.drainer.drain(), 2)
+        self.assertEqual(set(self.storage.objects), {self.storage.key_for(shared)})
+
+    async def test_recipe_update_releases_replaced_images(self):
+        from crud.crud_recipe import recipe as crud_recipe
+        from schemas.recipes import RecipeUpdate
+
+        main, first, second = await self.upload(b"main", b"first", b"second")
+        recipe_id = await self.create_recipe(main, [first, second])
+
+        async with self.session_factory() as db:
+            recipe = await crud_recipe.get(db, recipe_id)
+            # 업로드하지 않은 저장소 URL은 참조 수 없이 공유되므로 거부
+            with self.assertRaises(ValueError):
+                await crud_recipe.update_with_images(
+                    db, db_obj=recipe, obj_in=RecipeUpdate(cooking_img=[first, second, self.storage.url_for("other.jpg")]),
+                    backend=self.storage
+                )
+            await crud_recipe.update_with_images(
+                db, db_obj=recipe, obj_in=RecipeUpdate(image_large=None, image_small=None, cooking_img=[second]),
+                backend=self.storage
+            )
+
+        self.assertEqual(await self.refcounts(), {self.storage.key_for(second): 1})
+        self.assertEqual(await self.drainer.drain(), 2)
+
+        async with self.session_factory() as db:
+            recipe = await crud_recipe.get(db, recipe_id)
+            await crud_recipe.update_with_images(db, db_obj=recipe, obj_in=RecipeUpdate(name="된장찌개"), backend=self.storage)
+        self.assertEqual(await self.refcounts(), {self.storage.key_for(second): 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import os
+import unittest
+from utils.ingredient_line_parser import parse_ingredient_text, parse_quantity
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "ingredient_parse_corpus.json")
+
+
+def load_corpus() -> list:
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def same_amounts(parsed: dict, expected: dict) -> bool:
+    # LLM 응답의 반올림 차이(0.125 -> 0.12/0.13)는 같은 값으로 봄
+    return parsed.keys() == expected.keys() and all(abs(parsed[k] - expected[k]) <= 0.01 for k in expected)
+
+
+class TestParseQuantity(unittest.TestCase):
+    def test_fractions_and_decimals(self):
+        self.assertEqual(parse_quantity("3/4"), 0.75)
+        self.assertEqual(parse_quantity("1과1/2"), 1.5)
+        self.assertEqual(parse_quantity("1 1/2"), 1.5)
+        self.assertEqual(parse_quantity("1.5"), 1.5)
+        self.assertEqual(parse_quantity("½"), 0.5)
+        self.assertEqual(parse_quantity("1/3"), 0.33)
+        self.assertEqual(parse_quantity("1/8"), 0.13)
+        self.assertIsNone(parse_quantity("1/0"))
+        self.assertIsNone(parse_quantity("약간"))
+
+
+class TestParseIngredientText(unittest.TestCase):
+    def test_parenthesised_amount_wins(self):
+        parsed, unresolved = parse_ingredient_text("연두부 75g(3/4모), 칵테일새우 20g(5마리), 돼지고기(200g)")
+        self.assertEqual(parsed, {"연두부": 0.75, "칵테일새우": 5, "돼지고기": 200})
+        self.assertEqual(unresolved, [])
+
+    def test_nested_group_is_flattened(self):
+        parsed, _ = parse_ingredient_text("멸치육수(물 1.5컵, 멸치 3마리), 채소(양파 2개, 당근 1개)")
+        self.assertEqual(parsed, {"물": 1.5, "멸치": 3, "양파": 2, "당근": 1})
+
+    def test_headings_titles_and_vague_amounts_are_skipped(self):
+        text = "새우두부계란찜\n●양념 : 소금 약간, 간장 1작은술\n[고명] 두부(부침용) 1/2모\n고명"
+        parsed, unresolved = parse_ingredient_text(text)
+        self.assertEqual(parsed, {"간장": 1, "두부": 0.5})
+        self.assertEqual(unresolved, [])
+
+    def test_ambiguous_lines_are_escalated_whole(self):
+        text = "청경채 2~3포기, 굴소스 1큰술\n돼지고기(목살 200g)\n달걀 1개 + 노른자 1개\n양파 1개"
+        parsed, unresolved = parse_ingredient_text(text)
+        self.assertEqual(parsed, {"양파": 1})
+        self.assertEqual(unresolved, ["청경채 2~3포기, 굴소스 1큰술", "돼지고기(목살 200g)", "달걀 1개 + 노른자 1개"])
+
+
+class TestCorpusAgreement(unittest.TestCase):
+    """이전에 LLM으로 파싱해 둔 결과와 비교"""
+
+    def test_agreement_on_confidently_parsed_recipes(self):
+        corpus = load_corpus()
+        resolved, agreed, mismatches = 0, 0, []
+        for case in corpus:
+            parsed, unresolved = parse_ingredient_text(case["text"])
+            if unresolved:
+                continue
+            resolved += 1
+            if same_amounts(parsed, case["expected"]):
+                agreed += 1
+            else:
+                mismatches.append((case["text"], parsed, case["expected"]))
+
+        # 대부분은 LLM 없이 처리하고, 처리한 것은 모두 이전 결과와 같아야 함
+        self.assertGreaterEqual(resolved / len(corpus), 0.8)
+        self.assertEqual(mismatches, [])
+        self.assertEqual(agreed, resolved)
+
+    def test_escalated_lines_are_subset_of_input(self):
+        for case in load_corpus():
+            _, unresolved = parse_ingredient_text(case["text"])
+            lines = [line.strip() for line in case["text"].split("\n")]
+            for line in unresolved:
+                self.assertIn(line, lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import time
+import unittest
+from services.llm_gateway import (
+    FakeLLMBackend,
+    LLMError,
+    LLMGateway,
+    LLMJSONError,
+    MemoryResponseStore,
+    TokenBucket
+)
+from services.recipes import IngredientParser
+
+MESSAGES = [{"role": "user", "content": "양파 2개, 당근 1개"}]
+
+
+class TestLLMGateway(unittest.IsolatedAsyncioTestCase):
+    def make_gateway(self, backend: FakeLLMBackend, **kwargs) -> LLMGateway:
+        kwargs.setdefault("rate", 0)
+        kwargs.setdefault("store", MemoryResponseStore())
+        return LLMGateway(backend, **kwargs)
+
+    async def test_cached_response_is_reused(self):
+        backend = FakeLLMBackend(lambda messages: '{"양파": 2, "당근": 1}')
+        gateway = self.make_gateway(backend)
+
+        first = await gateway.complete_json(MESSAGES)
+        second = await gateway.complete_json(MESSAGES)
+        other = await gateway.complete_json(MESSAGES, temperature=0.5)
+
+        self.assertEqual(first, {"양파": 2, "당근": 1})
+        self.assertEqual(first, second)
+        self.assertEqual(other, first)
+        # 옵션이 다르면 다른 캐시 키
+        self.assertEqual(len(backend.calls), 2)
+        self.assertEqual(gateway.stats()["cache_hits"], 1)
+
+    async def test_concurrent_identical_requests_share_one_call(self):
+        backend = FakeLLMBackend(lambda messages: "응답", delay=0.05)
+        gateway = self.make_gateway(backend, store=None)
+
+        results = await asyncio.gather(*(gateway.complete(MESSAGES) for _ in range(5)))
+
+        self.assertEqual(results, ["응답"] * 5)
+        self.assertEqual(len(backend.calls), 1)
+        self.assertEqual(gateway.stats()["deduplicated"], 4)
+
+    async def test_invalid_json_is_repaired_once(self):
+        responses = iter(['```json\n{"양파": 2,}\n```', '{"양파": 2}'])
+        backend = FakeLLMBackend(lambda messages: next(responses))
+        gateway = self.make_gateway(backend)
+
+        self.assertEqual(await gateway.complete_json(MESSAGES), {"양파": 2})
+        self.assertEqual(len(backend.calls), 2)
+        # 복구 요청에는 잘못된 응답과 수정 요청이 포함됨
+        self.assertEqual(backend.calls[1][-2]["role"], "assistant")
+        self.assertEqual(gateway.stats()["repairs"], 1)
+
+        # 캐시에는 복구된 응답이 저장됨
+        self.assertEqual(await gateway.complete_json(MESSAGES), {"양파": 2})
+        self.assertEqual(len(backend.calls), 2)
+
+    async def test_unrepairable_json_raises_and_is_not_cached(self):
+        backend = FakeLLMBackend(lambda messages: "재료를 찾을 수 없습니다")
+        gateway = self.make_gateway(backend)
+
+        with self.assertRaises(LLMJSONError):
+            await gateway.complete_json(MESSAGES)
+        with self.assertRaises(LLMJSONError):
+            await gateway.complete_json(MESSAGES)
+        self.assertEqual(len(backend.calls), 4)
+
+    async def test_concurrency_limit_and_timeout(self):
+        backend = FakeLLMBackend(lambda messages: messages[0]["content"], delay=0.05)
+        gateway = self.make_gateway(backend, max_concurrency=2)
+
+        await asyncio.gather(*(gateway.complete([{"role": "user", "content": str(n)}]) for n in range(6)))
+        self.assertEqual(backend.max_in_flight, 2)
+
+        gateway.timeout = 0.01
+        with self.assertRaises(LLMError):
+            await gateway.complete([{"role": "user", "content": "느린 요청"}])
+        self.assertEqual(gateway.stats()["in_flight"], 0)
+
+    async def test_rate_limited_call_does_not_hold_a_slot(self):
+        backend = FakeLLMBackend(lambda messages: "응답")
+        gateway = self.make_gateway(backend, store=None, max_concurrency=1, rate=20, burst=1)
+        await gateway.bucket.acquire()
+
+        call = asyncio.create_task(gateway.complete(MESSAGES))
+        await asyncio.sleep(0.01)
+        # 토큰을 기다리는 중에는 자리가 비어 있음
+        self.assertFalse(gateway._slots.locked())
+        self.assertEqual(await call, "응답")
+        self.assertGreater(gateway.stats()["rate_limited_seconds"], 0)
+
+    async def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=50, capacity=2)
+        started = time.monotonic()
+        for _ in range(7):
+            await bucket.acquire()
+        # 처음 2개는 바로, 나머지 5개는 1/50초 간격
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    async def test_ingredient_parser_uses_gateway(self):
+        backend = FakeLLMBackend(lambda messages: json.dumps({"청경채": 2}))
+        parser = IngredientParser(self.make_gateway(backend))
+
+        result = await parser.parse_ingredients("연두부 75g(3/4모)\n청경채 2~3포기")
+
+        self.assertEqual(result, {"연두부": 0.75, "청경채": 2})
+        # 규칙으로 파싱하지 못한 줄만 LLM으로 보냄
+        self.assertEqual(len(backend.calls), 1)
+        self.assertTrue(backend.calls[0][1]["content"].rstrip().endswith("재료 목록:\n            청경채 2~3포기"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from utils.metrics import LatencyTracker, timed
+
+
+class TestLatencyTracker(unittest.TestCase):
+    def test_empty_tracker_reports_zeros(self):
+        self.assertEqual(LatencyTracker().snapshot(), {
+            "count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0
+        })
+
+    def test_percentiles_of_recorded_samples(self):
+        tracker = LatencyTracker()
+        for ms in range(1, 101):
+            tracker.record(ms / 1000)
+
+        snapshot = tracker.snapshot()
+        self.assertEqual((snapshot["count"], snapshot["avg_ms"], snapshot["max_ms"]), (100, 50.5, 100.0))
+        self.assertEqual((snapshot["p50_ms"], snapshot["p95_ms"], snapshot["p99_ms"]), (51.0, 95.0, 99.0))
+        self.assertNotIn("histogram", snapshot)
+
+    def test_percentiles_use_recent_window_but_totals_use_all(self):
+        tracker = LatencyTracker(window=3)
+        for seconds in (5.0, 0.001, 0.002, 0.003):
+            tracker.record(seconds)
+
+        # 창 밖으로 밀려난 5초는 백분위에서 빠지지만 count/max에는 남음
+        self.assertEqual(tracker.percentile(100), 0.003)
+        self.assertEqual((tracker.count, tracker.max), (4, 5.0))
+
+    def test_histogram_counts_every_sample_by_upper_bound(self):
+        tracker = LatencyTracker(window=2, buckets=(0.01, 0.001))
+        for seconds in (0.0005, 0.001, 0.005, 0.02):
+            tracker.record(seconds)
+
+        # 상한과 같은 값은 그 구간에, 마지막 상한보다 크면 +Inf
+        self.assertEqual(tracker.histogram(), {"le_1ms": 2, "le_10ms": 1, "+Inf": 1})
+        self.assertEqual(tracker.snapshot()["histogram"]["+Inf"], 1)
+
+    def test_timed_records_milliseconds_even_on_error(self):
+        timings = {}
+        with self.assertRaises(ValueError):
+            with timed(timings, "ocr"):
+                raise ValueError("boom")
+        self.assertGreaterEqual(timings["ocr"], 0.0)
+
+
+class TestMetricsAccess(unittest.TestCase):
+    def setUp(self):
+        from api.dependencies import get_current_active_user
+        from api.routes import metrics
+        from models.models import User
+
+        self.user = User(id=1, email="cook@test.com", is_active=True)
+        app = FastAPI()
+        app.include_router(metrics.router)
+        self.client = TestClient(app)
+        self.app = app
+        self.get_current_active_user = get_current_active_user
+
+    def login(self):
+        self.app.dependency_overrides[self.get_current_active_user] = lambda: self.user
+
+    def test_anonymous_request_is_unauthorized(self):
+        self.assertEqual(self.client.get("/metrics/ocr").status_code, 401)
+
+    def test_regular_user_is_forbidden(self):
+        self.login()
+        with patch("api.dependencies.settings.ADMIN_EMAILS", ["ops@test.com"]):
+            self.assertEqual(self.client.get("/metrics/ocr").status_code, 403)
+
+    def test_admin_can_read_metrics(self):
+        self.login()
+        with patch("api.dependencies.settings.ADMIN_EMAILS", ["cook@test.com"]):
+            response = self.client.get("/metrics/ocr")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("latency", response.json())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import io
+import socket
+import threading
+import time
+import unittest
+import httpx
+import uvicorn
+from fastapi import HTTPException, UploadFile
+from services.ocr_client import ClovaOCRProvider, OCRClient, detect_image_format
+from utils.ocr_stub_server import StubState, create_stub_app
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 300_000
+JPG = b"\xff\xd8\xff\xe0" + b"\x00" * 1000
+
+
+def upload(data: bytes, filename: str = "receipt") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+class TestDetectImageFormat(unittest.TestCase):
+    def test_signature_and_extension(self):
+        self.assertEqual(detect_image_format(io.BytesIO(PNG)), "png")
+        self.assertEqual(detect_image_format(io.BytesIO(JPG)), "jpg")
+        self.assertEqual(detect_image_format(io.BytesIO(b"%PDF-1.7")), "pdf")
+        self.assertEqual(detect_image_format(io.BytesIO(b"unknown"), "scan.TIF"), "tiff")
+        self.assertEqual(detect_image_format(io.BytesIO(b"unknown")), "jpg")
+
+
+class TestOCRClient(unittest.IsolatedAsyncioTestCase):
+    def make_client(self, state: StubState, **kwargs) -> OCRClient:
+        kwargs.setdefault("retry_backoff", 0.001)
+        client = OCRClient(
+            ClovaOCRProvider("http://ocr-stub/ocr", "secret"),
+            transport=httpx.ASGITransport(app=create_stub_app(state)),
+            **kwargs
+        )
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+    async def test_recognize_streams_file_and_detects_format(self):
+        state = StubState(lines=["양파 2,500", "우유 2,980"])
+        client = self.make_client(state)
+
+        text = await client.recognize(upload(PNG))
+
+        self.assertEqual(text, "양파 2,500\n우유 2,980\n")
+        self.assertEqual(state.formats, ["png"])
+        self.assertEqual(state.sizes, [len(PNG)])
+
+    async def test_retries_server_errors_with_backoff(self):
+        state = StubState(fail_first=2)
+        client = self.make_client(state, max_retries=2)
+
+        await client.recognize(upload(JPG))
+
+        self.assertEqual(state.requests, 3)
+        self.assertEqual(client.retries, 2)
+        # 재시도마다 파일 전체를 다시 전송
+        self.assertEqual(state.sizes, [len(JPG)] * 3)
+
+    async def test_gives_up_after_max_retries(self):
+        state = StubState(fail_first=10)
+        client = self.make_client(state, max_retries=1)
+
+        with self.assertRaises(HTTPException) as ctx:
+            await client.recognize(upload(JPG))
+
+        self.assertEqual(ctx.exception.status_code, 502)
+        self.assertEqual(state.requests, 2)
+        self.assertEqual(client.stats()["failures"], 1)
+
+    async def test_client_errors_are_not_retried(self):
+        state = StubState(fail_first=10, fail_status=400)
+        client = self.make_client(state, max_retries=3)
+
+        with self.assertRaises(HTTPException):
+            await client.recognize(upload(JPG))
+
+        self.assertEqual(state.requests, 1)
+
+    async def test_concurrency_limit(self):
+        state = StubState(delay=0.05)
+        client = self.make_client(state, max_concurrency=2)
+
+        await asyncio.gather(*(client.recognize(upload(JPG)) for _ in range(8)))
+
+        self.assertLessEqual(state.max_in_flight, 2)
+        stats = client.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["waiting"], 0)
+        self.assertEqual(stats["latency"]["count"], 8)
+
+
+class TestOCRClientOverNetwork(unittest.IsolatedAsyncioTestCase):
+    """실제 TCP 연결에서의 타임아웃과 연결 재사용 확인"""
+
+    def setUp(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.state = StubState()
+        config = uvicorn.Config(create_stub_app(self.state), host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        deadline = time.time() + 5
+        while not self.server.started and time.time() < deadline:
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+    def make_client(self, **kwargs) -> OCRClient:
+        client = OCRClient(ClovaOCRProvider(f"http://127.0.0.1:{self.port}/ocr", "secret"), **kwargs)
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+    async def test_timeout(self):
+        self.state.delay = 1.0
+        client = self.make_client(timeout=0.1, max_retries=0)
+
+        with self.assertRaises(HTTPException) as ctx:
+            await client.recognize(upload(JPG))
+
+        self.assertEqual(ctx.exception.status_code, 504)
+
+    async def test_keep_alive_connection_reused(self):
+        client = self.make_client()
+        for _ in range(4):
+            await client.recognize(upload(JPG))
+
+        self.assertEqual(self.state.requests, 4)
+        self.assertEqual(len(set(self.state.peers)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
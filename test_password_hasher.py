@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import unittest
+import bcrypt
+from fastapi import HTTPException
+from core.config import settings
+from core.security import pwd_context
+from services.password_hasher import PasswordHasher
+
+
+def low_cost_hash(password: str) -> str:
+    """예전 설정(work factor 4)으로 만든 해시"""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=4)).decode()
+
+
+class TestPasswordHasher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hasher = PasswordHasher(max_workers=1, max_pending=2, retry_after=3)
+
+    async def asyncTearDown(self):
+        self.hasher.shutdown()
+
+    async def test_rejects_with_503_once_max_pending_is_reached(self):
+        release = threading.Event()
+        # 실행 중 1개 + 스레드 풀에서 기다리는 1개
+        blocked = [asyncio.create_task(self.hasher._run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        self.assertEqual(self.hasher.stats()["in_flight"], 2)
+
+        with self.assertRaises(HTTPException) as raised:
+            await self.hasher.hash("secret")
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(raised.exception.headers, {"Retry-After": "3"})
+
+        release.set()
+        await asyncio.gather(*blocked)
+        stats = self.hasher.stats()
+        self.assertEqual((stats["in_flight"], stats["rejected"]), (0, 1))
+        # 자리가 나면 다시 받음
+        self.assertTrue(pwd_context.verify("secret", await self.hasher.hash("secret")))
+
+    async def test_old_work_factor_is_rehashed_on_successful_verify(self):
+        valid, new_hash = await self.hasher.verify_and_update("secret", low_cost_hash("secret"))
+
+        self.assertTrue(valid)
+        self.assertIsNotNone(new_hash)
+        self.assertTrue(new_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$"))
+        self.assertTrue(pwd_context.verify("secret", new_hash))
+
+    async def test_current_work_factor_is_not_rehashed(self):
+        stored = await self.hasher.hash("secret")
+        self.assertEqual(await self.hasher.verify_and_update("secret", stored), (True, None))
+
+    async def test_wrong_password_is_rejected_without_rehash(self):
+        self.assertEqual(await self.hasher.verify_and_update("wrong", low_cost_hash("secret")), (False, None))
+        self.assertEqual(self.hasher.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import os
+import unittest
+from datetime import datetime, timedelta
+from httpx import ASGITransport, AsyncClient
+from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+CHATS = 5
+MESSAGES_PER_CHAT = 50
+SALES = 10
+IMAGES_PER_SALE = 3
+GROUP_PURCHASES = 10
+RECIPES = 20
+RECEIPT_ITEMS = 40
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_text(self, message: str):
+        self.received.append(message)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class TestQueryBudget(unittest.IsolatedAsyncioTestCase):
+    """
+    엔드포인트별 SQL 문 수와 가져온 행 수 예산
+
+    예산을 넘으면 (N+1, 불필요한 eager load 등) 실행된 쿼리 목록과 함께 실패한다.
+    """
+
+    async def asyncSetUp(self):
+        import main
+        from api.dependencies import get_async_db, get_primary_read_db, get_read_db
+        from core.config import settings
+        from db.base import Base
+        from db.query_counter import QueryCounter
+        from api.routes.chat import chat_history_cache
+        from services.chat_unread import unread_counter
+        from services.identity_cache import identity_cache
+
+        self.engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+        self.session_factory = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.QueryCounter = QueryCounter
+
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        await self._seed()
+
+        async def override_get_async_db():
+            async with self.session_factory() as session:
+                yield session
+                await session.commit()
+
+        # 조회 전용 엔드포인트도 같은 엔진의 READ ONLY 트랜잭션으로 (커밋하지 않음)
+        read_session_factory = sessionmaker(
+            self.engine.execution_options(postgresql_readonly=True), class_=AsyncSession, expire_on_commit=False
+        )
+
+        async def override_get_read_db():
+            async with read_session_factory() as session:
+                yield session
+
+        self.app = main.app
+        self.app.dependency_overrides[get_async_db] = override_get_async_db
+        self.app.dependency_overrides[get_read_db] = override_get_read_db
+        self.app.dependency_overrides[get_primary_read_db] = override_get_read_db
+        self.client = AsyncClient(transport=ASGITransport(app=self.app), base_url="http://test")
+        token = jwt.encode(
+            {"sub": "buyer@test.com", "exp": datetime.utcnow() + timedelta(hours=1)},
+            settings.SECRET_KEY,
+            algorithm=settings.ALGORITHM
+        )
+        self.auth = {"Authorization": f"Bearer {token}"}
+
+        # 프로세스 전역 캐시가 다른 테스트 결과에 영향을 주지 않도록 초기화
+        for chat_id in self.chat_ids:
+            chat_history_cache.evict(chat_id)
+        unread_counter.forget(self.buyer_id)
+        identity_cache.invalidate_user(email="buyer@test.com")
+
+    async def asyncTearDown(self):
+        from api.dependencies import get_async_db, get_primary_read_db, get_read_db
+        from db.base import Base
+
+        await self.client.aclose()
+        for dependency in (get_async_db, get_read_db, get_primary_read_db):
+            self.app.dependency_overrides.pop(dependency, None)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await self.engine.dispose()
+
+    async def _seed(self):
+        from models.models import Chat, GroupPurchase, Image, Message, Recipe, Sale, User
+
+        async with self.session_factory() as session:
+            users = [
+                User(
+                    email=f"{name}@test.com",
+                    username=name,
+                    nickname=name,
+                    hashed_password="x",
+                    address_name="서울",
+                    zone_no="00000",
+                    location_lat=37.5,
+                    location_lon=127.0
+                )
+                for name in ("buyer", "seller")
+            ]
+            session.add_all(users)
+            await session.flush()
+            buyer, seller = users
+
+            sales = []
+            for i in range(SALES):
+                sale = Sale(
+                    seller_id=seller.id,
+                    value=1000,
+                    category="채소",
+                    location_lat=37.5,
+                    location_lon=127.0,
+                    title=f"상품 {i}",
+                    ingredient_name="양파",
+                    expiry_date=datetime.utcnow(),
+                    contents="내용",
+                    amount=1
+                )
+                session.add(sale)
+                sales.append(sale)
+            await session.flush()
+            for sale in sales:
+                session.add_all([
+                    Image(sale_id=sale.id, image_url=f"https://img/{sale.id}/{n}.jpg")
+                    for n in range(IMAGES_PER_SALE)
+                ])
+
+            chats = [Chat(buyer_id=buyer.id, seller_id=seller.id, item_id=sales[i].id) for i in range(CHATS)]
+            session.add_all(chats)
+            await session.flush()
+            started = datetime(2026, 1, 1)
+            for chat in chats:
+                session.add_all([
+                    Message(
+                        chat_id=chat.id,
+                        sender_id=seller.id,
+                        content=f"메시지 {n}",
+                        timestamp=started + timedelta(seconds=n)
+                    )
+                    for n in range(MESSAGES_PER_CHAT)
+                ])
+
+            for i in range(GROUP_PURCHASES):
+                group_purchase = GroupPurchase(
+                    title=f"공구 {i}",
+                    created_by=seller.id,
+                    price=1000,
+                    original_price=2000,
+                    saving_price=1000,
+                    category="채소",
+                    max_participants=5,
+                    end_date=datetime.utcnow() + timedelta(days=1)
+                )
+                session.add(group_purchase)
+                await session.flush()
+                session.add(Image(group_purchase_id=group_purchase.id, image_url=f"https://img/gp/{i}.jpg"))
+
+            session.add_all([
+                Recipe(name=f"레시피 {i}", category="한식", ingredients={"item": i}, instructions=[], cooking_img=[])
+                for i in range(RECIPES)
+            ])
+            await session.commit()
+
+            self.buyer_id, self.seller_id = buyer.id, seller.id
+            self.sale_ids = [sale.id for sale in sales]
+            self.chat_ids = [chat.id for chat in chats]
+
+    async def _assert_budget(self, method, url, max_statements, max_rows, **kwargs):
+        with self.subTest(f"{method} {url}"):
+            with self.QueryCounter(self.engine) as counter:
+                response = await self.client.request(method, url, **kwargs)
+            self.assertLess(response.status_code, 400, response.text)
+            detail = f"\n{method} {url}: {counter.count}개 SQL, {counter.rows}행\n{counter.report()}"
+            self.assertLessEqual(counter.count, max_statements, detail)
+            self.assertLessEqual(counter.rows, max_rows, detail)
+            return response
+
+    async def _wait_for(self, predicate, timeout=2.0):
+        for _ in range(int(timeout / 0.01)):
+            if predicate():
+                return
+            await asyncio.sleep(0.01)
+
+    async def test_chat_routes(self):
+        # 채팅방 목록은 메시지 수와 무관하게 채팅방 수만큼의 행만 가져와야 함
+        response = await self._assert_budget(
+            "GET", f"/api/v1/chat/chats/?user_id={self.buyer_id}", 1, CHATS
+        )
+        self.assertEqual(len(response.json()), CHATS)
+        # 메시지는 내역 API로만 제공
+        self.assertNotIn("messages", response.json()[0])
+
+        await self._assert_budget(
+            "POST", "/api/v1/chat/chats/", 1, 1,
+            json={"buyer_id": self.buyer_id, "seller_id": self.seller_id, "item_id": self.sale_ids[0]}
+        )
+
+        # 첫 인증 요청은 사용자 조회 1번 추가 (이후에는 인증 캐시)
+        response = await self._assert_budget(
+            "GET", "/api/v1/chat/inbox/", 2, CHATS + 1, headers=self.auth
+        )
+        self.assertEqual(response.json()[0]["unread_count"], MESSAGES_PER_CHAT)
+        # 두 번째 조회는 메모리 카운터를 사용해 메시지를 스캔하지 않음
+        await self._assert_budget(
+            "GET", "/api/v1/chat/inbox/", 1, CHATS, headers=self.auth
+        )
+
+        chat_id = self.chat_ids[0]
+        # 이 워커에 접속자가 없는 방은 버퍼 없이 매번 DB 조회
+        for _ in range(2):
+            await self._assert_budget(
+                "GET", f"/api/v1/chat/chats/{chat_id}/messages/?limit=20", 1, MESSAGES_PER_CHAT
+            )
+
+        from api.routes.chat import manager
+        socket = FakeWebSocket()
+        await manager.connect(chat_id, socket, "seller@test.com", self.seller_id)
+        try:
+            await self._assert_budget(
+                "GET", f"/api/v1/chat/chats/{chat_id}/messages/?limit=20", 1, MESSAGES_PER_CHAT
+            )
+            # 접속자가 있는 방의 최신 페이지는 버퍼에서 응답
+            await self._assert_budget(
+                "GET", f"/api/v1/chat/chats/{chat_id}/messages/?limit=20", 0, 0
+            )
+
+            # REST로 보낸 메시지도 접속자와 버퍼에 전달
+            response = await self.client.post(
+                "/api/v1/chat/messages/",
+                json={"chat_id": chat_id, "sender_id": self.buyer_id, "content": "REST 메시지"}
+            )
+            message_id = response.json()["id"]
+            response = await self._assert_budget(
+                "GET", f"/api/v1/chat/chats/{chat_id}/messages/?limit=20", 0, 0
+            )
+            self.assertEqual(response.json()[-1]["id"], message_id)
+            await self._wait_for(lambda: socket.received)
+            self.assertEqual(json.loads(socket.received[-1])["id"], message_id)
+        finally:
+            manager.disconnect(chat_id, socket)
+
+    async def test_sale_routes(self):
+        await self._assert_budget("GET", "/api/v1/sales", 2, SALES + SALES * IMAGES_PER_SALE)
+
+    async def test_group_purchase_routes(self):
+        # 인증(사용자 조회) 1 + 목록 1 + 이미지 selectin 1
+        response = await self._assert_budget(
+            "GET", "/api/v1/group-purchases/", 3, 1 + GROUP_PURCHASES * 2, headers=self.auth
+        )
+        group_purchase_id = response.json()[0]["id"]
+        # 사용자는 인증 캐시에서 가져오므로 조회 + 이미지만
+        await self._assert_budget(
+            "GET", f"/api/v1/group-purchases/{group_purchase_id}", 2, 2, headers=self.auth
+        )
+
+        response = await self.client.get("/api/v1/group-purchases/chatrooms/999999/messages/")
+        self.assertEqual(response.status_code, 404)
+
+    async def test_receipt_routes(self):
+        from services.receipt_service import ReceiptService
+
+        items = [{"name": f"품목 {n}", "quantity": 1} for n in range(RECEIPT_ITEMS)]
+        async with self.session_factory() as session:
+            with self.QueryCounter(self.engine) as counter:
+                items = await ReceiptService().save_temp_items(session, items, self.buyer_id)
+            await session.commit()
+        # 품목 수와 관계없이 INSERT ... RETURNING 한 번
+        self.assertEqual(counter.count, 1, counter.report())
+        temp_ids = [item["temp_id"] for item in items]
+        self.assertEqual(len(set(temp_ids)), RECEIPT_ITEMS)
+
+        payload = [
+            {"temp_id": temp_id, "category": "채소", "expiry_date": "2030-01-01T00:00:00Z"}
+            for temp_id in temp_ids
+        ]
+        response = await self._assert_budget(
+            "POST", "/api/v1/receipts/confirm-batch", 3, 1 + 2 * RECEIPT_ITEMS, json=payload, headers=self.auth
+        )
+        ingredients = response.json()["ingredients"]
+        self.assertEqual([ingredient["name"] for ingredient in ingredients], [item["name"] for item in items])
+
+        # 이미 옮긴 품목을 다시 확정하면 아무것도 저장하지 않고 404
+        response = await self.client.post("/api/v1/receipts/confirm-batch", json=payload[:2], headers=self.auth)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["detail"]["temp_ids"], sorted(temp_ids[:2]))
+
+    async def test_recipe_routes(self):
+        response = await self._assert_budget("GET", "/api/v1/recipes/", 2, 1 + RECIPES, headers=self.auth)
+        recipe_id = response.json()["한식"][0]["id"]
+        await self._assert_budget("GET", f"/api/v1/recipes/{recipe_id}", 1, 1, headers=self.auth)
+
+
+if __name__ == "__main__":
+    unittest.main()
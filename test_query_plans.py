@@ -0,0 +1,154 @@
+import os
+import unittest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# 이보다 행이 많은 테이블을 순차 스캔하면 실패
+LARGE_TABLE_ROWS = 1000
+
+# 운영 데이터 비율을 흉내 낸 시드 (판매 중 5%, 진행 중 요청 일부 등)
+SEED = """
+INSERT INTO users (email, username, nickname, hashed_password, address_name, zone_no, location_lat, location_lon)
+SELECT 'u' || g || '@test.com', 'u' || g, 'n' || g, 'x', '서울', '00000', 37.5, 127.0 FROM generate_series(1, 200) g;
+
+INSERT INTO recipes (name, category) SELECT '레시피 ' || g, '반찬' FROM generate_series(1, 5000) g;
+
+INSERT INTO ingredients (name, category, expiry_date, amount, user_id)
+SELECT '재료 ' || (g % 300), '채소', now() + interval '7 days', 1, g % 200 + 1 FROM generate_series(1, 40000) g;
+
+INSERT INTO q_values (user_id, recipe_id, value)
+SELECT g % 200 + 1, g % 5000 + 1, 0.5 FROM generate_series(1, 40000) g;
+
+INSERT INTO sales (ingredient_name, seller_id, value, category, location_lat, location_lon, title, status, expiry_date, contents, amount)
+SELECT '재료', g % 200 + 1, 1000, '채소', 37.5, 127.0, '판매 ' || g, CASE WHEN g % 20 = 0 THEN 'Available' ELSE 'Sold' END,
+       now() + interval '7 days', '내용', 1
+FROM generate_series(1, 20000) g;
+
+INSERT INTO ingredient_requests (user_id, ingredient_id, request_type, status)
+SELECT g % 200 + 1, g % 40000 + 1, 'Request', CASE WHEN g % 10 = 0 THEN '거래 중' ELSE 'Pending' END
+FROM generate_series(1, 20000) g;
+
+INSERT INTO transaction (buyer_id, sale_id, appointment_time, status)
+SELECT g % 200 + 1, g, now(), CASE WHEN g % 10 = 0 THEN 'Trading' ELSE 'Done' END FROM generate_series(1, 20000) g;
+
+INSERT INTO chats (buyer_id, seller_id, item_id) SELECT g % 200 + 1, (g + 1) % 200 + 1, g FROM generate_series(1, 500) g;
+
+INSERT INTO messages (chat_id, sender_id, content, timestamp)
+SELECT g % 500 + 1, g % 200 + 1, '메시지', now() - g * interval '1 second' FROM generate_series(1, 50000) g;
+
+INSERT INTO group_purchases (title, created_by, price, original_price, saving_price, category, max_participants, end_date, status)
+SELECT '공동구매 ' || g, g % 200 + 1, 1000, 2000, 1000, '채소', 5, now() + interval '7 days', 'open' FROM generate_series(1, 100) g;
+
+INSERT INTO group_chatrooms (group_purchase_id) SELECT g FROM generate_series(1, 100) g;
+
+INSERT INTO group_chat_messages (chatroom_id, sender_id, content, timestamp)
+SELECT g % 100 + 1, g % 200 + 1, '메시지', now() - g * interval '1 second' FROM generate_series(1, 50000) g;
+"""
+
+
+class TestPrecompiledStatements(unittest.TestCase):
+    """lambda_stmt로 만든 조회는 인자가 달라도 같은 컴파일 결과를 재사용"""
+
+    def setUp(self):
+        from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+
+        # 컴파일 캐시 키에 dialect가 들어가므로 엔진처럼 하나를 계속 씀
+        self.dialect = PGDialect_asyncpg()
+
+    def compile(self, stmt, cache):
+        compiled, params, cache_hit = stmt._compile_w_cache(
+            self.dialect, compiled_cache=cache, column_keys=[], for_executemany=False, schema_translate_map=None
+        )
+        return compiled, [param.value for param in params], cache_hit
+
+    def test_bind_values_change_without_recompiling(self):
+        from sqlalchemy.engine.interfaces import CacheStats
+        from sqlalchemy.util import LRUCache
+        from db.hot_queries import profile_by_user
+
+        cache = LRUCache(10)
+        first, first_params, first_hit = self.compile(profile_by_user(1), cache)
+        second, second_params, second_hit = self.compile(profile_by_user(2), cache)
+        self.assertEqual((first_hit, second_hit), (CacheStats.CACHE_MISS, CacheStats.CACHE_HIT))
+        self.assertIs(first, second)
+        self.assertEqual((first_params, second_params), ([1], [2]))
+
+    def test_criteria_can_be_appended(self):
+        from db.hot_queries import ingredients_by_user, literal_sql
+        from models.models import Ingredient
+
+        category = "채소"
+        stmt = ingredients_by_user(3)
+        stmt += lambda s: s.where(Ingredient.category == category)
+        sql = literal_sql(stmt)
+        self.assertIn("ingredients.user_id = 3 AND ingredients.category = '채소'", sql)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL이 설정되지 않음")
+class TestHotQueryPlans(unittest.IsolatedAsyncioTestCase):
+    """
+    db/hot_queries.py에 등록된 조회가 큰 테이블을 순차 스캔하지 않는지 확인
+
+    인덱스가 빠지거나 조회 조건이 인덱스를 못 타게 바뀌면 실행 계획과 함께 실패한다.
+    """
+
+    async def asyncSetUp(self):
+        from db.base import Base
+        import db.hot_queries  # noqa: F401  (모델 등록)
+
+        self.engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            for statement in SEED.split(";"):
+                if statement.strip():
+                    await conn.execute(text(statement))
+            await conn.execute(text("ANALYZE"))
+            result = await conn.execute(text(
+                "SELECT relname FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace "
+                "AND reltuples >= :rows"
+            ), {"rows": LARGE_TABLE_ROWS})
+            self.large_tables = {row.relname for row in result}
+
+    async def asyncTearDown(self):
+        from db.base import Base
+
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await self.engine.dispose()
+
+    async def plan_problems(self, conn):
+        """{조회 이름: 순차 스캔한 큰 테이블}"""
+        from db.hot_queries import HOT_QUERIES, explain, sequential_scans
+
+        problems = {}
+        for query in HOT_QUERIES.values():
+            plan = await explain(conn, query.build(**query.sample))
+            scanned = sorted(set(sequential_scans(plan)) & self.large_tables)
+            if scanned:
+                problems[query.name] = (scanned, plan)
+        return problems
+
+    async def test_hot_queries_use_indexes(self):
+        self.assertIn("ingredients", self.large_tables)
+        async with self.engine.connect() as conn:
+            problems = await self.plan_problems(conn)
+        self.assertEqual(
+            {name: scanned for name, (scanned, _) in problems.items()}, {},
+            "\n".join(f"{name}: {plan}" for name, (_, plan) in problems.items())
+        )
+
+    async def test_missing_index_is_reported(self):
+        async with self.engine.connect() as conn:
+            await conn.execute(text("DROP INDEX ix_sales_status"))
+            problems = await self.plan_problems(conn)
+            await conn.rollback()
+        self.assertEqual(list(problems), ["available_sales"])
+        self.assertEqual(problems["available_sales"][0], ["sales"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from jose import jwt
+from core.config import settings
+from db.read_routing import PRIMARY_UNTIL_COOKIE, PRIMARY_UNTIL_HEADER, ReadRouting, ReadYourWritesMiddleware
+
+
+def make_app(routing: ReadRouting) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, routing=routing)
+
+    @app.post("/items")
+    async def create_item():
+        return {"ok": True}
+
+    @app.post("/fail")
+    async def fail():
+        raise HTTPException(status_code=400, detail="bad")
+
+    @app.get("/items")
+    async def list_items(request: Request):
+        return {"primary": routing.prefers_primary(request)}
+
+    return app
+
+
+def bearer(email: str) -> dict:
+    token = jwt.encode(
+        {"sub": email, "exp": datetime.utcnow() + timedelta(hours=1)},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestReadYourWrites(unittest.TestCase):
+    def setUp(self):
+        self.routing = ReadRouting(window=5.0)
+        self.client = TestClient(make_app(self.routing))
+
+    def test_successful_write_pins_next_reads_to_primary(self):
+        self.assertFalse(self.client.get("/items").json()["primary"])
+
+        response = self.client.post("/items")
+        self.assertIn(PRIMARY_UNTIL_COOKIE, response.cookies)
+        self.assertTrue(self.client.get("/items").json()["primary"])
+
+    def test_bearer_client_without_cookies_is_pinned_by_user(self):
+        # 쿠키를 저장하지 않는 클라이언트 (모바일/서버 간 호출)
+        auth = bearer("writer@test.com")
+        self.client.post("/items", headers=auth)
+        self.client.cookies.clear()
+
+        self.assertTrue(self.client.get("/items", headers=auth).json()["primary"])
+        # 다른 사용자는 영향을 받지 않음
+        self.assertFalse(self.client.get("/items", headers=bearer("reader@test.com")).json()["primary"])
+
+    def test_echoed_header_pins_on_other_workers(self):
+        until = self.client.post("/items").headers[PRIMARY_UNTIL_HEADER]
+
+        # 메모리에 기록이 없는 다른 워커라도 돌려보낸 헤더로 기본 DB 선택
+        other_worker = TestClient(make_app(ReadRouting(window=5.0)))
+        self.assertTrue(other_worker.get("/items", headers={PRIMARY_UNTIL_HEADER: until}).json()["primary"])
+        self.assertFalse(other_worker.get("/items").json()["primary"])
+
+    def test_reads_and_failed_writes_do_not_pin(self):
+        auth = bearer("writer@test.com")
+        response = self.client.get("/items", headers=auth)
+        self.assertNotIn(PRIMARY_UNTIL_COOKIE, response.cookies)
+        response = self.client.post("/fail", headers=auth)
+        self.assertNotIn(PRIMARY_UNTIL_COOKIE, response.cookies)
+        self.assertNotIn(PRIMARY_UNTIL_HEADER, response.headers)
+        self.assertFalse(self.client.get("/items", headers=auth).json()["primary"])
+
+    def test_expired_or_invalid_pins_read_from_replica(self):
+        self.client.cookies.set(PRIMARY_UNTIL_COOKIE, str(time.time() - 1))
+        self.assertFalse(self.client.get("/items").json()["primary"])
+        self.client.cookies.set(PRIMARY_UNTIL_COOKIE, "garbage")
+        self.assertFalse(self.client.get("/items", headers={PRIMARY_UNTIL_HEADER: "garbage"}).json()["primary"])
+
+        self.routing.pin("writer@test.com", time.time() - 1)
+        self.assertFalse(self.client.get("/items", headers=bearer("writer@test.com")).json()["primary"])
+        self.assertEqual(self.routing.stats()["pinned_users"], 0)
+
+    def test_pins_are_bounded(self):
+        routing = ReadRouting(window=5.0, max_pins=2)
+        now = time.time()
+        routing.pin("a", now - 1)
+        routing.pin("b", now + 10)
+        routing.pin("c", now + 20)
+        routing.pin("d", now + 30)
+        self.assertEqual(set(routing._pins), {"c", "d"})
+
+    def test_stats(self):
+        self.routing.record(replica=True, pinned=False)
+        self.routing.record(replica=False, pinned=True)
+        stats = self.routing.stats()
+        self.assertEqual((stats["replica_reads"], stats["primary_reads"], stats["pinned_reads"]), (1, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
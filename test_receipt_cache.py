@@ -0,0 +1,149 @@
+import io
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import select, update
+from conftest import DatabaseTestCase
+from services.receipt_cache import Image, hamming_distance, perceptual_hash
+
+
+def receipt_image(lines, fmt="PNG", quality=95) -> bytes:
+    """가로줄 무늬로 만든 영수증 비슷한 이미지"""
+    from PIL import ImageDraw
+
+    img = Image.new("L", (180, 320), color=255)
+    draw = ImageDraw.Draw(img)
+    for index, width in enumerate(lines):
+        draw.rectangle([10, 10 + index * 30, 10 + width, 24 + index * 30], fill=0)
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt, quality=quality)
+    return buffer.getvalue()
+
+
+class TestPerceptualHash(unittest.TestCase):
+    def test_hamming_distance(self):
+        self.assertEqual(hamming_distance(0b1011, 0b0001), 2)
+        # 부호 있는 64비트로 저장된 값도 64비트로 비교
+        self.assertEqual(hamming_distance(-1, 0), 64)
+
+    def test_invalid_image_has_no_hash(self):
+        self.assertIsNone(perceptual_hash(b"not an image"))
+
+    @unittest.skipIf(Image is None, "Pillow가 설치되지 않음")
+    def test_reencoded_photo_is_close_and_other_receipt_is_far(self):
+        original = perceptual_hash(receipt_image([160, 40, 120, 80, 150, 30, 100, 60, 140, 20]))
+        reencoded = perceptual_hash(receipt_image([160, 40, 120, 80, 150, 30, 100, 60, 140, 20], "JPEG", 40))
+        other = perceptual_hash(receipt_image([20, 150, 30, 160, 40, 120, 10, 140, 50, 130]))
+
+        self.assertTrue(-(1 << 63) <= original < (1 << 63))
+        self.assertLessEqual(hamming_distance(original, reencoded), 6)
+        self.assertGreater(hamming_distance(original, other), 6)
+
+
+class TestReceiptAnalysisCache(DatabaseTestCase):
+    async def asyncSetUp(self):
+        from models.models import User
+        from services.receipt_cache import ReceiptAnalysisCacheService
+
+        await super().asyncSetUp()
+
+        async with self.session_factory() as db:
+            for i in (1, 2):
+                db.add(User(
+                    email=f"u{i}@test.com", username=f"u{i}", nickname=f"n{i}", hashed_password="x",
+                    address_name="서울", zone_no="00000", location_lat=37.5, location_lon=127.0
+                ))
+            await db.commit()
+        self.cache = ReceiptAnalysisCacheService(self.session_factory, max_distance=6)
+
+    async def age(self, sha256, **values):
+        from models.models import ReceiptAnalysisCache
+
+        async with self.session_factory() as db:
+            await db.execute(
+                update(ReceiptAnalysisCache).where(ReceiptAnalysisCache.content_hash == sha256).values(**values)
+            )
+            await db.commit()
+
+    async def stored(self):
+        from models.models import ReceiptAnalysisCache
+
+        async with self.session_factory() as db:
+            result = await db.execute(select(ReceiptAnalysisCache.content_hash, ReceiptAnalysisCache.items))
+            return dict(result.all())
+
+    async def test_exact_hash_hit_for_any_user(self):
+        await self.cache.store(1, "a" * 64, None, "우유 2500", [{"name": "우유"}])
+
+        cached = await self.cache.lookup(2, "a" * 64, None)
+        self.assertEqual(cached, {"ocr_text": "우유 2500", "items": [{"name": "우유"}]})
+        # 돌려준 값을 고쳐도 캐시에는 영향 없음
+        cached["items"][0]["temp_id"] = 1
+        self.assertEqual((await self.cache.lookup(1, "a" * 64, None))["items"], [{"name": "우유"}])
+        self.assertEqual((self.cache.exact_hits, self.cache.ocr_calls_avoided), (2, 2))
+
+    async def test_similar_photo_matches_only_same_user(self):
+        await self.cache.store(1, "a" * 64, 0b1111_0000, "우유 2500", [{"name": "우유"}])
+
+        # 다시 찍은 사진 (해밍 거리 2)
+        self.assertIsNone(await self.cache.lookup(2, "b" * 64, 0b1111_0011))
+        self.assertEqual((await self.cache.lookup(1, "b" * 64, 0b1111_0011))["ocr_text"], "우유 2500")
+        # 거리가 max_distance를 넘으면 다른 영수증
+        self.assertIsNone(await self.cache.lookup(1, "c" * 64, 0b1111_0000 ^ 0b1111111))
+        self.assertEqual(self.cache.perceptual_hits, 1)
+
+    async def test_expired_entries_are_not_served(self):
+        await self.cache.store(1, "a" * 64, 0b1, "우유 2500", [{"name": "우유"}])
+        await self.age("a" * 64, created_at=datetime.utcnow() - self.cache.ttl - timedelta(minutes=1))
+
+        self.assertIsNone(await self.cache.lookup(1, "a" * 64, 0b1))
+
+    async def test_least_recently_used_entries_are_evicted(self):
+        self.cache.max_entries = 2
+        self.cache.evict_every = 1
+        now = datetime.utcnow()
+        for n, sha256 in enumerate(("a" * 64, "b" * 64)):
+            await self.cache.store(1, sha256, None, f"text {n}", None)
+        await self.age("a" * 64, last_used_at=now - timedelta(hours=1))
+        await self.age("b" * 64, last_used_at=now - timedelta(hours=2))
+
+        await self.cache.store(1, "c" * 64, None, "text 2", None)
+        self.assertEqual(set(await self.stored()), {"a" * 64, "c" * 64})
+        self.assertEqual(self.cache.evicted, 1)
+
+    async def test_ocr_text_is_kept_when_extraction_raises(self):
+        from services.receipt_service import ReceiptService
+
+        service = ReceiptService()
+        calls = {"ocr": 0, "extract": 0}
+
+        async def fake_ocr(file):
+            calls["ocr"] += 1
+            return "우유 2500"
+
+        async def failing_extract(text):
+            calls["extract"] += 1
+            raise ConnectionError("llm unavailable")
+
+        async def working_extract(text):
+            calls["extract"] += 1
+            return [{"name": "우유"}]
+
+        with patch("services.receipt_service.receipt_analysis_cache", self.cache), \
+                patch.object(service, "_process_ocr", fake_ocr):
+            with patch.object(service, "_extract_data_with_gpt", failing_extract):
+                with self.assertRaises(ConnectionError):
+                    await service.extract_items(b"receipt", "r.jpg", {}, user_id=1)
+            self.assertEqual(list((await self.stored()).values()), [None])
+
+            # 작업 재시도: OCR은 캐시에서, 추출만 다시
+            with patch.object(service, "_extract_data_with_gpt", working_extract):
+                items = await service.extract_items(b"receipt", "r.jpg", {}, user_id=1)
+
+        self.assertEqual(items, [{"name": "우유"}])
+        self.assertEqual(calls, {"ocr": 1, "extract": 2})
+        self.assertEqual(list((await self.stored()).values()), [[{"name": "우유"}]])
+
+
+if __name__ == "__main__":
+    unittest.main()
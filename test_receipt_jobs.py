@@ -0,0 +1,141 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from conftest import DatabaseTestCase, make_file
+
+
+class FakeProcessor:
+    """OCR/추출 대신 정해진 품목을 돌려주고, fail이면 추출이 실패"""
+
+    def __init__(self):
+        self.fail = False
+        self.calls = 0
+
+    async def extract_items(self, image, filename, timings, user_id):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("ocr unavailable")
+        timings["ocr"] = 1.0
+        return [{"name": image.decode(), "user_id": user_id}]
+
+    async def save_temp_items(self, db, items, user_id):
+        return [{**item, "temp_id": index} for index, item in enumerate(items, 1)]
+
+
+class TestReceiptJobQueue(DatabaseTestCase):
+    async def asyncSetUp(self):
+        from models.models import User
+        from services.receipt_jobs import ReceiptJobQueue
+
+        await super().asyncSetUp()
+
+        async with self.session_factory() as db:
+            db.add(User(
+                email="u@test.com", username="u", nickname="n", hashed_password="x",
+                address_name="서울", zone_no="00000", location_lat=37.5, location_lon=127.0
+            ))
+            await db.commit()
+        self.processor = FakeProcessor()
+        self.queue = ReceiptJobQueue(
+            self.processor, self.session_factory, workers=0, visibility_timeout=60, max_attempts=2
+        )
+
+    async def enqueue(self, *contents):
+        ids = []
+        async with self.session_factory() as db:
+            for data in contents:
+                job = await self.queue.enqueue(db, 1, make_file(data, "receipt.jpg"))
+                ids.append(job.id)
+        return ids
+
+    async def job(self, job_id):
+        from models.models import ReceiptJob
+
+        async with self.session_factory() as db:
+            return (await db.execute(select(ReceiptJob).where(ReceiptJob.id == job_id))).scalar_one()
+
+    async def expire(self, job_id):
+        """처리 중에 워커가 죽은 것처럼 시작 시각을 visibility_timeout 이전으로"""
+        from models.models import ReceiptJob
+
+        async with self.session_factory() as db:
+            await db.execute(
+                update(ReceiptJob)
+                .where(ReceiptJob.id == job_id)
+                .values(started_at=datetime.utcnow() - timedelta(seconds=120))
+            )
+            await db.commit()
+
+    async def test_claim_takes_pending_jobs_in_order(self):
+        first, second = await self.enqueue(b"a", b"b")
+
+        job = await self.queue.claim()
+        self.assertEqual((job["id"], job["attempts"], job["image"]), (first, 1, b"a"))
+        self.assertEqual((await self.job(first)).status, "processing")
+        self.assertEqual((await self.queue.claim())["id"], second)
+        self.assertIsNone(await self.queue.claim())
+
+    async def test_concurrent_claims_do_not_share_jobs(self):
+        ids = await self.enqueue(b"a", b"b", b"c")
+
+        claimed = await asyncio.gather(*(self.queue.claim() for _ in range(5)))
+        self.assertEqual(sorted(job["id"] for job in claimed if job), ids)
+
+    async def test_processed_job_is_done_and_drops_image(self):
+        [job_id] = await self.enqueue(b"milk")
+
+        await self.queue.process(await self.queue.claim())
+
+        job = await self.job(job_id)
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.result, [{"name": "milk", "user_id": 1, "temp_id": 1}])
+        self.assertIsNone(job.image)
+        self.assertIn("total", job.stage_timings)
+        self.assertEqual(self.queue.completed, 1)
+
+    async def test_failed_job_is_retried_until_max_attempts(self):
+        [job_id] = await self.enqueue(b"milk")
+        self.processor.fail = True
+
+        await self.queue.process(await self.queue.claim())
+        job = await self.job(job_id)
+        self.assertEqual((job.status, job.attempts, job.error), ("pending", 1, "ocr unavailable"))
+        self.assertEqual(job.image, b"milk")
+
+        await self.queue.process(await self.queue.claim())
+        job = await self.job(job_id)
+        self.assertEqual((job.status, job.attempts), ("failed", 2))
+        self.assertIsNone(job.image)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(await self.queue.claim())
+        self.assertEqual((self.queue.retried, self.queue.failed), (1, 1))
+
+    async def test_stale_processing_job_is_reclaimed_after_visibility_timeout(self):
+        [job_id] = await self.enqueue(b"milk")
+        await self.queue.claim()
+
+        # 아직 처리 중인 작업은 다른 워커가 가져가지 않음
+        self.assertIsNone(await self.queue.claim())
+
+        await self.expire(job_id)
+        job = await self.queue.claim()
+        self.assertEqual((job["id"], job["attempts"]), (job_id, 2))
+
+    async def test_stale_job_at_max_attempts_is_failed_not_reclaimed(self):
+        [job_id] = await self.enqueue(b"milk")
+        await self.queue.claim()
+        await self.expire(job_id)
+        await self.queue.claim()
+        await self.expire(job_id)
+
+        self.assertIsNone(await self.queue.claim())
+        job = await self.job(job_id)
+        self.assertEqual((job.status, job.attempts, job.error), ("failed", 2, "처리 시간 초과"))
+        self.assertIsNone(job.image)
+        self.assertEqual(self.processor.calls, 0)
+        self.assertEqual(self.queue.failed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
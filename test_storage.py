@@ -0,0 +1,131 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from fastapi import FastAPI, HTTPException
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+from conftest import make_file
+from services.storage import LocalStorage, MemoryStorage, S3Storage, delete_images, upload_images
+
+
+class FailingStorage(MemoryStorage):
+    """내용이 fail로 시작하는 파일만 저장에 실패"""
+
+    async def put(self, key, file, content_type):
+        if file.read(4) == b"fail":
+            raise RuntimeError("stub failure")
+        file.seek(0)
+        await super().put(key, file, content_type)
+
+
+class TestStorage(unittest.IsolatedAsyncioTestCase):
+    async def test_memory_upload_and_delete(self):
+        storage = MemoryStorage()
+        urls = await upload_images([make_file(b"a"), make_file(b"b", "second.PNG")], storage)
+
+        self.assertEqual(len(urls), 2)
+        self.assertTrue(urls[1].endswith(".png"))
+        self.assertEqual(sorted(storage.objects.values()), [b"a", b"b"])
+        self.assertEqual(storage.content_types[storage.key_for(urls[0])], "image/jpeg")
+
+        self.assertTrue(await delete_images(urls, storage))
+        self.assertEqual(storage.objects, {})
+
+    async def test_no_files_returns_none(self):
+        self.assertIsNone(await upload_images([], MemoryStorage()))
+
+    async def test_partial_failure_removes_uploaded_files(self):
+        storage = FailingStorage()
+        with self.assertRaises(HTTPException) as ctx:
+            await upload_images([make_file(b"ok"), make_file(b"fail", "broken.jpg")], storage)
+
+        self.assertEqual(ctx.exception.status_code, 502)
+        self.assertEqual(ctx.exception.detail["files"], [{"filename": "broken.jpg", "error": "stub failure"}])
+        self.assertEqual(storage.objects, {})
+
+    async def test_local_storage_is_served_by_static_mount(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(os.path.join(root, "media"), "/media")
+            urls = await upload_images([make_file(b"image-bytes")], storage)
+            self.assertTrue(urls[0].startswith("/media/"))
+
+            app = FastAPI()
+            app.mount(storage.mount_path, StaticFiles(directory=storage.root, check_dir=False), name="media")
+            client = TestClient(app)
+            self.assertEqual(client.get(urls[0]).content, b"image-bytes")
+
+            await delete_images(urls, storage)
+            self.assertEqual(client.get(urls[0]).status_code, 404)
+
+    def test_s3_storage_does_not_create_client_until_used(self):
+        storage = S3Storage(None, region="ap-northeast-2")
+        self.assertIsNone(storage._client)
+        self.assertEqual(storage.key_for("https://b.s3.ap-northeast-2.amazonaws.com/abc.jpg"), "abc.jpg")
+        with self.assertRaises(RuntimeError):
+            storage.client
+
+
+class TestS3Storage(unittest.IsolatedAsyncioTestCase):
+    """utils.s3_stub_server를 상대로 S3 요청 수 확인"""
+
+    @classmethod
+    def setUpClass(cls):
+        import uvicorn
+        from utils.s3_stub_server import StubState, create_stub_app
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            cls.port = sock.getsockname()[1]
+        cls.state = StubState()
+        cls.server = uvicorn.Server(uvicorn.Config(
+            create_stub_app(cls.state), host="127.0.0.1", port=cls.port, log_level="warning"
+        ))
+        cls.thread = threading.Thread(target=cls.server.run, daemon=True)
+        cls.thread.start()
+        deadline = time.time() + 5
+        while not cls.server.started and time.time() < deadline:
+            time.sleep(0.01)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.should_exit = True
+        cls.thread.join(timeout=5)
+
+    def make_storage(self) -> S3Storage:
+        return S3Storage(
+            "test-bucket",
+            region="us-east-1",
+            access_key_id="test",
+            secret_access_key="test",
+            endpoint_url=f"http://127.0.0.1:{self.port}"
+        )
+
+    async def test_delete_many_batches_delete_objects(self):
+        storage = self.make_storage()
+        keys = [f"{n}.jpg" for n in range(2500)]
+        for key in keys:
+            self.state.objects[f"test-bucket/{key}"] = b"x"
+        before = len(self.state.requests)
+
+        self.assertEqual(await storage.delete_many(keys), [])
+
+        requests = self.state.requests[before:]
+        # 키마다 DELETE를 보내지 않고 DeleteObjects(POST ?delete) 1000개씩 3번
+        self.assertEqual(len(requests), 3)
+        self.assertTrue(all(request.startswith("POST /test-bucket?delete") for request in requests))
+        self.assertFalse(any(key.startswith("test-bucket/") for key in self.state.objects))
+
+    async def test_upload_and_delete_roundtrip(self):
+        storage = self.make_storage()
+        urls = await upload_images([make_file(b"s3-bytes")], storage)
+        key = storage.key_for(urls[0])
+        self.assertEqual(self.state.objects[f"test-bucket/{key}"], b"s3-bytes")
+        self.assertTrue(await delete_images(urls, storage))
+        self.assertNotIn(f"test-bucket/{key}", self.state.objects)
+
+
+if __name__ == "__main__":
+    unittest.main()
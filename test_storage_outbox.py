@@ -0,0 +1,149 @@
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from conftest import DatabaseTestCase
+from services.storage import MemoryStorage
+
+
+class FlakyStorage(MemoryStorage):
+    """fail_keys에 있는 키는 삭제 실패로 돌려주고, down이면 요청 자체가 실패"""
+
+    def __init__(self):
+        super().__init__()
+        self.fail_keys = set()
+        self.down = False
+        self.calls = []
+
+    async def delete_many(self, keys):
+        self.calls.append(list(keys))
+        if self.down:
+            raise ConnectionError("storage unavailable")
+        await super().delete_many([key for key in keys if key not in self.fail_keys])
+        return [key for key in keys if key in self.fail_keys]
+
+
+class TestStorageDeletionOutbox(DatabaseTestCase):
+    async def asyncSetUp(self):
+        from services.storage_outbox import StorageDeletionDrainer
+
+        await super().asyncSetUp()
+
+        self.storage = FlakyStorage()
+        for n in range(5):
+            self.storage.objects[f"{n}.jpg"] = b"x"
+        self.drainer = StorageDeletionDrainer(
+            self.session_factory, self.storage, batch_size=2, max_attempts=2, retry_backoff=60
+        )
+
+    async def enqueue(self, urls, commit=True):
+        from services.storage_outbox import enqueue_deletions
+
+        async with self.session_factory() as db:
+            enqueue_deletions(db, urls, self.storage)
+            if commit:
+                await db.commit()
+            else:
+                await db.rollback()
+
+    async def rows(self):
+        from models.models import StorageDeletion
+
+        async with self.session_factory() as db:
+            return (await db.execute(select(StorageDeletion).order_by(StorageDeletion.id))).scalars().all()
+
+    async def test_rolled_back_transaction_deletes_nothing(self):
+        await self.enqueue(["memory://media/0.jpg"], commit=False)
+        self.assertEqual(await self.drainer.drain(), 0)
+        self.assertIn("0.jpg", self.storage.objects)
+
+    async def test_drains_in_batches(self):
+        await self.enqueue([f"memory://media/{n}.jpg" for n in range(5)])
+
+        self.assertEqual(await self.drainer.drain(), 5)
+        self.assertEqual(self.storage.objects, {})
+        self.assertEqual([len(call) for call in self.storage.calls], [2, 2, 1])
+        self.assertEqual(await self.rows(), [])
+
+    async def test_failed_keys_are_retried_with_backoff_then_given_up(self):
+        from models.models import StorageDeletion
+
+        self.storage.fail_keys = {"1.jpg"}
+        await self.enqueue(["memory://media/0.jpg", "memory://media/1.jpg"])
+
+        self.assertEqual(await self.drainer.drain(), 1)
+        [row] = await self.rows()
+        self.assertEqual((row.key, row.attempts), ("1.jpg", 1))
+        self.assertGreater(row.next_attempt_at, datetime.utcnow() + timedelta(seconds=30))
+
+        # 재시도 시각 전에는 고르지 않음
+        self.assertEqual(await self.drainer.drain(), 0)
+        self.assertEqual(len(self.storage.calls), 1)
+
+        async def make_due():
+            async with self.session_factory() as db:
+                await db.execute(update(StorageDeletion).values(next_attempt_at=datetime.utcnow()))
+                await db.commit()
+
+        # 저장소 요청 자체가 실패해도 행은 남고 시도 횟수만 늘어남
+        await make_due()
+        self.storage.down = True
+        self.assertEqual(await self.drainer.drain(), 0)
+        [row] = await self.rows()
+        self.assertEqual(row.attempts, 2)
+        self.assertIn("storage unavailable", row.last_error)
+
+        # max_attempts에 닿으면 더 이상 시도하지 않고 dead로 집계
+        await make_due()
+        self.storage.down = False
+        self.assertEqual(await self.drainer.drain(), 0)
+        self.assertEqual(len(self.storage.calls), 2)
+        async with self.session_factory() as db:
+            backlog = await self.drainer.backlog(db)
+        self.assertEqual((backlog["pending"], backlog["retrying"], backlog["dead"]), (0, 0, 1))
+
+    async def test_rows_are_leased_not_locked_during_storage_call(self):
+        from models.models import StorageDeletion
+        from services.storage_outbox import StorageDeletionDrainer
+
+        await self.enqueue(["memory://media/0.jpg", "memory://media/1.jpg"])
+        other = StorageDeletionDrainer(self.session_factory, self.storage, batch_size=2)
+        seen = {}
+        delete_many = self.storage.delete_many
+
+        async def checking_delete_many(keys):
+            async with self.session_factory() as db:
+                # 행 잠금이 없으므로 NOWAIT으로도 바로 읽힘
+                result = await db.execute(
+                    select(StorageDeletion.next_attempt_at).with_for_update(nowait=True)
+                )
+                seen["leased_until"] = result.scalars().all()
+            # 다른 워커는 lease 중인 행을 고르지 않음
+            seen["other_drained"] = await other.drain()
+            return await delete_many(keys)
+
+        self.storage.delete_many = checking_delete_many
+        self.assertEqual(await self.drainer.drain(), 2)
+
+        self.assertEqual(seen["other_drained"], 0)
+        self.assertTrue(all(at > datetime.utcnow() + timedelta(seconds=200) for at in seen["leased_until"]))
+        self.assertEqual(await self.rows(), [])
+
+    async def test_rows_claimed_by_crashed_worker_are_picked_after_lease(self):
+        from models.models import StorageDeletion
+
+        await self.enqueue(["memory://media/0.jpg"])
+        # 저장소를 호출하기 전에 워커가 죽음
+        await self.drainer._claim(datetime.utcnow())
+
+        self.assertEqual(await self.drainer.drain(), 0)
+        async with self.session_factory() as db:
+            await db.execute(
+                update(StorageDeletion).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+            )
+            await db.commit()
+        self.assertEqual(await self.drainer.drain(), 1)
+        self.assertNotIn("0.jpg", self.storage.objects)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from conftest import DatabaseTestCase
+
+
+class TempReceiptTestCase(DatabaseTestCase):
+    async def asyncSetUp(self):
+        from models.models import User
+
+        await super().asyncSetUp()
+
+        async with self.session_factory() as db:
+            for i in (1, 2):
+                db.add(User(
+                    email=f"u{i}@test.com", username=f"u{i}", nickname=f"n{i}", hashed_password="x",
+                    address_name="서울", zone_no="00000", location_lat=37.5, location_lon=127.0
+                ))
+            await db.commit()
+
+    async def add_rows(self, names, user_id=1, age=timedelta(0)):
+        from models.models import TempReceipt
+
+        created_at = datetime.utcnow() - age
+        async with self.session_factory() as db:
+            result = await db.execute(
+                insert(TempReceipt).returning(TempReceipt.id, sort_by_parameter_order=True),
+                [{"name": name, "user_id": user_id, "created_at": created_at} for name in names]
+            )
+            ids = result.scalars().all()
+            await db.commit()
+        return ids
+
+    async def remaining(self):
+        from models.models import TempReceipt
+
+        async with self.session_factory() as db:
+            return (await db.execute(select(TempReceipt.name).order_by(TempReceipt.id))).scalars().all()
+
+
+class TestTempReceiptSweeper(TempReceiptTestCase):
+    async def asyncSetUp(self):
+        from services.temp_receipt_sweeper import TempReceiptSweeper
+
+        await super().asyncSetUp()
+
+        # 배치(트랜잭션)마다 세션을 하나씩 여는지 셈
+        self.sessions = 0
+
+        def counting_session_factory():
+            self.sessions += 1
+            return self.session_factory()
+
+        self.sweeper = TempReceiptSweeper(counting_session_factory, max_age=timedelta(hours=24), batch_size=2)
+
+    async def test_old_rows_are_deleted_in_batches(self):
+        await self.add_rows([f"old {n}" for n in range(5)], age=timedelta(hours=25))
+        await self.add_rows(["new"], age=timedelta(hours=1))
+
+        self.assertEqual(await self.sweeper.sweep(), 5)
+        # 2 + 2 + 1, 마지막 배치가 batch_size보다 작으면 멈춤
+        self.assertEqual(self.sessions, 3)
+        self.assertEqual(await self.remaining(), ["new"])
+        self.assertEqual((self.sweeper.runs, self.sweeper.deleted), (1, 5))
+
+    async def test_full_last_batch_stops_on_empty_batch(self):
+        await self.add_rows([f"old {n}" for n in range(4)], age=timedelta(hours=25))
+
+        self.assertEqual(await self.sweeper.sweep(), 4)
+        self.assertEqual(self.sessions, 3)
+        self.assertEqual(await self.remaining(), [])
+
+    async def test_rows_newer_than_cutoff_survive(self):
+        await self.add_rows(["legacy"], user_id=None, age=timedelta(hours=23, minutes=59))
+        await self.add_rows(["new"], age=timedelta(0))
+
+        self.assertEqual(await self.sweeper.sweep(), 0)
+        self.assertEqual(self.sessions, 1)
+        self.assertEqual(await self.remaining(), ["legacy", "new"])
+
+
+class TestConfirmItems(TempReceiptTestCase):
+    def payload(self, temp_ids):
+        return [
+            {"temp_id": temp_id, "category": "채소", "expiry_date": datetime(2030, 1, 1)}
+            for temp_id in temp_ids
+        ]
+
+    async def confirm(self, temp_ids, user_id=1):
+        from services.receipt_service import ReceiptService
+
+        async with self.session_factory() as db:
+            return await ReceiptService().confirm_items(db, self.payload(temp_ids), user_id)
+
+    async def test_own_items_are_moved_to_ingredients(self):
+        temp_ids = await self.add_rows(["우유", "양파"])
+
+        ingredients = await self.confirm(temp_ids)
+        self.assertEqual([(item["name"], item["user_id"]) for item in ingredients], [("우유", 1), ("양파", 1)])
+        self.assertEqual(await self.remaining(), [])
+
+    async def test_other_users_items_are_not_found(self):
+        [own] = await self.add_rows(["우유"])
+        [other] = await self.add_rows(["양파"], user_id=2)
+
+        with self.assertRaises(HTTPException) as raised:
+            await self.confirm([own, other])
+        self.assertEqual((raised.exception.status_code, raised.exception.detail["temp_ids"]), (404, [other]))
+        self.assertEqual(await self.remaining(), ["우유", "양파"])
+
+    async def test_legacy_items_without_owner_are_gone(self):
+        [own] = await self.add_rows(["우유"])
+        [legacy] = await self.add_rows(["양파"], user_id=None)
+
+        with self.assertRaises(HTTPException) as raised:
+            await self.confirm([own, legacy])
+        self.assertEqual((raised.exception.status_code, raised.exception.detail["temp_ids"]), (410, [legacy]))
+        self.assertIn("다시 분석", raised.exception.detail["message"])
+        self.assertEqual(await self.remaining(), ["우유", "양파"])
+
+
+class TestTempItemOwnership(TempReceiptTestCase):
+    async def test_only_owner_can_edit(self):
+        from schemas.receipts import TempReceiptUpdate
+        from services.receipt_service import ReceiptService
+
+        [temp_id] = await self.add_rows(["우유"])
+        async with self.session_factory() as db:
+            with self.assertRaises(HTTPException) as raised:
+                await ReceiptService().update_temp_receipt(db, temp_id, TempReceiptUpdate(name="양파"), 2)
+            self.assertEqual(raised.exception.status_code, 404)
+
+            updated = await ReceiptService().update_temp_receipt(db, temp_id, TempReceiptUpdate(name="두유"), 1)
+        self.assertEqual(updated["name"], "두유")
+        self.assertEqual(await self.remaining(), ["두유"])
+
+    async def test_only_owner_can_delete(self):
+        from services.receipt_service import ReceiptService
+
+        [temp_id] = await self.add_rows(["우유"])
+        async with self.session_factory() as db:
+            for user_id in (2, None):
+                with self.assertRaises(HTTPException) as raised:
+                    await ReceiptService().delete_temp_item(db, temp_id, user_id)
+                self.assertEqual(raised.exception.status_code, 404)
+            self.assertEqual(await self.remaining(), ["우유"])
+
+            await ReceiptService().delete_temp_item(db, temp_id, 1)
+        self.assertEqual(await self.remaining(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
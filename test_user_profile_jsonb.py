@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+from sqlalchemy import select
+from conftest import DatabaseTestCase
+
+
+class TestUserProfileJsonb(DatabaseTestCase):
+    async def asyncSetUp(self):
+        from models.models import User, UserProfile
+
+        await super().asyncSetUp()
+
+        async with self.session_factory() as db:
+            for i in (1, 2):
+                user = User(
+                    email=f"u{i}@test.com", username=f"u{i}", nickname=f"n{i}", hashed_password="x",
+                    address_name="서울", zone_no="00000", location_lat=37.5, location_lon=127.0
+                )
+                db.add(user)
+                await db.flush()
+                db.add(UserProfile(user_id=user.id, nutrition_limits={"max_calories": 2000}))
+            await db.commit()
+        self.user_ids = (1, 2)
+
+    async def load(self, db, user_id):
+        from crud.crud_user_profile import user_profile
+
+        return await user_profile.get_profile(db, user_id)
+
+    async def stored(self, user_id):
+        """DB에 실제로 저장된 값"""
+        from models.models import UserProfile
+
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(UserProfile.recipe_history, UserProfile.ratings).where(UserProfile.user_id == user_id)
+            )
+            return result.one()
+
+    async def test_rating_is_merged_server_side(self):
+        from crud.crud_user_profile import user_profile
+
+        async with self.session_factory() as db:
+            profile = await self.load(db, 1)
+            profile = await user_profile.update_rating(db, profile, 7, 4.5)
+            profile = await user_profile.update_rating(db, profile, 9, 3.0)
+            self.assertEqual(profile.ratings, {"7": 4.5, "9": 3.0})
+
+        self.assertEqual((await self.stored(1)).ratings, {"7": 4.5, "9": 3.0})
+
+    async def test_concurrent_ratings_do_not_overwrite_each_other(self):
+        from crud.crud_user_profile import user_profile
+
+        # 같은 프로필을 각자 불러와 다른 레시피를 평가 (읽고-고쳐-쓰기였다면 한쪽이 사라짐)
+        async def rate(recipe_id):
+            async with self.session_factory() as db:
+                profile = await self.load(db, 1)
+                await user_profile.update_rating(db, profile, recipe_id, 5.0)
+
+        await asyncio.gather(*(rate(recipe_id) for recipe_id in range(1, 6)))
+        self.assertEqual(set((await self.stored(1)).ratings), {"1", "2", "3", "4", "5"})
+
+    async def test_history_append_skips_duplicates(self):
+        from crud.crud_user_profile import user_profile
+
+        async with self.session_factory() as db:
+            profile = await self.load(db, 1)
+            for recipe_id in (3, 5, 3):
+                profile = await user_profile.update_recipe_history(db, profile, recipe_id)
+            self.assertEqual(profile.recipe_history, [3, 5])
+
+        self.assertEqual((await self.stored(1)).recipe_history, [3, 5])
+
+    async def test_q_value_is_created_then_moved_toward_reward(self):
+        from models.models import QValue, Recipe
+        from services.recommender import RecipeRecommender
+
+        recommender = RecipeRecommender()
+        async with self.session_factory() as db:
+            db.add(Recipe(name="김치찌개"))
+            await db.commit()
+            await recommender.update_q_value(db, 1, 1, 1.0)
+            await recommender.update_q_value(db, 1, 1, 0.0)
+
+            values = (await db.execute(select(QValue.value).where(QValue.user_id == 1))).scalars().all()
+        self.assertEqual([round(value, 3) for value in values], [0.09])
+
+    async def test_scoring_inputs_count_history_server_side(self):
+        from crud.crud_user_profile import user_profile
+
+        async with self.session_factory() as db:
+            profile = await self.load(db, 1)
+            for recipe_id in (3, 5):
+                await user_profile.update_recipe_history(db, profile, recipe_id)
+
+            self.assertEqual(await user_profile.get_scoring_inputs(db, 1), ({"max_calories": 2000}, 2))
+            self.assertEqual(await user_profile.get_scoring_inputs(db, 2), ({"max_calories": 2000}, 0))
+            self.assertIsNone(await user_profile.get_scoring_inputs(db, 99))
+
+    async def test_rate_by_user_returns_updated_profile(self):
+        from crud.crud_user_profile import user_profile
+
+        async with self.session_factory() as db:
+            await user_profile.rate(db, 1, 7, 4.0)
+            profile = await user_profile.rate(db, 1, 9, 2.5)
+            self.assertEqual((profile.user_id, profile.ratings), (1, {"7": 4.0, "9": 2.5}))
+            self.assertIsNone(await user_profile.rate(db, 99, 7, 4.0))
+
+        self.assertEqual((await self.stored(1)).ratings, {"7": 4.0, "9": 2.5})
+        self.assertEqual((await self.stored(2)).ratings, {})
+
+if __name__ == "__main__":
+    unittest.main()
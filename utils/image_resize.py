@@ -0,0 +1,76 @@
+"""
+업로드 이미지 파생본(썸네일/중간 크기) 생성
+
+프로세스 풀 워커에서 실행되므로 설정/DB/저장소 모듈을 불러오지 않는다.
+"""
+import io
+from typing import Dict, Iterable
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow가 없으면 파생본을 만들지 않음 (원본만 사용)
+    Image = None
+    ImageOps = None
+
+# 형식 이름 -> (Pillow 형식, content type, 확장자)
+FORMATS = {
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+}
+
+
+def warm_up() -> bool:
+    """워커 프로세스를 미리 띄울 때 실행 (Pillow import까지 끝내 둠)"""
+    return Image is not None
+
+
+def _flatten(img):
+    """투명 영역을 흰 배경으로 채워 RGB로 (JPEG는 알파 채널을 지원하지 않음)"""
+    if img.mode == "RGB":
+        return img
+    rgba = img.convert("RGBA")
+    background = Image.new("RGB", rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel("A"))
+    return background
+
+
+def render_derivatives(
+    data: bytes,
+    sizes: Dict[str, int],
+    formats: Iterable[str] = ("webp", "jpeg"),
+    quality: int = 80
+) -> Dict[str, Dict[str, bytes]]:
+    """
+    긴 변이 sizes[name] 픽셀 이하가 되도록 줄여 형식별로 인코딩
+
+    {"thumb": {"webp": b"...", "jpeg": b"..."}, "medium": {...}}
+    원본보다 크게 늘리지 않고, 큰 크기부터 줄여 작은 크기는 앞 결과를 다시 줄인다.
+    디코딩할 수 없는 파일이면 예외를 그대로 올린다.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow가 설치되어 있지 않습니다.")
+
+    with Image.open(io.BytesIO(data)) as opened:
+        largest = max(sizes.values())
+        # JPEG는 디코딩 단계에서 1/2~1/8로 줄여 읽음 (큰 휴대폰 사진의 디코딩 시간/메모리 절감)
+        opened.draft("RGB", (largest, largest))
+        # 휴대폰 사진의 회전 정보(EXIF) 반영, GIF 등은 첫 프레임만 사용
+        source = ImageOps.exif_transpose(opened)
+        source = source.convert("RGBA") if source.mode in ("P", "LA", "PA", "RGBA") else source.convert("RGB")
+
+    results: Dict[str, Dict[str, bytes]] = {}
+    current = source
+    for name, size in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+        current = current.copy()
+        current.thumbnail((size, size), Image.LANCZOS)
+        encoded = {}
+        for fmt in formats:
+            pil_format = FORMATS[fmt][0]
+            out = io.BytesIO()
+            if pil_format == "JPEG":
+                _flatten(current).save(out, pil_format, quality=quality, optimize=True, progressive=True)
+            else:
+                current.save(out, pil_format, quality=quality, method=4)
+            encoded[fmt] = out.getvalue()
+        results[name] = encoded
+    return results
@@ -0,0 +1,215 @@
+"""
+레시피 재료 문자열(식품안전나라 COOKRCP01 RCP_PARTS_DTLS) 규칙 기반 파서
+
+IngredientParser의 LLM 프롬프트와 같은 규칙으로 재료명:수량을 만든다.
+- 괄호 안 수량이 있으면 괄호 안 숫자를 사용 ("연두부 75g(3/4모)" -> 0.75)
+- 분수는 실수로 ("1/2" -> 0.5, "1과1/2" -> 1.5)
+- 묶음은 풀어서 최상위에 나열 ("멸치육수(물 1.5컵, 멸치 3마리)" -> 물, 멸치)
+- 분량이 없는 재료("소금 약간")와 제목/구분 줄은 제외
+
+범위("2~3개")나 해석이 애매한 항목이 있는 줄은 unresolved로 돌려주고,
+호출 측(IngredientParser)이 그 줄만 LLM으로 보낸다.
+"""
+import re
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, Optional, Tuple
+
+UNICODE_FRACTIONS = {"½": 0.5, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 0.25, "¾": 0.75, "⅕": 0.2}
+
+# 숫자 뒤에 오는 단위 (긴 것부터 매칭)
+UNITS = sorted([
+    "g", "kg", "mg", "ml", "mL", "l", "L", "cc", "cm",
+    "컵", "큰술", "작은술", "스푼", "숟가락", "티스푼", "T", "t", "Ts", "ts", "꼬집",
+    "개", "마리", "줄기", "줄", "모", "장", "쪽", "알", "톨", "뿌리", "대", "줌", "송이", "봉", "봉지",
+    "팩", "캔", "병", "토막", "조각", "단", "포기", "공기", "인분", "잎", "통", "판", "묶음", "컵분",
+], key=len, reverse=True)
+
+NUMBER = r"(?:\d+(?:\.\d+)?\s*과\s*\d+/\d+|\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?[½⅓⅔¼¾⅕]?|[½⅓⅔¼¾⅕])"
+UNIT = "|".join(re.escape(unit) for unit in UNITS)
+
+# "1/2개", "75g", "1.5컵 정도"
+AMOUNT_RE = re.compile(rf"^(?P<qty>{NUMBER})\s*(?P<unit>{UNIT})?\s*(?:정도|분량|내외)?$")
+# "연두부 75g", "다진 마늘 1큰술"
+NAME_AMOUNT_RE = re.compile(rf"^(?P<name>.*?)\s*(?P<amount>{NUMBER}\s*(?:{UNIT})?\s*(?:정도|분량|내외)?)$")
+RANGE_RE = re.compile(r"\d\s*[~∼\-]\s*\d")
+# 줄 앞의 구분 표시 ("●주재료 :", "[양념장]", "재료 ")
+HEADING_RE = re.compile(r"^\s*(?:[●○■□◆◇▶•·※\-]\s*)*(?:\[[^\]]*\]\s*)*(?:[^\s:()\[\]]{1,10}\s*:\s*)?(?:재료\s+)?")
+VAGUE_AMOUNTS = ("약간", "적당량", "조금", "적량", "취향껏", "기호에 맞게", "소량")
+NAME_RE = re.compile(r"^[가-힣A-Za-z][가-힣A-Za-z\s]*$")
+
+
+def _round(value: float) -> float:
+    # 1/8 -> 0.13 (round()는 0.12가 됨)
+    return float(Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
+class Unresolved(Exception):
+    """규칙으로 확신할 수 없는 항목 (그 줄은 LLM으로 보냄)"""
+
+
+def parse_quantity(text: str) -> Optional[float]:
+    """수량 문자열을 실수로 ("3/4" -> 0.75, "1과1/2" -> 1.5, "½" -> 0.5)"""
+    text = text.strip()
+    if not text:
+        return None
+    if text in UNICODE_FRACTIONS:
+        return _round(UNICODE_FRACTIONS[text])
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(?:과\s*|\s+)(\d+)/(\d+)", text)
+    if match:
+        whole, numerator, denominator = match.groups()
+        if int(denominator) == 0:
+            return None
+        return _round(float(whole) + int(numerator) / int(denominator))
+    match = re.fullmatch(r"(\d+)/(\d+)", text)
+    if match:
+        numerator, denominator = match.groups()
+        if int(denominator) == 0:
+            return None
+        return _round(int(numerator) / int(denominator))
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([½⅓⅔¼¾⅕])?", text)
+    if match:
+        value = float(match.group(1)) + UNICODE_FRACTIONS.get(match.group(2) or "", 0)
+        return _round(value)
+    return None
+
+
+def _amount(text: str) -> Optional[float]:
+    match = AMOUNT_RE.match(text.strip())
+    return parse_quantity(match.group("qty")) if match else None
+
+
+def split_top_level(text: str) -> List[str]:
+    """괄호 밖의 쉼표로 항목 분리"""
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth = max(depth - 1, 0)
+        if char in ",，" and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _split_paren(entry: str) -> Tuple[str, Optional[str], str]:
+    """첫 괄호 기준으로 (앞, 괄호 안, 뒤) 분리 (괄호가 없으면 괄호 안은 None)"""
+    start = entry.find("(")
+    if start < 0:
+        return entry, None, ""
+    depth = 0
+    for index in range(start, len(entry)):
+        if entry[index] == "(":
+            depth += 1
+        elif entry[index] == ")":
+            depth -= 1
+            if depth == 0:
+                return entry[:start], entry[start + 1:index], entry[index + 1:]
+    raise Unresolved(entry)
+
+
+def _name(text: str) -> str:
+    name = " ".join(text.split())
+    if not NAME_RE.match(name) or len(name) > 20:
+        raise Unresolved(text)
+    return name
+
+
+def _is_vague(text: str) -> bool:
+    return any(word in text for word in VAGUE_AMOUNTS)
+
+
+def parse_entry(entry: str) -> Dict[str, float]:
+    """쉼표로 나뉜 항목 하나를 재료명:수량으로 (분량이 없으면 빈 dict)"""
+    entry = entry.strip().strip(".")
+    if not entry:
+        return {}
+    if RANGE_RE.search(entry):
+        raise Unresolved(entry)
+
+    head, inner, tail = _split_paren(entry)
+    head, tail = head.strip(), tail.strip()
+
+    if inner is not None:
+        inner = inner.strip()
+        if "(" in tail:
+            raise Unresolved(entry)
+        # 묶음: "멸치육수(물 1.5컵, 멸치 3마리)"
+        if len(split_top_level(inner)) > 1:
+            if tail:
+                raise Unresolved(entry)
+            result: Dict[str, float] = {}
+            for child in split_top_level(inner):
+                result.update(parse_entry(child))
+            return result
+
+        head_match = NAME_AMOUNT_RE.match(head)
+        name_text = head_match.group("name") if head_match else head
+        inner_amount = _amount(inner)
+        if inner_amount is not None:
+            # 괄호 안 수량을 우선 사용: "연두부 75g(3/4모)", "돼지고기(200g)"
+            if tail:
+                raise Unresolved(entry)
+            return {_name(name_text): inner_amount}
+        if re.search(r"\d", inner):
+            # "돼지고기(목살 200g)"처럼 괄호 안이 재료 하나인 경우는 규칙으로 정하지 않음
+            raise Unresolved(entry)
+
+        # 설명 괄호는 무시: "두부(부침용) 1/2모", "양파 1개(중간 크기)", "소금(약간)"
+        if head_match:
+            if tail:
+                raise Unresolved(entry)
+            return {_name(name_text): parse_quantity(AMOUNT_RE.match(head_match.group("amount")).group("qty"))}
+        if tail:
+            tail_amount = _amount(tail)
+            if tail_amount is not None:
+                return {_name(head): tail_amount}
+            if _is_vague(tail):
+                _name(head)
+                return {}
+            raise Unresolved(entry)
+        _name(head)
+        return {}
+
+    match = NAME_AMOUNT_RE.match(entry)
+    if match and match.group("name").strip():
+        qty = AMOUNT_RE.match(match.group("amount")).group("qty")
+        return {_name(match.group("name")): parse_quantity(qty)}
+    if re.search(r"\d", entry):
+        raise Unresolved(entry)
+    # 분량이 없는 재료("소금 약간", "참기름")는 제외
+    if _is_vague(entry):
+        entry = entry.split()[0] if entry.split() else entry
+    _name(entry)
+    return {}
+
+
+def parse_line(line: str) -> Dict[str, float]:
+    """한 줄을 재료명:수량으로 (확신할 수 없으면 Unresolved)"""
+    line = HEADING_RE.sub("", line.strip(), count=1)
+    result: Dict[str, float] = {}
+    for entry in split_top_level(line):
+        result.update(parse_entry(entry))
+    return result
+
+
+def parse_ingredient_text(text: str) -> Tuple[Dict[str, float], List[str]]:
+    """
+    재료 문자열 전체를 (파싱 결과, LLM으로 보낼 줄 목록)으로
+
+    줄 안에 애매한 항목이 하나라도 있으면 그 줄 전체를 unresolved로 돌려준다
+    (쉼표로 이어진 묶음이 줄 단위로 끊기지 않도록).
+    """
+    parsed: Dict[str, float] = {}
+    unresolved: List[str] = []
+    for line in text.split("\n"):
+        if not line.strip():
+            continue
+        try:
+            parsed.update(parse_line(line))
+        except Unresolved:
+            unresolved.append(line.strip())
+    return parsed, unresolved
@@ -0,0 +1,67 @@
+import bisect
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Optional, Sequence
+
+
+class LatencyTracker:
+    """
+    최근 측정값(window개)으로 지연 시간 백분위를 계산하는 간단한 집계기
+
+    buckets(초 단위 상한 목록)를 주면 전체 측정값의 구간별 개수도 센다 (상한을 넘는 값은 "+Inf").
+    """
+
+    def __init__(self, window: int = 1024, buckets: Optional[Sequence[float]] = None):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = sorted(buckets) if buckets else None
+        self._bucket_counts = [0] * (len(self.buckets) + 1) if self.buckets else None
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if self.buckets:
+            self._bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def histogram(self) -> Dict[str, int]:
+        """구간 상한(밀리초) -> 그 구간에 든 측정값 수"""
+        if not self.buckets:
+            return {}
+        labels = [f"le_{round(bound * 1000, 3):g}ms" for bound in self.buckets] + ["+Inf"]
+        return dict(zip(labels, self._bucket_counts))
+
+    def percentile(self, q: float) -> float:
+        """최근 측정값 기준 q 백분위 (초 단위, 0 <= q <= 100)"""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, float]:
+        """밀리초 단위 요약 통계"""
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            **({"histogram": self.histogram()} if self.buckets else {})
+        }
+
+
+@contextmanager
+def timed(timings: Dict[str, float], name: str):
+    """블록 실행 시간을 timings[name]에 밀리초로 기록"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round((time.perf_counter() - started) * 1000, 3)
@@ -0,0 +1,132 @@
+"""
+Clova OCR(V2) 응답 형식을 흉내 내는 로컬 스텁 서버
+
+테스트와 로컬 개발에서 실제 OCR API 대신 사용한다.
+
+    python -m utils.ocr_stub_server --port 9000 --delay 0.5 --fail-first 1
+    # .env: CLOVA_OCR_API_URL=http://localhost:9000/ocr
+
+테스트에서는 create_stub_app()을 httpx.ASGITransport로 바로 연결할 수 있다.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import List, Optional
+from fastapi import FastAPI, File, Form, Header, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse
+
+DEFAULT_LINES = [
+    "이마트 영수증",
+    "양파 1 2,500",
+    "우유 1L 1 2,980",
+    "계란 30구 1 7,900",
+    "합계 13,380",
+]
+
+
+class StubState:
+    """스텁 서버 동작 설정과 받은 요청 기록"""
+
+    def __init__(
+        self,
+        lines: Optional[List[str]] = None,
+        delay: float = 0.0,
+        fail_first: int = 0,
+        fail_status: int = 503
+    ):
+        self.lines = lines or DEFAULT_LINES
+        self.delay = delay
+        # 처음 fail_first개 요청은 fail_status로 실패 (재시도 확인용)
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.formats: List[str] = []
+        self.sizes: List[int] = []
+        # 요청을 보낸 클라이언트 주소 (연결 재사용 확인용)
+        self.peers: List[str] = []
+
+
+def build_fields(lines: List[str]) -> list:
+    fields = []
+    for line in lines:
+        words = line.split()
+        for i, word in enumerate(words):
+            fields.append({
+                "valueType": "ALL",
+                "inferText": word,
+                "inferConfidence": 0.99,
+                "type": "NORMAL",
+                "lineBreak": i == len(words) - 1
+            })
+    return fields
+
+
+def create_stub_app(state: Optional[StubState] = None) -> FastAPI:
+    app = FastAPI(title="Clova OCR stub")
+    app.state.stub = state or StubState()
+
+    @app.post("/ocr")
+    async def ocr(
+        request: Request,
+        message: str = Form(...),
+        file: UploadFile = File(...),
+        x_ocr_secret: Optional[str] = Header(None)
+    ):
+        stub: StubState = app.state.stub
+        if not x_ocr_secret:
+            raise HTTPException(status_code=401, detail="X-OCR-SECRET header is required")
+
+        stub.requests += 1
+        if request.client:
+            stub.peers.append(f"{request.client.host}:{request.client.port}")
+        stub.in_flight += 1
+        stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+        try:
+            ocr_request = json.loads(message)
+            image = ocr_request["images"][0]
+            stub.formats.append(image["format"])
+            stub.sizes.append(len(await file.read()))
+
+            if stub.delay:
+                await asyncio.sleep(stub.delay)
+            if stub.requests <= stub.fail_first:
+                return JSONResponse(status_code=stub.fail_status, content={"code": "STUB", "message": "stub failure"})
+
+            return {
+                "version": "V2",
+                "requestId": ocr_request.get("requestId", str(uuid.uuid4())),
+                "timestamp": int(time.time() * 1000),
+                "images": [{
+                    "uid": uuid.uuid4().hex,
+                    "name": image.get("name", "receipt"),
+                    "inferResult": "SUCCESS",
+                    "message": "SUCCESS",
+                    "fields": build_fields(stub.lines)
+                }]
+            }
+        finally:
+            stub.in_flight -= 1
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clova OCR stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--delay", type=float, default=0.0, help="응답 지연(초)")
+    parser.add_argument("--fail-first", type=int, default=0, help="처음 N개 요청을 실패 처리")
+    parser.add_argument("--fail-status", type=int, default=503)
+    args = parser.parse_args()
+
+    import uvicorn
+    state = StubState(delay=args.delay, fail_first=args.fail_first, fail_status=args.fail_status)
+    uvicorn.run(create_stub_app(state), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+S3 API 일부(PutObject, 멀티파트 업로드, GetObject, DeleteObject, DeleteObjects)를 흉내 내는 로컬 스텁 서버
+
+벤치마크와 로컬 개발에서 실제 S3 대신 사용한다 (경로 방식 주소만 지원).
+
+    python -m utils.s3_stub_server --port 9100 --delay 0.05
+    # .env: AWS_S3_ENDPOINT_URL=http://localhost:9100
+"""
+import argparse
+import asyncio
+import hashlib
+import re
+import uuid
+from typing import Dict, List, Optional
+from fastapi import FastAPI, Request, Response
+
+XML_NS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+class StubState:
+    """스텁 서버 동작 설정과 저장된 객체/요청 기록"""
+
+    def __init__(self, delay: float = 0.0, fail_first: int = 0, fail_status: int = 403):
+        # 요청마다 delay초 지연 (네트워크 왕복 시간 흉내)
+        self.delay = delay
+        # 처음 fail_first개 쓰기 요청은 fail_status로 실패 (실패 보고 확인용, 403은 boto3가 재시도하지 않음)
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.objects: Dict[str, bytes] = {}
+        self.content_types: Dict[str, str] = {}
+        self.uploads: Dict[str, Dict[int, bytes]] = {}
+        self.requests: List[str] = []
+        self.writes = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+def _xml(body: str, status_code: int = 200) -> Response:
+    return Response(
+        content=f'<?xml version="1.0" encoding="UTF-8"?>\n{body}',
+        media_type="application/xml",
+        status_code=status_code
+    )
+
+
+def _error(code: str, status_code: int) -> Response:
+    return _xml(f"<Error><Code>{code}</Code><Message>stub {code}</Message></Error>", status_code)
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+def create_stub_app(state: Optional[StubState] = None) -> FastAPI:
+    app = FastAPI(title="S3 stub")
+    app.state.stub = state or StubState()
+
+    @app.middleware("http")
+    async def record(request: Request, call_next):
+        stub: StubState = app.state.stub
+        stub.requests.append(f"{request.method} {request.url.path}?{request.url.query}")
+        stub.in_flight += 1
+        stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+        try:
+            if stub.delay:
+                await asyncio.sleep(stub.delay)
+            if request.method in ("PUT", "POST", "DELETE"):
+                stub.writes += 1
+                if stub.writes <= stub.fail_first:
+                    # 본문을 읽지 않고 응답하면 keep-alive 연결에 남은 본문이 다음 요청을 깨뜨림
+                    await request.body()
+                    return _error("AccessDenied", stub.fail_status)
+            return await call_next(request)
+        finally:
+            stub.in_flight -= 1
+
+    @app.post("/{bucket}")
+    async def delete_objects(bucket: str, request: Request):
+        stub: StubState = app.state.stub
+        if "delete" not in request.query_params:
+            return _error("NotImplemented", 501)
+        body = (await request.body()).decode("utf-8")
+        keys = re.findall(r"<Key>(.*?)</Key>", body)
+        deleted = []
+        for key in keys:
+            stub.objects.pop(f"{bucket}/{key}", None)
+            deleted.append(f"<Deleted><Key>{key}</Key></Deleted>")
+        quiet = "<Quiet>true</Quiet>" in body
+        return _xml(f'<DeleteResult xmlns="{XML_NS}">{"" if quiet else "".join(deleted)}</DeleteResult>')
+
+    @app.put("/{bucket}/{key:path}")
+    async def put_object(bucket: str, key: str, request: Request):
+        stub: StubState = app.state.stub
+        data = await request.body()
+        upload_id = request.query_params.get("uploadId")
+        if upload_id is not None:
+            parts = stub.uploads.get(upload_id)
+            if parts is None:
+                return _error("NoSuchUpload", 404)
+            parts[int(request.query_params["partNumber"])] = data
+        else:
+            stub.objects[f"{bucket}/{key}"] = data
+            stub.content_types[f"{bucket}/{key}"] = request.headers.get("content-type", "binary/octet-stream")
+        return Response(status_code=200, headers={"ETag": _etag(data)})
+
+    @app.post("/{bucket}/{key:path}")
+    async def multipart(bucket: str, key: str, request: Request):
+        stub: StubState = app.state.stub
+        if "uploads" in request.query_params:
+            upload_id = uuid.uuid4().hex
+            stub.uploads[upload_id] = {}
+            stub.content_types[f"{bucket}/{key}"] = request.headers.get("content-type", "binary/octet-stream")
+            return _xml(
+                f'<InitiateMultipartUploadResult xmlns="{XML_NS}"><Bucket>{bucket}</Bucket>'
+                f"<Key>{key}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+            )
+        upload_id = request.query_params.get("uploadId")
+        parts = stub.uploads.pop(upload_id, None) if upload_id else None
+        if parts is None:
+            return _error("NoSuchUpload", 404)
+        data = b"".join(parts[number] for number in sorted(parts))
+        stub.objects[f"{bucket}/{key}"] = data
+        return _xml(
+            f'<CompleteMultipartUploadResult xmlns="{XML_NS}"><Bucket>{bucket}</Bucket>'
+            f"<Key>{key}</Key><ETag>{_etag(data)}</ETag></CompleteMultipartUploadResult>"
+        )
+
+    @app.get("/{bucket}/{key:path}")
+    async def get_object(bucket: str, key: str):
+        stub: StubState = app.state.stub
+        data = stub.objects.get(f"{bucket}/{key}")
+        if data is None:
+            return _error("NoSuchKey", 404)
+        return Response(content=data, media_type=stub.content_types.get(f"{bucket}/{key}"), headers={"ETag": _etag(data)})
+
+    @app.delete("/{bucket}/{key:path}")
+    async def delete_object(bucket: str, key: str, request: Request):
+        stub: StubState = app.state.stub
+        upload_id = request.query_params.get("uploadId")
+        if upload_id is not None:
+            stub.uploads.pop(upload_id, None)
+        else:
+            stub.objects.pop(f"{bucket}/{key}", None)
+        return Response(status_code=204)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="S3 stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--delay", type=float, default=0.0, help="요청별 지연(초)")
+    parser.add_argument("--fail-first", type=int, default=0, help="처음 N개 쓰기 요청을 실패 처리")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_stub_app(StubState(delay=args.delay, fail_first=args.fail_first)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()